@@ -0,0 +1,98 @@
+"""Quiet-client latency while a noisy client floods the server, with and without admission control.
+
+    python benchmarks/bench_admission.py --noisy 64 --quiet-requests 200 --service-ms 20
+
+A handler that serves `--capacity` requests at a time (like a model server)
+sits behind the admission middleware. The noisy client keeps `--noisy`
+requests in flight; the quiet client sends one request at a time. Without
+admission the quiet client queues behind the flood; with a per-client
+concurrency cap the noisy client gets 429s and the quiet client keeps its
+latency.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from whisk.admission import AdmissionMiddleware
+from whisk.config import AdmissionConfig, RateLimitConfig
+
+
+def make_app(capacity: int, service: float):
+    semaphore = asyncio.Semaphore(capacity)
+
+    async def app(scope, receive, send):
+        await receive()
+        async with semaphore:
+            await asyncio.sleep(service)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def run(args, admission: bool) -> dict:
+    app = make_app(args.capacity, args.service_ms / 1000)
+    if admission:
+        config = AdmissionConfig(
+            enabled=True,
+            client=RateLimitConfig(max_concurrency=args.client_concurrency),
+            handler=RateLimitConfig(max_concurrency=args.capacity * 2),
+            latency_slo_ms=args.slo_ms
+        )
+        app = AdmissionMiddleware(app, config)
+    transport = httpx.ASGITransport(app=app)
+    stop = asyncio.Event()
+    rejected = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def noisy():
+            nonlocal rejected
+            while not stop.is_set():
+                response = await client.get("/work", headers={"x-api-key": "noisy"})
+                if response.status_code != 200:
+                    rejected += 1
+                    await asyncio.sleep(0.001)
+
+        flood = [asyncio.create_task(noisy()) for _ in range(args.noisy)]
+        await asyncio.sleep(args.service_ms / 1000 * 2)
+        latencies = []
+        for _ in range(args.quiet_requests):
+            started = time.perf_counter()
+            response = await client.get("/work", headers={"x-api-key": "quiet"})
+            if response.status_code == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+        stop.set()
+        await asyncio.gather(*flood)
+
+    return {
+        "admission": admission,
+        "quiet_ok": len(latencies),
+        "quiet_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "quiet_p99_ms": round(percentile(latencies, 0.99), 2),
+        "noisy_rejected": rejected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--noisy", type=int, default=64, help="Requests the noisy client keeps in flight")
+    parser.add_argument("--quiet-requests", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=8, help="Requests the handler serves at once")
+    parser.add_argument("--service-ms", type=float, default=20)
+    parser.add_argument("--client-concurrency", type=int, default=8)
+    parser.add_argument("--slo-ms", type=float, default=200)
+    args = parser.parse_args()
+    for admission in (False, True):
+        print(json.dumps(asyncio.run(run(args, admission))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark ANN indexes against exact search: recall@k and p50/p99 latency.
+
+    python benchmarks/bench_ann.py --size 200000 --dim 384 --nprobe 4 8 16 32
+
+Vectors are drawn around random cluster centers so IVF partitions are
+meaningful. HNSW is included when hnswlib is installed.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from whisk.kitchenai_sdk.ann import IVFFlatIndex
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
+
+
+def clustered(rng, n: int, dim: int, centers: int) -> np.ndarray:
+    means = rng.standard_normal((centers, dim)) * 3
+    return (means[rng.integers(0, centers, n)] + rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def measure(search, queries: np.ndarray, truth, top_k: int) -> dict:
+    latencies = []
+    found = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        hits = search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found += len({hit.node.id for hit in hits} & expected)
+    return {
+        f"recall@{top_k}": round(found / (len(queries) * top_k), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered(rng, args.size, args.dim, centers=max(10, args.size // 1000))
+    queries = clustered(rng, args.queries, args.dim, centers=10)
+    ids = [str(i) for i in range(args.size)]
+
+    exact = NumpyVectorStore(dim=args.dim)
+    exact.add(ids, vectors)
+    exact.flush()
+    truth = [{hit.node.id for hit in hits} for hits in (exact.query(query, top_k=args.top_k) for query in queries)]
+    print(json.dumps({"index": "exact", **measure(lambda q: exact.query(q, top_k=args.top_k), queries, truth, args.top_k)}))
+
+    started = time.perf_counter()
+    ivf = IVFFlatIndex(dim=args.dim, nlist=args.nlist, min_train_size=args.size)
+    ivf.add(ids, vectors)
+    build = round(time.perf_counter() - started, 3)
+    for nprobe in args.nprobe:
+        result = measure(lambda q: ivf.query(q, top_k=args.top_k, nprobe=nprobe), queries, truth, args.top_k)
+        print(json.dumps({"index": "ivf", "nlist": ivf.nlist, "nprobe": nprobe, "build_seconds": build, **result}))
+
+    try:
+        from whisk.kitchenai_sdk.ann import HNSWIndex
+        started = time.perf_counter()
+        hnsw = HNSWIndex(dim=args.dim, max_elements=args.size)
+        hnsw.add(ids, vectors)
+    except ImportError:
+        return
+    build = round(time.perf_counter() - started, 3)
+    for ef in args.ef:
+        result = measure(lambda q: hnsw.query(q, top_k=args.top_k, ef=ef), queries, truth, args.top_k)
+        print(json.dumps({"index": "hnsw", "ef": ef, "build_seconds": build, **result}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measure event-loop lag under concurrent RAG load, blocking vs AsyncRetriever.
+
+    python benchmarks/bench_event_loop_lag.py --size 200000 --dim 384 --concurrency 32
+
+Each simulated RAG request runs an exact vector search (NumPy releases the
+GIL during the matrix product) followed by a short awaited "LLM" call. A
+ticker task sleeps 1 ms in a loop and records how late it wakes up; that
+overshoot is the lag every other request on the loop would see.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from whisk.kitchenai_sdk.retrieval import AsyncRetriever
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
+
+
+class VectorRetriever:
+    def __init__(self, store: NumpyVectorStore, top_k: int):
+        self.store = store
+        self.top_k = top_k
+
+    def retrieve(self, query):
+        return self.store.query(query, top_k=self.top_k)
+
+
+async def run(retriever, queries: np.ndarray, concurrency: int, use_async: bool, llm_latency: float) -> dict:
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - started - 0.001) * 1000)
+
+    async def request(query):
+        nodes = await retriever.aretrieve(query) if use_async else retriever.retrieve(query)
+        await asyncio.sleep(llm_latency)
+        return nodes
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(query):
+        async with semaphore:
+            return await request(query)
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(query) for query in queries))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticking
+
+    return {
+        "mode": "async" if use_async else "blocking",
+        "requests_per_second": round(len(queries) / elapsed, 1),
+        "lag_p50_ms": round(float(np.percentile(lags, 50)), 3),
+        "lag_p99_ms": round(float(np.percentile(lags, 99)), 3),
+        "lag_max_ms": round(float(np.max(lags)), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    store = NumpyVectorStore(dim=args.dim)
+    store.add([str(i) for i in range(args.size)], rng.standard_normal((args.size, args.dim), dtype=np.float32))
+    store.flush()
+    queries = rng.standard_normal((args.requests, args.dim), dtype=np.float32)
+    retriever = AsyncRetriever(VectorRetriever(store, top_k=4))
+
+    for use_async in (False, True):
+        print(json.dumps(asyncio.run(run(retriever, queries, args.concurrency, use_async, args.llm_latency))))
+
+
+if __name__ == "__main__":
+    main()
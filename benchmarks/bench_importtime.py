@@ -0,0 +1,65 @@
+"""Cold-start import time for the CLI and SDK entry points.
+
+    python benchmarks/bench_importtime.py --runs 5 --top 10
+    python benchmarks/bench_importtime.py --max-ms 400   # fail if `whisk --help` is slower
+
+Each measurement runs in a fresh interpreter. `-X importtime` output gives
+the cumulative cost of the heaviest imports so regressions (an eager FastAPI
+or cookiecutter import in the CLI, say) are easy to spot.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ["whisk.cli", "whisk.kitchenai_sdk.kitchenai", "whisk.router", "whisk.client"]
+
+
+def import_profile(module: str, top: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    total = next((cumulative for cumulative, name in rows if name == module), 0)
+    heaviest = sorted(((cumulative, name) for cumulative, name in rows if name != module), reverse=True)[:top]
+    return {
+        "module": module,
+        "import_ms": round(total / 1000, 1),
+        "heaviest": [{"module": name, "ms": round(cumulative / 1000, 1)} for cumulative, name in heaviest],
+    }
+
+
+def cli_startup_ms(runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "whisk", "--help"], capture_output=True, check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Exit non-zero if `whisk --help` median exceeds this")
+    args = parser.parse_args()
+
+    for module in MODULES:
+        print(json.dumps(import_profile(module, args.top)))
+    startup = cli_startup_ms(args.runs)
+    print(json.dumps({"command": "whisk --help", "median_ms": startup, "runs": args.runs}))
+    if args.max_ms is not None and startup > args.max_ms:
+        sys.exit(f"whisk --help took {startup}ms (limit {args.max_ms}ms)")
+
+
+if __name__ == "__main__":
+    main()
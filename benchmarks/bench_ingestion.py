@@ -0,0 +1,94 @@
+"""Ingestion throughput in pages/sec: parse -> chunk -> embed -> upsert.
+
+    python benchmarks/bench_ingestion.py --files 200 --pages 20 --workers 0 2 4
+    python benchmarks/bench_ingestion.py --corpus ./data/10k --workers 4
+
+Without `--corpus` a sample corpus of text files (form feeds between pages)
+is generated in a temp directory. Embedding is a deterministic hash
+projection with a configurable per-batch latency standing in for an
+embedding API, and chunks are upserted into a NumpyVectorStore.
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from whisk.kitchenai_sdk.ingestion import IngestionPipeline, IngestSource, vector_store_upsert
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
+
+WORDS = "revenue growth ride share driver rider margin quarter market cost network city".split()
+
+
+def generate_corpus(directory: Path, files: int, pages: int, words_per_page: int):
+    rng = random.Random(0)
+    for index in range(files):
+        text = "\f".join(
+            " ".join(rng.choice(WORDS) for _ in range(words_per_page))
+            for _ in range(pages)
+        )
+        (directory / f"doc-{index:05d}.txt").write_text(text)
+
+
+def make_embedder(dim: int, latency: float):
+    projection = np.random.default_rng(0).standard_normal((256, dim)).astype(np.float32)
+
+    async def embed(texts):
+        await asyncio.sleep(latency)
+        counts = np.zeros((len(texts), 256), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.split():
+                counts[row, hash(token) % 256] += 1
+        return counts @ projection
+    return embed
+
+
+async def run(corpus: Path, workers: int, args) -> dict:
+    store = NumpyVectorStore(dim=args.dim)
+    pipeline = IngestionPipeline(
+        embed=make_embedder(args.dim, args.embed_latency),
+        upsert=vector_store_upsert(store),
+        parse_workers=workers,
+        embed_batch_size=args.batch_size,
+    )
+    sources = (IngestSource(filename=path.name, path=str(path)) for path in sorted(corpus.iterdir()) if path.is_file())
+    try:
+        result = await pipeline.run(sources)
+    finally:
+        pipeline.close()
+    return {
+        "parse_workers": workers,
+        "sources": result.sources,
+        "pages": result.pages,
+        "chunks": result.chunks,
+        "seconds": result.seconds,
+        "pages_per_second": round(result.pages / result.seconds, 1) if result.seconds else None,
+        "errors": len(result.errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=str, default=None)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="whisk-corpus-") as tmp:
+        corpus = Path(args.corpus) if args.corpus else Path(tmp)
+        if not args.corpus:
+            generate_corpus(corpus, args.files, args.pages, args.words_per_page)
+        for workers in args.workers:
+            print(json.dumps(asyncio.run(run(corpus, workers, args))))
+
+
+if __name__ == "__main__":
+    main()
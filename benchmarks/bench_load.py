@@ -0,0 +1,43 @@
+"""Throughput, p50/p95/p99 latency and time to first token over HTTP and NATS.
+
+    python benchmarks/bench_load.py --scenario chat chat-stream files --concurrency 1 16 64
+    python benchmarks/bench_load.py --scenario query storage --nats-url nats://localhost:4222
+
+Synthetic handlers (fixed latency, CPU-bound, token streaming) run behind a
+local WhiskRouter and an in-process WhiskClient worker; the NATS scenarios
+need a running nats-server. Same harness as `whisk bench`.
+"""
+import argparse
+import asyncio
+import json
+
+from whisk.bench import SCENARIOS, run_bench
+
+
+async def run(args):
+    async for result in run_bench(
+        args.scenario, args.concurrency, args.requests,
+        url=args.url, nats_url=args.nats_url, warmup=args.warmup,
+        latency_ms=args.latency_ms, cpu_ms=args.cpu_ms,
+        tokens=args.tokens, token_interval_ms=args.token_interval_ms,
+    ):
+        print(json.dumps(result.model_dump(exclude_none=True)), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", default=["chat", "chat-cpu", "chat-stream", "files"], choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--url", help="Benchmark a running server instead of a local one")
+    parser.add_argument("--nats-url", default="nats://localhost:4222")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--cpu-ms", type=float, default=5)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--token-interval-ms", type=float, default=2)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Interactive latency during a bulk ingest, FIFO vs the priority scheduler.
+
+    python benchmarks/bench_priority.py --ingest 2000 --queries 200 --capacity 8
+
+`pool` runs: both kinds of work share a dependency (e.g. an embedding model)
+that serves `--capacity` calls at once. With a plain FIFO semaphore a query
+waits behind every queued ingest call; with a `PriorityScheduler` pool the
+interactive class is granted contended slots by weight.
+
+`tasks` runs: `--jobs` storage handlers of `--job-ms` each and chat handlers
+go through `scheduler.wrap()`, as the routes and the NATS worker dispatch
+them, on a task pool of `--capacity` slots. FIFO queries wait for whole
+ingest jobs to finish; the scheduler keeps slots reserved for them.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from whisk.kitchenai_sdk.scheduler import PriorityScheduler, TaskClass
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def measure(args, call, ingest_calls: int) -> dict:
+    started = time.perf_counter()
+    ingest = [asyncio.create_task(call(TaskClass.BATCH)) for _ in range(ingest_calls)]
+    await asyncio.sleep(args.service_ms / 1000)
+
+    latencies = []
+    for _ in range(args.queries):
+        begin = time.perf_counter()
+        await call(TaskClass.INTERACTIVE)
+        latencies.append((time.perf_counter() - begin) * 1000)
+        await asyncio.sleep(args.think_ms / 1000)
+    await asyncio.gather(*ingest)
+
+    return {
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p99_ms": round(percentile(latencies, 0.99), 2),
+        "ingest_seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+async def run_pool(args, prioritized: bool) -> dict:
+    scheduler = PriorityScheduler()
+    scheduler.add_pool("embed", args.capacity)
+    semaphore = asyncio.Semaphore(args.capacity)
+    service = args.service_ms / 1000
+
+    async def call(task_class: TaskClass):
+        if prioritized:
+            async with scheduler.pool("embed", task_class):
+                await asyncio.sleep(service)
+        else:
+            async with semaphore:
+                await asyncio.sleep(service)
+
+    return {"path": "pool", "scheduler": prioritized, **await measure(args, call, args.ingest)}
+
+
+async def run_tasks(args, prioritized: bool) -> dict:
+    scheduler = PriorityScheduler(concurrency=args.capacity)
+    semaphore = asyncio.Semaphore(args.capacity)
+
+    async def storage(request):
+        await asyncio.sleep(args.job_ms / 1000)
+
+    async def chat(request):
+        await asyncio.sleep(args.service_ms / 1000)
+
+    handlers = {
+        TaskClass.BATCH: scheduler.wrap("storage", "upload", storage),
+        TaskClass.INTERACTIVE: scheduler.wrap("chat", "rag", chat),
+    }
+    plain = {TaskClass.BATCH: storage, TaskClass.INTERACTIVE: chat}
+
+    async def call(task_class: TaskClass):
+        if prioritized:
+            await handlers[task_class](None)
+        else:
+            async with semaphore:
+                await plain[task_class](None)
+
+    return {"path": "tasks", "scheduler": prioritized, **await measure(args, call, args.jobs)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", choices=["pool", "tasks", "both"], default="both")
+    parser.add_argument("--ingest", type=int, default=2000, help="Queued bulk ingest calls (pool)")
+    parser.add_argument("--jobs", type=int, default=32, help="Queued storage jobs (tasks)")
+    parser.add_argument("--job-ms", type=float, default=200, help="Duration of each storage job (tasks)")
+    parser.add_argument("--queries", type=int, default=100, help="Sequential interactive calls")
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--service-ms", type=float, default=5)
+    parser.add_argument("--think-ms", type=float, default=5, help="Pause between interactive calls")
+    args = parser.parse_args()
+    runners = {"pool": [run_pool], "tasks": [run_tasks], "both": [run_pool, run_tasks]}[args.path]
+    for runner in runners:
+        for prioritized in (False, True):
+            print(json.dumps(asyncio.run(runner(args, prioritized))))
+
+
+if __name__ == "__main__":
+    main()
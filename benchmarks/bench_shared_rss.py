@@ -0,0 +1,92 @@
+"""Total worker memory with per-process copies vs. shared dependencies.
+
+    python benchmarks/bench_shared_rss.py --workers 8 --mb 256
+    python benchmarks/bench_shared_rss.py --backend shm
+
+Each worker gets an embeddings matrix through `DependencyManager` and reads
+all of it. "copy" builds it in every worker; "mmap"/"shm" build it once in
+the parent with `share_dependencies()` and workers attach to it. Reports the
+sum of RSS (counts shared pages in every process) and PSS (shared pages
+split between the processes that map them; Linux only), i.e. what the
+machine actually pays.
+"""
+import argparse
+import json
+import multiprocessing
+
+import numpy as np
+
+from whisk.kitchenai_sdk.base import DependencyManager
+from whisk.kitchenai_sdk.schema import DependencyType
+
+ROWS_PER_MB = (1 << 20) // (384 * 4)
+
+
+def memory_kb() -> dict:
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as rollup:
+            for line in rollup:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    usage[key.lower()] = int(value.split()[0])
+    except FileNotFoundError:
+        import resource
+        usage["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+
+def make_manager(mb: int) -> DependencyManager:
+    manager = DependencyManager()
+    manager.register_shared(
+        DependencyType.EMBEDDINGS,
+        lambda: np.random.default_rng(0).standard_normal((mb * ROWS_PER_MB, 384)).astype(np.float32)
+    )
+    return manager
+
+
+def worker(mb: int, started, queue):
+    baseline = memory_kb()
+    matrix = make_manager(mb).get_dependency(DependencyType.EMBEDDINGS)
+    float(matrix.sum())  # fault every page in
+    started.wait()  # measure while all workers hold the matrix
+    usage = memory_kb()
+    queue.put({key: usage[key] - baseline.get(key, 0) for key in usage})
+
+
+def run(args, backend: str) -> dict:
+    shared = make_manager(args.mb).share_dependencies(backend=backend) if backend != "copy" else None
+    context = multiprocessing.get_context("spawn")
+    started = context.Barrier(args.workers)
+    queue = context.Queue()
+    processes = [context.Process(target=worker, args=(args.mb, started, queue)) for _ in range(args.workers)]
+    try:
+        for process in processes:
+            process.start()
+        usages = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        if shared is not None:
+            shared.close()
+    return {
+        "backend": backend,
+        "workers": args.workers,
+        "matrix_mb": args.mb,
+        "total_rss_mb": round(sum(usage["rss"] for usage in usages) / 1024, 1),
+        "total_pss_mb": round(sum(usage["pss"] for usage in usages) / 1024, 1) if "pss" in usages[0] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--mb", type=int, default=256)
+    parser.add_argument("--backend", nargs="+", default=["copy", "mmap", "shm"])
+    args = parser.parse_args()
+    for backend in args.backend:
+        print(json.dumps(run(args, backend)))
+
+
+if __name__ == "__main__":
+    main()
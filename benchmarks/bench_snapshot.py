@@ -0,0 +1,59 @@
+"""Cold build vs. snapshot load time for a NumpyVectorStore.
+
+    python benchmarks/bench_snapshot.py --vectors 200000 --dim 384
+
+Building stands in for embedding the corpus (random vectors plus a
+configurable per-vector embedding latency); loading memory-maps the saved
+snapshot read-only.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from whisk.kitchenai_sdk.snapshot import SnapshotStore
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--embed-latency-us", type=float, default=50.0, help="Simulated embedding cost per vector")
+    args = parser.parse_args()
+
+    vectors = np.random.default_rng(0).standard_normal((args.vectors, args.dim)).astype(np.float32)
+
+    def build():
+        time.sleep(args.vectors * args.embed_latency_us / 1e6)
+        store = NumpyVectorStore(dim=args.dim)
+        store.add([str(i) for i in range(args.vectors)], vectors, metadatas=[{"row": i} for i in range(args.vectors)])
+        return store
+
+    with tempfile.TemporaryDirectory(prefix="whisk-snapshots-") as root:
+        snapshots = SnapshotStore(root)
+        started = time.perf_counter()
+        snapshots.load_or_build("bench", "random", build)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store = snapshots.load_or_build("bench", "random", build)
+        load_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store.query(vectors[0], top_k=10)
+        query_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "build_seconds": round(build_seconds, 3),
+        "load_ms": round(load_seconds * 1000, 1),
+        "first_query_ms": round(query_ms, 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark the NumPy vector store: build time, QPS and recall@k.
+
+    python benchmarks/bench_vector_store.py --sizes 100000 1000000 --dim 384
+
+Recall is measured against an exact float64 search over the same vectors, so
+it checks that segmenting, tombstones and compaction don't lose results.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    vectors = vectors.astype(np.float64)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = vectors @ queries.T
+    return np.argsort(-scores, axis=0)[:k].T
+
+
+def run(size: int, dim: int, queries: int, top_k: int, batch: int, path: str) -> dict:
+    rng = np.random.default_rng(size)
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+
+    store = NumpyVectorStore(path=path, dim=dim, auto_compact=False)
+    started = time.perf_counter()
+    for start in range(0, size, 10_000):
+        end = min(start + 10_000, size)
+        store.add([str(i) for i in range(start, end)], vectors[start:end])
+    store.flush()
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store.compact()
+    compact_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    single = [store.query(query, top_k=top_k) for query in query_vectors]
+    single_qps = queries / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    batched = []
+    for start in range(0, queries, batch):
+        batched.extend(store.query_batch(query_vectors[start:start + batch], top_k=top_k))
+    batch_qps = queries / (time.perf_counter() - started)
+
+    truth = exact_top_k(vectors, query_vectors, top_k)
+    found = sum(
+        len({int(hit.node.id) for hit in hits} & set(expected.tolist()))
+        for hits, expected in zip(single, truth)
+    )
+    return {
+        "size": size,
+        "dim": dim,
+        "build_seconds": round(build_seconds, 3),
+        "compact_seconds": round(compact_seconds, 3),
+        "qps": round(single_qps, 1),
+        "batch_qps": round(batch_qps, 1),
+        f"recall@{top_k}": round(found / (queries * top_k), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="whisk-bench-") as path:
+            print(json.dumps(run(size, args.dim, args.queries, args.top_k, args.batch, path)))
+
+
+if __name__ == "__main__":
+    main()
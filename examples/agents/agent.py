@@ -6,6 +6,7 @@ from whisk.kitchenai_sdk.http_schema import (
     ChatResponseMessage
 )
 from whisk.kitchenai_sdk.schema import ChatInput, ChatResponse
+from whisk.kitchenai_sdk.retrieval import AsyncRetriever, FanOutRetriever
 from llama_index.core import (
     SimpleDirectoryReader,
     VectorStoreIndex,
@@ -61,8 +62,8 @@ async def rag_handler(chat: ChatInput, vector_store, llm) -> ChatResponse:
     question = chat.messages[-1].content
     
     # Search for relevant documents
-    retriever = vector_store.as_retriever(similarity_top_k=2)
-    nodes = retriever.retrieve(question)
+    retriever = AsyncRetriever.from_dependency(vector_store, similarity_top_k=2)
+    nodes = await retriever.aretrieve(question)
     
     # Create context from retrieved documents
     context = "\n".join(node.node.text for node in nodes)
@@ -168,6 +169,22 @@ lyft_engine, uber_engine = init_query_engines()
 query_tools = init_query_tools(lyft_engine, uber_engine)
 regular_agent, instruct_agent = init_agents(query_tools)
 
+# Query both 10-K indices at once; latency is the slower index, not the sum
+financials_retriever = FanOutRetriever(
+    {"lyft": lyft_engine.retriever, "uber": uber_engine.retriever},
+    similarity_top_k=4,
+    timeout=5.0
+)
+
+@kitchen.chat.handler("chat.compare", DependencyType.LLM)
+async def handle_compare(chat: ChatInput, llm) -> ChatResponse:
+    """Answer from both companies' filings, retrieved in parallel"""
+    question = chat.messages[-1].content
+    nodes = await financials_retriever.aretrieve(question)
+    context = "\n".join(f"[{', '.join(node.metadata['sources'])}] {node.text}" for node in nodes)
+    response = await llm.acomplete(f"Answer based on context: {context}\nQuestion: {question}")
+    return ChatResponse(content=response.text, sources=nodes)
+
 @kitchen.chat.handler("regular-agent")
 async def handle_regular_agent(chat: ChatInput) -> ChatResponse:
     """Handle queries using the regular GPT-3.5-turbo agent"""
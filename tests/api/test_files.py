@@ -192,4 +192,164 @@ def test_delete_file(test_client):
 
     # Verify it's gone
     get_response = test_client.get(f"/v1/files/{file_id}")
-    assert get_response.status_code == 404 
\ No newline at end of file
+    assert get_response.status_code == 404 
+
+
+def test_list_files_pagination(test_client):
+    """Test limit/has_more and cursor pagination on file listing"""
+    response = test_client.get("/v1/files", params={"limit": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert [f["id"] for f in data["data"]] == ["file-2"]
+    assert data["has_more"] is True
+    assert data["last_id"] == "file-2"
+
+    response = test_client.get("/v1/files", params={"limit": 1, "after": data["last_id"]})
+    data = response.json()
+    assert [f["id"] for f in data["data"]] == ["file-1"]
+    assert data["has_more"] is False
+
+def test_list_files_order_and_purpose(test_client):
+    """Test ordering and purpose filtering on file listing"""
+    response = test_client.get("/v1/files", params={"order": "asc"})
+    assert [f["id"] for f in response.json()["data"]] == ["file-1", "file-2"]
+
+    response = test_client.get("/v1/files", params={"purpose": "assistants"})
+    data = response.json()
+    assert all(f["purpose"] == "assistants" for f in data["data"])
+
+    assert test_client.get("/v1/files", params={"order": "sideways"}).status_code == 422
+
+def test_list_files_streaming_handler(kitchen_app, test_client):
+    """Test that handlers can stream list results as an async iterator"""
+    @kitchen_app.storage.handler("streaming")
+    async def streaming_handler(data: StorageRequest):
+        async def files():
+            for i in range(data.limit):
+                yield StorageResponse(file_id=f"file-{i}", filename=f"{i}.txt", metadata={"size": i})
+        return files()
+
+    response = test_client.get("/v1/files", params={"limit": 3, "model": "@test-app-0.0.1/streaming"})
+    data = response.json()
+    assert [f["id"] for f in data["data"]] == ["file-0", "file-1", "file-2"]
+    assert data["has_more"] is True
+    assert data["first_id"] == "file-0"
+
+def test_list_files_handler_error(kitchen_app, test_client):
+    """Test that a handler failing before the first file gets an error status"""
+    @kitchen_app.storage.handler("broken")
+    async def broken_handler(data: StorageRequest):
+        async def files():
+            raise RuntimeError("listing failed")
+            yield
+        return files()
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app, raise_server_exceptions=False)
+    response = client.get("/v1/files", params={"model": "@test-app-0.0.1/broken"})
+    assert response.status_code == 500
+
+@pytest.fixture
+def content_client(kitchen_app, test_client, tmp_path):
+    """Register a storage handler that serves content from memory or disk"""
+    local_file = tmp_path / "local.bin"
+    local_file.write_bytes(b"0123456789" * 10)
+
+    @kitchen_app.storage.handler("blob")
+    async def blob_handler(data: StorageRequest) -> StorageResponse:
+        if data.file_id == "file-local":
+            return StorageResponse(file_id=data.file_id, filename="local.bin", path=str(local_file))
+        if data.file_id == "file-memory":
+            return StorageResponse(
+                file_id=data.file_id,
+                filename="memory.txt",
+                content=b"hello whisk content",
+                created_at=1234567890,
+                metadata={"content_type": "text/plain"}
+            )
+        return None
+
+    return test_client
+
+def test_file_content_download(content_client):
+    """Test full download with validators"""
+    response = content_client.get("/v1/files/file-memory/content", params={"model": "@test-app-0.0.1/blob"})
+    assert response.status_code == 200
+    assert response.content == b"hello whisk content"
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["etag"]
+    assert response.headers["accept-ranges"] == "bytes"
+
+    missing = content_client.get("/v1/files/file-missing/content", params={"model": "@test-app-0.0.1/blob"})
+    assert missing.status_code == 404
+
+def test_file_content_range(content_client):
+    """Test single byte range and suffix range requests"""
+    params = {"model": "@test-app-0.0.1/blob"}
+    response = content_client.get("/v1/files/file-memory/content", params=params, headers={"Range": "bytes=6-10"})
+    assert response.status_code == 206
+    assert response.content == b"whisk"
+    assert response.headers["content-range"] == "bytes 6-10/19"
+
+    response = content_client.get("/v1/files/file-memory/content", params=params, headers={"Range": "bytes=-7"})
+    assert response.content == b"content"
+
+    response = content_client.get("/v1/files/file-memory/content", params=params, headers={"Range": "bytes=100-"})
+    assert response.status_code == 416
+
+def test_file_content_conditional(content_client):
+    """Test If-None-Match and If-Modified-Since return 304"""
+    params = {"model": "@test-app-0.0.1/blob"}
+    for file_id in ("file-memory", "file-local"):
+        first = content_client.get(f"/v1/files/{file_id}/content", params=params)
+        etag = first.headers["etag"]
+        response = content_client.get(f"/v1/files/{file_id}/content", params=params, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        response = content_client.get(
+            f"/v1/files/{file_id}/content",
+            params=params,
+            headers={"If-Modified-Since": first.headers["last-modified"]}
+        )
+        assert response.status_code == 304
+
+def test_file_content_local_path(content_client):
+    """Test that local paths are served from disk with range support"""
+    params = {"model": "@test-app-0.0.1/blob"}
+    response = content_client.get("/v1/files/file-local/content", params=params)
+    assert response.status_code == 200
+    assert len(response.content) == 100
+
+    response = content_client.get("/v1/files/file-local/content", params=params, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == b"0123456789"
+
+def test_background_upload(kitchen_app):
+    """Test background uploads can be polled and followed over SSE"""
+    app = FastAPI()
+    app.include_router(router)
+    set_kitchen_app(kitchen_app)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/v1/files",
+            files={"file": ("test.txt", BytesIO(b"test content"))},
+            data={"purpose": "test", "background": "true"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"].startswith("job-")
+        assert data["status"] == "uploaded"
+
+        with client.stream("GET", f"/v1/files/{data['id']}/events") as events:
+            lines = [line for line in events.iter_lines() if line.startswith("data: ")]
+        assert lines[-1] == "data: [DONE]"
+        assert json.loads(lines[-2][len("data: "):])["status"] == "complete"
+
+        polled = client.get(f"/v1/files/{data['id']}").json()
+        assert polled["status"] == "processed"
+        assert polled["id"].startswith("file-")
+        assert polled["filename"] == "test.txt"
+
+def test_file_events_unknown_job(test_client):
+    assert test_client.get("/v1/files/job-missing/events").status_code == 404
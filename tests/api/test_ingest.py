@@ -0,0 +1,120 @@
+import pytest
+import io
+import tarfile
+import time
+import zipfile
+from fastapi.testclient import TestClient
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import StorageRequest, StorageResponse
+from whisk.config import WhiskConfig, ServerConfig, IngestConfig
+from whisk.router import WhiskRouter
+
+@pytest.fixture
+def stored():
+    return {}
+
+@pytest.fixture
+def client(stored):
+    """Create a test client with a storage handler that records uploads"""
+    kitchen = KitchenAIApp(namespace="test-ingest")
+
+    @kitchen.storage.handler("storage")
+    async def storage_handler(data: StorageRequest) -> StorageResponse:
+        if data.filename == "broken.txt":
+            raise ValueError("cannot parse")
+        stored[data.filename] = data.content
+        return StorageResponse(file_id=f"file-{len(stored)}", filename=data.filename)
+
+    config = WhiskConfig(server=ServerConfig(type="fastapi"), ingest=IngestConfig(max_expanded_bytes=1000))
+    router = WhiskRouter(kitchen_app=kitchen, config=config)
+    with TestClient(router.app) as client:
+        yield client
+
+def wait_for_job(client, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/v1/ingest/{job_id}").json()
+        if job["status"] in ("complete", "error"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+def test_bulk_ingest_files_and_archive(client, stored):
+    """Test that plain files and archive members are all stored"""
+    archive = make_zip({"docs/a.txt": b"alpha", "docs/b.txt": b"beta"})
+    response = client.post(
+        "/v1/ingest",
+        files=[
+            ("files", ("one.txt", b"one")),
+            ("files", ("two.txt", b"two")),
+            ("files", ("corpus.zip", archive)),
+        ],
+        data={"concurrency": "2"}
+    )
+    assert response.status_code == 200
+    job = response.json()
+    assert job["id"].startswith("job-")
+    assert job["kind"] == "ingest"
+
+    job = wait_for_job(client, job["id"])
+    assert job["status"] == "complete"
+    assert job["progress"]["expand"]["received"] == 3
+    assert job["progress"]["store"]["emitted"] == 4
+    assert stored == {"one.txt": b"one", "two.txt": b"two", "a.txt": b"alpha", "b.txt": b"beta"}
+
+def test_bulk_ingest_reports_failures(client, stored):
+    """Test that a failing file is counted and fails the job once the rest are stored"""
+    response = client.post(
+        "/v1/ingest",
+        files=[("files", ("ok.txt", b"ok")), ("files", ("broken.txt", b"bad"))]
+    )
+    job = wait_for_job(client, response.json()["id"])
+    assert job["status"] == "error"
+    assert stored == {"ok.txt": b"ok"}
+    assert job["progress"]["store"]["failed"] == 1
+    assert any("cannot parse" in error for error in job["errors"])
+    assert "1 items failed to ingest (1 stored)" in job["errors"]
+
+def make_tar(members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+def test_bulk_ingest_sanitizes_member_paths(client, stored):
+    """Test that archive members with unsafe paths are stored from where they were extracted"""
+    response = client.post(
+        "/v1/ingest",
+        files=[
+            ("files", ("corpus.zip", make_zip({"../up.txt": b"up", "/abs/root.txt": b"root"}))),
+            ("files", ("corpus.tar", make_tar({"docs/c.txt": b"gamma", "../../escape.txt": b"no"}))),
+        ]
+    )
+    job = wait_for_job(client, response.json()["id"])
+    assert job["status"] == "complete"
+    assert stored == {"up.txt": b"up", "root.txt": b"root", "c.txt": b"gamma"}
+
+def test_bulk_ingest_rejects_archive_bombs(client, stored):
+    """Test that archives expanding past max_expanded_bytes are rejected before extraction"""
+    response = client.post("/v1/ingest", files=[("files", ("bomb.zip", make_zip({"big.txt": b"0" * 5000})))])
+    job = wait_for_job(client, response.json()["id"])
+    assert job["status"] == "error"
+    assert job["progress"]["expand"]["failed"] == 1
+    assert stored == {}
+
+def test_bulk_ingest_validates_concurrency(client):
+    response = client.post("/v1/ingest", files=[("files", ("one.txt", b"one"))], data={"concurrency": "1000000"})
+    assert response.status_code == 422
+
+def test_get_unknown_job(client):
+    assert client.get("/v1/ingest/job-missing").status_code == 404
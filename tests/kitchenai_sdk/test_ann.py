@@ -0,0 +1,119 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from whisk.kitchenai_sdk.ann import ANNRetriever, IVFFlatIndex, create_ann_index
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import DependencyType, ChatCompletionRequest, ChatInput, ChatResponse
+
+def clustered(n, dim, centers=20, seed=0):
+    rng = np.random.default_rng(seed)
+    means = rng.standard_normal((centers, dim)) * 4
+    return (means[rng.integers(0, centers, n)] + rng.standard_normal((n, dim))).astype(np.float32)
+
+def exact(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return set(np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:k].tolist())
+
+def test_untrained_index_is_exact():
+    vectors = clustered(200, 8)
+    index = IVFFlatIndex(dim=8, min_train_size=1000)
+    index.add([str(i) for i in range(200)], vectors)
+
+    assert not index.trained
+    hits = index.query(vectors[5], top_k=5)
+    assert {int(hit.node.id) for hit in hits} == exact(vectors, vectors[5], 5)
+
+def test_trained_index_recall_and_nprobe_knob():
+    vectors = clustered(3000, 16)
+    index = IVFFlatIndex(dim=16, nlist=32, nprobe=4, min_train_size=2000)
+    for start in range(0, 3000, 500):
+        index.add([str(i) for i in range(start, start + 500)], vectors[start:start + 500])
+
+    assert index.trained
+    assert len(index) == 3000
+    queries = clustered(20, 16, seed=1)
+    recall = np.mean([
+        len({int(hit.node.id) for hit in index.query(query, top_k=10)} & exact(vectors, query, 10)) / 10
+        for query in queries
+    ])
+    full = [
+        {int(hit.node.id) for hit in index.query(query, top_k=10, nprobe=32)} == exact(vectors, query, 10)
+        for query in queries
+    ]
+    assert recall >= 0.8
+    assert all(full)
+
+def test_delete_filters_and_upsert():
+    index = IVFFlatIndex(dim=2, metric="dot", min_train_size=2)
+    index.add(["a", "b", "c"], [[1, 0], [0.9, 0.1], [0, 1]], metadatas=[{"t": 1}, {"t": 2}, {"t": 1}])
+    index.delete(["a"])
+    assert [hit.node.id for hit in index.query([1, 0], top_k=1)] == ["b"]
+    assert [hit.node.id for hit in index.query([1, 0], top_k=1, filters={"t": 1})] == ["c"]
+
+    index.add(["b"], [[0, 2]])
+    assert len(index) == 2
+    assert index.query([0, 1], top_k=1)[0].node.id == "b"
+
+def test_deletes_compact_dead_rows():
+    vectors = clustered(400, 8)
+    index = IVFFlatIndex(dim=8, nlist=8, min_train_size=100)
+    ids = [str(i) for i in range(400)]
+    index.add(ids, vectors)
+    for _ in range(5):
+        index.add(ids[:300], vectors[:300])
+    assert len(index._alive) < 2 * len(index)
+    assert sum(inverted.size for inverted in index._lists) == len(index._alive)
+    assert index.query(vectors[7], top_k=1, nprobe=8)[0].node.id == "7"
+
+    index.delete(ids[:250])
+    assert len(index) == 150 and len(index._alive) == 150
+    assert index.query(vectors[300], top_k=1, nprobe=8)[0].node.id == "300"
+
+def test_train_without_live_vectors():
+    index = IVFFlatIndex(dim=2, min_train_size=2)
+    index.add(["a", "b"], [[1, 0], [0, 1]])
+    assert index.trained
+    index.delete(["a", "b"])
+    index.train()
+    assert not index.trained
+    assert index.query([1, 0]) == []
+
+def test_hnsw_filter_with_fewer_matches_than_k():
+    pytest.importorskip("hnswlib")
+    from whisk.kitchenai_sdk.ann import HNSWIndex
+    vectors = clustered(200, 8)
+    index = HNSWIndex(dim=8)
+    index.add([str(i) for i in range(200)], vectors, metadatas=[{"t": i % 50} for i in range(200)])
+
+    hits = index.query(vectors[0], top_k=10, filters={"t": 0})
+    assert 0 < len(hits) <= 4
+    assert all(int(hit.node.id) % 50 == 0 for hit in hits)
+    assert index.query(vectors[0], top_k=10, filters={"t": -1}) == []
+
+def test_create_ann_index_backends():
+    assert isinstance(create_ann_index(4, backend="ivf"), IVFFlatIndex)
+    with pytest.raises(ValueError):
+        create_ann_index(4, backend="annoy")
+
+async def test_retriever_dependency_injection():
+    embeddings = {"cats": [1.0, 0.0], "dogs": [0.0, 1.0]}
+    retriever = ANNRetriever(IVFFlatIndex(dim=2), embed_fn=lambda text: embeddings[text], similarity_top_k=1)
+    kitchen = KitchenAIApp(namespace="test-ann")
+    kitchen.register_dependency(DependencyType.RETRIEVER, retriever)
+
+    @kitchen.storage.handler("storage", DependencyType.RETRIEVER)
+    async def storage_handler(texts, retriever=None):
+        return retriever.add_texts(texts)
+
+    @kitchen.chat.handler("chat.rag", DependencyType.RETRIEVER)
+    async def rag_handler(chat: ChatInput, retriever=None):
+        nodes = retriever.retrieve(chat.messages[-1].content)
+        return ChatResponse(content=nodes[0].node.text, sources=[node.to_source_node() for node in nodes])
+
+    await kitchen.storage.get_task("storage")(["cats", "dogs"])
+    response = await kitchen.chat.get_task("chat.rag")(ChatCompletionRequest(
+        messages=[{"role": "user", "content": "dogs"}],
+        model="chat.rag"
+    ))
+    assert response.choices[0].message.content == "dogs"
@@ -0,0 +1,116 @@
+import asyncio
+from whisk.kitchenai_sdk.conversation import ConversationStore
+from whisk.kitchenai_sdk.http_schema import ChatCompletionRequest
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import ChatInput, ChatResponse
+
+def make_app():
+    kitchen = KitchenAIApp(namespace="test")
+    seen = []
+
+    @kitchen.chat.handler("chat", conversation=True)
+    async def chat(chat: ChatInput, conversation) -> ChatResponse:
+        seen.append([(m.role, m.content) for m in chat.messages])
+        conversation.cache["turns"] = conversation.cache.get("turns", 0) + 1
+        return ChatResponse(content=f"reply {len(chat.messages)}")
+
+    return kitchen, seen
+
+def request(content, conversation_id=None, messages=None, stream=False):
+    return ChatCompletionRequest(
+        model="@test/chat",
+        messages=messages or [{"role": "user", "content": content}],
+        metadata={"conversation_id": conversation_id} if conversation_id else None,
+        stream=stream
+    )
+
+async def test_clients_send_only_the_new_turn():
+    kitchen, seen = make_app()
+    task = kitchen.chat.get_task("chat")
+
+    first = await task(request("hello"))
+    conversation_id = first.metadata["conversation_id"]
+    await task(request("and then?", conversation_id))
+
+    assert seen[-1] == [("user", "hello"), ("assistant", "reply 1"), ("user", "and then?")]
+    conversation = kitchen.chat.conversations.get(conversation_id)
+    assert len(conversation.messages) == 4
+    assert conversation.cache["turns"] == 2
+    assert conversation.token_count() > 0
+
+async def test_resent_history_is_not_duplicated():
+    kitchen, seen = make_app()
+    task = kitchen.chat.get_task("chat")
+    await task(request("hello", "c1"))
+    await task(request(None, "c1", messages=[
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "reply 1"},
+        {"role": "user", "content": "again"},
+    ]))
+    assert len(seen[-1]) == 3
+
+async def test_edited_history_forks_the_conversation():
+    kitchen, seen = make_app()
+    task = kitchen.chat.get_task("chat")
+    await task(request("hello", "c1"))
+    await task(request("more", "c1"))
+
+    # Regenerate the first reply: the resend stops short of the stored history
+    forked = await task(request(None, "c1", messages=[{"role": "user", "content": "hello"}, {"role": "user", "content": "retry"}]))
+    fork_id = forked.metadata["conversation_id"]
+    assert fork_id != "c1"
+    assert seen[-1] == [("user", "hello"), ("user", "retry")]
+    assert len(kitchen.chat.conversations.get("c1").messages) == 4
+    assert [m.content for m in kitchen.chat.conversations.get(fork_id).messages] == ["hello", "retry", "reply 2"]
+
+    # An identical resend adds nothing but the reply
+    await task(request(None, fork_id, messages=[
+        {"role": "user", "content": "hello"}, {"role": "user", "content": "retry"}, {"role": "assistant", "content": "reply 2"},
+    ]))
+    assert len(seen[-1]) == 3
+
+async def test_concurrent_turns_are_serialized():
+    kitchen = KitchenAIApp(namespace="test")
+    histories = []
+
+    @kitchen.chat.handler("chat", conversation=True)
+    async def chat(chat: ChatInput, conversation) -> ChatResponse:
+        histories.append(len(chat.messages))
+        await asyncio.sleep(0.01)
+        return ChatResponse(content="ok")
+
+    task = kitchen.chat.get_task("chat")
+    await asyncio.gather(task(request("one", "c1")), task(request("two", "c1")))
+    assert histories == [1, 3]
+    assert [m.content for m in kitchen.chat.conversations.get("c1").messages] == ["one", "ok", "two", "ok"]
+
+async def test_streamed_replies_are_stored():
+    kitchen = KitchenAIApp(namespace="test")
+
+    @kitchen.chat.handler("chat", conversation=True)
+    async def chat(chat: ChatInput, conversation):
+        for word in ["streamed ", "reply"]:
+            yield ChatResponse(content=word)
+
+    chunks = [chunk async for chunk in await kitchen.chat.get_task("chat")(request("hi", "s1", stream=True))]
+    assert chunks[-1]["metadata"] == {"conversation_id": "s1"}
+    assert kitchen.chat.conversations.get("s1").messages[-1].content == "streamed reply"
+
+def test_sqlite_store_survives_restarts_and_eviction(tmp_path):
+    path = str(tmp_path / "conversations.db")
+    store = ConversationStore(path=path, max_conversations=1)
+    for conversation_id in ("a", "b"):
+        chat = ChatInput(messages=[{"role": "user", "content": f"hi {conversation_id}"}], metadata={"conversation_id": conversation_id})
+        conversation, new = store.resolve(chat)
+        store.append(conversation, new)
+    # "a" was evicted from memory but is reloaded from SQLite
+    assert store.get("a").messages[0].content == "hi a"
+    store.close()
+
+    reopened = ConversationStore(path=path)
+    assert [m.content for m in reopened.get("b").messages] == ["hi b"]
+    fork = reopened.fork(reopened.get("b"), 1)
+    reopened.append(fork, [])
+    assert [m.content for m in ConversationStore(path=path).get(fork.id).messages] == ["hi b"]
+    reopened.delete("b")
+    assert reopened.get("b") is None
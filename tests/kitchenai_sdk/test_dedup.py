@@ -0,0 +1,136 @@
+import pytest
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.dedup import DedupIndex, content_hash
+from whisk.kitchenai_sdk.schema import (
+    StorageRequest,
+    StorageResponse,
+    WhiskStorageSchema,
+    WhiskStorageResponseSchema
+)
+
+@pytest.fixture
+def kitchen():
+    return KitchenAIApp(namespace="test-dedup")
+
+def test_content_hash_streaming_matches_bytes():
+    data = b"x" * (3 << 20)
+    assert content_hash(data) == content_hash([data[:100], data[100:]])
+    assert content_hash(b"a") != content_hash(b"b")
+
+async def test_dedup_short_circuits_same_content(kitchen):
+    """Test identical content skips the handler and relinks metadata"""
+    calls = []
+
+    @kitchen.storage.handler("storage", dedup=True)
+    async def storage_handler(data: WhiskStorageSchema):
+        calls.append(data.id)
+        return WhiskStorageResponseSchema(id=data.id, name=data.name, metadata={"chunks": "3"})
+
+    handler = kitchen.storage.get_task("storage")
+    first = await handler(WhiskStorageSchema(id=1, name="a.txt", label="storage", data=b"same", metadata={"v": "1"}))
+    second = await handler(WhiskStorageSchema(id=2, name="b.txt", label="storage", data=b"same", metadata={"v": "2"}))
+    third = await handler(WhiskStorageSchema(id=3, name="c.txt", label="storage", data=b"different"))
+
+    assert calls == [1, 3]
+    assert first.metadata == {"chunks": "3"}
+    assert second.id == 2
+    assert second.name == "b.txt"
+    assert second.metadata["v"] == "2"
+    assert second.metadata["chunks"] == "3"
+    assert second.metadata["deduplicated"] is True
+    assert third.id == 3
+
+async def test_dedup_http_upload_and_delete(kitchen):
+    """Test uploads dedupe until the original file is deleted"""
+    calls = []
+
+    @kitchen.storage.handler("storage", dedup=True)
+    async def storage_handler(data: StorageRequest):
+        calls.append(data.action)
+        if data.action == "delete":
+            return StorageResponse(file_id=data.file_id, filename="", deleted=True)
+        return StorageResponse(file_id=f"file-{len(calls)}", filename=data.filename)
+
+    handler = kitchen.storage.get_task("storage")
+    upload = StorageRequest(action="upload", content=b"doc", filename="doc.txt")
+    first = await handler(upload)
+    again = await handler(upload)
+    assert again.file_id == first.file_id
+    assert calls == ["upload"]
+
+    await handler(StorageRequest(action="delete", file_id=first.file_id))
+    third = await handler(upload)
+    assert third.file_id != first.file_id
+    assert calls == ["upload", "delete", "upload"]
+
+async def test_dedup_forgets_documents_deleted_by_hooks(kitchen):
+    """Test delete hooks (NATS deletes and re-indexing) clear the dedup entry"""
+    calls = []
+
+    @kitchen.storage.handler("storage", dedup=True)
+    async def storage_handler(data: WhiskStorageSchema):
+        calls.append(data.id)
+        return WhiskStorageResponseSchema(id=data.id, name=data.name)
+
+    @kitchen.storage.on_delete("storage")
+    async def delete_handler(data):
+        calls.append("delete")
+
+    handler = kitchen.storage.get_task("storage")
+    document = WhiskStorageSchema(id=1, name="a.txt", label="storage", data=b"same")
+    await handler(document)
+    await kitchen.storage.get_hook("storage", "on_delete")(WhiskStorageSchema(id=1, name="a.txt", label="storage"))
+    await handler(document)
+    await kitchen.storage.execute_delete("storage", StorageRequest(action="delete", file_id="1"))
+    await handler(document)
+    assert calls == [1, "delete", 1, "delete", 1]
+
+async def test_dedup_skips_error_responses(kitchen):
+    """Test failed results are not cached, so a retry runs the handler again"""
+    calls = []
+
+    @kitchen.storage.handler("storage", dedup=True)
+    async def storage_handler(data: WhiskStorageSchema):
+        calls.append(data.id)
+        return WhiskStorageResponseSchema(id=data.id, name=data.name, status="error" if len(calls) == 1 else "complete")
+
+    handler = kitchen.storage.get_task("storage")
+    document = WhiskStorageSchema(id=1, name="a.txt", label="storage", data=b"same")
+    assert (await handler(document)).status == "error"
+    assert (await handler(document)).status == "complete"
+    await handler(document)
+    assert calls == [1, 1]
+
+async def test_handlers_without_dedup_always_run(kitchen, storage_data):
+    calls = []
+
+    @kitchen.storage.handler("storage")
+    async def storage_handler(data):
+        calls.append(data.id)
+        return WhiskStorageResponseSchema(id=data.id, name=data.name)
+
+    handler = kitchen.storage.get_task("storage")
+    await handler(storage_data)
+    await handler(storage_data)
+    assert len(calls) == 2
+
+def test_chunk_diff():
+    """Test only new chunks are reported as changed"""
+    index = DedupIndex()
+    diff = index.diff_chunks("doc", ["a", "b", "c"])
+    assert diff.changed == [0, 1, 2]
+    index.commit_chunks("doc", diff.hashes)
+
+    diff = index.diff_chunks("doc", ["a", "b2", "c"])
+    assert diff.changed == [1]
+    assert len(diff.removed) == 1
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    index = DedupIndex(path)
+    index.put("storage:abc", StorageResponse(file_id="file-1", filename="a.txt"))
+    index.close()
+
+    restored = DedupIndex(path).get("storage:abc")
+    assert isinstance(restored, StorageResponse)
+    assert restored.file_id == "file-1"
@@ -0,0 +1,126 @@
+import pytest
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.ingestion import (
+    IngestionError,
+    IngestionPipeline,
+    IngestionResult,
+    IngestSource,
+    split_text,
+)
+from whisk.kitchenai_sdk.schema import StorageRequest, StorageResponse
+
+def fake_embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+def test_split_text_respects_size_and_overlap():
+    text = " ".join(f"word{i}" for i in range(200))
+    chunks = list(split_text(text, chunk_size=100, chunk_overlap=20))
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert chunks[0].split()[0] == "word0"
+    assert chunks[-1].split()[-1] == "word199"
+    # Consecutive chunks overlap
+    assert chunks[1].split()[0] in chunks[0]
+
+async def test_pipeline_parses_chunks_embeds_and_upserts():
+    upserted = []
+    embed_batches = []
+
+    def embed(texts):
+        embed_batches.append(len(texts))
+        return fake_embed(texts)
+
+    async def upsert(chunks):
+        upserted.extend(chunks)
+
+    pipeline = IngestionPipeline(
+        embed=embed,
+        upsert=upsert,
+        chunk_size=50,
+        chunk_overlap=10,
+        parse_workers=0,
+        embed_batch_size=8
+    )
+    sources = [
+        IngestSource(filename=f"doc{i}.txt", content=("page one " * 20 + "\f" + "page two " * 20).encode())
+        for i in range(3)
+    ]
+    result = await pipeline.run(sources)
+
+    assert result.sources == 3
+    assert result.pages == 6
+    assert result.chunks == result.embedded == result.upserted == len(upserted)
+    assert sorted(result.chunk_ids) == sorted(chunk.id for chunk in upserted)
+    assert max(embed_batches) <= 8
+    assert all(chunk.embedding == [float(len(chunk.text)), 1.0] for chunk in upserted)
+    assert {chunk.metadata["page"] for chunk in upserted} == {1, 2}
+    assert not result.errors
+
+async def test_pipeline_rejects_short_embedding_batches():
+    upserted = []
+    pipeline = IngestionPipeline(embed=lambda texts: fake_embed(texts)[1:], upsert=upserted.extend, parse_workers=0)
+    result = await pipeline.run([IngestSource(filename="a.md", content=b"hello world")])
+    assert result.embedded == result.upserted == 0
+    assert upserted == []
+    assert any("1 chunks" in error for error in result.errors)
+
+async def test_pipeline_uses_process_pool_for_parsing():
+    pipeline = IngestionPipeline(parse_workers=2)
+    try:
+        result = await pipeline.run([IngestSource(filename="a.md", content=b"hello world")])
+    finally:
+        pipeline.close()
+    assert result.pages == 1
+    assert result.chunks == 1
+
+async def test_storage_handler_declares_pipeline():
+    kitchen = KitchenAIApp(namespace="test-ingestion")
+    stored = []
+    pipeline = IngestionPipeline(embed=fake_embed, upsert=stored.extend, parse_workers=0)
+
+    @kitchen.storage.handler("storage", pipeline=pipeline)
+    async def handle_storage(data: StorageRequest, ingested: IngestionResult = None) -> StorageResponse:
+        if data.action == "delete":
+            assert ingested is None
+            return StorageResponse(file_id=data.file_id, filename="a.txt", deleted=True)
+        return StorageResponse(file_id="file-1", filename=data.filename, metadata={"chunks": ingested.chunks})
+
+    handler = kitchen.storage.get_task("storage")
+    response = await handler(StorageRequest(action="upload", content=b"some text to index", filename="a.txt"))
+    assert response.metadata == {"chunks": 1}
+    assert stored[0].text == "some text to index"
+    assert stored[0].metadata["source"] == "a.txt"
+
+    deleted = await handler(StorageRequest(action="delete", file_id="file-1"))
+    assert deleted.deleted
+
+def broken_parser(source):
+    raise ValueError("not a PDF")
+
+async def test_storage_handler_fails_when_nothing_is_ingested():
+    kitchen = KitchenAIApp(namespace="test-ingestion")
+    calls = []
+    pipeline = IngestionPipeline(embed=fake_embed, upsert=calls.extend, parse=broken_parser, parse_workers=0)
+
+    @kitchen.storage.handler("storage", pipeline=pipeline)
+    async def handle_storage(data: StorageRequest, ingested: IngestionResult = None) -> StorageResponse:
+        calls.append(data)
+        return StorageResponse(file_id="file-1", filename=data.filename)
+
+    handler = kitchen.storage.get_task("storage")
+    with pytest.raises(IngestionError, match="not a PDF") as error:
+        await handler(StorageRequest(action="upload", content=b"%PDF", filename="a.pdf"))
+    assert error.value.result.chunks == 0
+    assert calls == []
+
+async def test_app_close_shuts_down_parse_pools():
+    kitchen = KitchenAIApp(namespace="test-ingestion")
+    pipeline = IngestionPipeline(parse_workers=1)
+
+    @kitchen.storage.handler("storage", pipeline=pipeline)
+    async def handle_storage(data: StorageRequest, ingested: IngestionResult = None) -> StorageResponse:
+        return StorageResponse(file_id="file-1", filename=data.filename)
+
+    await kitchen.storage.get_task("storage")(StorageRequest(action="upload", content=b"text", filename="a.txt"))
+    assert pipeline._executor is not None
+    kitchen.close()
+    assert pipeline._executor is None
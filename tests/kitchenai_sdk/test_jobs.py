@@ -0,0 +1,76 @@
+import asyncio
+from whisk.kitchenai_sdk.jobs import JobManager, JobStatus, report_progress, current_job
+
+async def test_job_lifecycle_and_progress():
+    """Test a job runs in the background and records reported progress"""
+    jobs = JobManager()
+    job = jobs.create("storage", label="docs")
+    assert job.status == JobStatus.QUEUED
+
+    async def work():
+        assert current_job() is job
+        report_progress("parse", chunks_parsed=3)
+        report_progress("embed", chunks_embedded=3)
+
+    jobs.start(job, work())
+    await jobs.wait(job.id)
+
+    assert job.status == JobStatus.COMPLETE
+    assert job.completed_at is not None
+    assert job.progress == {"parse": {"chunks_parsed": 3}, "embed": {"chunks_embedded": 3}}
+    assert job.metadata == {"label": "docs"}
+
+async def test_job_failure():
+    """Test a failing job is marked as error with the message recorded"""
+    jobs = JobManager()
+    job = jobs.create("storage")
+
+    async def work():
+        raise ValueError("boom")
+
+    jobs.start(job, work())
+    await jobs.wait(job.id)
+    assert job.status == JobStatus.ERROR
+    assert job.errors == ["boom"]
+
+async def test_job_subscribe_events():
+    """Test subscribers see progress events and the terminal status"""
+    jobs = JobManager()
+    job = jobs.create("storage")
+    release = asyncio.Event()
+
+    async def work():
+        report_progress("download", bytes_downloaded=10)
+        await release.wait()
+        report_progress("download", bytes_downloaded=20)
+
+    jobs.start(job, work())
+    events = []
+
+    async def collect():
+        async for event in jobs.subscribe(job.id):
+            events.append(event)
+
+    collector = asyncio.create_task(collect())
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.wait_for(collector, 1)
+
+    assert events[-1].status == JobStatus.COMPLETE
+    assert events[-1].progress["download"]["bytes_downloaded"] == 20
+    assert any(event.stage == "download" for event in events)
+
+def test_report_progress_outside_job():
+    """Test report_progress is a no-op without a running job"""
+    report_progress("parse", chunks_parsed=1)
+    assert current_job() is None
+
+def test_job_eviction():
+    """Test finished jobs are evicted beyond max_jobs"""
+    jobs = JobManager(max_jobs=2)
+    first = jobs.create("a")
+    jobs.set_status(first, JobStatus.COMPLETE)
+    jobs.create("b")
+    jobs.create("c")
+    assert jobs.get(first.id) is None
+    assert len(jobs.list_jobs()) == 2
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from whisk.kitchenai_sdk.load import LoadAwareDispatcher, LoadMonitor
+from whisk.kitchenai_sdk.nats_schema import LoadReport
+
+
+def test_monitor_counts_inflight_and_errors():
+    monitor = LoadMonitor()
+    with monitor.track("query"):
+        monitor.begin("storage")
+        report = monitor.report()
+        assert report.inflight == {"query": 1, "storage": 1}
+    monitor.finish("storage", failed=True)
+    with pytest.raises(ValueError):
+        with monitor.track("query"):
+            raise ValueError("boom")
+
+    report = monitor.report(queue_waits=[(float("inf"), 0.2)] * 19 + [(float("inf"), 1.0)])
+    assert report.inflight == {}
+    assert report.requests == 3
+    assert report.error_rate == pytest.approx(2 / 3, abs=1e-3)
+    assert report.queue_wait_p95_ms == 1000.0
+    assert report.rss_mb > 0
+
+
+async def test_monitor_samples_loop_lag():
+    monitor = LoadMonitor(lag_interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    # Block the loop so the sampler wakes up late
+    import time
+    time.sleep(0.05)
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+    assert monitor.report().loop_lag_ms >= 30
+
+
+def test_dispatcher_prefers_least_loaded():
+    dispatcher = LoadAwareDispatcher(choices=None)
+    dispatcher.update("busy", LoadReport(inflight={"query": 8}, queue_wait_p95_ms=500))
+    dispatcher.update("idle", LoadReport())
+    dispatcher.update("draining", LoadReport(draining=True))
+    assert dispatcher.pick(["busy", "idle", "draining"]) == "idle"
+    # Unknown workers get a neutral score, between idle and busy
+    assert dispatcher.pick(["busy", "unknown"]) == "unknown"
+
+
+def test_dispatcher_samples_only_available_workers():
+    dispatcher = LoadAwareDispatcher(choices=2)
+    dispatcher.update("a", LoadReport(draining=True))
+    dispatcher.update("b", LoadReport(draining=True))
+    dispatcher.update("c", LoadReport(inflight={"query": 20}))
+    assert {dispatcher.pick(["a", "b", "c"]) for _ in range(200)} == {"c"}
+    # With every worker draining there is still an answer
+    assert dispatcher.pick(["a", "b"]) in ("a", "b")
+
+
+def test_dispatcher_counts_outstanding_routes():
+    dispatcher = LoadAwareDispatcher(choices=None)
+    dispatcher.update("a", LoadReport())
+    dispatcher.update("b", LoadReport(inflight={"query": 1}))
+    with dispatcher.route(["a", "b"]) as first:
+        assert first == "a"
+        with dispatcher.route(["a", "b"]) as second:
+            # "a" now has one outstanding request, tying with "b"
+            assert second in ("a", "b")
+            with dispatcher.route(["a", "b"]) as third:
+                assert {second, third} == {"a", "b"}
+    assert dispatcher.outstanding == {"a": 0, "b": 0}
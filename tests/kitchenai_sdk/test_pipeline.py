@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from whisk.kitchenai_sdk.pipeline import IngestPipeline, Stage
+
+async def test_pipeline_stages_and_fan_out():
+    """Test items flow through sync and async stages with fan-out"""
+    async def double(item):
+        await asyncio.sleep(0)
+        return item * 2
+
+    def split(item):
+        return [item, item + 1]
+
+    results = []
+
+    async def collect(item):
+        results.append(item)
+
+    pipeline = IngestPipeline([
+        Stage(name="double", func=double, concurrency=3),
+        Stage(name="split", func=split, fan_out=True),
+        Stage(name="collect", func=collect),
+    ], queue_size=2)
+    stats = await pipeline.run(range(5))
+
+    assert sorted(results) == [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    assert stats.stages["double"].received == 5
+    assert stats.stages["split"].emitted == 10
+    assert stats.stages["collect"].received == 10
+
+async def test_pipeline_bounded_concurrency():
+    """Test a stage never runs more than `concurrency` items at once"""
+    running = 0
+    peak = 0
+
+    async def slow(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return item
+
+    await IngestPipeline([Stage(name="slow", func=slow, concurrency=4)]).run(range(50))
+    assert peak == 4
+
+async def test_pipeline_counts_failures():
+    """Test failing items are recorded and the run continues"""
+    async def maybe_fail(item):
+        if item % 2:
+            raise ValueError(f"bad {item}")
+        return item
+
+    stats = await IngestPipeline([Stage(name="check", func=maybe_fail)]).run(range(6))
+    assert stats.stages["check"].failed == 3
+    assert stats.stages["check"].emitted == 3
+    assert len(stats.errors) == 3
+
+def test_pipeline_requires_stages():
+    with pytest.raises(ValueError):
+        IngestPipeline([])
+
+async def test_pipeline_batches_items():
+    """Test batch stages receive lists and fan out their results"""
+    batches = []
+    results = []
+
+    async def embed(batch):
+        batches.append(len(batch))
+        return [item * 10 for item in batch]
+
+    async def collect(item):
+        results.append(item)
+
+    stats = await IngestPipeline([
+        Stage(name="embed", func=embed, batch_size=4, batch_wait=0.01),
+        Stage(name="collect", func=collect),
+    ]).run(range(10))
+
+    assert sorted(results) == [item * 10 for item in range(10)]
+    assert sum(batches) == 10
+    assert max(batches) <= 4
+    assert stats.stages["embed"].received == 10
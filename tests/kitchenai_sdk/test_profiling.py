@@ -0,0 +1,91 @@
+import marshal
+import time
+import pytest
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import ChatCompletionRequest, ChatInput, ChatResponse
+
+
+def spin(seconds: float) -> int:
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+@pytest.fixture
+def kitchen():
+    kitchen = KitchenAIApp(namespace="test-profiling")
+
+    @kitchen.chat.handler("busy")
+    async def busy(chat: ChatInput) -> ChatResponse:
+        return ChatResponse(content=str(spin(0.05)))
+
+    @kitchen.chat.handler("stream")
+    async def stream(chat: ChatInput):
+        for word in ["a", "b"]:
+            spin(0.005)
+            yield ChatResponse(content=word)
+
+    return kitchen
+
+
+def chat_request(model: str, metadata=None, stream=False) -> ChatCompletionRequest:
+    return ChatCompletionRequest(
+        model=model,
+        messages=[{"role": "user", "content": "hi"}],
+        metadata=metadata,
+        stream=stream,
+    )
+
+
+async def test_sampling_records_collapsed_stacks(kitchen):
+    profiler = kitchen.profiler
+    profiler.configure(interval=0.001)
+    profiler.start_sampling("chat", "busy")
+    assert profiler.status().sampling == ["chat:busy"]
+    await kitchen.chat.get_task("busy")(chat_request("busy"))
+    profiler.stop_sampling("chat", "busy")
+
+    lines = profiler.collapsed("chat", "busy").splitlines()
+    assert lines and all(line.startswith("chat:busy;busy_(") for line in lines)
+    assert any(";spin_(" in line for line in lines)
+    assert profiler.status().sampling == []
+
+    with pytest.raises(KeyError):
+        profiler.start_sampling("chat", "missing")
+
+
+async def test_cprofile_rule_captures_matching_requests(kitchen):
+    profiler = kitchen.profiler
+    rule = profiler.add_rule(mode="cprofile", label="busy", metadata={"tenant": "a"}, count=1)
+
+    task = kitchen.chat.get_task("busy")
+    await task(chat_request("busy", metadata={"tenant": "b"}))
+    assert not profiler.captures
+
+    await task(chat_request("busy", metadata={"tenant": "a"}))
+    await task(chat_request("busy", metadata={"tenant": "a"}))
+    assert len(profiler.captures) == 1
+    assert not profiler.rules
+
+    capture = profiler.captures[0]
+    assert capture.rule_id == rule.id and capture.taxonomy == "chat"
+    assert capture.duration_ms >= 50
+    assert any(row["function"].startswith("spin ") for row in capture.top)
+    assert marshal.loads(capture.data)
+
+
+async def test_streaming_capture_ends_with_the_stream(kitchen):
+    profiler = kitchen.profiler
+    profiler.add_rule(mode="tracemalloc", label="stream")
+
+    stream = await kitchen.chat.get_task("stream")(chat_request("stream", stream=True))
+    assert not profiler.captures
+    chunks = [chunk async for chunk in stream]
+
+    assert len(chunks) == 3  # two words and the final usage chunk
+    assert len(profiler.captures) == 1
+    capture = profiler.captures[0]
+    assert capture.mode == "tracemalloc" and capture.error is None
+    assert capture.data is None
@@ -0,0 +1,81 @@
+from whisk.kitchenai_sdk.prompt import PromptBuilder, context_window
+from whisk.kitchenai_sdk.schema import Message, SourceNode
+from whisk.kitchenai_sdk.tokens import TokenCounter
+
+class WordTokenizer:
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+def make_builder(budget, **kwargs):
+    tokenizer = WordTokenizer()
+    counter = TokenCounter()
+    counter.register("", lambda model: tokenizer)
+    builder = PromptBuilder(model="test", max_context_tokens=budget, reserve_completion_tokens=0, counter=counter, **kwargs)
+    return builder, tokenizer
+
+def history(turns):
+    messages = []
+    for turn in range(turns):
+        messages.append(Message(role="user", content=f"question {turn} " + "word " * 20))
+        messages.append(Message(role="assistant", content=f"answer {turn} " + "word " * 20))
+    messages.append(Message(role="user", content="latest question"))
+    return messages
+
+def test_context_window_lookup():
+    assert context_window("gpt-4o-mini") == 128000
+    assert context_window("gpt-4") == 8192
+    assert context_window("unknown", default=4096) == 4096
+
+def test_old_history_is_dropped_to_fit_the_budget():
+    builder, _ = make_builder(200)
+    prompt = builder.build(history(10), system_prompt="Be brief.")
+
+    assert prompt.prompt_tokens <= 200
+    assert prompt.messages[0].content == "Be brief."
+    assert prompt.messages[-1].content == "latest question"
+    assert prompt.dropped_messages > 0
+    # The newest turns are the ones kept
+    assert prompt.messages[-2].content.startswith("answer 9")
+
+def test_sources_are_ranked_and_trimmed():
+    builder, _ = make_builder(120, context_share=0.5)
+    sources = [
+        SourceNode(text="low " * 10, metadata={}, score=0.1),
+        SourceNode(text="best " * 30, metadata={}, score=0.9),
+        SourceNode(text="second " * 40, metadata={}, score=0.5),
+    ]
+    prompt = builder.build([Message(role="user", content="q")], sources=sources)
+
+    assert [node.score for node in prompt.sources] == [0.9, 0.5]
+    assert prompt.sources[1].text.split() == ["second"] * len(prompt.sources[1].text.split())
+    assert len(prompt.sources[1].text.split()) < 40
+    assert prompt.dropped_sources == 1
+    assert prompt.context.startswith("Context:\nbest")
+    assert prompt.prompt_tokens <= 120
+
+def test_repeated_history_is_not_retokenized():
+    builder, tokenizer = make_builder(100000)
+    messages = history(20)
+    builder.build(messages)
+    calls = tokenizer.calls
+    builder.build(messages + [Message(role="assistant", content="new answer"), Message(role="user", content="next")])
+    assert tokenizer.calls - calls <= 6
+
+async def test_dropped_history_can_be_summarized():
+    async def summarize(messages):
+        return f"{len(messages)} earlier messages"
+
+    builder, _ = make_builder(150, summarize=summarize)
+    prompt = await builder.abuild(history(10))
+    assert prompt.summarized
+    assert prompt.messages[0].content.endswith(f"{prompt.dropped_messages} earlier messages")
+
+def test_oversized_latest_message_keeps_its_end():
+    builder, _ = make_builder(30)
+    prompt = builder.build([Message(role="user", content="filler " * 100 + "what is the answer?")])
+    assert prompt.messages[-1].content.endswith("what is the answer?")
+    assert prompt.prompt_tokens <= 30
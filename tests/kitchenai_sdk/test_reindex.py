@@ -0,0 +1,90 @@
+import os
+import pytest
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.ingestion import IngestionPipeline
+from whisk.kitchenai_sdk.reindex import IndexManifest, Reindexer
+from whisk.kitchenai_sdk.schema import StorageRequest, StorageResponse
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (root / name).write_text(f"contents of {name}")
+    return root
+
+async def test_sync_only_touches_changed_files(corpus, tmp_path):
+    ingested, deleted = [], []
+    pipeline = IngestionPipeline(parse_workers=0)
+
+    async def ingest(source):
+        ingested.append(source.metadata["path"])
+        return await pipeline.run([source])
+
+    async def delete(entry):
+        deleted.append((entry.path, entry.chunk_ids))
+
+    manifest_path = tmp_path / "manifest.json"
+    report = await Reindexer(corpus, manifest_path, ingest, delete).sync()
+    assert report.added == 3
+    assert sorted(ingested) == ["a.txt", "b.txt", "c.txt"]
+    assert all(entry.chunk_ids for entry in IndexManifest.load(manifest_path).files.values())
+
+    # Warm restart: nothing changed
+    ingested.clear()
+    report = await Reindexer(corpus, manifest_path, ingest, delete).sync()
+    assert report.unchanged == 3
+    assert ingested == []
+
+    # Touch without changing content, edit one, remove one, add one
+    stat = os.stat(corpus / "a.txt")
+    os.utime(corpus / "a.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    (corpus / "b.txt").write_text("new contents of b.txt, now longer")
+    old_c = IndexManifest.load(manifest_path).files["c.txt"].chunk_ids
+    (corpus / "c.txt").unlink()
+    (corpus / "d.txt").write_text("contents of d.txt")
+
+    report = await Reindexer(corpus, manifest_path, ingest, delete).sync()
+    assert (report.added, report.changed, report.removed, report.unchanged) == (1, 1, 1, 1)
+    assert sorted(ingested) == ["b.txt", "d.txt"]
+    assert ("c.txt", old_c) in deleted
+    assert [path for path, _ in deleted] == ["c.txt", "b.txt"]
+    assert sorted(IndexManifest.load(manifest_path).files) == ["a.txt", "b.txt", "d.txt"]
+
+async def test_failed_files_are_retried(corpus, tmp_path):
+    fail = {"b.txt"}
+
+    async def ingest(source):
+        if source.metadata["path"] in fail:
+            raise RuntimeError("embedding service down")
+
+    manifest_path = tmp_path / "manifest.json"
+    report = await Reindexer(corpus, manifest_path, ingest).sync()
+    assert report.added == 2
+    assert len(report.errors) == 1
+
+    fail.clear()
+    report = await Reindexer(corpus, manifest_path, ingest).sync()
+    assert report.added == 1
+    assert report.unchanged == 2
+
+async def test_for_storage_uses_handler_and_on_delete_hook(corpus, tmp_path):
+    kitchen = KitchenAIApp(namespace="test-reindex")
+    deleted = []
+
+    @kitchen.storage.handler("storage")
+    async def handle_storage(data: StorageRequest) -> StorageResponse:
+        return StorageResponse(file_id=f"file-{data.filename}", filename=data.filename)
+
+    @kitchen.storage.on_delete("storage")
+    async def handle_delete(data: StorageRequest):
+        deleted.append((data.file_id, data.metadata["path"]))
+
+    manifest_path = tmp_path / "manifest.json"
+    await Reindexer.for_storage(kitchen.storage, "storage", corpus, manifest_path).sync()
+    assert IndexManifest.load(manifest_path).files["a.txt"].file_id == "file-a.txt"
+
+    (corpus / "a.txt").unlink()
+    report = await Reindexer.for_storage(kitchen.storage, "storage", corpus, manifest_path).sync()
+    assert report.removed == 1
+    assert deleted == [("file-a.txt", "a.txt")]
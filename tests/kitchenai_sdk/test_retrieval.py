@@ -0,0 +1,113 @@
+import asyncio
+import time
+import pytest
+from whisk.kitchenai_sdk.retrieval import AsyncRetriever, FanOutRetriever, aretrieve
+from whisk.kitchenai_sdk.schema import SourceNode
+
+class SlowRetriever:
+    similarity_top_k = 2
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.calls = []
+
+    def retrieve(self, query):
+        self.calls.append(query)
+        time.sleep(self.delay)
+        return [query]
+
+class NativeRetriever:
+    def retrieve(self, query):
+        raise AssertionError("sync path should not be used")
+
+    async def aretrieve(self, query):
+        return [f"async:{query}"]
+
+class FakeIndex:
+    def as_retriever(self, similarity_top_k=2):
+        retriever = SlowRetriever(delay=0)
+        retriever.similarity_top_k = similarity_top_k
+        return retriever
+
+async def test_sync_retrieval_does_not_block_event_loop():
+    retriever = AsyncRetriever(SlowRetriever(delay=0.1))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(retriever.aretrieve(f"q{i}") for i in range(4)))
+    elapsed = time.perf_counter() - started
+    ticking.cancel()
+
+    assert results == [["q0"], ["q1"], ["q2"], ["q3"]]
+    assert elapsed < 0.3
+    assert ticks >= 5
+
+async def test_native_aretrieve_is_preferred():
+    assert await AsyncRetriever(NativeRetriever()).aretrieve("x") == ["async:x"]
+
+async def test_from_dependency_wraps_vector_stores():
+    retriever = AsyncRetriever.from_dependency(FakeIndex(), similarity_top_k=5)
+    assert retriever.similarity_top_k == 5
+    assert AsyncRetriever.from_dependency(retriever) is retriever
+    assert await aretrieve(FakeIndex(), "hello") == ["hello"]
+
+class StaticRetriever:
+    def __init__(self, nodes, delay=0.0):
+        self.nodes = nodes
+        self.delay = delay
+
+    async def aretrieve(self, query):
+        await asyncio.sleep(self.delay)
+        return self.nodes
+
+def node(text, score):
+    return SourceNode(text=text, metadata={}, score=score)
+
+async def test_fan_out_runs_sources_concurrently_and_fuses_with_rrf():
+    retriever = FanOutRetriever({
+        "lyft": StaticRetriever([node("shared", 0.9), node("lyft only", 0.8)], delay=0.1),
+        "uber": StaticRetriever([node("uber only", 0.95), node("shared", 0.7)], delay=0.1),
+    }, similarity_top_k=3)
+
+    started = time.perf_counter()
+    nodes = await retriever.aretrieve("rides")
+    assert time.perf_counter() - started < 0.19
+
+    assert nodes[0].text == "shared"
+    assert nodes[0].metadata["sources"] == ["lyft", "uber"]
+    assert {n.text for n in nodes[1:]} == {"lyft only", "uber only"}
+
+async def test_fan_out_drops_slow_and_failing_sources():
+    class Broken:
+        def retrieve(self, query):
+            raise RuntimeError("index offline")
+
+    retriever = FanOutRetriever({
+        "fast": StaticRetriever([node("fast", 0.5)]),
+        "slow": StaticRetriever([node("slow", 0.9)], delay=1),
+        "broken": Broken(),
+    }, timeouts={"slow": 0.05})
+
+    nodes = await retriever.aretrieve("q")
+    assert [n.text for n in nodes] == ["fast"]
+
+def test_score_fusion_normalizes_per_source():
+    retriever = FanOutRetriever({}, fusion="score", weights={"b": 2.0})
+    nodes = retriever.fuse({
+        "a": [node("x", 100.0), node("y", 50.0)],
+        "b": [node("y", 0.2), node("z", 0.1)],
+    })
+    assert [n.text for n in nodes] == ["y", "x", "z"]
+    assert nodes[0].score == pytest.approx(2.0)
+
+def test_fusion_leaves_caller_nodes_untouched():
+    hits = [node("x", 1.0)]
+    FanOutRetriever({}).fuse({"a": hits, "b": hits})
+    assert "sources" not in hits[0].metadata
@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.scheduler import PriorityScheduler, TaskClass, WeightedPool
+
+
+async def test_contended_slots_favor_interactive():
+    pool = WeightedPool(1)
+    order = []
+    release = asyncio.Event()
+
+    async def run(task_class, name):
+        async with pool.slot(task_class):
+            order.append(name)
+            await release.wait()
+
+    holder = asyncio.create_task(run(TaskClass.BATCH, "holder"))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(run(TaskClass.BATCH, f"batch-{i}")) for i in range(6)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(run(TaskClass.INTERACTIVE, "interactive")))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+
+    # The interactive request arrived last but doesn't wait for the whole batch queue
+    assert order.index("interactive") <= 2
+    assert pool.stats[TaskClass.BATCH].completed == 7
+    assert pool.stats[TaskClass.INTERACTIVE].completed == 1
+    assert pool.active == 0
+
+
+async def test_weights_share_contended_slots():
+    pool = WeightedPool(1, weights={TaskClass.INTERACTIVE: 3, TaskClass.BATCH: 1})
+    order = []
+    gate = asyncio.Event()
+
+    async def run(task_class):
+        async with pool.slot(task_class):
+            order.append(task_class)
+            await gate.wait()
+
+    holder = asyncio.create_task(run(TaskClass.BACKGROUND))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(run(task_class)) for task_class in [TaskClass.BATCH] * 4 + [TaskClass.INTERACTIVE] * 12]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+
+    granted = order[1:9]
+    assert granted.count(TaskClass.INTERACTIVE) == 6
+    assert granted.count(TaskClass.BATCH) == 2
+
+
+async def test_caps_bound_a_class():
+    pool = WeightedPool(4, caps={TaskClass.BATCH: 1})
+    gate = asyncio.Event()
+    running = []
+
+    async def run():
+        async with pool.slot(TaskClass.BATCH):
+            running.append(pool.stats[TaskClass.BATCH].running)
+            await gate.wait()
+
+    tasks = [asyncio.create_task(run()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert pool.stats[TaskClass.BATCH].running == 1
+    assert pool.stats[TaskClass.BATCH].queued == 2
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert max(running) == 1
+
+
+async def test_cancelled_waiter_frees_its_place():
+    pool = WeightedPool(1)
+    await pool.acquire(TaskClass.BATCH)
+    waiter = asyncio.create_task(pool.acquire(TaskClass.BATCH))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert pool.stats[TaskClass.BATCH].queued == 0
+    pool.release(TaskClass.BATCH)
+    assert pool.active == 0
+
+
+async def test_wrap_classifies_and_holds_slot_for_streams():
+    scheduler = PriorityScheduler(concurrency=2)
+    scheduler.assign("storage", "background", label="reindex")
+    assert scheduler.classify("storage", "reindex") == TaskClass.BACKGROUND
+    assert scheduler.classify("storage", "upload") == TaskClass.BATCH
+    assert scheduler.classify("chat") == TaskClass.INTERACTIVE
+
+    async def chat(request):
+        async def stream():
+            for word in ("a", "b"):
+                yield word
+        return stream()
+
+    stream = await scheduler.wrap("chat", "chat.completions", chat)(None)
+    assert scheduler.tasks.stats[TaskClass.INTERACTIVE].running == 1
+    assert [chunk async for chunk in stream] == ["a", "b"]
+    assert scheduler.tasks.stats[TaskClass.INTERACTIVE].running == 0
+
+    async def fail(request):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await scheduler.wrap("storage", "upload", fail)(None)
+    assert scheduler.metrics()["tasks"]["batch"].failed == 1
+
+
+async def test_long_batch_tasks_leave_slots_for_interactive():
+    scheduler = PriorityScheduler(concurrency=4)
+    done = asyncio.Event()
+
+    async def ingest(request):
+        await done.wait()
+
+    async def chat(request):
+        return "answer"
+
+    ingests = [asyncio.create_task(scheduler.wrap("storage", "upload", ingest)(i)) for i in range(8)]
+    await asyncio.sleep(0.01)
+    assert scheduler.tasks.stats[TaskClass.BATCH].running == 2
+    assert scheduler.tasks.stats[TaskClass.BATCH].queued == 6
+
+    # Answered while every batch task is still running
+    assert await asyncio.wait_for(scheduler.wrap("chat", "rag", chat)(None), 0.5) == "answer"
+    done.set()
+    await asyncio.gather(*ingests)
+    assert scheduler.tasks.stats[TaskClass.BATCH].completed == 8
+
+
+async def test_named_pool_uses_request_class():
+    kitchen = KitchenAIApp()
+    kitchen.scheduler.add_pool("llm", 1)
+    seen = []
+
+    async def handler(request):
+        async with kitchen.scheduler.pool("llm"):
+            seen.append(request)
+        return request
+
+    assert await kitchen.scheduler.wrap("storage", "upload", handler)("doc") == "doc"
+    assert kitchen.scheduler.metrics()["llm"]["batch"].completed == 1
+    # Unknown pools are a no-op
+    async with kitchen.scheduler.pool("missing"):
+        pass
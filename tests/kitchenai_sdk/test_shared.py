@@ -0,0 +1,60 @@
+import multiprocessing
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from whisk.kitchenai_sdk.base import DependencyManager
+from whisk.kitchenai_sdk.schema import DependencyType
+from whisk.kitchenai_sdk.shared import SharedArrays, attach_array
+
+builds = []
+
+def build_arrays():
+    builds.append(1)
+    return {"vectors": np.arange(12, dtype=np.float32).reshape(3, 4), "ids": np.array([7, 8, 9])}
+
+def make_manager():
+    manager = DependencyManager()
+    manager.register_shared(DependencyType.EMBEDDINGS, build_arrays, wrap=lambda arrays: (arrays["ids"], arrays["vectors"]))
+    return manager
+
+def _worker(queue):
+    builds.clear()
+    ids, vectors = make_manager().get_dependency(DependencyType.EMBEDDINGS)
+    queue.put((len(builds), ids.tolist(), float(vectors.sum()), vectors.flags.writeable))
+
+def test_without_a_parent_the_factory_builds_locally():
+    builds.clear()
+    ids, vectors = make_manager().get_dependency(DependencyType.EMBEDDINGS)
+    assert builds == [1]
+    assert ids.tolist() == [7, 8, 9]
+
+@pytest.mark.parametrize("backend", ["mmap", "shm"])
+def test_workers_attach_to_arrays_published_by_the_parent(backend, tmp_path):
+    manager = make_manager()
+    assert manager.shared_dependencies() == [DependencyType.EMBEDDINGS]
+    shared = manager.share_dependencies(backend=backend, directory=str(tmp_path))
+    try:
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        workers = [context.Process(target=_worker, args=(queue,)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        results = [queue.get(timeout=30) for _ in workers]
+        for worker in workers:
+            worker.join(10)
+    finally:
+        shared.close()
+
+    # Workers attached instead of building, and got read-only views
+    assert results == [(0, [7, 8, 9], 66.0, False)] * 2
+    assert not list(tmp_path.iterdir())
+
+def test_single_array_round_trip():
+    with SharedArrays(backend="shm") as shared:
+        spec = shared.publish("matrix", np.ones((2, 2)))
+        assert spec.single
+        view = attach_array(spec.arrays["array"])
+        assert view.sum() == 4
+        with pytest.raises(ValueError):
+            view[0, 0] = 2
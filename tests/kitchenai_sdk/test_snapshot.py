@@ -0,0 +1,73 @@
+import multiprocessing
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from whisk.kitchenai_sdk.snapshot import SnapshotStore, corpus_hash
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
+
+def embed(text):
+    vector = np.zeros(8, dtype=np.float32)
+    for token in text.split():
+        vector[hash(token) % 8] += 1
+    return vector
+
+TEXTS = ["paris is in france", "the eiffel tower is tall", "paris is the city of light"]
+
+def test_corpus_hash_is_order_independent_and_content_sensitive(tmp_path):
+    assert corpus_hash(TEXTS) == corpus_hash(list(reversed(TEXTS)))
+    assert corpus_hash(TEXTS) != corpus_hash(TEXTS[:2])
+
+    doc = tmp_path / "doc.txt"
+    doc.write_text("one")
+    before = corpus_hash(paths=[str(doc)])
+    assert corpus_hash(paths=[doc]) == before
+    assert corpus_hash([str(doc)]) != before
+    doc.write_text("two")
+    assert corpus_hash(paths=[doc]) != before
+    with pytest.raises(TypeError):
+        corpus_hash([doc])
+
+def test_load_or_build_builds_once_then_loads_read_only(tmp_path):
+    snapshots = SnapshotStore(tmp_path)
+    builds = []
+
+    def build():
+        builds.append(1)
+        store = NumpyVectorStore(embed_fn=embed, segment_size=2)
+        store.add_texts(TEXTS, metadatas=[{"n": i} for i in range(3)])
+        store.delete([store.query(embed(TEXTS[1]), top_k=1)[0].node.id])
+        return store
+
+    digest = corpus_hash(TEXTS)
+    first = snapshots.load_or_build(digest, "hash-8", build, embed_fn=embed)
+    second = snapshots.load_or_build(digest, "hash-8", build, embed_fn=embed)
+
+    assert builds == [1]
+    assert len(second) == 2
+    assert isinstance(second._segments[0].vectors, np.memmap)
+    assert second.as_retriever(similarity_top_k=1).retrieve("eiffel paris")[0].node.metadata["n"] in (0, 2)
+    assert snapshots.info(digest, "hash-8").count == 2
+    with pytest.raises(ValueError):
+        first.add(["x"], [embed("x")])
+
+    # A different embedding model is a different snapshot
+    assert snapshots.load(digest, "other-model") is None
+
+def _load_in_worker(root, digest, queue):
+    store = SnapshotStore(root).load(digest, "hash-8")
+    queue.put(len(store))
+
+def test_snapshot_is_shared_with_other_processes(tmp_path):
+    store = NumpyVectorStore(embed_fn=embed)
+    store.add_texts(TEXTS)
+    SnapshotStore(tmp_path).save(store, "corpus", "hash-8")
+    # Saving again (e.g. a racing worker) keeps the existing snapshot
+    SnapshotStore(tmp_path).save(store, "corpus", "hash-8")
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_load_in_worker, args=(str(tmp_path), "corpus", queue))
+    process.start()
+    process.join(30)
+    assert queue.get(timeout=5) == 3
@@ -0,0 +1,75 @@
+from whisk.kitchenai_sdk.http_schema import ChatCompletionRequest
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import ChatInput, ChatResponse
+from whisk.kitchenai_sdk.tokens import HeuristicTokenizer, TokenCounter, get_token_counter
+
+class CountingTokenizer:
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+def test_counts_are_cached_per_tokenizer():
+    tokenizer = CountingTokenizer()
+    counter = TokenCounter()
+    counter.register("word", lambda model: tokenizer)
+
+    history = [{"role": "user", "content": "a long question"}, {"role": "assistant", "content": "an answer"}]
+    first = counter.count_messages(history, "word-model")
+    calls = tokenizer.calls
+    assert counter.count_messages(history, "word-model") == first
+    assert tokenizer.calls == calls
+    # 3 reply + 2 * 3 overhead + role and content words
+    assert first == 3 + 6 + (1 + 3) + (1 + 2)
+
+def test_streaming_counts_match_whole_text():
+    counter = TokenCounter()
+    counter.register("", lambda model: HeuristicTokenizer())
+    text = " ".join(["Streaming responses are counted incrementally without re-tokenizing the whole completion"] * 20)
+    usage = counter.stream("m", prompt_tokens=5)
+    for start in range(0, len(text), 7):
+        usage.add(text[start:start + 7])
+    result = usage.finish()
+    assert result["prompt_tokens"] == 5
+    assert abs(result["completion_tokens"] - counter.count(text, "m")) <= 10
+    assert result["total_tokens"] == 5 + result["completion_tokens"]
+
+def request(stream=False):
+    return ChatCompletionRequest(model="@test/chat", messages=[{"role": "user", "content": "How tall is the Eiffel Tower?"}], stream=stream)
+
+async def test_chat_responses_get_usage_and_handlers_are_aggregated():
+    kitchen = KitchenAIApp(namespace="test")
+
+    @kitchen.chat.handler("chat")
+    async def chat(chat: ChatInput) -> ChatResponse:
+        return ChatResponse(content="It is 324 meters tall.")
+
+    @kitchen.chat.handler("reported")
+    async def reported(chat: ChatInput) -> ChatResponse:
+        return ChatResponse(content="ok", usage={"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11})
+
+    response = await kitchen.chat.get_task("chat")(request())
+    counter = get_token_counter()
+    assert response.usage["prompt_tokens"] == counter.count_messages(request().messages, "@test/chat")
+    assert response.usage["completion_tokens"] == counter.count("It is 324 meters tall.", "@test/chat")
+
+    assert (await kitchen.chat.get_task("reported")(request())).usage["total_tokens"] == 11
+    await kitchen.chat.get_task("chat")(request())
+    assert kitchen.chat.usage.get("chat").requests == 2
+    assert kitchen.chat.usage.get("reported").total_tokens == 11
+
+async def test_streamed_chat_reports_usage_in_final_chunk():
+    kitchen = KitchenAIApp(namespace="test")
+
+    @kitchen.chat.handler("chat")
+    async def chat(chat: ChatInput):
+        for word in ["It ", "is ", "324 ", "meters ", "tall."]:
+            yield ChatResponse(content=word)
+
+    chunks = [chunk async for chunk in await kitchen.chat.get_task("chat")(request(stream=True))]
+    usage = chunks[-1]["usage"]
+    assert usage["completion_tokens"] > 0
+    assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+    assert kitchen.chat.usage.get("chat").total_tokens == usage["total_tokens"]
@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
+from whisk.config import VectorStoreConfig
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import DependencyType
+
+def exact_top_k(matrix, query, k):
+    matrix = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    query = query / np.linalg.norm(query)
+    return list(np.argsort(-(matrix @ query))[:k])
+
+def test_query_matches_brute_force_across_segments():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    store = NumpyVectorStore(dim=16, segment_size=128, auto_compact=False)
+    for start in range(0, 500, 100):
+        store.add([str(i) for i in range(start, start + 100)], vectors[start:start + 100])
+
+    assert len(store._segments) == 2
+    assert len(store) == 500
+    query = rng.standard_normal(16)
+    hits = store.query(query, top_k=5)
+    assert [int(hit.node.id) for hit in hits] == exact_top_k(vectors, query, 5)
+    assert hits[0].score >= hits[-1].score
+
+def test_metadata_filters_and_deletes():
+    store = NumpyVectorStore(dim=2, metric="dot")
+    store.add(
+        ["a", "b", "c"],
+        [[1, 0], [0.9, 0], [0.8, 0]],
+        texts=["A", "B", "C"],
+        metadatas=[{"source": "x"}, {"source": "y"}, {"source": "x"}]
+    )
+
+    assert [hit.node.id for hit in store.query([1, 0], top_k=3, filters={"source": "x"})] == ["a", "c"]
+    assert [hit.node.id for hit in store.query([1, 0], top_k=3, filters={"source": ["y", "z"]})] == ["b"]
+
+    assert store.delete(["a"]) == 1
+    assert [hit.node.id for hit in store.query([1, 0], top_k=3)] == ["b", "c"]
+    assert len(store) == 2
+
+def test_upsert_replaces_existing_id():
+    store = NumpyVectorStore(dim=2, segment_size=1)
+    store.add(["a"], [[1, 0]], texts=["old"])
+    store.add(["a"], [[0, 1]], texts=["new"])
+
+    assert len(store) == 1
+    assert store.get("a").text == "new"
+    assert store.query([0, 1], top_k=1)[0].node.text == "new"
+
+def test_persistence_memory_maps_segments(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((50, 8)).astype(np.float32)
+    store = NumpyVectorStore(path=str(tmp_path), segment_size=20, auto_compact=False)
+    store.add([str(i) for i in range(50)], vectors, metadatas=[{"n": i} for i in range(50)])
+    store.flush()
+    store.delete(["3"])
+
+    reopened = NumpyVectorStore(path=str(tmp_path))
+    assert isinstance(reopened._segments[0].vectors, np.memmap)
+    assert len(reopened) == 49
+    assert reopened.get("3") is None
+    assert reopened.get("4").metadata == {"n": 4}
+    query = vectors[7]
+    assert reopened.query(query, top_k=1)[0].node.id == "7"
+
+def test_app_close_flushes_buffered_vectors(tmp_path):
+    store = NumpyVectorStore(path=str(tmp_path), dim=2)
+    store.add(["a", "b"], [[1, 0], [0, 1]])
+    kitchen = KitchenAIApp()
+    kitchen.manager.register_dependency(DependencyType.VECTOR_STORE, store)
+    kitchen.close()
+
+    reopened = NumpyVectorStore(path=str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.query([0, 1], top_k=1)[0].node.id == "b"
+
+def test_compaction_drops_tombstones(tmp_path):
+    store = NumpyVectorStore(path=str(tmp_path), dim=4, segment_size=10, max_segments=2)
+    rng = np.random.default_rng(2)
+    store.add([str(i) for i in range(25)], rng.standard_normal((25, 4)))
+    store.delete(["0", "11"])
+    store.flush()
+    if store._compaction:
+        store._compaction.join()
+    store.compact()
+
+    assert len(store._segments) == 1
+    assert len(store._segments[0]) == 23
+    assert len(list(tmp_path.glob("seg-*.npy"))) == 1
+    assert len(NumpyVectorStore(path=str(tmp_path))) == 23
+
+def test_retriever_uses_embed_fn():
+    embeddings = {"cats": [1, 0], "dogs": [0, 1]}
+    store = NumpyVectorStore.from_config(VectorStoreConfig(path=None), embed_fn=lambda text: embeddings[text])
+    store.add_texts(["cats", "dogs"], metadatas=[{"kind": "cat"}, {"kind": "dog"}])
+
+    nodes = store.as_retriever(similarity_top_k=1).retrieve("dogs")
+    assert nodes[0].node.text == "dogs"
+    assert nodes[0].to_source_node().metadata == {"kind": "dog"}
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import httpx
+from whisk.admission import AdmissionMiddleware, ConcurrencyLimiter, TokenBucket, _Bounded
+from whisk.config import AdmissionConfig, RateLimitConfig, WhiskConfig
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.router import WhiskRouter
+
+
+def make_app(delay: float = 0.0):
+    """Bare ASGI app echoing the request body after `delay`"""
+    async def app(scope, receive, send):
+        message = await receive()
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": message.get("body", b"")})
+    return app
+
+
+def client_for(app, config: AdmissionConfig) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=AdmissionMiddleware(app, config)), base_url="http://test")
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=1000, burst=2)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
+
+
+async def test_rate_limit_is_per_client():
+    config = AdmissionConfig(enabled=True, client=RateLimitConfig(rate=0.01, burst=2))
+    async with client_for(make_app(), config) as client:
+        statuses = [(await client.get("/v1/models", headers={"x-api-key": "noisy"})).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        response = await client.get("/v1/models", headers={"x-api-key": "noisy"})
+        assert int(response.headers["retry-after"]) >= 1
+        assert response.json()["error"]["type"] == "rate_limit_exceeded"
+        # Another key (or a bearer token) has its own bucket
+        assert (await client.get("/v1/models", headers={"authorization": "Bearer quiet"})).status_code == 200
+
+
+async def test_client_overrides():
+    config = AdmissionConfig(
+        enabled=True,
+        client=RateLimitConfig(rate=0.01, burst=1),
+        clients={"premium": RateLimitConfig(rate=0.01, burst=5)}
+    )
+    async with client_for(make_app(), config) as client:
+        statuses = [(await client.get("/", headers={"x-api-key": "premium"})).status_code for _ in range(5)]
+        assert statuses == [200] * 5
+
+
+async def test_chat_body_is_replayed_and_keyed_by_model():
+    config = AdmissionConfig(enabled=True, handlers={"slow-model": RateLimitConfig(rate=0.01, burst=1)})
+    body = {"model": "@whisk/slow-model", "messages": [{"role": "user", "content": "hi"}]}
+    async with client_for(make_app(), config) as client:
+        first = await client.post("/v1/chat/completions", json=body)
+        assert first.status_code == 200
+        assert json.loads(first.content) == body
+        assert (await client.post("/v1/chat/completions", json=body)).status_code == 429
+        other = {**body, "model": "@whisk/fast-model"}
+        assert (await client.post("/v1/chat/completions", json=other)).status_code == 200
+
+
+async def test_unknown_models_share_the_default_bucket():
+    config = AdmissionConfig(enabled=True, handler=RateLimitConfig(rate=0.01, burst=2))
+    middleware = AdmissionMiddleware(make_app(), config, known_handlers=lambda: {"rag"})
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test") as client:
+        statuses = [
+            (await client.post("/v1/chat/completions", json={"model": f"@whisk/made-up-{i}"})).status_code
+            for i in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+        assert (await client.get("/v1/files/file-123")).status_code == 429
+        # Registered labels keep their own bucket
+        assert (await client.post("/v1/chat/completions", json={"model": "@whisk/rag"})).status_code == 200
+    assert set(middleware._handler_buckets) == {"default", "rag"}
+
+
+def test_busy_client_limiters_are_not_evicted():
+    limiters = _Bounded(1, busy=lambda limiter: limiter.active)
+    busy = limiters.get_or_create("a", lambda: ConcurrencyLimiter(1))
+    assert busy.try_acquire()
+    limiters.get_or_create("b", lambda: ConcurrencyLimiter(1))
+    assert limiters["a"] is busy
+    busy.release()
+    limiters.get_or_create("c", lambda: ConcurrencyLimiter(1))
+    assert "a" not in limiters
+
+
+async def test_concurrency_cap_sheds_past_slo():
+    config = AdmissionConfig(
+        enabled=True,
+        handler=RateLimitConfig(max_concurrency=1),
+        latency_slo_ms=50
+    )
+    async with client_for(make_app(delay=0.2), config) as client:
+        responses = await asyncio.gather(*(client.get("/work") for _ in range(3)))
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 503, 503]
+
+
+async def test_concurrency_cap_queues_within_slo():
+    config = AdmissionConfig(enabled=True, handler=RateLimitConfig(max_concurrency=1), latency_slo_ms=1000)
+    async with client_for(make_app(delay=0.02), config) as client:
+        responses = await asyncio.gather(*(client.get("/work") for _ in range(4)))
+    assert [response.status_code for response in responses] == [200] * 4
+
+
+async def test_limiter_hands_slots_over_in_order():
+    limiter = ConcurrencyLimiter(1)
+    assert await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire(timeout=1))
+    await asyncio.sleep(0)
+    assert limiter.waiting == 1
+    limiter.release(0.01)
+    assert await waiter
+    assert limiter.active == 1
+    assert not await limiter.acquire(timeout=0.01)
+    assert limiter.waiting == 0
+    limiter.release()
+    assert limiter.active == 0
+
+
+def test_router_installs_middleware_when_enabled():
+    config = WhiskConfig(client={"id": "test"}, admission={"enabled": True})
+    router = WhiskRouter(KitchenAIApp(), config)
+    assert any(middleware.cls is AdmissionMiddleware for middleware in router.app.user_middleware)
@@ -0,0 +1,65 @@
+import asyncio
+import httpx
+from faststream.nats import TestNatsBroker
+from whisk.bench import (
+    BENCH_WORKER_ID,
+    HTTP_SCENARIOS,
+    StorageWaiter,
+    http_calls,
+    nats_calls,
+    run_load,
+    synthetic_kitchen,
+)
+from whisk.client import WhiskClient
+from whisk.config import WhiskConfig, ServerConfig
+from whisk.http_client import WhiskHTTPClient
+from whisk.router import WhiskRouter
+
+
+async def test_run_load_reports_percentiles_and_errors():
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        n = calls
+        await asyncio.sleep(0.001)
+        if n % 5 == 0:
+            raise RuntimeError("boom")
+        return 0.0005
+
+    result = await run_load("http", "fake", call, concurrency=4, requests=20)
+    assert calls == 20
+    assert result.errors == 4
+    assert result.first_error == "RuntimeError: boom"
+    assert result.p50_ms <= result.p95_ms <= result.p99_ms
+    assert result.ttft_p50_ms == 0.5
+    assert result.throughput_rps > 0
+
+
+async def test_http_scenarios():
+    kitchen = synthetic_kitchen(latency_ms=1, cpu_ms=1, tokens=3, token_interval_ms=0)
+    router = WhiskRouter(kitchen_app=kitchen, config=WhiskConfig(server=ServerConfig(type="fastapi")))
+    async with WhiskHTTPClient(transport=httpx.ASGITransport(app=router.app), http2=False, retries=0) as client:
+        calls = http_calls(client, kitchen)
+        for scenario in HTTP_SCENARIOS:
+            result = await run_load("http", scenario, calls[scenario], concurrency=2, requests=4)
+            assert result.errors == 0, result.first_error
+            assert (result.ttft_p50_ms is not None) == (scenario == "chat-stream")
+
+
+async def test_nats_scenarios(monkeypatch):
+    kitchen = synthetic_kitchen(latency_ms=1)
+    worker = WhiskClient(client_id=BENCH_WORKER_ID, kitchen=kitchen)
+    waiter = StorageWaiter(worker.broker, BENCH_WORKER_ID, "http://files/bench.bin")
+
+    async def download(url):
+        return b"payload"
+
+    monkeypatch.setattr(worker, "_download", download)
+    async with TestNatsBroker(worker.broker):
+        calls = nats_calls(worker, kitchen, waiter, timeout=5)
+        for scenario in ("query", "storage"):
+            result = await run_load("nats", scenario, calls[scenario], concurrency=2, requests=4)
+            assert result.errors == 0, result.first_error
+    assert result.ttft_p50_ms is not None
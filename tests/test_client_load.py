@@ -0,0 +1,55 @@
+from faststream.nats import TestNatsBroker
+from whisk.client import WhiskClient
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.nats_schema import StorageRequestMessage
+from whisk.kitchenai_sdk.schema import WhiskStorageResponseSchema
+
+
+async def test_heartbeat_reports_load():
+    """Test heartbeats carry the worker's load and feed the dispatcher"""
+    worker = WhiskClient(client_id="worker-a", kitchen=KitchenAIApp())
+    worker.load.begin("storage")
+
+    async with TestNatsBroker(worker.broker):
+        report = await worker.heartbeat("worker-a")
+
+    assert report.inflight == {"storage": 1}
+    assert not report.draining
+    assert "worker-a" in worker.dispatcher.reports
+
+
+async def test_heartbeat_failure_is_forgotten():
+    """Test unreachable workers lose their report instead of keeping a stale one"""
+    worker = WhiskClient(client_id="worker-a", kitchen=KitchenAIApp())
+    async with TestNatsBroker(worker.broker):
+        assert await worker.heartbeat("worker-missing", timeout=0.1) is None
+    assert "worker-missing" not in worker.dispatcher.reports
+
+
+async def test_storage_request_is_counted_once(monkeypatch):
+    """Test a NATS storage request counts as one request in load reports"""
+    kitchen = KitchenAIApp()
+
+    @kitchen.storage.handler("storage")
+    async def storage_handler(data):
+        return WhiskStorageResponseSchema(id=data.id, name=data.name)
+
+    worker = WhiskClient(client_id="worker-a", kitchen=kitchen)
+
+    async def process(msg, task, logger):
+        return WhiskStorageResponseSchema(id=msg.id, name=msg.name)
+
+    monkeypatch.setattr(worker, "_process_storage", process)
+    async with TestNatsBroker(worker.broker) as broker:
+        await broker.publish(
+            StorageRequestMessage(
+                id=1, name="doc.txt", label="storage", request_id="req-1", timestamp=0.0, client_id="worker-a"
+            ),
+            "kitchenai.service.worker-a.storage.storage",
+        )
+        for job in kitchen.jobs.list_jobs():
+            await kitchen.jobs.wait(job.id)
+
+    report = worker.load_report()
+    assert report.requests == 1
+    assert report.inflight == {}
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import pytest
+from whisk.client import BUSY_ERROR, DRAIN_ERROR, WhiskClient
+from whisk.kitchenai_sdk.jobs import report_progress
+from whisk.kitchenai_sdk.nats_schema import StorageRequestMessage
+from whisk.kitchenai_sdk.schema import WhiskStorageResponseSchema, WhiskStorageStatus
+
+class FakeNatsResponse:
+    """Minimal stand-in for a faststream request reply"""
+    def __init__(self, body):
+        self.body = b""
+        self.headers = {}
+        self.content_type = "application/json"
+        self.correlation_id = "corr"
+        self.reply_to = None
+        self.message_id = "msg"
+        self._decoded_body = body
+        self.raw_message = type("Raw", (), {"subject": "reply"})()
+
+@pytest.fixture
+def storage_client(kitchen_app, monkeypatch):
+    client = WhiskClient(client_id="test_client", kitchen=kitchen_app)
+    published = []
+
+    async def publish(message, subject):
+        published.append((subject, message))
+
+    async def request(message, subject):
+        return FakeNatsResponse({
+            "request_id": message.request_id,
+            "timestamp": 0.0,
+            "label": message.label,
+            "client_id": message.client_id,
+            "presigned_url": "http://files/doc.txt",
+        })
+
+    async def download(url):
+        report_progress("download", bytes_downloaded=9)
+        return b"test data"
+
+    monkeypatch.setattr(client.broker, "publish", publish)
+    monkeypatch.setattr(client.broker, "request", request)
+    monkeypatch.setattr(client, "_download", download)
+    client.published = published
+    return client
+
+def storage_message():
+    return StorageRequestMessage(
+        id=1,
+        name="doc.txt",
+        label="storage",
+        request_id="req-1",
+        timestamp=0.0,
+        client_id="test_client",
+        metadata={"source": "test"},
+    )
+
+async def test_storage_runs_as_background_job(storage_client, kitchen_app):
+    """Test storage requests are acked, run as jobs and report progress"""
+    msg = storage_message()
+    await storage_client._handle_storage(msg, logger=logging.getLogger())
+
+    subject, ack = storage_client.published[0]
+    assert subject == "kitchenai.service.test_client.storage.storage.response"
+    assert ack.status == WhiskStorageStatus.ACK
+    job_id = ack.metadata["job_id"]
+
+    job = await kitchen_app.jobs.wait(job_id)
+    await asyncio.sleep(0)
+    statuses = [message.status for _, message in storage_client.published]
+    assert statuses[-1] == WhiskStorageStatus.COMPLETE
+    assert job.progress["download"]["bytes_downloaded"] == 9
+
+async def test_storage_job_error(storage_client, kitchen_app):
+    """Test handler failures publish an error status"""
+    @kitchen_app.storage.handler("storage")
+    async def failing_handler(data):
+        raise ValueError("parse failed")
+
+    await storage_client._handle_storage(storage_message(), logger=logging.getLogger())
+    job_id = storage_client.published[0][1].metadata["job_id"]
+    await kitchen_app.jobs.wait(job_id)
+
+    final = storage_client.published[-1][1]
+    assert final.status == WhiskStorageStatus.ERROR
+    assert final.error == "parse failed"
+
+async def test_drain_waits_for_storage_jobs(storage_client, kitchen_app):
+    """Test draining lets running storage jobs finish and publish their status"""
+    @kitchen_app.storage.handler("storage")
+    async def slow_handler(data):
+        await asyncio.sleep(0.05)
+        return WhiskStorageResponseSchema(id=data.id, name=data.name, status=WhiskStorageStatus.COMPLETE)
+
+    await storage_client._handle_storage(storage_message(), logger=logging.getLogger())
+    assert await storage_client.drain(timeout=2)
+    assert storage_client.draining
+    assert storage_client.published[-1][1].status == WhiskStorageStatus.COMPLETE
+
+async def test_drain_deadline_publishes_final_error(storage_client, kitchen_app):
+    """Test jobs still running at the drain deadline are cancelled with an error status"""
+    @kitchen_app.storage.handler("storage")
+    async def stuck_handler(data):
+        await asyncio.sleep(10)
+
+    await storage_client._handle_storage(storage_message(), logger=logging.getLogger())
+    job_id = storage_client.published[0][1].metadata["job_id"]
+    await asyncio.sleep(0.01)
+    assert not await storage_client.drain(timeout=0.05)
+
+    final = storage_client.published[-1][1]
+    assert final.status == WhiskStorageStatus.ERROR
+    assert final.error == DRAIN_ERROR
+    assert kitchen_app.jobs.get(job_id).status == "error"
+
+async def test_draining_rejects_new_storage_requests(storage_client, kitchen_app):
+    """Test a draining worker answers storage requests with the drain error instead of queueing them"""
+    storage_client._storage_slots = asyncio.Semaphore(0)
+    storage_client.draining = True
+
+    await asyncio.wait_for(storage_client._handle_storage(storage_message(), logger=logging.getLogger()), 1)
+    assert [message.status for _, message in storage_client.published] == [WhiskStorageStatus.ERROR]
+    assert storage_client.published[-1][1].error == DRAIN_ERROR
+    assert not storage_client._storage_jobs
+
+async def test_reload_swaps_app_on_live_client(storage_client, kitchen_app):
+    """Test reload routes new messages to the new app while old work finishes"""
+    from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+    calls = []
+
+    @kitchen_app.storage.handler("storage")
+    async def old_handler(data):
+        await asyncio.sleep(0.05)
+        calls.append("old")
+        return WhiskStorageResponseSchema(id=data.id, name=data.name, status=WhiskStorageStatus.COMPLETE)
+
+    new_app = KitchenAIApp()
+
+    @new_app.storage.handler("storage")
+    async def new_handler(data):
+        calls.append("new")
+        return WhiskStorageResponseSchema(id=data.id, name=data.name, status=WhiskStorageStatus.COMPLETE)
+
+    await storage_client._handle_storage(storage_message(), logger=logging.getLogger())
+    await asyncio.sleep(0.01)
+    assert await storage_client.reload(new_app, timeout=2)
+    assert storage_client.kitchen is new_app
+    assert calls == ["old"]
+
+    await storage_client._handle_storage(storage_message(), logger=logging.getLogger())
+    job_id = storage_client.published[-1][1].metadata["job_id"]
+    await new_app.jobs.wait(job_id)
+    assert calls == ["old", "new"]
+
+async def test_storage_jobs_are_bounded(storage_client, kitchen_app):
+    """Test storage requests beyond the job slots are turned away as busy"""
+    storage_client._storage_slots = asyncio.Semaphore(1)
+    release = asyncio.Event()
+
+    @kitchen_app.storage.handler("storage")
+    async def blocked_handler(data):
+        await release.wait()
+        return WhiskStorageResponseSchema(id=data.id, name=data.name, status=WhiskStorageStatus.COMPLETE)
+
+    await storage_client._handle_storage(storage_message(), logger=logging.getLogger())
+    await asyncio.wait_for(storage_client._handle_storage(storage_message(), logger=logging.getLogger()), 1)
+    statuses = [message.status for _, message in storage_client.published]
+    assert statuses.count(WhiskStorageStatus.ACK) == 1
+    assert storage_client.published[-1][1].status == WhiskStorageStatus.ERROR
+    assert storage_client.published[-1][1].error == BUSY_ERROR
+
+    release.set()
+    acks = [message for _, message in storage_client.published if message.status == WhiskStorageStatus.ACK]
+    await kitchen_app.jobs.wait(acks[0].metadata["job_id"])
+    await storage_client._handle_storage(storage_message(), logger=logging.getLogger())
+    acks = [message for _, message in storage_client.published if message.status == WhiskStorageStatus.ACK]
+    assert len(acks) == 2
+    await kitchen_app.jobs.wait(acks[1].metadata["job_id"])
@@ -0,0 +1,78 @@
+import pytest
+from nats.errors import ConnectionClosedError
+from whisk.config import NatsConfig
+from whisk.connection import ConnectionManager, backoff_delay
+
+
+class FakeBroker:
+    def __init__(self):
+        self.published = []
+        self.fail = False
+        self._connection = type("Conn", (), {"options": {"reconnect_time_wait": 0.5}})()
+
+    async def publish(self, message, subject):
+        if self.fail:
+            raise ConnectionClosedError()
+        self.published.append((subject, message))
+
+
+@pytest.fixture
+def manager():
+    manager = ConnectionManager(NatsConfig(outbox_size=3, reconnect_jitter=0))
+    manager.bind(FakeBroker())
+    return manager
+
+
+def test_backoff_grows_and_caps():
+    delays = [backoff_delay(attempt, 0.5, 4.0) for attempt in range(6)]
+    assert delays == [0.5, 1.0, 2.0, 4.0, 4.0, 4.0]
+    assert 0.4 <= backoff_delay(0, 0.5, 4.0, jitter=0.2) <= 0.6
+
+
+def test_broker_options_carry_policy(manager):
+    options = manager.broker_options()
+    assert options["ping_interval"] == 20
+    assert options["reconnect_time_wait"] == 0.5
+    assert options["max_reconnect_attempts"] == -1
+    assert options["disconnected_cb"] == manager._on_disconnected
+
+
+async def test_publishes_buffer_while_disconnected_and_flush_in_order(manager):
+    await manager.publish("a", "s")
+    await manager._on_disconnected()
+    await manager.publish("b", "s")
+    await manager.publish("c", "s")
+    assert manager._broker.published == [("s", "a")]
+    assert manager.stats.buffered == 2
+
+    await manager._on_reconnected()
+    await manager._flushing
+    assert manager._broker.published == [("s", "a"), ("s", "b"), ("s", "c")]
+    assert manager.stats.flushed == 2
+    assert manager.stats.buffered == 0
+    assert manager.stats.disconnects == 1
+    assert manager.stats.reconnects == 1
+
+
+async def test_failed_publish_is_buffered_and_oldest_dropped(manager):
+    manager._broker.fail = True
+    for message in "abcde":
+        await manager.publish(message, "s")
+    assert manager.stats.dropped == 2
+    assert manager.stats.buffered == 3
+
+    manager._broker.fail = False
+    assert await manager.flush() == 3
+    assert [message for _, message in manager._broker.published] == ["c", "d", "e"]
+
+
+async def test_failed_reconnect_attempts_back_off(manager):
+    options = manager._broker._connection.options
+    await manager._on_disconnected()
+    for _ in range(3):
+        await manager._on_error(ConnectionRefusedError())
+    assert options["reconnect_time_wait"] == 2.0
+    assert manager.stats.reconnect_attempts == 3
+
+    await manager._on_reconnected()
+    assert options["reconnect_time_wait"] == 0.5
@@ -39,4 +39,79 @@ async def test_multiple_dependencies(kitchen_app, mock_llm, mock_vector_store):
     async def handle_chat(request, llm=None, vector_store=None):
         assert llm == mock_llm
         assert vector_store == mock_vector_store
-        return {"response": "test"} 
\ No newline at end of file
+        return {"response": "test"} 
+
+def test_dependency_factory_is_built_once_on_first_use():
+    manager = DependencyManager()
+    calls = []
+
+    def build_llm():
+        calls.append(1)
+        return object()
+
+    manager.register_factory(DependencyType.LLM, build_llm)
+    assert manager.has_dependency(DependencyType.LLM)
+    assert manager.pending_dependencies() == [DependencyType.LLM]
+    assert calls == []
+
+    llm = manager.get_dependency(DependencyType.LLM)
+    assert manager.get_dependency(DependencyType.LLM) is llm
+    assert calls == [1]
+    assert manager.pending_dependencies() == []
+
+@pytest.mark.asyncio
+async def test_dependency_warmup_builds_in_parallel():
+    import threading
+    manager = DependencyManager()
+    barrier = threading.Barrier(2, timeout=2)
+
+    def slow_factory(value):
+        def build():
+            barrier.wait()  # Only passes if both factories run at the same time
+            return value
+        return build
+
+    def broken():
+        raise RuntimeError("no credentials")
+
+    manager.register_factory(DependencyType.LLM, slow_factory("llm"))
+    manager.register_factory(DependencyType.VECTOR_STORE, slow_factory("store"))
+    manager.register_factory(DependencyType.EMBEDDINGS, broken)
+    await manager.warmup()
+
+    assert manager.list_dependencies() == {DependencyType.LLM: "llm", DependencyType.VECTOR_STORE: "store"}
+    assert manager.pending_dependencies() == [DependencyType.EMBEDDINGS]
+    with pytest.raises(RuntimeError):
+        manager.get_dependency(DependencyType.EMBEDDINGS)
+
+@pytest.mark.asyncio
+async def test_lazy_dependency_injection(kitchen_app, mock_llm):
+    kitchen_app.register_factory(DependencyType.LLM, lambda: mock_llm)
+
+    @kitchen_app.chat.handler("test", DependencyType.LLM)
+    async def test_handler(request, llm=None):
+        assert llm == mock_llm
+        return {"response": "test"}
+
+    await kitchen_app.chat.get_task("test")(ChatCompletionRequest(
+        messages=[{"role": "user", "content": "test"}],
+        model="test"
+    ))
+
+@pytest.mark.asyncio
+async def test_lazy_dependency_builds_off_the_event_loop(kitchen_app):
+    import threading
+    built_on = []
+
+    def build_embeddings():
+        built_on.append(threading.current_thread())
+        return "embeddings"
+
+    kitchen_app.register_factory(DependencyType.EMBEDDINGS, build_embeddings)
+
+    @kitchen_app.storage.handler("test", DependencyType.EMBEDDINGS)
+    async def handle_storage(data, embeddings=None):
+        return embeddings
+
+    assert await kitchen_app.storage.get_task("test")(None) == "embeddings"
+    assert built_on and built_on[0] is not threading.current_thread()
@@ -0,0 +1,87 @@
+import httpx
+import pytest
+from whisk.config import WhiskConfig, ServerConfig
+from whisk.http_client import WhiskHTTPClient, WhiskHTTPError, iter_sse
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import ChatInput, ChatResponse, StorageRequest, StorageResponse
+from whisk.router import WhiskRouter
+
+
+@pytest.fixture
+def whisk():
+    kitchen = KitchenAIApp(namespace="test-http", version="0.0.1")
+    stored = []
+
+    @kitchen.chat.handler("chat")
+    async def chat(chat: ChatInput) -> ChatResponse:
+        return ChatResponse(content=f"echo: {chat.messages[-1].content}")
+
+    @kitchen.chat.handler("stream")
+    async def stream(chat: ChatInput):
+        for word in ["Hello", "world"]:
+            yield ChatResponse(content=word)
+
+    @kitchen.storage.handler("storage")
+    async def storage(data: StorageRequest) -> StorageResponse:
+        stored.append((data.filename, data.content, data.metadata))
+        return StorageResponse(file_id=f"{len(stored)}", filename=data.filename)
+
+    router = WhiskRouter(kitchen_app=kitchen, config=WhiskConfig(server=ServerConfig(type="fastapi")))
+    client = WhiskHTTPClient(transport=httpx.ASGITransport(app=router.app), http2=False)
+    client.stored = stored
+    return client
+
+
+async def test_models_and_chat(whisk):
+    models = await whisk.models()
+    assert "@test-http-0.0.1/chat" in [model.id for model in models.data]
+
+    response = await whisk.chat("hi", model="@test-http-0.0.1/chat")
+    assert response.choices[0].message.content == "echo: hi"
+
+
+async def test_stream_chat_parses_chunks(whisk):
+    chunks = [chunk async for chunk in whisk.stream_chat("hi", model="@test-http-0.0.1/stream")]
+    assert "".join(chunk.choices[0].delta.content or "" for chunk in chunks) == "Helloworld"
+    assert chunks[-1].usage["completion_tokens"] > 0
+
+
+async def test_upload_many_keeps_order(whisk, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"from disk")
+    files = await whisk.upload_many(
+        [path, ("b.txt", b"in memory")],
+        model="@test-http-0.0.1/storage",
+        metadata={"source": "test"}
+    )
+    assert [file.filename for file in files] == ["a.txt", "b.txt"]
+    assert sorted(whisk.stored)[0][:2] == ("a.txt", b"from disk")
+    assert whisk.stored[0][2]["source"] == "test"
+
+
+async def test_retries_turned_away_requests():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"object": "list", "data": []})
+
+    async with WhiskHTTPClient(transport=httpx.MockTransport(handler), http2=False) as whisk:
+        assert (await whisk.models()).data == []
+    assert len(calls) == 3
+
+    async with WhiskHTTPClient(transport=httpx.MockTransport(handler), http2=False, retries=0) as whisk:
+        calls.clear()
+        with pytest.raises(WhiskHTTPError) as error:
+            await whisk.models()
+    assert error.value.status_code == 503
+
+
+async def test_iter_sse_handles_multiline_and_done():
+    async def lines():
+        for line in [": keepalive", "data: {\"a\":", "data: 1}", "", "data: [DONE]", "", "data: late", ""]:
+            yield line
+
+    assert [event async for event in iter_sse(lines())] == ["{\"a\":\n1}"]
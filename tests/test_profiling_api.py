@@ -0,0 +1,70 @@
+import pstats
+from fastapi.testclient import TestClient
+from faststream.nats import TestNatsBroker
+from whisk.client import WhiskClient
+from whisk.config import WhiskConfig, ServerConfig, ProfilingConfig
+from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.schema import ChatInput, ChatResponse
+from whisk.router import WhiskRouter
+
+
+def profiled_kitchen() -> KitchenAIApp:
+    kitchen = KitchenAIApp(namespace="test-profiling", version="0.0.1")
+
+    @kitchen.chat.handler("chat")
+    async def chat(chat: ChatInput) -> ChatResponse:
+        return ChatResponse(content=str(sum(range(10000))))
+
+    return kitchen
+
+
+def test_profiling_endpoints(tmp_path):
+    kitchen = profiled_kitchen()
+    disabled = WhiskRouter(kitchen_app=kitchen, config=WhiskConfig(server=ServerConfig(type="fastapi")))
+    assert TestClient(disabled.app).get("/v1/profiling").status_code == 404
+
+    config = WhiskConfig(server=ServerConfig(type="fastapi"), profiling=ProfilingConfig(enabled=True))
+    client = TestClient(WhiskRouter(kitchen_app=kitchen, config=config).app)
+
+    response = client.post("/v1/profiling/sampling", json={"label": "chat"})
+    assert response.json()["sampling"] == ["chat:chat"]
+    assert client.post("/v1/profiling/sampling", json={"label": "missing"}).status_code == 404
+    client.post("/v1/profiling/sampling", json={"label": "chat", "enabled": False})
+    assert client.get("/v1/profiling/sampling/collapsed").headers["content-type"].startswith("text/plain")
+
+    rule = client.post("/v1/profiling/rules", json={"label": "chat", "mode": "cprofile"}).json()
+    client.post("/v1/chat/completions", json={
+        "model": "@test-profiling-0.0.1/chat",
+        "messages": [{"role": "user", "content": "hi"}],
+    })
+    capture = client.get("/v1/profiling").json()["captures"][0]
+    assert capture["rule_id"] == rule["id"]
+
+    stats = client.get(f"/v1/profiling/captures/{capture['id']}/pstats")
+    path = tmp_path / "capture.prof"
+    path.write_bytes(stats.content)
+    assert pstats.Stats(str(path)).total_calls > 0
+    assert client.delete(f"/v1/profiling/rules/{rule['id']}").status_code == 404
+
+
+async def test_profiling_over_nats():
+    worker = WhiskClient(
+        client_id="worker-a", kitchen=profiled_kitchen(), profiling_config=ProfilingConfig(enabled=True)
+    )
+    async with TestNatsBroker(worker.broker):
+        started = await worker.profile("worker-a", "start_sampling", label="chat")
+        assert started.status.sampling == ["chat:chat"]
+
+        missing = await worker.profile("worker-a", "start_sampling", label="missing")
+        assert "missing" in missing.error
+
+        added = await worker.profile("worker-a", "add_rule", rule={"label": "chat", "mode": "tracemalloc"})
+        assert added.rule.mode == "tracemalloc"
+        status = await worker.profile("worker-a", "stop_sampling", label="chat")
+        assert status.status.sampling == [] and len(status.status.rules) == 1
+
+
+def test_profiling_subject_is_off_by_default():
+    worker = WhiskClient(client_id="worker-a", kitchen=profiled_kitchen())
+    assert not hasattr(worker, "handle_profiling")
+    assert all("mgmt.profiling" not in subscriber.subject for subscriber in worker._subscribers)
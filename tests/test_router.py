@@ -127,3 +127,12 @@ class TestFastAPIRouter:
         
         assert response.status_code == 200
         assert response.headers["content-type"].startswith("text/event-stream")
+
+def test_router_warms_up_lazy_dependencies(kitchen, fastapi_config):
+    from whisk.kitchenai_sdk.schema import DependencyType
+    kitchen.register_factory(DependencyType.LLM, lambda: "llm")
+    router = WhiskRouter(kitchen, fastapi_config)
+
+    assert kitchen.manager.pending_dependencies() == [DependencyType.LLM]
+    with TestClient(router.app):
+        assert kitchen.manager.list_dependencies() == {DependencyType.LLM: "llm"}
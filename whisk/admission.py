@@ -0,0 +1,292 @@
+from typing import Any, Callable, Container, Deque, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+from .config import AdmissionConfig, RateLimitConfig
+import asyncio
+import json
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Handler key shared by requests for labels that have no limits of their own
+DEFAULT_HANDLER = "default"
+
+
+class TokenBucket:
+    """Allows `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take a token; returns 0 on success, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+class ConcurrencyLimiter:
+    """Caps requests in flight; the rest wait in FIFO order.
+
+    Keeps a moving average of service time so callers can estimate the wait
+    for a slot before queueing.
+    """
+
+    def __init__(self, limit: int, smoothing: float = 0.2):
+        self.limit = limit
+        self.active = 0
+        self.service_time = 0.0
+        self.smoothing = smoothing
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        if self.active < self.limit and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) * self.service_time / self.limit
+
+    def try_acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        return False
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a slot; False if none freed up within `timeout`"""
+        if self.try_acquire():
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as we gave up: pass it on
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, elapsed: Optional[float] = None):
+        if elapsed is not None:
+            self.service_time += self.smoothing * (elapsed - self.service_time) if self.service_time else elapsed
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+
+class _Bounded(OrderedDict):
+    """LRU of per-client state so unbounded client ids can't exhaust memory.
+
+    Entries for which `busy(value)` is true (limiters with requests in
+    flight) are never evicted, so a client's count can't be reset mid-request.
+    """
+
+    def __init__(self, maxsize: int, busy: Callable[[Any], bool] = lambda value: False):
+        super().__init__()
+        self.maxsize = maxsize
+        self.busy = busy
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = self[key] = factory()
+            if len(self) > self.maxsize:
+                self._evict(key)
+        else:
+            self.move_to_end(key)
+        return value
+
+    def _evict(self, keep: str):
+        for key, value in self.items():
+            if key != keep and not self.busy(value):
+                del self[key]
+                return
+
+
+class AdmissionMiddleware:
+    """ASGI middleware enforcing per-client and per-handler admission.
+
+    Clients are identified by the API key header, a bearer token, or the
+    peer address. Each client and handler gets a token bucket (429 with
+    `Retry-After` when empty) and a concurrency cap. Handlers are the chat
+    label from the request's `model` or the route path, but only labels in
+    `config.handlers` or in `known_handlers()` (registered chat labels) get
+    their own limits; everything else shares the DEFAULT_HANDLER ones, so
+    made-up model names can't mint fresh buckets. A client over its cap gets a 429
+    right away; requests over a handler's cap queue for a slot, and are shed
+    with a 503 when the expected or actual wait exceeds `latency_slo_ms`, so
+    queued requests never blow through the latency target.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        config: AdmissionConfig,
+        known_handlers: Optional[Callable[[], Container[str]]] = None
+    ):
+        self.app = app
+        self.config = config
+        self.known_handlers = known_handlers
+        self.api_key_header = config.api_key_header.lower().encode()
+        self.slo = config.latency_slo_ms / 1000 if config.latency_slo_ms else None
+        self._client_buckets = _Bounded(config.max_tracked_clients)
+        self._client_limiters = _Bounded(
+            config.max_tracked_clients, busy=lambda limiter: limiter.active or limiter.waiting
+        )
+        self._handler_buckets: Dict[str, TokenBucket] = {}
+        self._handler_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+    # -- identification ----------------------------------------------------
+
+    def client_id(self, scope: Dict[str, Any]) -> str:
+        headers = dict(scope.get("headers") or [])
+        key = headers.get(self.api_key_header)
+        if key:
+            return key.decode()
+        authorization = headers.get(b"authorization", b"").decode()
+        if authorization.lower().startswith("bearer "):
+            return authorization[7:].strip()
+        client = scope.get("client")
+        return client[0] if client else "anonymous"
+
+    def handler_key(self, label: str) -> str:
+        """Key handler limits by known labels only; the rest share DEFAULT_HANDLER"""
+        if label in self.config.handlers:
+            return label
+        if self.known_handlers is not None and label in self.known_handlers():
+            return label
+        return DEFAULT_HANDLER
+
+    async def _handler(self, scope: Dict[str, Any], receive: Callable) -> Tuple[str, Callable]:
+        """Handler key for the request, and a receive that replays any body we read"""
+        path = scope.get("path", "")
+        if scope.get("method") != "POST" or not path.endswith("/chat/completions"):
+            return self.handler_key(path), receive
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        try:
+            model = json.loads(body).get("model") or DEFAULT_HANDLER
+        except (ValueError, AttributeError):
+            model = DEFAULT_HANDLER
+        return self.handler_key(str(model).split("/")[-1]), replay
+
+    # -- limits ------------------------------------------------------------
+
+    def _client_limits(self, client: str) -> RateLimitConfig:
+        return self.config.clients.get(client, self.config.client)
+
+    def _handler_limits(self, handler: str) -> RateLimitConfig:
+        return self.config.handlers.get(handler, self.config.handler)
+
+    def _bucket(self, store, key: str, limits: RateLimitConfig) -> Optional[TokenBucket]:
+        if limits.rate is None:
+            return None
+        if isinstance(store, _Bounded):
+            return store.get_or_create(key, lambda: TokenBucket(limits.rate, limits.burst))
+        if key not in store:
+            store[key] = TokenBucket(limits.rate, limits.burst)
+        return store[key]
+
+    def _limiter(self, store, key: str, limits: RateLimitConfig) -> Optional[ConcurrencyLimiter]:
+        if limits.max_concurrency is None:
+            return None
+        if isinstance(store, _Bounded):
+            return store.get_or_create(key, lambda: ConcurrencyLimiter(limits.max_concurrency))
+        if key not in store:
+            store[key] = ConcurrencyLimiter(limits.max_concurrency)
+        return store[key]
+
+    async def _reject(self, send: Callable, status: int, retry_after: float, message: str, kind: str):
+        body = json.dumps({"error": {"message": message, "type": kind}}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        client = self.client_id(scope)
+        handler, receive = await self._handler(scope, receive)
+
+        for bucket, subject in (
+            (self._bucket(self._client_buckets, client, self._client_limits(client)), "client"),
+            (self._bucket(self._handler_buckets, handler, self._handler_limits(handler)), f"handler '{handler}'"),
+        ):
+            if bucket is not None:
+                wait = bucket.try_acquire()
+                if wait:
+                    return await self._reject(send, 429, wait, f"Rate limit exceeded for {subject}", "rate_limit_exceeded")
+
+        client_limiter = self._limiter(self._client_limiters, client, self._client_limits(client))
+        if client_limiter is not None and not client_limiter.try_acquire():
+            return await self._reject(send, 429, client_limiter.service_time, "Too many concurrent requests", "rate_limit_exceeded")
+
+        handler_limiter = self._limiter(self._handler_limiters, handler, self._handler_limits(handler))
+        started = time.monotonic()
+        try:
+            if handler_limiter is not None:
+                expected = handler_limiter.expected_wait()
+                if self.slo is not None and expected > self.slo:
+                    logger.debug(f"Shedding request for {handler}: expected wait {expected:.3f}s")
+                    return await self._reject(send, 503, expected, f"Handler '{handler}' is overloaded", "overloaded")
+                if not await handler_limiter.acquire(self.slo):
+                    return await self._reject(send, 503, handler_limiter.expected_wait(), f"Handler '{handler}' is overloaded", "overloaded")
+            started = time.monotonic()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if handler_limiter is not None:
+                    handler_limiter.release(time.monotonic() - started)
+        finally:
+            if client_limiter is not None:
+                client_limiter.release(time.monotonic() - started)
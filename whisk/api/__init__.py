@@ -5,4 +5,5 @@ def get_routers():
     from .chat import router as chat_router
     from .files import router as files_router
     from .models import router as models_router
-    return [chat_router, files_router, models_router] 
\ No newline at end of file
+    from .ingest import router as ingest_router
+    return [chat_router, files_router, models_router, ingest_router] 
\ No newline at end of file
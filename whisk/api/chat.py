@@ -38,7 +38,7 @@ def get_chat_task(request: ChatCompletionRequest) -> Callable:
             detail=f"Chat handler '{handler}' not found"
         )
     
-    return task
+    return kitchen.scheduler.wrap("chat", handler, task)
 
 def parse_system_metadata(messages: List[Dict[str, str]]) -> Dict[str, Any]:
     """Extract metadata from system messages"""
@@ -7,6 +7,7 @@ from whisk.kitchenai_sdk.http_schema import (
     ChatCompletionChoice,
     ChatResponseMessage
 )
+from whisk.kitchenai_sdk.tokens import get_token_counter, usage_dict
 import time
 import json
 
@@ -23,6 +24,8 @@ class CommandMiddleware:
             "/chat": self.show_chat_handlers,
             "/file": self.show_file_handlers,
             "/eval": self.show_eval_handlers,
+            "/usage": self.show_usage,
+            "/scheduler": self.show_scheduler,
             "/help": self.show_help
         }
         logger.info(f"Command middleware initialized with commands: {list(self.commands.keys())}")
@@ -52,7 +55,10 @@ class CommandMiddleware:
             )
 
         logger.info(f"Executing command: {cmd}")
-        return await handler(command)
+        response = await handler(command)
+        completion_tokens = response["usage"]["completion_tokens"]
+        response["usage"] = usage_dict(get_token_counter().count_messages(request.messages, request.model), completion_tokens)
+        return response
 
     def create_response(self, content: str) -> Dict[str, Any]:
         """Create a chat completion response with given content"""
@@ -76,11 +82,7 @@ class CommandMiddleware:
                     "finish_reason": "stop"
                 }
             ],
-            "usage": {
-                "prompt_tokens": 0,
-                "completion_tokens": len(content.split()),
-                "total_tokens": len(content.split())
-            }
+            "usage": usage_dict(0, get_token_counter().count(content))
         }
         
         logger.info(f"Formatted response: {json.dumps(response, indent=2)}")
@@ -158,6 +160,32 @@ class CommandMiddleware:
         # TODO: Implement eval handlers
         return self.create_response("Evaluation handlers not implemented yet")
 
+    async def show_usage(self, _: str) -> ChatCompletionResponse:
+        """Show token usage per chat handler"""
+        stats = self.app.chat.usage.snapshot()
+        content = ["Token Usage:"]
+        for name, usage in stats.items():
+            content.append(
+                f"  • {name}: {usage.requests} requests, {usage.prompt_tokens} prompt + "
+                f"{usage.completion_tokens} completion = {usage.total_tokens} tokens"
+            )
+        if not stats:
+            content.append("  No chat requests yet")
+        return self.create_response("\n".join(content))
+
+    async def show_scheduler(self, _: str) -> ChatCompletionResponse:
+        """Show scheduler metrics per pool and task class"""
+        content = ["Scheduler:"]
+        for pool, classes in self.app.scheduler.metrics().items():
+            content.append(f"  {pool}:")
+            for task_class, stats in classes.items():
+                avg_wait = stats.wait_seconds / stats.admitted * 1000 if stats.admitted else 0.0
+                content.append(
+                    f"    • {task_class}: {stats.running} running, {stats.queued} queued, "
+                    f"{stats.completed} done, {stats.failed} failed, avg wait {avg_wait:.1f}ms"
+                )
+        return self.create_response("\n".join(content))
+
     async def show_help(self, _: str) -> ChatCompletionResponse:
         """Show help for available commands"""
         help_text = """Available Commands:
@@ -166,6 +194,8 @@ class CommandMiddleware:
 /chat        - List chat handlers
 /file        - List file/storage handlers
 /eval        - List evaluation handlers
+/usage       - Show token usage per chat handler
+/scheduler   - Show queueing per task class
 /help        - Show this help message"""
         
         logger.info(f"Sending help text: {help_text}")
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, UploadFile, HTTPException, Depends, File, Form
-from typing import Optional, Dict, Any, Annotated, Callable
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, File, Form, Query, Request
+from fastapi.responses import StreamingResponse, Response, FileResponse as LocalFileResponse
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, Annotated, Callable, List, AsyncIterator, Literal, Tuple
+from email.utils import formatdate, parsedate_to_datetime
+import hashlib
+import os
 from ..kitchenai_sdk.kitchenai import KitchenAIApp
 from ..kitchenai_sdk.http_schema import FileResponse, FileListResponse, FileDeleteResponse
-from ..kitchenai_sdk.schema import StorageRequest
+from ..kitchenai_sdk.schema import StorageRequest, StorageResponse
+from ..kitchenai_sdk.jobs import Job, JobStatus
 import time
 import json
 from ..dependencies import get_kitchen_app
@@ -47,20 +53,54 @@ def get_storage_task(model: Optional[str]) -> Callable:
             detail=f"Storage handler '{handler}' not found"
         )
     
-    return task
+    return kitchen.scheduler.wrap("storage", handler, task)
+
+def job_file_response(job: Job) -> FileResponse:
+    """Describe a background upload job as an OpenAI file object.
+
+    While the job runs the job id stands in for the file id; once the handler
+    finishes the real file id is returned with status "processed".
+    """
+    meta = job.metadata
+    if job.status == JobStatus.COMPLETE and meta.get("file_id"):
+        return FileResponse(
+            id=f"file-{meta['file_id']}",
+            bytes=meta.get("bytes", 0),
+            created_at=meta.get("created_at", job.created_at),
+            filename=meta.get("filename", ""),
+            purpose=meta.get("purpose", "fine-tune"),
+            status="processed"
+        )
+    return FileResponse(
+        id=job.id,
+        bytes=meta.get("bytes", 0),
+        created_at=job.created_at,
+        filename=meta.get("filename", ""),
+        purpose=meta.get("purpose", "fine-tune"),
+        status="error" if job.status == JobStatus.ERROR else "uploaded",
+        status_details="; ".join(job.errors) or None
+    )
 
 @router.post("/files", response_model=FileResponse)
 async def upload_file(
     file: UploadFile = File(...),
     purpose: str = Form("fine-tune"),
     model: str = Form("model"),
-    extra_body: Optional[str] = Form(None)
+    extra_body: Optional[str] = Form(None),
+    background: bool = Form(False)
 ):
-    """Upload a file"""
+    """Upload a file
+
+    With `background=true` (form field or extra_body) the storage handler runs
+    as a background job and the response returns immediately with status
+    "uploaded". Poll `GET /v1/files/{id}` or subscribe to
+    `GET /v1/files/{id}/events` until it is processed.
+    """
     # Parse extra_body and metadata
     extra = json.loads(extra_body) if extra_body else {}
     metadata = parse_metadata(extra.get("metadata"))
     extra_model = extra.get("model")
+    background = bool(extra.get("background", background))
     logger.info(f"Model: {model}")
     logger.info(f"Extra model: {extra_model}")
     
@@ -68,7 +108,7 @@ async def upload_file(
     task = get_storage_task(model)
     content = await file.read()
     
-    result = await task(StorageRequest(
+    request = StorageRequest(
         action="upload",
         content=content,
         filename=file.filename,
@@ -79,7 +119,20 @@ async def upload_file(
             "content_type": file.content_type,
             "size": len(content)
         }
-    ))
+    )
+
+    if background:
+        jobs = get_kitchen_app().jobs
+        job = jobs.create("upload", filename=file.filename, purpose=purpose, bytes=len(content))
+
+        async def work():
+            result = await task(request)
+            job.metadata.update(file_id=result.file_id, created_at=result.created_at)
+
+        jobs.start(job, work())
+        return job_file_response(job)
+
+    result = await task(request)
     
     return FileResponse(
         id=f"file-{result.file_id}",
@@ -90,16 +143,109 @@ async def upload_file(
         status="processed"
     )
 
-@router.get("/files", response_model=FileListResponse)
+def to_file_response(file: StorageResponse) -> FileResponse:
+    """Convert a storage handler result into an OpenAI file object"""
+    metadata = file.metadata or {}
+    return FileResponse(
+        id=file.file_id,
+        bytes=metadata.get("size", 0),
+        created_at=file.created_at,
+        filename=file.filename,
+        purpose=metadata.get("purpose", "fine-tune"),
+        status="processed"
+    )
+
+def filter_file_list(
+    files: List[StorageResponse],
+    purpose: Optional[str],
+    order: Literal["asc", "desc"],
+    after: Optional[str]
+) -> List[StorageResponse]:
+    """Apply purpose/order/cursor filtering to an already materialized list.
+
+    Handlers that return a plain list may ignore the pagination fields, so the
+    route applies them here. If the cursor is not in the list the handler is
+    assumed to have applied it already.
+    """
+    if purpose:
+        files = [f for f in files if (f.metadata or {}).get("purpose", "fine-tune") == purpose]
+    files = sorted(files, key=lambda f: f.created_at, reverse=order == "desc")
+    if after:
+        for index, file in enumerate(files):
+            if file.file_id == after:
+                return files[index + 1:]
+    return files
+
+async def iter_file_list(result: Any) -> AsyncIterator[StorageResponse]:
+    """Iterate a list result from a storage handler (list or async iterable)"""
+    if result is None:
+        return
+    if isinstance(result, BaseModel):
+        # Single schema response, e.g. WhiskStorageResponseSchema(files=[...])
+        result = getattr(result, "files", None) or []
+    if hasattr(result, "__aiter__"):
+        async for file in result:
+            yield file
+    else:
+        for file in result:
+            yield file
+
+async def stream_file_list(
+    first: Optional[FileResponse],
+    files: AsyncIterator[StorageResponse],
+    limit: int
+) -> AsyncIterator[str]:
+    """Stream a FileListResponse JSON document one file at a time
+
+    `first` is the already converted first file, or None for an empty list.
+    Errors raised after the first file abort the response rather than
+    closing the JSON document, so clients see a failed transfer instead of
+    a truncated list that parses.
+    """
+    yield '{"object": "list", "data": ['
+    first_id = None
+    last_id = None
+    count = 0
+    has_more = False
+    if first is not None:
+        yield first.model_dump_json()
+        first_id = last_id = first.id
+        count = 1
+    async for file in files:
+        if count == limit:
+            # The extra item requested from the handler only signals another page
+            has_more = True
+            break
+        item = to_file_response(file)
+        yield ("," if count else "") + item.model_dump_json()
+        first_id = first_id or item.id
+        last_id = item.id
+        count += 1
+    yield "], " + json.dumps({
+        "has_more": has_more,
+        "first_id": first_id,
+        "last_id": last_id,
+        "after": last_id,
+        "before": None
+    })[1:]
+
+@router.get("/files", response_class=StreamingResponse, responses={200: {"model": FileListResponse}})
 async def list_files(
     purpose: Optional[str] = None,
-    limit: int = 10000,
-    order: str = "desc",
+    limit: int = Query(10000, ge=1),
+    order: Literal["asc", "desc"] = "desc",
     after: Optional[str] = None,
     model: Optional[str] = None,
     extra_body: Optional[str] = None
 ):
-    """List all files with pagination support"""
+    """List files with cursor pagination support.
+
+    `limit`, `order`, `after` and `purpose` are passed to the storage handler
+    so it can do keyset pagination. One extra file is requested to compute
+    `has_more`, and the response is streamed rather than built in memory.
+    The first file is fetched before the response starts, so handler errors
+    on the first page item still produce an error status.
+    """
     # Parse extra_body to get model if provided
     if extra_body:
         try:
@@ -110,35 +256,27 @@ async def list_files(
             
     logger.info(f"Listing files with model: {model}")
     task = get_storage_task(model)
-    result = await task(StorageRequest(action="list"))
-    logger.info(f"Got result: {result}")
-    
-    # Handle result as a list of StorageResponse objects
-    files = [
-        FileResponse(
-            id=file.file_id,
-            bytes=file.metadata.get("size", 0),
-            created_at=file.created_at,
-            filename=file.filename,
-            purpose=file.metadata.get("purpose", "fine-tune"),
-            status="processed"
-        ) for file in result
-    ]
-    logger.info(f"Processed files: {files}")
-    
-    # Add pagination fields
-    first_id = files[0].id if files else None
-    last_id = files[-1].id if files else None
-    
-    response = FileListResponse(
-        data=files,
-        has_more=False,
-        first_id=first_id,
-        last_id=last_id,
-        after=last_id if files else None
+    result = await task(StorageRequest(
+        action="list",
+        purpose=purpose,
+        limit=limit + 1,
+        order=order,
+        after=after
+    ))
+
+    if isinstance(result, list):
+        result = filter_file_list(result, purpose, order, after)
+
+    files = iter_file_list(result)
+    try:
+        first = to_file_response(await anext(files))
+    except StopAsyncIteration:
+        first = None
+
+    return StreamingResponse(
+        stream_file_list(first, files, limit),
+        media_type="application/json"
     )
-    logger.info(f"Returning response: {response}")
-    return response
 
 @router.get("/files/{file_id}", response_model=FileResponse)
 async def get_file(
@@ -148,6 +286,10 @@ async def get_file(
     extra_body: Optional[str] = None
 ):
     """Get file metadata"""
+    job = get_kitchen_app().jobs.get(file_id)
+    if job:
+        return job_file_response(job)
+
     # Parse extra_body to get model and metadata if provided
     extra = {}
     logger.info(f"metadata: {metadata}")
@@ -196,6 +338,135 @@ async def get_file(
         status="processed"
     )
 
+@router.get("/files/{file_id}/events")
+async def file_events(file_id: str):
+    """Stream progress events for a background upload as server-sent events"""
+    jobs = get_kitchen_app().jobs
+    if not jobs.get(file_id):
+        raise HTTPException(status_code=404, detail=f"No job found for {file_id}")
+
+    async def event_stream():
+        async for event in jobs.subscribe(file_id):
+            yield f"data: {event.model_dump_json()}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+def parse_range_header(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored and the full body served
+    (unknown unit, multiple ranges, malformed values).
+    """
+    units, _, spec = range_header.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_str, sep, end_str = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not start_str:
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            start = max(size - length, 0) if length > 0 else size
+            end = size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+def is_not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current validators"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(last_modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@router.get("/files/{file_id}/content")
+async def get_file_content(request: Request, file_id: str, model: Optional[str] = None):
+    """Download file content.
+
+    The storage handler is called with `action="content"` and returns either
+    `content` bytes or a local `path`. Local paths are served from disk (with
+    `http.response.pathsend` on servers that support it) instead of being read
+    into memory. Single byte ranges and conditional requests are supported.
+    """
+    task = get_storage_task(model)
+    try:
+        result = await task(StorageRequest(action="content", file_id=file_id))
+    except ValueError as e:
+        logger.warning(f"File not found error: {str(e)}")
+        result = None
+
+    if not result or (result.content is None and not result.path):
+        raise HTTPException(status_code=404, detail=f"File {file_id} not found")
+
+    metadata = result.metadata or {}
+    media_type = metadata.get("content_type") or "application/octet-stream"
+
+    if result.path:
+        if not os.path.isfile(result.path):
+            raise HTTPException(status_code=404, detail=f"File {file_id} not found")
+        response = LocalFileResponse(
+            result.path,
+            media_type=media_type,
+            filename=result.filename,
+            stat_result=os.stat(result.path)
+        )
+        if is_not_modified(request, response.headers["etag"], response.headers["last-modified"]):
+            return Response(status_code=304, headers={
+                "etag": response.headers["etag"],
+                "last-modified": response.headers["last-modified"]
+            })
+        # FileResponse handles Range/If-Range itself
+        return response
+
+    content = result.content
+    etag = metadata.get("etag") or f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(result.created_at, usegmt=True),
+        "accept-ranges": "bytes",
+        "content-disposition": f'attachment; filename="{result.filename}"'
+    }
+    if is_not_modified(request, etag, headers["last-modified"]):
+        return Response(status_code=304, headers={
+            "etag": etag,
+            "last-modified": headers["last-modified"]
+        })
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range in (etag, headers["last-modified"])):
+        byte_range = parse_range_header(range_header, len(content))
+        if byte_range:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{len(content)}"
+            return Response(
+                content=memoryview(content)[start:end + 1].tobytes(),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+    return Response(content=content, media_type=media_type, headers=headers)
+
 @router.delete("/files/{file_id}", response_model=FileDeleteResponse)
 async def delete_file(file_id: str, model: Optional[str] = None):
     """Delete a file"""
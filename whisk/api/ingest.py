@@ -0,0 +1,194 @@
+from fastapi import APIRouter, UploadFile, HTTPException, File, Form
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Optional, List
+from pathlib import Path
+from ..kitchenai_sdk.jobs import Job
+from ..kitchenai_sdk.pipeline import IngestPipeline, Stage, PipelineStats
+from ..kitchenai_sdk.schema import StorageRequest
+from ..dependencies import get_kitchen_app, get_whisk_config
+from .files import get_storage_task, parse_metadata
+import functools
+import json
+import shutil
+import tarfile
+import tempfile
+import zipfile
+import logging
+
+router = APIRouter(prefix="/v1", tags=["Ingest"])
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+class IngestItem(BaseModel):
+    """A file spooled to disk waiting to be stored"""
+    path: str
+    filename: str
+    content_type: Optional[str] = None
+
+
+def is_archive(filename: str) -> bool:
+    """Check if a filename looks like a supported archive"""
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _check_expanded_size(total: int, max_bytes: int, filename: str):
+    if total > max_bytes:
+        raise ValueError(f"{filename} expands to {total} bytes, more than the {max_bytes} allowed")
+
+
+def _safe_tar_member(member: tarfile.TarInfo, target: Path) -> Optional[tarfile.TarInfo]:
+    """The member as it may be extracted under `target`, or None to skip it.
+
+    Uses tarfile's data filter where available (3.11.4+); older interpreters
+    get the equivalent checks for regular files.
+    """
+    if hasattr(tarfile, "data_filter"):
+        try:
+            return tarfile.data_filter(member, str(target))
+        except tarfile.FilterError as e:
+            logger.warning(f"Skipping archive member {member.name}: {e}")
+            return None
+    name = member.name.lstrip("/")
+    if not name or ".." in Path(name).parts:
+        logger.warning(f"Skipping archive member {member.name}: outside the destination")
+        return None
+    member = member.replace(name=name, mode=member.mode & 0o755, uid=None, gid=None, uname=None, gname=None, deep=False)
+    return member
+
+
+def expand_item(item: IngestItem, max_bytes: int = 4 << 30) -> List[IngestItem]:
+    """Expand archives into their member files, extracted next to the archive.
+
+    Extraction streams to disk so archive members never sit in memory.
+    Archives whose members add up to more than `max_bytes` are rejected
+    before anything is extracted.
+    """
+    if not is_archive(item.filename):
+        return [item]
+
+    target = Path(item.path + ".d")
+    target.mkdir()
+    paths = []
+    if item.filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(item.path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            _check_expanded_size(sum(info.file_size for info in members), max_bytes, item.filename)
+            for info in members:
+                # extract() drops ".." and absolute components, so use the path it wrote
+                paths.append(Path(archive.extract(info, target)))
+    else:
+        # Python < 3.11.4 has no extraction filters; members are checked by _safe_tar_member
+        options = {"filter": "fully_trusted"} if hasattr(tarfile, "data_filter") else {}
+        with tarfile.open(item.path) as archive:
+            members = [member for member in archive.getmembers() if member.isfile()]
+            _check_expanded_size(sum(member.size for member in members), max_bytes, item.filename)
+            for member in members:
+                member = _safe_tar_member(member, target)
+                if member is not None:
+                    archive.extract(member, target, **options)
+                    paths.append(target / member.name)
+
+    return [IngestItem(path=str(path), filename=path.name) for path in paths]
+
+
+@router.post("/ingest", response_model=Job)
+async def bulk_ingest(
+    files: List[UploadFile] = File(...),
+    purpose: str = Form("fine-tune"),
+    model: str = Form("model"),
+    extra_body: Optional[str] = Form(None),
+    concurrency: Optional[int] = Form(None, ge=1, le=1024)
+):
+    """Ingest many files (or zip/tar archives) in the background.
+
+    Files are spooled to disk and pushed through a bounded pipeline that
+    expands archives and calls the storage handler with `action="upload"` for
+    each document. Returns a job to poll with `GET /v1/ingest/{job_id}`; it
+    ends in `error` if any file failed. `concurrency` is capped at
+    `ingest.max_store_concurrency`.
+    """
+    extra = json.loads(extra_body) if extra_body else {}
+    metadata = parse_metadata(extra.get("metadata"))
+    task = get_storage_task(extra.get("model", model))
+    config = get_whisk_config().ingest
+
+    # Uploads are closed when the request ends, so copy them out first
+    spool_dir = tempfile.mkdtemp(prefix="whisk-ingest-")
+    items = []
+    for index, upload in enumerate(files):
+        path = Path(spool_dir) / f"{index}-{Path(upload.filename or 'upload').name}"
+        with open(path, "wb") as out:
+            await run_in_threadpool(shutil.copyfileobj, upload.file, out)
+        items.append(IngestItem(path=str(path), filename=upload.filename or path.name, content_type=upload.content_type))
+
+    async def store_item(item: IngestItem):
+        content = await run_in_threadpool(Path(item.path).read_bytes)
+        return await task(StorageRequest(
+            action="upload",
+            content=content,
+            filename=item.filename,
+            purpose=purpose,
+            model=model,
+            metadata={
+                **metadata,
+                "content_type": item.content_type,
+                "size": len(content)
+            }
+        ))
+
+    kitchen = get_kitchen_app()
+    job = kitchen.jobs.create("ingest", files=len(items), model=model, purpose=purpose)
+
+    def on_progress(stats: PipelineStats):
+        job.errors = list(stats.errors)
+        for name, stage in stats.stages.items():
+            kitchen.jobs.update(job, name, **stage.model_dump())
+
+    pipeline = IngestPipeline(
+        [
+            Stage(
+                name="expand",
+                func=functools.partial(expand_item, max_bytes=config.max_expanded_bytes),
+                concurrency=config.read_concurrency,
+                fan_out=True
+            ),
+            Stage(
+                name="store",
+                func=store_item,
+                concurrency=min(concurrency or config.store_concurrency, config.max_store_concurrency)
+            )
+        ],
+        queue_size=config.queue_size,
+        on_progress=on_progress
+    )
+
+    async def work():
+        try:
+            stats = await pipeline.run(items)
+        finally:
+            await run_in_threadpool(shutil.rmtree, spool_dir, True)
+        failed = sum(stage.failed for stage in stats.stages.values())
+        if failed:
+            stored = stats.stages["store"].emitted
+            raise RuntimeError(f"{failed} items failed to ingest ({stored} stored)")
+
+    kitchen.jobs.start(job, work())
+    return job
+
+
+@router.get("/ingest", response_model=List[Job])
+async def list_ingest_jobs():
+    """List tracked ingest jobs"""
+    return [job for job in get_kitchen_app().jobs.list_jobs() if job.kind == "ingest"]
+
+
+@router.get("/ingest/{job_id}", response_model=Job)
+async def get_ingest_job(job_id: str):
+    """Get ingest job status and per-stage progress"""
+    job = get_kitchen_app().jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from ..kitchenai_sdk.profiling import CaptureMode, ProfileCapture, ProfileRule, ProfilingStatus
+from ..dependencies import get_kitchen_app
+
+# Only mounted with `profiling.enabled`; see WhiskRouter
+router = APIRouter(prefix="/v1/profiling", tags=["Profiling"])
+
+
+class SamplingRequest(BaseModel):
+    label: str
+    taxonomy: str = "chat"
+    enabled: bool = True
+
+
+class RuleRequest(BaseModel):
+    mode: CaptureMode = "cprofile"
+    taxonomy: Optional[str] = None
+    label: Optional[str] = None
+    metadata: Dict[str, str] = Field(default_factory=dict)
+    count: int = Field(1, ge=1)
+    sample_rate: float = Field(1.0, gt=0, le=1)
+
+
+@router.get("", response_model=ProfilingStatus)
+async def profiling_status():
+    """Handlers being sampled, pending capture rules and finished captures"""
+    return get_kitchen_app().profiler.status()
+
+
+@router.post("/sampling", response_model=ProfilingStatus)
+async def toggle_sampling(request: SamplingRequest):
+    """Start or stop sampling a handler's stacks"""
+    profiler = get_kitchen_app().profiler
+    try:
+        if request.enabled:
+            profiler.start_sampling(request.taxonomy, request.label)
+        else:
+            profiler.stop_sampling(request.taxonomy, request.label)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return profiler.status()
+
+
+@router.get("/sampling/collapsed", response_class=PlainTextResponse)
+async def collapsed_stacks(taxonomy: Optional[str] = None, label: Optional[str] = None):
+    """Sampled stacks in collapsed format, for flamegraph.pl or speedscope"""
+    return get_kitchen_app().profiler.collapsed(taxonomy, label)
+
+
+@router.delete("/sampling/collapsed", status_code=204)
+async def reset_samples():
+    get_kitchen_app().profiler.sampler.reset()
+
+
+@router.post("/rules", response_model=ProfileRule)
+async def add_rule(request: RuleRequest):
+    """Capture the next matching requests with cProfile or tracemalloc"""
+    return get_kitchen_app().profiler.add_rule(**request.model_dump())
+
+
+@router.delete("/rules/{rule_id}", status_code=204)
+async def remove_rule(rule_id: str):
+    if not get_kitchen_app().profiler.remove_rule(rule_id):
+        raise HTTPException(status_code=404, detail=f"Rule {rule_id} not found")
+
+
+def find_capture(capture_id: str) -> ProfileCapture:
+    capture = get_kitchen_app().profiler.get_capture(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail=f"Capture {capture_id} not found")
+    return capture
+
+
+@router.get("/captures/{capture_id}", response_model=ProfileCapture)
+async def get_capture(capture_id: str):
+    return find_capture(capture_id)
+
+
+@router.get("/captures/{capture_id}/pstats")
+async def get_capture_pstats(capture_id: str):
+    """Raw cProfile stats, loadable with `pstats.Stats(path)` or snakeviz"""
+    capture = find_capture(capture_id)
+    if capture.data is None:
+        raise HTTPException(status_code=404, detail=f"Capture {capture_id} has no cProfile stats")
+    return Response(
+        capture.data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{capture.id}.prof"'}
+    )
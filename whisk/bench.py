@@ -0,0 +1,409 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from pydantic import BaseModel
+from .kitchenai_sdk.kitchenai import KitchenAIApp
+from .kitchenai_sdk.nats_schema import (
+    QueryRequestMessage,
+    StorageGetRequestMessage,
+    StorageRequestMessage,
+    StorageResponseMessage,
+)
+from .kitchenai_sdk.schema import (
+    ChatInput,
+    ChatResponse,
+    StorageResponse,
+    WhiskQueryBaseResponseSchema,
+    WhiskQuerySchema,
+    WhiskStorageStatus,
+)
+from .kitchenai_sdk.taxonomy.query import QueryTask
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+HTTP_SCENARIOS = ("chat", "chat-cpu", "chat-stream", "files")
+NATS_SCENARIOS = ("query", "storage")
+SCENARIOS = HTTP_SCENARIOS + NATS_SCENARIOS
+
+BENCH_WORKER_ID = "whisk-bench-worker"
+
+
+class BenchResult(BaseModel):
+    """Throughput and latency for one scenario at one concurrency level.
+
+    `ttft_*` is the time to the first streamed chunk for chat-stream and to
+    the ACK status for NATS storage; it is unset for other scenarios.
+    """
+    transport: str
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int = 0
+    seconds: float
+    throughput_rps: float
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+    ttft_p50_ms: Optional[float] = None
+    ttft_p95_ms: Optional[float] = None
+    ttft_p99_ms: Optional[float] = None
+    first_error: Optional[str] = None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value * 1000, 2)
+
+
+def synthetic_kitchen(
+    latency_ms: float = 20,
+    cpu_ms: float = 5,
+    tokens: int = 32,
+    token_interval_ms: float = 2,
+    payload: bytes = b"x" * 4096,
+) -> KitchenAIApp:
+    """A KitchenAIApp whose handlers cost a known amount of time.
+
+    chat "sleep" awaits `latency_ms`, chat "cpu" blocks the loop for
+    `cpu_ms`, chat "stream" yields `tokens` chunks `token_interval_ms`
+    apart, query "sleep" mirrors chat "sleep" over NATS, and storage "store"
+    accepts uploads and serves `payload` as file content.
+    """
+    kitchen = KitchenAIApp(namespace="bench")
+    # KitchenAIApp has no query registry of its own; WhiskClient's query.* subscriber expects one
+    kitchen.query = QueryTask(kitchen.namespace, kitchen.manager)
+
+    @kitchen.chat.handler("sleep")
+    async def sleep(chat: ChatInput) -> ChatResponse:
+        await asyncio.sleep(latency_ms / 1000)
+        return ChatResponse(content="ok")
+
+    @kitchen.chat.handler("cpu")
+    async def cpu(chat: ChatInput) -> ChatResponse:
+        deadline = time.perf_counter() + cpu_ms / 1000
+        digest = b""
+        while time.perf_counter() < deadline:
+            digest = hashlib.sha256(digest).digest()
+        return ChatResponse(content=digest.hex()[:8])
+
+    @kitchen.chat.handler("stream")
+    async def stream(chat: ChatInput):
+        for i in range(tokens):
+            await asyncio.sleep(token_interval_ms / 1000)
+            yield ChatResponse(content=f"token{i} ")
+
+    @kitchen.query.handler("sleep")
+    async def query(data: WhiskQuerySchema) -> WhiskQueryBaseResponseSchema:
+        await asyncio.sleep(latency_ms / 1000)
+        return WhiskQueryBaseResponseSchema(input=data.query, output="ok")
+
+    @kitchen.storage.handler("store")
+    async def store(data) -> StorageResponse:
+        # HTTP sends a StorageRequest; NATS sends a WhiskStorageSchema with the downloaded data
+        if getattr(data, "action", None) == "content":
+            return StorageResponse(file_id=data.file_id, filename="bench.bin", content=payload)
+        await asyncio.sleep(latency_ms / 1000)
+        return StorageResponse(file_id=uuid.uuid4().hex, filename=getattr(data, "filename", None) or "bench.bin")
+
+    return kitchen
+
+
+def model_id(kitchen: KitchenAIApp, label: str) -> str:
+    return f"@{kitchen.namespace}-{kitchen.version}/{label}"
+
+
+async def run_load(
+    transport: str,
+    scenario: str,
+    call: Callable[[], Awaitable[Optional[float]]],
+    concurrency: int,
+    requests: int,
+    warmup: int = 0,
+) -> BenchResult:
+    """Run `requests` calls with `concurrency` in flight (closed loop).
+
+    `call` returns its time-to-first-response in seconds, or None.
+    """
+    for _ in range(warmup):
+        try:
+            await call()
+        except Exception:
+            pass
+
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors: List[str] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            begin = time.perf_counter()
+            try:
+                ttft = await call()
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            latencies.append(time.perf_counter() - begin)
+            if ttft is not None:
+                ttfts.append(ttft)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    seconds = time.perf_counter() - started
+    return BenchResult(
+        transport=transport,
+        scenario=scenario,
+        concurrency=concurrency,
+        requests=requests,
+        errors=len(errors),
+        seconds=round(seconds, 3),
+        throughput_rps=round(len(latencies) / seconds, 2) if seconds else 0.0,
+        p50_ms=_ms(percentile(latencies, 0.5)),
+        p95_ms=_ms(percentile(latencies, 0.95)),
+        p99_ms=_ms(percentile(latencies, 0.99)),
+        ttft_p50_ms=_ms(percentile(ttfts, 0.5)),
+        ttft_p95_ms=_ms(percentile(ttfts, 0.95)),
+        ttft_p99_ms=_ms(percentile(ttfts, 0.99)),
+        first_error=errors[0] if errors else None,
+    )
+
+
+def http_calls(client, kitchen: KitchenAIApp, payload: bytes = b"x" * 4096) -> Dict[str, Callable[[], Awaitable[Optional[float]]]]:
+    """Scenario calls against a Whisk server through a WhiskHTTPClient"""
+    messages = [{"role": "user", "content": "benchmark"}]
+
+    async def chat():
+        await client.chat(messages, model=model_id(kitchen, "sleep"))
+
+    async def chat_cpu():
+        await client.chat(messages, model=model_id(kitchen, "cpu"))
+
+    async def chat_stream():
+        begin = time.perf_counter()
+        ttft = None
+        async for chunk in client.stream_chat(messages, model=model_id(kitchen, "stream")):
+            if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+                ttft = time.perf_counter() - begin
+        return ttft
+
+    async def files():
+        await client.upload(("bench.bin", payload), model=model_id(kitchen, "store"))
+
+    return {"chat": chat, "chat-cpu": chat_cpu, "chat-stream": chat_stream, "files": files}
+
+
+class StorageWaiter:
+    """Plays KitchenAI's side of a NATS storage request.
+
+    Answers the worker's presigned-url requests with `download_url` and
+    resolves each request when its COMPLETE or ERROR status arrives. Must be
+    created before the caller's broker starts.
+    """
+
+    def __init__(self, broker, worker_id: str, download_url: str):
+        self._acks: Dict[str, asyncio.Future] = {}
+        self._done: Dict[str, asyncio.Future] = {}
+
+        @broker.subscriber(f"kitchenai.service.{worker_id}.storage.*.get")
+        async def presign(msg: StorageGetRequestMessage) -> dict:
+            return {
+                "request_id": msg.request_id,
+                "timestamp": time.time(),
+                "label": msg.label,
+                "client_id": msg.client_id,
+                "presigned_url": download_url,
+            }
+
+        @broker.subscriber(f"kitchenai.service.{worker_id}.storage.*.response")
+        async def status(msg: StorageResponseMessage):
+            if msg.status == WhiskStorageStatus.ACK:
+                self._resolve(self._acks, msg.request_id, time.perf_counter())
+            elif msg.status == WhiskStorageStatus.COMPLETE:
+                self._resolve(self._done, msg.request_id, None)
+            elif msg.status == WhiskStorageStatus.ERROR:
+                self._resolve(self._done, msg.request_id, RuntimeError(msg.error))
+
+    @staticmethod
+    def _resolve(futures: Dict[str, asyncio.Future], request_id: str, value):
+        future = futures.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if isinstance(value, Exception):
+            future.set_exception(value)
+        else:
+            future.set_result(value)
+
+    def expect(self, request_id: str):
+        loop = asyncio.get_running_loop()
+        ack, done = loop.create_future(), loop.create_future()
+        self._acks[request_id] = ack
+        self._done[request_id] = done
+        return ack, done
+
+
+def nats_calls(caller, kitchen: KitchenAIApp, waiter: Optional[StorageWaiter], timeout: float = 30.0) -> Dict[str, Callable[[], Awaitable[Optional[float]]]]:
+    """Scenario calls against a WhiskClient worker over NATS"""
+    async def query():
+        response = await caller.query(QueryRequestMessage(
+            request_id=uuid.uuid4().hex,
+            timestamp=time.time(),
+            label="sleep",
+            client_id=BENCH_WORKER_ID,
+            query="benchmark",
+            metadata={},
+        ))
+        error = response.decoded_body.get("error")
+        if error:
+            raise RuntimeError(error)
+
+    async def storage():
+        request_id = uuid.uuid4().hex
+        ack, done = waiter.expect(request_id)
+        begin = time.perf_counter()
+        await caller.store_message(StorageRequestMessage(
+            id=1,
+            name="bench.bin",
+            request_id=request_id,
+            timestamp=time.time(),
+            label="store",
+            client_id=BENCH_WORKER_ID,
+        ))
+        await asyncio.wait_for(done, timeout)
+        return (ack.result() - begin) if ack.done() else None
+
+    return {"query": query, "storage": storage}
+
+
+class ServerThread:
+    """Serve an ASGI app with uvicorn on a background thread and a free port"""
+
+    def __init__(self, app, host: str = "127.0.0.1"):
+        import uvicorn
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=0, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.host = host
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://{self.host}:{port}"
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def bench_http(
+    url: str,
+    kitchen: KitchenAIApp,
+    scenarios: Iterable[str],
+    concurrency: Iterable[int],
+    requests: int,
+    warmup: int = 10,
+) -> AsyncIterator[BenchResult]:
+    """Drive the HTTP scenarios against a running server"""
+    from .http_client import WhiskHTTPClient
+
+    levels = list(concurrency)
+    # Retries would hide errors; the pool must not cap the concurrency under test
+    async with WhiskHTTPClient(url, retries=0, max_connections=max(levels), max_keepalive_connections=max(levels)) as client:
+        calls = http_calls(client, kitchen)
+        for scenario in scenarios:
+            for level in levels:
+                yield await run_load("http", scenario, calls[scenario], level, requests, warmup)
+
+
+async def bench_nats(
+    nats_url: str,
+    kitchen: KitchenAIApp,
+    scenarios: Iterable[str],
+    concurrency: Iterable[int],
+    requests: int,
+    download_url: Optional[str] = None,
+    warmup: int = 10,
+) -> AsyncIterator[BenchResult]:
+    """Drive the NATS scenarios against an in-process worker on a live nats-server"""
+    from .client import WhiskClient
+    from .config import NatsConfig
+
+    scenarios = list(scenarios)
+    # Fail fast when no nats-server is running rather than retrying forever
+    config = NatsConfig(url=nats_url, max_reconnect_attempts=1, reconnect_backoff=0.1)
+    worker = WhiskClient(nats_url, client_id=BENCH_WORKER_ID, kitchen=kitchen, nats_config=config)
+    caller = WhiskClient(nats_url, client_id="whisk-bench-caller", is_kitchenai=True, nats_config=config)
+    waiter = StorageWaiter(caller.broker, BENCH_WORKER_ID, download_url) if "storage" in scenarios else None
+    await worker.broker.start()
+    try:
+        await caller.broker.start()
+        try:
+            calls = nats_calls(caller, kitchen, waiter)
+            for scenario in scenarios:
+                for level in concurrency:
+                    yield await run_load("nats", scenario, calls[scenario], level, requests, warmup)
+        finally:
+            await caller.broker.close()
+    finally:
+        await worker.broker.close()
+
+
+async def run_bench(
+    scenarios: Iterable[str] = SCENARIOS,
+    concurrency: Iterable[int] = (1, 16, 64),
+    requests: int = 500,
+    url: Optional[str] = None,
+    nats_url: str = "nats://localhost:4222",
+    warmup: int = 10,
+    **handler_options,
+) -> AsyncIterator[BenchResult]:
+    """Run the selected scenarios, booting local servers as needed.
+
+    Without `url` a WhiskRouter for a synthetic kitchen is served on a
+    background thread (also used for NATS storage downloads); with `url` the
+    HTTP scenarios target that server, which must expose the synthetic
+    handlers. `handler_options` are passed to `synthetic_kitchen()`.
+    """
+    from .config import WhiskConfig, ServerConfig
+    from .router import WhiskRouter
+
+    scenarios = list(scenarios)
+    concurrency = list(concurrency)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    http = [scenario for scenario in scenarios if scenario in HTTP_SCENARIOS]
+    nats = [scenario for scenario in scenarios if scenario in NATS_SCENARIOS]
+
+    local = None
+    if (url is None and http) or "storage" in nats:
+        # The server runs on its own loop, so it gets its own kitchen
+        router = WhiskRouter(kitchen_app=synthetic_kitchen(**handler_options), config=WhiskConfig(server=ServerConfig(type="fastapi")))
+        local = ServerThread(router.app)
+    base = local.__enter__() if local else None
+    try:
+        kitchen = synthetic_kitchen(**handler_options)
+        if http:
+            async for result in bench_http(url or base, kitchen, http, concurrency, requests, warmup):
+                yield result
+        if nats:
+            download_url = f"{base}/v1/files/bench/content?model={model_id(kitchen, 'store')}" if base else None
+            async for result in bench_nats(nats_url, kitchen, nats, concurrency, requests, download_url, warmup):
+                yield result
+    finally:
+        if local:
+            local.__exit__(None, None, None)
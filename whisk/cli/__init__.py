@@ -4,6 +4,7 @@ from .run import run
 from .init import init
 from .client import client
 from .nats import nats
+from .bench import bench
 from .. import __version__
 
 app = typer.Typer(help="Whisk CLI")
@@ -14,6 +15,7 @@ app.command()(run)
 app.command()(init)
 app.command()(client)
 app.command()(nats)
+app.command()(bench)
 
 @app.command()
 def version():
@@ -0,0 +1,51 @@
+import typer
+import asyncio
+import json
+from pathlib import Path
+from typing import List, Optional
+
+def bench(
+    scenario: List[str] = typer.Option(
+        ["chat", "chat-stream", "files"],
+        "--scenario",
+        "-s",
+        help="chat, chat-cpu, chat-stream, files (HTTP) or query, storage (NATS, needs a nats-server)"
+    ),
+    concurrency: List[int] = typer.Option([1, 16, 64], "--concurrency", "-c", help="Requests in flight; repeat for several levels"),
+    requests: int = typer.Option(500, "--requests", "-n", help="Requests per scenario and level"),
+    warmup: int = typer.Option(10, help="Unmeasured requests before each run"),
+    url: Optional[str] = typer.Option(None, help="Benchmark a running server instead of a local one"),
+    nats_url: str = typer.Option("nats://localhost:4222", help="NATS server for the NATS scenarios"),
+    latency_ms: float = typer.Option(20, help="Latency of the sleep handlers"),
+    cpu_ms: float = typer.Option(5, help="CPU time of the chat-cpu handler"),
+    tokens: int = typer.Option(32, help="Chunks per streamed response"),
+    token_interval_ms: float = typer.Option(2, help="Delay between streamed chunks"),
+    output: Optional[Path] = typer.Option(None, "--output", "-o", help="Append results to this JSON-lines file"),
+):
+    """Load-test the HTTP and NATS paths with synthetic handlers.
+
+    Prints one JSON object per scenario and concurrency level with
+    throughput, p50/p95/p99 latency and time to first token.
+    """
+    from ..bench import run_bench
+
+    async def main():
+        async for result in run_bench(
+            scenario, concurrency, requests, url=url, nats_url=nats_url, warmup=warmup,
+            latency_ms=latency_ms, cpu_ms=cpu_ms, tokens=tokens, token_interval_ms=token_interval_ms,
+        ):
+            line = json.dumps(result.model_dump(exclude_none=True))
+            typer.echo(line)
+            if output:
+                with output.open("a") as f:
+                    f.write(line + "\n")
+
+    from nats.errors import Error as NatsError
+    try:
+        asyncio.run(main())
+    except ValueError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(1)
+    except (NatsError, OSError) as e:
+        typer.echo(f"Could not connect to NATS at {nats_url}: {e}", err=True)
+        raise typer.Exit(1)
@@ -1,21 +1,34 @@
+import asyncio
 import typer
-from ..client import WhiskClient
 
 app = typer.Typer(help="Client management commands")
 
+async def _list_models(url: str, api_key: str = None):
+    from ..http_client import WhiskHTTPClient
+    async with WhiskHTTPClient(url, api_key=api_key) as whisk:
+        return await whisk.models()
+
 @app.command()
-def register(
-    name: str = typer.Argument(..., help="Client name"),
-    url: str = typer.Option("http://localhost:8000", help="Server URL")
+def models(
+    url: str = typer.Option("http://localhost:8000", help="Server URL"),
+    api_key: str = typer.Option(None, help="API key"),
 ):
-    """Register a new client"""
-    client = WhiskClient(url)
-    result = client.register(name)
-    typer.echo(f"Client registered: {result}")
+    """List the models a server exposes"""
+    for model in asyncio.run(_list_models(url, api_key)).data:
+        typer.echo(model.id)
 
 def client(
     url: str = typer.Option(..., help="Server URL"),
     api_key: str = typer.Option(None, help="API key"),
 ):
     """Connect to a Whisk server"""
-    # ... implementation ... 
\ No newline at end of file
+    from ..http_client import WhiskHTTPError
+    import httpx
+    try:
+        result = asyncio.run(_list_models(url, api_key))
+    except (httpx.HTTPError, WhiskHTTPError) as e:
+        typer.echo(f"Could not connect to {url}: {e}", err=True)
+        raise typer.Exit(1)
+    typer.echo(f"Connected to {url} ({len(result.data)} models)")
+    for model in result.data:
+        typer.echo(f"  {model.id}")
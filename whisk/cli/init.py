@@ -1,6 +1,5 @@
 import typer
 from pathlib import Path
-from cookiecutter.main import cookiecutter
 
 app = typer.Typer(help="Project initialization commands")
 
@@ -10,6 +9,7 @@ def init(
     template: str = typer.Option("basic", help="Template to use"),
 ):
     """Initialize a new Whisk project"""
+    from cookiecutter.main import cookiecutter
     cookiecutter(
         template,
         output_dir=Path(name)
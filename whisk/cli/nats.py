@@ -3,9 +3,7 @@ import importlib
 import asyncio
 from pathlib import Path
 from typing import Optional, List
-from watchfiles import awatch
 from ..config import WhiskConfig, NatsConfig
-from ..client import WhiskClient
 
 app = typer.Typer(help="NATS connection commands")
 
@@ -38,10 +36,18 @@ def connect(
         ["./"],
         "--watch",
         help="Directories to watch for changes"
+    ),
+    drain_timeout: float = typer.Option(
+        30.0,
+        "--drain-timeout",
+        help="Seconds to let in-flight work finish on shutdown or reload"
     )
 ):
     """Connect to NATS cluster and start processing messages"""
     async def run_client(kitchen_path: str, config_file: Optional[Path], watch_dirs: List[Path], reload: bool):
+        from watchfiles import awatch
+        from ..client import WhiskClient
+
         # Load config
         config = WhiskConfig.from_file(config_file) if config_file else WhiskConfig()
         
@@ -57,19 +63,38 @@ def connect(
         # Setup client
         client = WhiskClient(
             nats_url=config.nats.url,
+            client_id=config.nats.client_id or (config.client.id if config.client else None),
             user=config.nats.user,
             password=config.nats.password,
-            kitchen=kitchen
+            kitchen=kitchen,
+            drain_timeout=drain_timeout,
+            nats_config=config.nats,
+            max_storage_jobs=config.ingest.max_storage_jobs,
+            profiling_config=config.profiling
         )
-        
+
+        async def watch(stop: asyncio.Event):
+            # Swap reloaded apps into the running client; the NATS connection stays up
+            async for changes in awatch(*watch_dirs, stop_event=stop):
+                typer.echo(f"Detected changes: {changes}")
+                try:
+                    module = importlib.reload(kitchen_module)
+                    new_kitchen = getattr(module, attr)
+                except Exception as e:
+                    typer.echo(f"Reload failed, keeping the running app: {e}")
+                    continue
+                await client.reload(new_kitchen)
+                typer.echo("Reloaded app")
+
         try:
             if reload:
-                # Watch for file changes
-                async for changes in awatch(*watch_dirs):
-                    typer.echo(f"Detected changes: {changes}")
-                    # Reload kitchen module
-                    importlib.reload(kitchen_module)
-                    kitchen = getattr(kitchen_module, attr)
+                stop = asyncio.Event()
+                watcher = asyncio.create_task(watch(stop))
+                try:
+                    await client.app.run()
+                finally:
+                    stop.set()
+                    await watcher
             else:
                 # Run the NATS client
                 await client.app.run()
@@ -79,6 +104,14 @@ def connect(
     # Run with multiple workers if specified
     if workers > 1:
         import multiprocessing
+        from .serve import import_app
+
+        # Build shared dependencies once here; workers attach to the same copy
+        shared = None
+        manager = import_app(kitchen).manager
+        if manager.shared_dependencies():
+            shared = manager.share_dependencies()
+
         processes = []
         for _ in range(workers):
             p = multiprocessing.Process(
@@ -94,6 +127,9 @@ def connect(
         except KeyboardInterrupt:
             for p in processes:
                 p.terminate()
+        finally:
+            if shared is not None:
+                shared.close()
     else:
         # Single worker mode
         try:
@@ -3,9 +3,7 @@ import importlib
 import asyncio
 from pathlib import Path
 from typing import Optional, List
-from watchfiles import awatch
 from ..config import WhiskConfig, NatsConfig
-from ..client import WhiskClient
 
 app = typer.Typer(help="Development server commands")
 
@@ -42,6 +40,9 @@ def main(
 ):
     """Run a development server with hot reload and worker support"""
     async def run_app(kitchen_path: str, config_file: Optional[Path], watch_dirs: List[Path], reload: bool):
+        from watchfiles import awatch
+        from ..client import WhiskClient
+
         # Load config
         config = WhiskConfig.from_file(config_file) if config_file else WhiskConfig()
         
@@ -59,7 +60,10 @@ def main(
             nats_url=config.nats.url,
             user=config.nats.user,
             password=config.nats.password,
-            kitchen=kitchen
+            kitchen=kitchen,
+            nats_config=config.nats,
+            max_storage_jobs=config.ingest.max_storage_jobs,
+            profiling_config=config.profiling
         )
         
         try:
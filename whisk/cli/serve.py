@@ -2,7 +2,6 @@ import typer
 import importlib
 from typing import Optional
 from ..config import load_config, ConfigError, WhiskConfig
-from ..router import WhiskRouter, set_kitchen_app
 
 app = typer.Typer()
 
@@ -38,6 +37,7 @@ def get_application():
     config = load_config()
     app_path = os.getenv("WHISK_APP_PATH") or get_app_path(None, config)
     kitchen = import_app(app_path)
+    from ..router import WhiskRouter
     router = WhiskRouter(kitchen, config)
     return router.app
 
@@ -85,6 +85,7 @@ def serve(
         )
     else:
         # Create router and run
+        from ..router import WhiskRouter
         kitchen = import_app(resolved_app_path)
         router = WhiskRouter(kitchen, config)
         router.run(
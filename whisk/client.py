@@ -4,7 +4,14 @@ from faststream.nats import NatsBroker, PullSub, JStream
 
 
 from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
 from whisk.kitchenai_sdk.kitchenai import KitchenAIApp
+from whisk.kitchenai_sdk.jobs import JobStatus, report_progress
+from whisk.kitchenai_sdk.load import LoadAwareDispatcher, LoadMonitor
+from whisk.config import NatsConfig, ProfilingConfig
+from whisk.connection import ConnectionManager, ConnectionStats
+import asyncio
+import functools
 import time
 import sys
 from nats.errors import Error as NatsError
@@ -18,6 +25,11 @@ from whisk.kitchenai_sdk.nats_schema import (
     EmbedResponseMessage,
     BroadcastRequestMessage,
     NatsRegisterMessage,
+    HeartbeatRequestMessage,
+    HeartbeatResponseMessage,
+    ProfilingRequestMessage,
+    ProfilingResponseMessage,
+    LoadReport,
     StorageGetRequestMessage,
     StorageGetResponseMessage,
 )
@@ -54,6 +66,11 @@ class WhiskConnectionError(WhiskClientError):
 
 logger = logging.getLogger(__name__)
 
+# Final status for storage jobs still running when a drain deadline passes
+DRAIN_ERROR = "Worker shut down before the job finished; please resubmit"
+# Reply to storage requests that arrive while every job slot is taken
+BUSY_ERROR = "Worker is busy with other storage jobs; please retry"
+
 
 class WhiskClient:
     """
@@ -63,6 +80,31 @@ class WhiskClient:
 
     # As the KitchenAI service
     kitchenai = WhiskClient(user="kitchenai_admin", password="...", is_kitchenai=True)
+
+    On shutdown the worker drains: it stops taking messages, lets in-flight
+    handlers and storage jobs finish for up to `drain_timeout` seconds, and
+    publishes a final status for jobs it had to abandon. Storage requests
+    that still arrive while draining get that status right away.
+    `reload()` swaps in a new KitchenAIApp on the live connection.
+
+    Heartbeat replies carry the worker's live load. Callers spreading queries
+    over several workers can poll them with `refresh_load()` and let
+    `query(message, client_ids=[...])` pick the least-loaded one.
+
+    Storage requests run as background jobs, at most `max_storage_jobs` at
+    a time. The subscription is a plain NATS queue subscription with no
+    acks, so a worker can't leave messages with the server; instead, a
+    request that arrives while all slots are busy gets an immediate ERROR
+    status (`BUSY_ERROR`) and the requester can retry or send it elsewhere.
+
+    With `profiling_config.enabled`, the worker answers profiling commands
+    on its `mgmt.profiling` subject (see `profile()`). It is off by default,
+    like the HTTP profiling endpoints, since captures can be switched on by
+    anyone who can publish to the subject.
+
+    `nats_config` sets the reconnect policy. Status and response publishes
+    made while the connection is down are buffered and sent on reconnect;
+    see `connection_stats()`.
     """
 
     def __init__(
@@ -74,21 +116,43 @@ class WhiskClient:
         is_kitchenai: bool = False,
         kitchen: KitchenAIApp = None,
         app: FastStream = None,
+        drain_timeout: float = 30.0,
+        nats_config: NatsConfig = None,
+        max_storage_jobs: int = 4,
+        profiling_config: ProfilingConfig = None,
     ):
         self.client_id = client_id
         self.user = user
         self.is_kitchenai = is_kitchenai
         self.kitchen = kitchen
         self.app = app
+        self.drain_timeout = drain_timeout
+        self.draining = False
+        self.profiling_config = profiling_config or ProfilingConfig()
+        if kitchen is not None:
+            self._configure_profiler(kitchen)
+        self._subscribers: List[Any] = []
+        # Futures for handlers in progress and tasks for background storage jobs
+        self._inflight: Set[asyncio.Future] = set()
+        self._storage_jobs: Dict[str, asyncio.Task] = {}
+        # Held from before the ack until the job finishes
+        self._storage_slots = asyncio.Semaphore(max_storage_jobs)
+        self.load = LoadMonitor()
+        self.dispatcher = LoadAwareDispatcher()
+        self.connection = ConnectionManager(nats_config or NatsConfig(url=nats_url))
         try:
             self.broker = NatsBroker(
-                nats_url, name=client_id, user=user, password=password
+                nats_url, name=client_id, user=user, password=password,
+                **self.connection.broker_options()
             )
+            self.connection.bind(self.broker)
 
             if not self.app:
                 self.app = FastStream(
                     broker=self.broker, title=f"Whisk-{client_id}", lifespan=self.lifespan
                 )
+            # Runs before the broker disconnects, so final statuses can still be published
+            self.app.on_shutdown(self._on_shutdown)
 
             # Register subscribers immediately
             if not self.is_kitchenai:
@@ -109,6 +173,10 @@ class WhiskClient:
     @asynccontextmanager
     async def lifespan(self):
         try:
+            if self.kitchen:
+                # Build lazily registered dependencies before taking messages
+                await self.kitchen.manager.warmup()
+            self.load.start()
             yield
         except NatsError as e:
             if "Authorization" in str(e):
@@ -122,6 +190,9 @@ class WhiskClient:
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}")
         finally:
+            await self.load.stop()
+            if self.kitchen:
+                await asyncio.to_thread(self.kitchen.close)
             if hasattr(self, "broker"):
                 await self.broker.close()
 
@@ -144,21 +215,119 @@ class WhiskClient:
 
         args = ("queue",)
         # Setup subscribers
-        self.handle_query = self.broker.subscriber(f"{client_prefix}.query.*", *args)(
-            self._handle_query
+        self.handle_query = self._subscribe(f"{client_prefix}.query.*", self._handle_query, "query", *args)
+        self.handle_heartbeat = self._subscribe(f"{client_prefix}.heartbeat", self._handle_heartbeat, None, *args)
+        if self.profiling_config.enabled:
+            self.handle_profiling = self._subscribe(f"{client_prefix}.mgmt.profiling", self._handle_profiling, None, *args)
+        # Storage jobs are counted by _handle_storage for as long as they run, not here
+        self.handle_storage = self._subscribe(f"{client_prefix}.storage.*", self._handle_storage, None, *args)
+        self.handle_storage_delete = self._subscribe(
+            f"{client_prefix}.storage.*.delete", self._handle_storage_delete, "storage", *args
         )
-        self.handle_heartbeat = self.broker.subscriber(
-            f"{client_prefix}.heartbeat", *args
-        )(self._handle_heartbeat)
 
-        self.handle_storage = self.broker.subscriber(
-            f"{client_prefix}.storage.*",
-            *args,
-        )(self._handle_storage)
-        self.handle_storage_delete = self.broker.subscriber(
-            f"{client_prefix}.storage.*.delete",
-            *args,
-        )(self._handle_storage_delete)
+    def _subscribe(self, subject: str, handler: Callable, taxonomy: Optional[str], *args):
+        subscriber = self.broker.subscriber(subject, *args)
+        self._subscribers.append(subscriber)
+        return subscriber(self._tracked(handler, taxonomy))
+
+    def _tracked(self, handler: Callable, taxonomy: Optional[str] = None) -> Callable:
+        """Record the handler as in flight while it runs, for drains and load reports"""
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            done = asyncio.get_running_loop().create_future()
+            self._inflight.add(done)
+            try:
+                if taxonomy is None:
+                    return await handler(*args, **kwargs)
+                with self.load.track(taxonomy):
+                    return await handler(*args, **kwargs)
+            finally:
+                self._inflight.discard(done)
+                done.set_result(None)
+        return wrapper
+
+    async def _wait_inflight(self, pending: Set[asyncio.Future], deadline: float) -> Set[asyncio.Future]:
+        """Wait for in-flight work until the deadline; returns what is still running"""
+        pending = {future for future in pending if not future.done()}
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=max(deadline - time.monotonic(), 0))
+        return pending
+
+    async def _stop_subscriber(self, subscriber, deadline: float):
+        subscription = subscriber.subscription
+        if subscription is not None:
+            try:
+                # Unsubscribe from the queue group but process what was already delivered
+                await asyncio.wait_for(subscription.drain(), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                logger.warning(f"Subscriber {subscriber.subject} still busy at the drain deadline")
+            except NatsError as e:
+                logger.warning(f"Error draining subscriber {subscriber.subject}: {e}")
+            subscriber.subscription = None
+        await subscriber.stop()
+
+    async def drain(self, timeout: float = None) -> bool:
+        """Stop taking messages and finish in-flight work within `timeout` seconds.
+
+        Storage jobs still running at the deadline are cancelled and publish
+        an error status on their `.response` subject. Returns True if all
+        work finished in time. Call `resume()` to take messages again.
+        """
+        timeout = self.drain_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        self.draining = True
+        logger.info(f"Draining: {len(self._inflight)} handlers and {len(self._storage_jobs)} storage jobs in flight")
+        await asyncio.gather(*(self._stop_subscriber(subscriber, deadline) for subscriber in self._subscribers))
+
+        pending = await self._wait_inflight({*self._inflight, *self._storage_jobs.values()}, deadline)
+        jobs = [task for task in self._storage_jobs.values() if task in pending]
+        for task in jobs:
+            task.cancel()
+        if jobs:
+            logger.warning(f"Cancelled {len(jobs)} storage jobs at the drain deadline")
+            # Give them a moment to publish their final status
+            await asyncio.wait(jobs, timeout=5)
+        return not pending
+
+    async def resume(self):
+        """Take messages again after a drain"""
+        for subscriber in self._subscribers:
+            if not subscriber.running:
+                await subscriber.start()
+        self.draining = False
+
+    async def reload(self, kitchen: KitchenAIApp, timeout: float = None) -> bool:
+        """Switch to a new KitchenAIApp on the live NATS connection.
+
+        The new app's dependencies are built first while the old app keeps
+        serving. The swap itself is atomic: messages received afterwards go
+        to the new app and handlers already running finish on the old one
+        (awaited up to `timeout`). The subscriptions stay up throughout, so
+        no messages are dropped in between, even with a single worker.
+        """
+        timeout = self.drain_timeout if timeout is None else timeout
+        await kitchen.manager.warmup()
+        self._configure_profiler(kitchen)
+        previous = {*self._inflight, *self._storage_jobs.values()}
+        old_kitchen, self.kitchen = self.kitchen, kitchen
+        if self.client_id:
+            try:
+                await self.register_client(self.client_id)
+            except Exception as e:
+                logger.error(f"Failed to re-register after reload: {e}")
+        pending = await self._wait_inflight(previous, time.monotonic() + timeout)
+        if pending:
+            logger.warning(f"{len(pending)} tasks of the previous app still running after {timeout}s")
+        elif old_kitchen is not None and old_kitchen is not kitchen:
+            shared = kitchen.manager.list_dependencies().values()
+            await asyncio.to_thread(old_kitchen.close, shared)
+        return not pending
+
+    async def _on_shutdown(self):
+        if self._subscribers:
+            await self.drain()
+        # Last chance to send statuses buffered during an outage
+        await self.connection.flush()
 
 
     async def _handle_query(
@@ -181,6 +350,7 @@ class WhiskClient:
                 messages=msg.messages,
             )
 
+        task = self.kitchen.scheduler.wrap("query", msg.label, task)
         response = await task(WhiskQuerySchema(**msg.model_dump()))
         response_dict = response.model_dump()
 
@@ -218,14 +388,83 @@ class WhiskClient:
                 )
             )
 
-    async def _handle_heartbeat(self, msg: NatsRegisterMessage, logger: Logger) -> None:
-        logger.info(f"Heartbeat request: {msg}")
-        return NatsRegisterMessage(
-            client_id=msg.client_id,
-            version=msg.version,
-            name=msg.name,
-            ack=True,
-            message="heartbeat",
+    async def _handle_heartbeat(self, msg: HeartbeatRequestMessage, logger: Logger) -> HeartbeatResponseMessage:
+        logger.debug(f"Heartbeat request: {msg.client_id}")
+        return HeartbeatResponseMessage(
+            client_id=self.client_id or msg.client_id,
+            version=self.kitchen.version if self.kitchen else msg.version,
+            name=self.kitchen.namespace if self.kitchen else msg.name,
+            timestamp=time.time(),
+            load=self.load_report(),
+        )
+
+    def _configure_profiler(self, kitchen: KitchenAIApp):
+        if self.profiling_config.enabled:
+            kitchen.profiler.configure(
+                self.profiling_config.interval_ms / 1000, self.profiling_config.max_captures
+            )
+
+    async def _handle_profiling(self, msg: ProfilingRequestMessage, logger: Logger) -> ProfilingResponseMessage:
+        """Drive the kitchen's HandlerProfiler for remote profiling"""
+        profiler = self.kitchen.profiler
+        response = ProfilingResponseMessage(client_id=self.client_id or msg.client_id)
+        try:
+            if msg.action == "start_sampling":
+                profiler.start_sampling(msg.taxonomy or "chat", msg.label)
+            elif msg.action == "stop_sampling":
+                profiler.stop_sampling(msg.taxonomy or "chat", msg.label)
+            elif msg.action == "collapsed":
+                response.collapsed = profiler.collapsed(msg.taxonomy, msg.label)
+            elif msg.action == "add_rule":
+                response.rule = profiler.add_rule(**(msg.rule or {}))
+            elif msg.action == "remove_rule":
+                if not profiler.remove_rule(msg.rule_id):
+                    response.error = f"Rule {msg.rule_id} not found"
+            elif msg.action == "capture":
+                response.capture = profiler.get_capture(msg.capture_id)
+                if response.capture is None:
+                    response.error = f"Capture {msg.capture_id} not found"
+        except (KeyError, ValueError) as e:
+            response.error = str(e.args[0]) if isinstance(e, KeyError) else str(e)
+        if msg.action in ("status", "start_sampling", "stop_sampling"):
+            response.status = profiler.status()
+        return response
+
+    def load_report(self) -> LoadReport:
+        """This worker's current load, as sent in heartbeat replies"""
+        waits = self.kitchen.scheduler.tasks.recent_waits if self.kitchen else ()
+        return self.load.report(waits, draining=self.draining)
+
+    def connection_stats(self) -> ConnectionStats:
+        """Reconnect and outbox counters for this client's NATS connection"""
+        return self.connection.stats.model_copy()
+
+    def _storage_response_subject(self, msg: StorageRequestMessage) -> str:
+        return f"kitchenai.service.{msg.client_id}.storage.{msg.label}.response"
+
+    async def _publish_storage_status(
+        self,
+        msg: StorageRequestMessage,
+        status: WhiskStorageStatus,
+        error: str = None,
+        metadata: dict = None,
+        token_counts=None,
+    ) -> None:
+        """Publish a storage status update on the request's .response subject"""
+        await self.connection.publish(
+            StorageResponseMessage(
+                id=msg.id,
+                name=msg.name,
+                request_id=msg.request_id,
+                timestamp=time.time(),
+                label=msg.label,
+                client_id=msg.client_id,
+                metadata=metadata,
+                status=status,
+                token_counts=token_counts,
+                error=error,
+            ),
+            self._storage_response_subject(msg),
         )
 
     async def _handle_storage(self, msg: StorageRequestMessage, logger: Logger) -> None:
@@ -233,32 +472,99 @@ class WhiskClient:
         This is a storage request.
         Flow:
         - KitchenAI will publish a message to client bento box
-        - Bento box will pick up the message and request a presigned url from KitchenAI
+        - Bento box acks the request and runs the rest as a background job
+        - Bento box will request a presigned url from KitchenAI
         - KitchenAI will return a presigned url
         - Bento box will use the presigned url to download the file
         - Bento box will process the file with the storage task
-        - Bento box service will send a response back to the client for progress
+        - Bento box service will send progress updates back to the client
         - KitchenAI will update object status.
         """
         logger.info(f"Storage request: {msg}")
         # Get the task handler
         task = self.kitchen.storage.get_task(msg.label)
         if not task:
-            payload = StorageResponseMessage(
-                id=msg.id,
-                request_id=msg.request_id,
-                timestamp=time.time(),
-                client_id=msg.client_id,
-                label=msg.label,
-                status=WhiskStorageStatus.ERROR,
-                error="No task found for storage request",
+            error = "No task found for storage request"
+            logger.error(f"Error processing storage request: {error}")
+            self.load.begin("storage")
+            self.load.finish("storage", failed=True)
+            await self._publish_storage_status(msg, WhiskStorageStatus.ERROR, error=error)
+            return
+        task = self.kitchen.scheduler.wrap("storage", msg.label, task)
+
+        if self.draining:
+            # Shutting down: don't start (or wait for a slot for) new jobs
+            logger.warning(f"Storage request {msg.id} rejected: worker is draining")
+            await self._publish_storage_status(msg, WhiskStorageStatus.ERROR, error=DRAIN_ERROR)
+            return
+
+        # Backpressure: turn away requests beyond max_storage_jobs rather than
+        # letting them queue in the client's pending buffer
+        if self._storage_slots.locked():
+            logger.warning(f"Storage request {msg.id} rejected: all job slots busy")
+            self.load.begin("storage")
+            self.load.finish("storage", failed=True)
+            await self._publish_storage_status(msg, WhiskStorageStatus.ERROR, error=BUSY_ERROR)
+            return
+        await self._storage_slots.acquire()
+        try:
+            job = self.kitchen.jobs.create(
+                "storage", id=msg.id, label=msg.label, request_id=msg.request_id
             )
-            logger.error(f"Error processing storage request: {payload}")
-            await self.broker.publish(
-                payload,
-                f"kitchenai.service.{msg.client_id}.storage.{msg.label}.response",
+            await self._publish_storage_status(
+                msg, WhiskStorageStatus.ACK, metadata={"job_id": job.id}
             )
-            return
+            work = self.kitchen.jobs.start(job, self._run_storage_job(msg, task, job, logger))
+        except BaseException:
+            self._storage_slots.release()
+            raise
+        self._storage_jobs[job.id] = work
+        self.load.begin("storage")
+
+        def finished(_):
+            self._storage_slots.release()
+            self._storage_jobs.pop(job.id, None)
+            self.load.finish("storage", failed=job.status == JobStatus.ERROR)
+        work.add_done_callback(finished)
+
+    async def _forward_storage_progress(self, msg: StorageRequestMessage, job) -> None:
+        """Relay job progress events to the request's .response subject"""
+        async for event in self.kitchen.jobs.subscribe(job.id):
+            if event.stage is None:
+                continue
+            await self._publish_storage_status(
+                msg,
+                WhiskStorageStatus.PROGRESS,
+                metadata={"job_id": job.id, "stage": event.stage, "progress": event.progress},
+            )
+
+    async def _run_storage_job(self, msg: StorageRequestMessage, task, job, logger: Logger) -> None:
+        """Process a storage request, publishing progress and the final status"""
+        forwarder = asyncio.create_task(self._forward_storage_progress(msg, job))
+        try:
+            response = await self._process_storage(msg, task, logger)
+        except asyncio.CancelledError:
+            # Drained past the deadline: tell the requester rather than going silent
+            forwarder.cancel()
+            await self._publish_storage_status(
+                msg, WhiskStorageStatus.ERROR, error=DRAIN_ERROR, metadata={"job_id": job.id}
+            )
+            raise
+        except Exception as e:
+            # Stop relaying progress first so nothing is published after the final status
+            forwarder.cancel()
+            await self._publish_storage_status(msg, WhiskStorageStatus.ERROR, error=str(e))
+            raise
+        forwarder.cancel()
+        await self._publish_storage_status(
+            msg,
+            WhiskStorageStatus.COMPLETE,
+            metadata=response.metadata,
+            token_counts=getattr(response, "token_counts", None),
+        )
+
+    async def _process_storage(self, msg: StorageRequestMessage, task, logger: Logger):
+        """Fetch a presigned url, download the object and run the storage task"""
         # Get file pre-signed url from kitchenai storage
         try:
             nats_response = await self.broker.request(
@@ -272,58 +578,28 @@ class WhiskClient:
                 ),
                 f"kitchenai.service.{msg.client_id}.storage.{msg.label}.get",
             )
+            presigned_message = StorageGetResponseMessage(
+                id=msg.id, **NatsMessage.from_faststream(nats_response).decoded_body
+            )
         except Exception as e:
             logger.error(f"Error getting presigned url: {e}")
-            await self.broker.publish(
-                StorageResponseMessage(
-                    id=msg.id,
-                    request_id=msg.request_id,
-                    timestamp=time.time(),
-                    error=str(e),
-                    label=msg.label,
-                    client_id=msg.client_id,
-                    status=WhiskStorageStatus.ERROR,
-                ),
-                f"kitchenai.service.{msg.client_id}.storage.{msg.label}.response",
-            )
-            return
-        presigned_message = StorageGetResponseMessage(
-            id=msg.id, **NatsMessage.from_faststream(nats_response).decoded_body
-        )
+            raise
         if presigned_message.error:
             raise WhiskClientError(
                 f"Error getting presigned url: {presigned_message.error}"
             )
-        
+
         logger.info(f"Presigned url: {presigned_message.presigned_url}")
-        # Use httpx to download the file using the presigned URL
+        # Stream the download so progress can be reported as bytes arrive
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(presigned_message.presigned_url)
-                if response.status_code != 200:
-                    raise WhiskClientError(
-                        f"Error downloading file: {response.status_code}"
-                    )
-                file_data = response.content
+            file_data = await self._download(presigned_message.presigned_url)
         except Exception as e:
             logger.error(f"Error downloading file: {e}")
-            await self.broker.publish(
-                StorageResponseMessage(
-                    id=msg.id,
-                    request_id=msg.request_id,
-                    timestamp=time.time(),
-                    error=str(e),
-                    label=msg.label,
-                    client_id=msg.client_id,
-                    status=WhiskStorageStatus.ERROR,
-                ),
-                f"kitchenai.service.{msg.client_id}.storage.{msg.label}.response",
-            )
-            return
+            raise
 
         # Process file with kitchen task
         try:
-            response = await task(
+            return await task(
                 WhiskStorageSchema(
                     id=msg.id,
                     name=msg.name,
@@ -334,33 +610,24 @@ class WhiskClient:
             )
         except Exception as e:
             logger.error(f"Error processing storage request: {e}")
-            await self.broker.publish(
-                StorageResponseMessage(
-                    id=msg.id,
-                    request_id=msg.request_id,
-                    timestamp=time.time(),
-                    label=msg.label,
-                    client_id=msg.client_id,
-                    metadata=response.metadata,
-                    status=WhiskStorageStatus.ERROR,
-                    token_counts=response.token_counts,
-                    error=str(e),
-                ),
-                f"kitchenai.service.{msg.client_id}.storage.{msg.label}.response",
-            )
-        await self.broker.publish(
-            StorageResponseMessage(
-                id=msg.id,
-                request_id=msg.request_id,
-                timestamp=time.time(),
-                label=msg.label,
-                client_id=msg.client_id,
-                metadata=response.metadata,
-                status=WhiskStorageStatus.COMPLETE,
-                token_counts=response.token_counts,
-            ),
-            f"kitchenai.service.{msg.client_id}.storage.{msg.label}.response",
-        )
+            raise
+
+    async def _download(self, url: str) -> bytes:
+        """Download a file, reporting bytes_downloaded progress to the current job"""
+        chunks = []
+        downloaded = 0
+        async with httpx.AsyncClient() as client:
+            async with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise WhiskClientError(
+                        f"Error downloading file: {response.status_code}"
+                    )
+                total = int(response.headers.get("content-length", 0))
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    downloaded += len(chunk)
+                    report_progress("download", bytes_downloaded=downloaded, bytes_total=total)
+        return b"".join(chunks)
 
     async def _handle_storage_delete(
         self, msg: StorageRequestMessage, logger: Logger
@@ -390,13 +657,14 @@ class WhiskClient:
                     client_id=msg.client_id,
                     error="No task found for embed request",
                 )
-                await self.broker.publish(
+                await self.connection.publish(
                     embed_response,
                     f"kitchenai.service.{msg.client_id}.embedding.{msg.label}.response",
                 )
                 return
+            task = self.kitchen.scheduler.wrap("embeddings", msg.label, task)
             response = await task(WhiskEmbedSchema(**msg.model_dump()))
-            await self.broker.publish(
+            await self.connection.publish(
                 EmbedResponseMessage(
                     id=msg.id,
                     request_id=msg.request_id,
@@ -409,7 +677,7 @@ class WhiskClient:
             )
         except Exception as e:
             logger.error(f"Error processing embed request: {str(e)}")
-            await self.broker.publish(
+            await self.connection.publish(
                 EmbedResponseMessage(
                     id=msg.id,
                     request_id=msg.request_id,
@@ -432,21 +700,58 @@ class WhiskClient:
         await task(WhiskEmbedSchema(**msg.model_dump()))
 
     async def _publish_stream(self, message: QueryResponseMessage):
-        await self.broker.publish(
+        await self.connection.publish(
             message,
             f"kitchenai.service.{message.client_id}.query.{message.label}.stream.response",
         )
 
-    async def query(self, message: QueryRequestMessage) -> NatsMessage:
+    async def query(self, message: QueryRequestMessage, client_ids: Optional[List[str]] = None) -> NatsMessage:
         """Send a query request.
         Returns a NatsMessage object
+
+        With `client_ids`, the request goes to the least-loaded of those
+        workers according to the dispatcher (see `refresh_load()`).
         """
+        if not client_ids:
+            response = await self.broker.request(
+                message,
+                f"kitchenai.service.{message.client_id}.query.{message.label}",
+                timeout=10,
+            )
+            return NatsMessage.from_faststream(response)
+        with self.dispatcher.route(client_ids) as client_id:
+            message = message.model_copy(update={"client_id": client_id})
+            return await self.query(message)
+
+    async def heartbeat(self, client_id: str, timeout: float = 2.0) -> Optional[LoadReport]:
+        """Probe a worker and record its load with the dispatcher; None if it didn't answer"""
+        try:
+            response = await self.broker.request(
+                HeartbeatRequestMessage(client_id=client_id),
+                f"kitchenai.service.{client_id}.heartbeat",
+                timeout=timeout,
+            )
+            reply = HeartbeatResponseMessage(**NatsMessage.from_faststream(response).decoded_body)
+        except Exception as e:
+            logger.warning(f"No heartbeat from {client_id}: {e}")
+            self.dispatcher.reports.pop(client_id, None)
+            return None
+        self.dispatcher.update(client_id, reply.load)
+        return reply.load
+
+    async def profile(self, client_id: str, action: str, timeout: float = 5.0, **fields) -> ProfilingResponseMessage:
+        """Send a profiling command to a worker, e.g. profile("worker-a", "start_sampling", label="rag")"""
         response = await self.broker.request(
-            message,
-            f"kitchenai.service.{message.client_id}.query.{message.label}",
-            timeout=10,
+            ProfilingRequestMessage(client_id=client_id, action=action, **fields),
+            f"kitchenai.service.{client_id}.mgmt.profiling",
+            timeout=timeout,
         )
-        return NatsMessage.from_faststream(response)
+        return ProfilingResponseMessage(**NatsMessage.from_faststream(response).decoded_body)
+
+    async def refresh_load(self, client_ids: List[str], timeout: float = 2.0) -> Dict[str, Optional[LoadReport]]:
+        """Heartbeat several workers concurrently"""
+        reports = await asyncio.gather(*(self.heartbeat(client_id, timeout) for client_id in client_ids))
+        return dict(zip(client_ids, reports))
 
     async def query_stream(self, message: QueryRequestMessage):
         """Send a query stream request. This will only work for KitchenAI Server
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional, Literal
+from typing import Dict, Optional, Literal
 import os
 import yaml
 from pydantic import BaseModel, Field, validator, field_validator
@@ -20,6 +20,15 @@ class NatsConfig(BaseModel):
     user: Optional[str] = None
     password: Optional[str] = None
     client_id: Optional[str] = None
+    # Reconnect policy: waits grow from reconnect_backoff to reconnect_backoff_max
+    max_reconnect_attempts: int = Field(-1, description="-1 to retry forever")
+    reconnect_backoff: float = 0.5
+    reconnect_backoff_max: float = 30.0
+    reconnect_jitter: float = Field(0.2, description="Random +/- share of each wait")
+    ping_interval: int = Field(20, description="Seconds between pings; a dead server is noticed after max_outstanding_pings")
+    max_outstanding_pings: int = 3
+    connect_timeout: int = 2
+    outbox_size: int = Field(1000, description="Status publishes kept while disconnected; the oldest are dropped beyond this")
 
 class FastAPIConfig(BaseModel):
     host: str = "0.0.0.0"
@@ -29,6 +38,45 @@ class FastAPIConfig(BaseModel):
 class ChromaConfig(BaseModel):
     path: str = "chroma_db"
 
+class VectorStoreConfig(BaseModel):
+    """Settings for the built-in NumPy vector store"""
+    path: Optional[str] = "vector_store"
+    metric: Literal["cosine", "dot"] = "cosine"
+    segment_size: int = 65536
+    max_segments: int = 8
+
+class IngestConfig(BaseModel):
+    """Parallelism for the bulk ingest pipeline"""
+    read_concurrency: int = 2
+    store_concurrency: int = 4
+    queue_size: int = 64
+    max_store_concurrency: int = Field(32, description="Upper bound for the per-request `concurrency` field")
+    max_expanded_bytes: int = Field(4 << 30, description="Largest total size an uploaded archive may expand to")
+    max_storage_jobs: int = Field(4, description="NATS storage jobs a worker runs at once; further requests get a busy error")
+
+class RateLimitConfig(BaseModel):
+    """Token bucket plus concurrency cap for one client or handler"""
+    rate: Optional[float] = Field(None, description="Requests per second; None for no rate limit")
+    burst: Optional[int] = Field(None, description="Bucket size; defaults to max(1, rate)")
+    max_concurrency: Optional[int] = Field(None, description="Requests in flight; None for no cap")
+
+class AdmissionConfig(BaseModel):
+    """Rate limiting and admission control applied by WhiskRouter"""
+    enabled: bool = False
+    client: RateLimitConfig = RateLimitConfig()
+    clients: Dict[str, RateLimitConfig] = Field(default_factory=dict, description="Overrides by API key or client id")
+    handler: RateLimitConfig = RateLimitConfig()
+    handlers: Dict[str, RateLimitConfig] = Field(default_factory=dict, description="Overrides by handler label")
+    latency_slo_ms: Optional[float] = Field(None, description="Shed requests expected to wait longer than this for a handler slot")
+    api_key_header: str = "x-api-key"
+    max_tracked_clients: int = 10000
+
+class ProfilingConfig(BaseModel):
+    """Handler profiling under /v1/profiling and the NATS mgmt.profiling subject (unauthenticated; keep off in public deployments)"""
+    enabled: bool = False
+    interval_ms: float = Field(5.0, description="Stack sampling interval")
+    max_captures: int = Field(50, description="cProfile/tracemalloc results kept")
+
 class ServerConfig(BaseModel):
     type: Literal["fastapi", "nats", "both"]
     fastapi: Optional[FastAPIConfig] = None
@@ -59,6 +107,10 @@ class WhiskConfig(BaseModel):
     nats: Optional[NatsConfig] = None
     llm: Optional[dict] = None
     chroma: ChromaConfig = ChromaConfig()
+    ingest: IngestConfig = IngestConfig()
+    vector_store: VectorStoreConfig = VectorStoreConfig()
+    admission: AdmissionConfig = AdmissionConfig()
+    profiling: ProfilingConfig = ProfilingConfig()
 
     @classmethod
     def from_env(cls) -> "WhiskConfig":
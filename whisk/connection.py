@@ -0,0 +1,154 @@
+from typing import Any, Deque, Dict, Optional, Tuple
+from collections import deque
+from pydantic import BaseModel
+from nats.errors import Error as NatsError
+from .config import NatsConfig
+import asyncio
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Publish failures that mean "not connected right now" rather than a bad message
+PUBLISH_ERRORS = (NatsError, OSError, asyncio.TimeoutError)
+
+
+class ConnectionStats(BaseModel):
+    """Counters for one client's NATS connection"""
+    connected: bool = True
+    disconnects: int = 0
+    reconnects: int = 0
+    reconnect_attempts: int = 0
+    errors: int = 0
+    buffered: int = 0
+    flushed: int = 0
+    dropped: int = 0
+    last_error: Optional[str] = None
+
+
+def backoff_delay(attempt: int, initial: float, maximum: float, jitter: float = 0.0) -> float:
+    """Exponential backoff for the given attempt (0-based), capped, with +/- jitter"""
+    delay = min(maximum, initial * (2 ** attempt))
+    if jitter:
+        delay *= 1 + random.uniform(-jitter, jitter)
+    return max(delay, 0.0)
+
+
+class ConnectionManager:
+    """Reconnect policy, outbox and metrics for a WhiskClient's NATS connection.
+
+    nats-py retries with a fixed wait; the wait is grown with exponential
+    backoff from the error callback of each failed attempt. Status and
+    response publishes go through `publish()`: while the connection is down
+    (or when a publish fails) they wait in a bounded outbox, oldest dropped
+    first, and are sent in order once the connection is back.
+    """
+
+    def __init__(self, config: Optional[NatsConfig] = None):
+        self.config = config or NatsConfig()
+        self.stats = ConnectionStats()
+        self._outbox: Deque[Tuple[Any, str, Dict[str, Any]]] = deque()
+        self._broker = None
+        self._flushing: Optional[asyncio.Task] = None
+
+    def broker_options(self) -> Dict[str, Any]:
+        """Keyword arguments for NatsBroker"""
+        return {
+            "allow_reconnect": True,
+            "max_reconnect_attempts": self.config.max_reconnect_attempts,
+            "reconnect_time_wait": self.config.reconnect_backoff,
+            "ping_interval": self.config.ping_interval,
+            "max_outstanding_pings": self.config.max_outstanding_pings,
+            "connect_timeout": self.config.connect_timeout,
+            "disconnected_cb": self._on_disconnected,
+            "reconnected_cb": self._on_reconnected,
+            "error_cb": self._on_error,
+            "closed_cb": self._on_closed,
+        }
+
+    def bind(self, broker):
+        self._broker = broker
+
+    def _set_reconnect_wait(self, wait: float):
+        connection = getattr(self._broker, "_connection", None)
+        options = getattr(connection, "options", None)
+        if isinstance(options, dict):
+            options["reconnect_time_wait"] = wait
+
+    async def _on_disconnected(self):
+        if self.stats.connected:
+            self.stats.connected = False
+            self.stats.disconnects += 1
+            self.stats.reconnect_attempts = 0
+            logger.warning("Disconnected from NATS; buffering status publishes")
+
+    async def _on_reconnected(self):
+        self.stats.connected = True
+        self.stats.reconnects += 1
+        self._set_reconnect_wait(self.config.reconnect_backoff)
+        logger.info(f"Reconnected to NATS after {self.stats.reconnect_attempts} attempts; flushing {len(self._outbox)} publishes")
+        self._schedule_flush()
+
+    async def _on_error(self, error: Exception):
+        self.stats.errors += 1
+        self.stats.last_error = str(error) or type(error).__name__
+        if not self.stats.connected:
+            # A failed reconnect attempt: wait longer before the next one
+            self._set_reconnect_wait(backoff_delay(
+                self.stats.reconnect_attempts,
+                self.config.reconnect_backoff,
+                self.config.reconnect_backoff_max,
+                self.config.reconnect_jitter
+            ))
+            self.stats.reconnect_attempts += 1
+        logger.warning(f"NATS error: {error}")
+
+    async def _on_closed(self):
+        self.stats.connected = False
+        if self._outbox:
+            logger.error(f"NATS connection closed with {len(self._outbox)} publishes still buffered")
+
+    def _buffer(self, message: Any, subject: str, kwargs: Dict[str, Any], front: bool = False):
+        if front:
+            self._outbox.appendleft((message, subject, kwargs))
+        else:
+            self._outbox.append((message, subject, kwargs))
+        while len(self._outbox) > self.config.outbox_size:
+            # Drop the oldest; later statuses for the same request supersede it
+            self._outbox.popleft()
+            self.stats.dropped += 1
+        self.stats.buffered = len(self._outbox)
+
+    async def publish(self, message: Any, subject: str, **kwargs):
+        """Publish now if possible, otherwise queue for after the reconnect"""
+        if not self.stats.connected or self._outbox:
+            # Keep order behind anything already waiting
+            self._buffer(message, subject, kwargs)
+            if self.stats.connected:
+                self._schedule_flush()
+            return
+        try:
+            await self._broker.publish(message, subject, **kwargs)
+        except PUBLISH_ERRORS as e:
+            logger.warning(f"Publish to {subject} failed, buffering: {e}")
+            self._buffer(message, subject, kwargs)
+
+    def _schedule_flush(self):
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Send buffered publishes in order; stops at the first failure"""
+        sent = 0
+        while self._outbox and self.stats.connected:
+            message, subject, kwargs = self._outbox.popleft()
+            try:
+                await self._broker.publish(message, subject, **kwargs)
+            except PUBLISH_ERRORS as e:
+                logger.warning(f"Flushing buffered publishes failed: {e}")
+                self._buffer(message, subject, kwargs, front=True)
+                break
+            sent += 1
+            self.stats.flushed += 1
+        self.stats.buffered = len(self._outbox)
+        return sent
@@ -1,8 +1,10 @@
 from typing import Optional
 from .kitchenai_sdk.kitchenai import KitchenAIApp
+from .config import WhiskConfig
 
 # Global app instance
 _app: Optional[KitchenAIApp] = None
+_config: Optional[WhiskConfig] = None
 
 def get_kitchen_app() -> KitchenAIApp:
     """Get KitchenAI app instance"""
@@ -13,4 +15,15 @@ def get_kitchen_app() -> KitchenAIApp:
 def set_kitchen_app(app: KitchenAIApp):
     """Set the KitchenAI app instance"""
     global _app
-    _app = app 
\ No newline at end of file
+    _app = app
+
+def get_whisk_config() -> WhiskConfig:
+    """Get the Whisk config, falling back to defaults"""
+    if _config is None:
+        return WhiskConfig()
+    return _config
+
+def set_whisk_config(config: WhiskConfig):
+    """Set the Whisk config instance"""
+    global _config
+    _config = config
@@ -8,6 +8,10 @@ from whisk.kitchenai_sdk.schema import (
     WhiskStorageSchema,
     WhiskStorageResponseSchema
 )
+from whisk.kitchenai_sdk.retrieval import AsyncRetriever
+from whisk.kitchenai_sdk.prompt import PromptBuilder
+from whisk.kitchenai_sdk.snapshot import SnapshotStore, corpus_hash
+from whisk.kitchenai_sdk.vector_store import NumpyVectorStore
 from whisk.kitchenai_sdk.http_schema import (
     ChatCompletionRequest,
     ChatCompletionResponse,
@@ -39,11 +43,13 @@ logger = logging.getLogger(__name__)
 # Initialize the app
 kitchen = KitchenAIApp(namespace="whisk-example-app-2")
 
-# Initialize dependencies
-llm = OpenAI(
-    model="gpt-3.5-turbo",
-    temperature=0.1
-)
+# Dependencies are built on first use (or during server startup warmup),
+# so importing this module stays cheap
+def build_llm():
+    return OpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.1
+    )
 
 # Create a simple vector store with some documents
 documents = [
@@ -52,24 +58,32 @@ documents = [
     Document(text="Paris is known as the City of Light.", metadata={"source": "culture.txt"})
 ]
 
-# Initialize vector store
-embedding_model = OpenAIEmbedding()
-vector_store = SimpleVectorStore()
-storage_context = StorageContext.from_defaults(vector_store=vector_store)
+snapshots = SnapshotStore(".whisk/snapshots")
 
-# Create the index with the vector store
-index = VectorStoreIndex.from_documents(
-    documents,
-    storage_context=storage_context,
-    embed_model=embedding_model
-)
+def build_index():
+    # Embed the corpus once; later starts (and every --workers process)
+    # memory-map the saved snapshot instead of re-embedding it
+    embed_model = kitchen.manager.get_dependency(DependencyType.EMBEDDINGS)
+
+    def build():
+        store = NumpyVectorStore(embed_fn=embed_model.get_text_embedding)
+        store.add_texts([doc.text for doc in documents], metadatas=[doc.metadata for doc in documents])
+        return store
+
+    return snapshots.load_or_build(
+        corpus_hash(doc.text for doc in documents),
+        embed_model.model_name,
+        build,
+        embed_fn=embed_model.get_text_embedding
+    )
 
 # Register dependencies
-kitchen.register_dependency(DependencyType.LLM, llm)
-kitchen.register_dependency(DependencyType.VECTOR_STORE, index)
+kitchen.register_factory(DependencyType.LLM, build_llm)
+kitchen.register_factory(DependencyType.EMBEDDINGS, OpenAIEmbedding)
+kitchen.register_factory(DependencyType.VECTOR_STORE, build_index)
 
-@kitchen.chat.handler("chat.completions")
-async def handle_chat(request: ChatCompletionRequest):
+@kitchen.chat.handler("chat.completions", DependencyType.LLM)
+async def handle_chat(request: ChatCompletionRequest, llm):
     """Simple chat handler that forwards to OpenAI"""
     content = request.messages[-1].content
     
@@ -113,6 +127,8 @@ async def handle_chat(request: ChatCompletionRequest):
         ]
     )
 
+prompt_builder = PromptBuilder(model="gpt-3.5-turbo", reserve_completion_tokens=1024)
+
 @kitchen.chat.handler("chat.rag", DependencyType.VECTOR_STORE, DependencyType.LLM)
 async def rag_handler(chat: ChatInput, vector_store, llm) -> ChatResponse:
     """RAG-enabled chat handler"""
@@ -122,17 +138,19 @@ async def rag_handler(chat: ChatInput, vector_store, llm) -> ChatResponse:
     logger.info(f"RAG question: {question}")
     
     # Search for relevant documents
-    retriever = vector_store.as_retriever(similarity_top_k=2)
-    nodes = retriever.retrieve(question)
+    retriever = AsyncRetriever.from_dependency(vector_store, similarity_top_k=2)
+    nodes = await retriever.aretrieve(question)
     
-    # Create context from retrieved documents
-    context = "\n".join(node.node.text for node in nodes)
+    # Rank and trim the retrieved text so the prompt fits the model's context window
+    built = prompt_builder.build(
+        [chat.messages[-1]],
+        sources=[node.to_source_node() for node in nodes]
+    )
     prompt = f"""Answer the question based on the following context:
 
-Context:
-{context}
+{built.context}
 
-Question: {question}
+Question: {built.messages[-1].content}
 
 Answer:"""
     
@@ -156,8 +174,8 @@ Answer:"""
         ]
     )
 
-@kitchen.storage.handler("storage")
-async def storage_handler(data: WhiskStorageSchema) -> WhiskStorageResponseSchema:
+@kitchen.storage.handler("storage", DependencyType.EMBEDDINGS)
+async def storage_handler(data: WhiskStorageSchema, embeddings) -> WhiskStorageResponseSchema:
     """Storage handler for document ingestion"""
     try:
         # Parse model field if present: "@namespace-version/label" or just "label"
@@ -225,7 +243,7 @@ async def storage_handler(data: WhiskStorageSchema) -> WhiskStorageResponseSchem
             doc_index = VectorStoreIndex.from_documents(
                 documents,
                 storage_context=doc_storage_context,
-                embed_model=embedding_model
+                embed_model=embeddings
             )
             logger.info(f"Doc index: {doc_index}")
 
@@ -0,0 +1,309 @@
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from pathlib import Path
+from .kitchenai_sdk.http_schema import (
+    ChatCompletionChunk,
+    ChatCompletionResponse,
+    FileDeleteResponse,
+    FileListResponse,
+    FileResponse,
+    ModelListResponse,
+)
+import asyncio
+import json
+import random
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "not processed, try again": rate limited, shed or restarting
+RETRY_STATUSES = {429, 502, 503, 504}
+# Failures before the request reached the server; any method can be resent
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Failures after it may have been processed; only resent for idempotent methods
+IDEMPOTENT_ERRORS = CONNECT_ERRORS + (httpx.ReadTimeout, httpx.RemoteProtocolError)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "DELETE"}
+
+# A file to upload: a path, or (filename, content)
+FileInput = Union[str, Path, Tuple[str, bytes]]
+
+
+class WhiskHTTPError(Exception):
+    """Non-2xx response from a Whisk server"""
+    def __init__(self, status_code: int, message: str, body: Any = None):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.body = body
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+async def iter_sse(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Yield the data of each server-sent event, stopping at `[DONE]`.
+
+    Plain prefix checks rather than a regex per line; multi-line data fields
+    are joined with newlines as the SSE spec requires.
+    """
+    data: List[str] = []
+    async for line in lines:
+        if not line:
+            if data:
+                event = "\n".join(data)
+                data = []
+                if event == "[DONE]":
+                    return
+                yield event
+            continue
+        if line.startswith("data:"):
+            value = line[5:]
+            data.append(value[1:] if value.startswith(" ") else value)
+        # Comments (":") and other fields (event, id, retry) are ignored
+    if data and data != ["[DONE]"]:
+        yield "\n".join(data)
+
+
+class WhiskHTTPClient:
+    """Async client for a Whisk server's OpenAI-compatible HTTP API.
+
+    One pooled `httpx.AsyncClient` is shared by every call, using HTTP/2 when
+    `h2` is installed (`pip install kitchenai-whisk[http2]`), so batch jobs
+    reuse connections instead of opening one per request. Connection errors
+    and 429/502/503/504 responses are retried with exponential backoff,
+    honouring `Retry-After`; the bulk helpers run at most `concurrency`
+    requests at once.
+
+        async with WhiskHTTPClient("http://localhost:8000", api_key="...") as whisk:
+            response = await whisk.chat("Hello", model="@my-app-0.0.1/chat")
+            async for chunk in whisk.stream_chat("Hello", model="@my-app-0.0.1/chat"):
+                print(chunk.choices[0].delta.content, end="")
+            files = await whisk.upload_many(paths, model="@my-app-0.0.1/storage")
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: Optional[bool] = None,
+        retries: int = 3,
+        backoff: float = 0.5,
+        backoff_max: float = 10.0,
+        concurrency: int = 8,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if http2 is None:
+            http2 = _http2_available()
+        elif http2 and not _http2_available():
+            raise ImportError(
+                "Please install HTTP/2 support: "
+                "pip install kitchenai-whisk[http2]"
+            )
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.concurrency = concurrency
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/") + "/v1",
+            headers=headers,
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "WhiskHTTPClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_max, self.backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        if response.is_success:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        message = body
+        if isinstance(body, dict):
+            # OpenAI-style {"error": {"message": ...}} or FastAPI {"detail": ...}
+            error = body.get("error")
+            message = error.get("message", error) if isinstance(error, dict) else body.get("detail", body)
+        raise WhiskHTTPError(response.status_code, str(message), body)
+
+    async def _send(self, method: str, path: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """Send a request, retrying only when the server did not process it.
+
+        Requests that failed to connect or were turned away (see
+        RETRY_STATUSES) are safe to resend. Read timeouts and dropped
+        connections are only retried for idempotent methods, since a POST
+        may already have taken effect.
+        """
+        errors = IDEMPOTENT_ERRORS if method in IDEMPOTENT_METHODS else CONNECT_ERRORS
+        request = self._http.build_request(method, path, **kwargs)
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._http.send(request, stream=stream)
+            except errors as e:
+                if attempt >= self.retries:
+                    raise
+                delay = self._delay(attempt)
+                logger.warning(f"{method} {path} failed ({e!r}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                delay = self._delay(attempt, response)
+                await response.aclose()
+                logger.warning(f"{method} {path} returned {response.status_code}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = await self._send(method, path, **kwargs)
+        self._raise_for_status(response)
+        return response
+
+    async def models(self) -> ModelListResponse:
+        """List the chat handlers the server exposes"""
+        response = await self._request("GET", "/models")
+        return ModelListResponse.model_validate_json(response.content)
+
+    @staticmethod
+    def _chat_body(messages: Union[str, List[Dict[str, Any]]], model: str, stream: bool, **kwargs) -> Dict[str, Any]:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        return {"model": model, "messages": messages, "stream": stream, **kwargs}
+
+    async def chat(self, messages: Union[str, List[Dict[str, Any]]], model: str, **kwargs) -> ChatCompletionResponse:
+        """Create a chat completion; `messages` may be a single user message"""
+        response = await self._request("POST", "/chat/completions", json=self._chat_body(messages, model, False, **kwargs))
+        return ChatCompletionResponse.model_validate_json(response.content)
+
+    async def stream_chat(self, messages: Union[str, List[Dict[str, Any]]], model: str, **kwargs) -> AsyncIterator[ChatCompletionChunk]:
+        """Stream a chat completion as parsed chunks; the last one carries `usage`"""
+        response = await self._send(
+            "POST", "/chat/completions", stream=True,
+            json=self._chat_body(messages, model, True, **kwargs)
+        )
+        try:
+            if not response.is_success:
+                await response.aread()
+                self._raise_for_status(response)
+            async for data in iter_sse(response.aiter_lines()):
+                yield ChatCompletionChunk.model_validate_json(data)
+        finally:
+            await response.aclose()
+
+    async def chat_many(self, requests: Iterable[Tuple[Union[str, List[Dict[str, Any]]], str]], return_exceptions: bool = True, **kwargs) -> List[Union[ChatCompletionResponse, Exception]]:
+        """Run (messages, model) chat completions, `concurrency` at a time, in input order"""
+        return await self._gather(
+            (self.chat(messages, model, **kwargs) for messages, model in requests),
+            return_exceptions
+        )
+
+    async def upload(
+        self,
+        file: FileInput,
+        model: str,
+        purpose: str = "fine-tune",
+        metadata: Optional[Dict[str, str]] = None,
+        background: bool = False,
+    ) -> FileResponse:
+        """Upload a file to a storage handler"""
+        if isinstance(file, tuple):
+            filename, content = file
+        else:
+            path = Path(file)
+            filename, content = path.name, await asyncio.to_thread(path.read_bytes)
+        extra = {"model": model}
+        if metadata:
+            extra["metadata"] = ",".join(f"{key}={value}" for key, value in metadata.items())
+        response = await self._request(
+            "POST", "/files",
+            files={"file": (filename, content)},
+            data={
+                "purpose": purpose,
+                "model": model,
+                "extra_body": json.dumps(extra),
+                "background": str(background).lower(),
+            },
+        )
+        return FileResponse.model_validate_json(response.content)
+
+    async def upload_many(
+        self,
+        files: Iterable[FileInput],
+        model: str,
+        return_exceptions: bool = True,
+        **kwargs
+    ) -> List[Union[FileResponse, Exception]]:
+        """Upload files `concurrency` at a time over the shared pool, in input order.
+
+        Failed uploads come back as exceptions in their slot unless
+        `return_exceptions=False`.
+        """
+        return await self._gather(
+            (self.upload(file, model, **kwargs) for file in files),
+            return_exceptions
+        )
+
+    async def _gather(self, calls: Iterable[Any], return_exceptions: bool) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(call):
+            async with semaphore:
+                return await call
+
+        # Each call only starts once it holds a slot, so at most `concurrency` requests are in flight
+        return await asyncio.gather(*(limited(call) for call in calls), return_exceptions=return_exceptions)
+
+    async def list_files(self, model: Optional[str] = None, **params: Any) -> FileListResponse:
+        """List files; `purpose`, `limit`, `order` and `after` are passed through"""
+        if model:
+            params["model"] = model
+        response = await self._request("GET", "/files", params=params)
+        return FileListResponse.model_validate_json(response.content)
+
+    async def get_file(self, file_id: str, model: Optional[str] = None) -> FileResponse:
+        params = {"model": model} if model else {}
+        response = await self._request("GET", f"/files/{file_id}", params=params)
+        return FileResponse.model_validate_json(response.content)
+
+    async def file_content(self, file_id: str, model: Optional[str] = None) -> bytes:
+        params = {"model": model} if model else {}
+        response = await self._request("GET", f"/files/{file_id}/content", params=params)
+        return response.content
+
+    async def delete_file(self, file_id: str, model: Optional[str] = None) -> FileDeleteResponse:
+        params = {"model": model} if model else {}
+        response = await self._request("DELETE", f"/files/{file_id}", params=params)
+        return FileDeleteResponse.model_validate_json(response.content)
@@ -0,0 +1,435 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from .vector_store import StoredNode, VectorHit, _matches
+import math
+import threading
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("Please install numpy to use ANN indexes: pip install kitchenai-whisk[vector]")
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(matrix: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class _InvertedList:
+    """Contiguous, growable block of vectors assigned to one centroid"""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.rows = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    def append(self, vectors: "np.ndarray", rows: "np.ndarray"):
+        needed = self.size + len(vectors)
+        if needed > len(self.rows):
+            capacity = max(needed, 2 * len(self.rows))
+            self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+            self.rows = np.resize(self.rows, capacity)
+        self.vectors[self.size:needed] = vectors
+        self.rows[self.size:needed] = rows
+        self.size = needed
+
+
+class IVFFlatIndex:
+    """Inverted-file ANN index with exact (flat) scoring inside each list.
+
+    Vectors are clustered with k-means into `nlist` lists; a query scores the
+    centroids and then only the vectors in the `nprobe` closest lists.
+    Raising `nprobe` trades latency for recall (`nprobe == nlist` is exact).
+
+    The index is searched exhaustively until `min_train_size` vectors have
+    been added, then trains itself. Later inserts are assigned to the nearest
+    existing centroid, so call `train()` again if the corpus drifts a lot.
+
+    Deletes and upserts leave tombstoned rows behind. Once more than
+    `compact_ratio` of the rows are dead, `compact()` drops them (keeping
+    the centroids); pass `compact_ratio=None` to only compact by hand.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        metric: str = "cosine",
+        min_train_size: int = 4096,
+        kmeans_iters: int = 10,
+        seed: int = 0,
+        compact_ratio: Optional[float] = 0.5
+    ):
+        if metric not in ("cosine", "dot"):
+            raise ValueError("metric must be 'cosine' or 'dot'")
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.metric = metric
+        self.min_train_size = min_train_size
+        self.kmeans_iters = kmeans_iters
+        self.compact_ratio = compact_ratio
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+        self._nodes: List[StoredNode] = []
+        self._row_of: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self.centroids: Optional["np.ndarray"] = None
+        # Before training everything lives in a single list
+        self._lists: List[_InvertedList] = [_InvertedList(dim)]
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _prepare(self, vectors: Any) -> "np.ndarray":
+        matrix = np.array(np.atleast_2d(vectors), dtype=np.float32)
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {matrix.shape[1]}")
+        return _normalize(matrix) if self.metric == "cosine" else matrix
+
+    def _assign(self, vectors: "np.ndarray", block: int = 65536) -> "np.ndarray":
+        """Nearest centroid (by inner product) for each vector, in blocks to bound memory"""
+        return np.concatenate([
+            np.argmax(vectors[start:start + block] @ self.centroids.T, axis=1)
+            for start in range(0, len(vectors), block)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def train(self, nlist: Optional[int] = None):
+        """Cluster the live vectors and rebuild the inverted lists"""
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            if not len(rows):
+                # Nothing to cluster; go back to a single exhaustive list
+                self.centroids = None
+                self._lists = [_InvertedList(self.dim)]
+                return
+            vectors = self._gather(rows)
+            nlist = nlist or self.nlist or max(1, int(4 * math.sqrt(len(rows))))
+            nlist = min(nlist, max(1, len(rows)))
+
+            # k-means on a sample (inner-product / spherical for cosine)
+            sample = vectors
+            if len(vectors) > nlist * 256:
+                sample = vectors[self._rng.choice(len(vectors), nlist * 256, replace=False)]
+            self.centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(self.kmeans_iters):
+                assignment = self._assign(sample)
+                counts = np.bincount(assignment, minlength=nlist)
+                # Per-cluster sums via one sort + reduceat (np.add.at is much slower)
+                order = np.argsort(assignment, kind="stable")
+                starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+                sums = np.zeros_like(self.centroids)
+                present = counts > 0
+                sums[present] = np.add.reduceat(sample[order], starts[present], axis=0)
+                empty = counts == 0
+                sums[empty] = sample[self._rng.choice(len(sample), int(empty.sum()))]
+                counts[empty] = 1
+                self.centroids = sums / counts[:, None]
+                if self.metric == "cosine":
+                    _normalize(self.centroids)
+
+            self.nlist = nlist
+            self._lists = [_InvertedList(self.dim) for _ in range(nlist)]
+            self._insert_rows(vectors, rows)
+            logger.info(f"Trained IVF index with {nlist} lists over {len(rows)} vectors")
+
+    def _gather(self, rows: "np.ndarray") -> "np.ndarray":
+        """Collect stored vectors for global rows, in the given order"""
+        position = np.full(len(self._alive), -1, dtype=np.int64)
+        position[rows] = np.arange(len(rows))
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        for inverted in self._lists:
+            stored = inverted.rows[:inverted.size]
+            wanted = position[stored] >= 0
+            out[position[stored[wanted]]] = inverted.vectors[:inverted.size][wanted]
+        return out
+
+    def _insert_rows(self, vectors: "np.ndarray", rows: "np.ndarray"):
+        if not self.trained:
+            self._lists[0].append(vectors, rows)
+            return
+        assignment = self._assign(vectors)
+        for list_id in np.unique(assignment):
+            selected = assignment == list_id
+            self._lists[list_id].append(vectors[selected], rows[selected])
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        texts: Optional[Sequence[Optional[str]]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """Insert or replace vectors by id; safe to call from storage handlers"""
+        matrix = self._prepare(vectors)
+        if len(ids) != len(matrix):
+            raise ValueError("ids and vectors must have the same length")
+        texts = texts or [None] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            self.delete(ids)
+            start = len(self._nodes)
+            rows = np.arange(start, start + len(ids), dtype=np.int64)
+            for row, node_id, text, metadata in zip(rows, ids, texts, metadatas):
+                self._nodes.append(StoredNode(id=str(node_id), text=text, metadata=metadata or {}))
+                self._row_of[str(node_id)] = int(row)
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            self._insert_rows(matrix, rows)
+            if not self.trained and len(self._row_of) >= self.min_train_size:
+                self.train()
+        return [str(node_id) for node_id in ids]
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """Tombstone vectors by id"""
+        removed = 0
+        with self._lock:
+            for node_id in map(str, ids):
+                row = self._row_of.pop(node_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    removed += 1
+            dead = len(self._alive) - len(self._row_of)
+            if removed and self.compact_ratio is not None and dead > self.compact_ratio * len(self._alive):
+                self.compact()
+        return removed
+
+    def compact(self):
+        """Drop tombstoned rows and renumber the live ones, keeping the centroids"""
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            if len(rows) == len(self._alive):
+                return
+            remap = np.full(len(self._alive), -1, dtype=np.int64)
+            remap[rows] = np.arange(len(rows))
+            lists = []
+            for inverted in self._lists:
+                stored = inverted.rows[:inverted.size]
+                keep = self._alive[stored]
+                compacted = _InvertedList(self.dim, capacity=max(int(keep.sum()), 64))
+                compacted.append(inverted.vectors[:inverted.size][keep], remap[stored[keep]])
+                lists.append(compacted)
+            self._lists = lists
+            self._nodes = [self._nodes[row] for row in rows]
+            self._row_of = {node.id: row for row, node in enumerate(self._nodes)}
+            self._alive = np.ones(len(rows), dtype=bool)
+
+    def query(
+        self,
+        vector: Any,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[VectorHit]:
+        """Approximate top-k search; pass `nprobe` to override the default per query"""
+        query = self._prepare(vector)[0]
+        with self._lock:
+            if self.trained:
+                nprobe = min(nprobe or self.nprobe, len(self._lists))
+                centroid_scores = self.centroids @ query
+                probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+                lists = [self._lists[list_id] for list_id in probe]
+            else:
+                lists = self._lists
+            candidates = [inverted for inverted in lists if inverted.size]
+            if not candidates:
+                return []
+            rows = np.concatenate([inverted.rows[:inverted.size] for inverted in candidates])
+            scores = np.concatenate([inverted.vectors[:inverted.size] @ query for inverted in candidates])
+            alive = self._alive[rows]
+            rows, scores = rows[alive], scores[alive]
+            nodes = self._nodes
+
+        if filters:
+            order = np.argsort(-scores)
+            hits = []
+            for index in order:
+                node = nodes[rows[index]]
+                if _matches(node.metadata, filters):
+                    hits.append(VectorHit(node=node, score=float(scores[index])))
+                    if len(hits) == top_k:
+                        break
+            return hits
+
+        k = min(top_k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [VectorHit(node=nodes[rows[index]], score=float(scores[index])) for index in top]
+
+
+class HNSWIndex:
+    """HNSW index backed by hnswlib (`pip install hnswlib`).
+
+    `ef` is the query-time recall/latency knob; `M` and `ef_construction`
+    trade build time and memory for graph quality.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        metric: str = "cosine",
+        M: int = 16,
+        ef_construction: int = 200,
+        ef: int = 64,
+        max_elements: int = 10000
+    ):
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("Please install hnswlib to use the HNSW index: pip install hnswlib")
+        if metric not in ("cosine", "dot"):
+            raise ValueError("metric must be 'cosine' or 'dot'")
+        self.dim = dim
+        self.metric = metric
+        self.ef = ef
+        self._lock = threading.RLock()
+        self._index = hnswlib.Index(space="cosine" if metric == "cosine" else "ip", dim=dim)
+        self._index.init_index(max_elements=max_elements, ef_construction=ef_construction, M=M)
+        self._index.set_ef(ef)
+        self._nodes: Dict[int, StoredNode] = {}
+        self._label_of: Dict[str, int] = {}
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._label_of)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        texts: Optional[Sequence[Optional[str]]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> List[str]:
+        matrix = np.array(np.atleast_2d(vectors), dtype=np.float32)
+        texts = texts or [None] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            self.delete(ids)
+            labels = np.arange(self._next_label, self._next_label + len(ids))
+            self._next_label += len(ids)
+            needed = self._index.get_current_count() + len(ids)
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+            self._index.add_items(matrix, labels)
+            for label, node_id, text, metadata in zip(labels, ids, texts, metadatas):
+                self._nodes[int(label)] = StoredNode(id=str(node_id), text=text, metadata=metadata or {})
+                self._label_of[str(node_id)] = int(label)
+        return [str(node_id) for node_id in ids]
+
+    def delete(self, ids: Sequence[str]) -> int:
+        removed = 0
+        with self._lock:
+            for node_id in map(str, ids):
+                label = self._label_of.pop(node_id, None)
+                if label is not None:
+                    self._index.mark_deleted(label)
+                    del self._nodes[label]
+                    removed += 1
+        return removed
+
+    def query(
+        self,
+        vector: Any,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        ef: Optional[int] = None
+    ) -> List[VectorHit]:
+        with self._lock:
+            if not self._label_of:
+                return []
+            self._index.set_ef(max(ef or self.ef, top_k))
+            filter_fn = None
+            k = min(top_k, len(self._label_of))
+            if filters:
+                matching = {label for label, node in self._nodes.items() if _matches(node.metadata, filters)}
+                filter_fn = matching.__contains__
+                k = min(k, len(matching))
+            labels, distances = self._knn(np.asarray(vector, dtype=np.float32), k, filter_fn)
+        # hnswlib returns distances: 1 - cos for cosine, 1 - dot for ip
+        return [
+            VectorHit(node=self._nodes[int(label)], score=float(1 - distance))
+            for label, distance in zip(labels[0], distances[0])
+        ]
+
+
+    def _knn(self, vector: "np.ndarray", k: int, filter_fn: Optional[Callable[[int], bool]]):
+        """knn_query, asking for fewer neighbours when a filtered search can't fill k"""
+        while k:
+            try:
+                return self._index.knn_query(vector, k=k, filter=filter_fn)
+            except RuntimeError:
+                # hnswlib raises when the graph walk finds fewer than k allowed labels
+                if filter_fn is None:
+                    raise
+                k //= 2
+        return np.zeros((1, 0), dtype=np.uint64), np.zeros((1, 0), dtype=np.float32)
+
+
+def create_ann_index(dim: int, backend: str = "auto", **kwargs) -> Any:
+    """Create an ANN index; `auto` uses hnswlib when installed, IVF-flat otherwise"""
+    if backend == "auto":
+        try:
+            import hnswlib  # noqa: F401
+            backend = "hnsw"
+        except ImportError:
+            backend = "ivf"
+    if backend == "hnsw":
+        return HNSWIndex(dim, **kwargs)
+    if backend == "ivf":
+        return IVFFlatIndex(dim, **kwargs)
+    raise ValueError(f"Unknown ANN backend: {backend}")
+
+
+class ANNRetriever:
+    """Text retriever over an ANN index, registrable as `DependencyType.RETRIEVER`.
+
+        retriever = ANNRetriever(IVFFlatIndex(dim=384, nprobe=16), embed_fn=embed)
+        kitchen.register_dependency(DependencyType.RETRIEVER, retriever)
+
+    Storage handlers can insert incrementally with `add_texts()`; chat
+    handlers call `retrieve()` like a llama-index retriever.
+    """
+
+    def __init__(
+        self,
+        index: Any,
+        embed_fn: Callable[[str], Sequence[float]],
+        similarity_top_k: int = 2,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        self.index = index
+        self.embed_fn = embed_fn
+        self.similarity_top_k = similarity_top_k
+        self.filters = filters
+
+    def add_texts(
+        self,
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """Embed and insert texts"""
+        from .dedup import chunk_hash
+        ids = ids or [chunk_hash(text) for text in texts]
+        return self.index.add(ids, [self.embed_fn(text) for text in texts], texts=texts, metadatas=metadatas)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        return self.index.delete(ids)
+
+    def retrieve(self, query: str, **kwargs) -> List[VectorHit]:
+        """Retrieve the top nodes for a text query; extra kwargs (e.g. `nprobe`) go to the index"""
+        return self.index.query(
+            self.embed_fn(query),
+            top_k=kwargs.pop("top_k", self.similarity_top_k),
+            filters=kwargs.pop("filters", self.filters),
+            **kwargs
+        )
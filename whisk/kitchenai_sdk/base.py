@@ -2,35 +2,163 @@ from collections.abc import Callable
 import logging
 from functools import wraps
 import asyncio
+import threading
+import time
 from .schema import DependencyType
-from typing import Any, Dict, Optional, Union, List
+from .profiling import profiled
+from typing import Any, Dict, Iterable, Optional, Union, List
 
 logger = logging.getLogger(__name__)
 
+def _dep_key(dep_type: Union[DependencyType, str]) -> str:
+    return dep_type.value if hasattr(dep_type, "value") else dep_type
+
 class DependencyManager:
-    """Manages dependencies for KitchenAI tasks"""
+    """Manages dependencies for KitchenAI tasks
+
+    Dependencies can be registered as instances or as zero-argument
+    factories. Factories are built on first use (in a worker thread when a
+    handler asks for them), or all at once (in parallel threads) by
+    `warmup()`, so importing an app doesn't pay for LLM clients and indices
+    it may not need yet.
+
+    Large read-only arrays (embedding matrices, index data) can be registered
+    with `register_shared()`: a multi-worker parent builds them once with
+    `share_dependencies()` and each worker maps the same copy.
+    """
     
     def __init__(self):
         self._dependencies: Dict[DependencyType, Any] = {}
+        self._factories: Dict[DependencyType, Callable[[], Any]] = {}
+        self._build_locks: Dict[DependencyType, threading.Lock] = {}
+        self._shared: Dict[DependencyType, tuple] = {}
         
     def register_dependency(self, dep_type: DependencyType, dep: Any):
         """Register a dependency"""
+        self._factories.pop(dep_type, None)
+        self._shared.pop(dep_type, None)
         self._dependencies[dep_type] = dep
+
+    def register_factory(self, dep_type: DependencyType, factory: Callable[[], Any]):
+        """Register a callable that builds the dependency when first needed"""
+        self._dependencies.pop(dep_type, None)
+        self._shared.pop(dep_type, None)
+        self._factories[dep_type] = factory
+        self._build_locks[dep_type] = threading.Lock()
         
+    def register_shared(
+        self,
+        dep_type: DependencyType,
+        factory: Callable[[], Any],
+        wrap: Optional[Callable[[Any], Any]] = None
+    ):
+        """Register a dependency built from large read-only NumPy arrays.
+
+        `factory()` returns an array or a dict of arrays and `wrap(arrays)`
+        turns them into the dependency handlers receive. In a worker whose
+        parent called `share_dependencies()`, the arrays are attached
+        zero-copy instead of calling `factory()`; otherwise this behaves like
+        `register_factory`.
+        """
+        wrap = wrap or (lambda arrays: arrays)
+
+        def build():
+            from .shared import attach_dependency, published_dependency
+            spec = published_dependency(_dep_key(dep_type))
+            return wrap(attach_dependency(spec) if spec else factory())
+
+        self.register_factory(dep_type, build)
+        self._shared[dep_type] = factory
+
+    def share_dependencies(self, backend: str = "mmap", directory: Optional[str] = None):
+        """Build shared dependencies once and publish them for worker processes.
+
+        Call in the parent before starting workers; they inherit the published
+        locations through the environment. Returns the `SharedArrays`, whose
+        `close()` removes the shared copies once the workers have exited.
+        """
+        from .shared import SharedArrays
+        shared = SharedArrays(backend=backend, directory=directory)
+        for dep_type, factory in self._shared.items():
+            shared.publish(_dep_key(dep_type), factory())
+        shared.export()
+        return shared
+
     def get_dependency(self, dep_type: DependencyType) -> Any:
-        """Get a registered dependency"""
-        if dep_type not in self._dependencies:
-            raise KeyError(f"Dependency {dep_type} not registered")
-        return self._dependencies[dep_type]
+        """Get a registered dependency, building it if it was registered as a factory"""
+        if dep_type in self._dependencies:
+            return self._dependencies[dep_type]
+        if dep_type in self._factories:
+            return self._build(dep_type)
+        raise KeyError(f"Dependency {dep_type} not registered")
+
+    async def aget_dependency(self, dep_type: DependencyType) -> Any:
+        """Like `get_dependency`, but builds pending factories in a worker thread.
+
+        Handlers use this so a dependency that wasn't warmed up (e.g. an
+        embedding model) doesn't block the event loop while it loads.
+        """
+        if dep_type in self._dependencies:
+            return self._dependencies[dep_type]
+        if dep_type in self._factories:
+            return await asyncio.to_thread(self._build, dep_type)
+        raise KeyError(f"Dependency {dep_type} not registered")
+
+    def _build(self, dep_type: DependencyType) -> Any:
+        # Per-dependency lock: concurrent first uses build once, different deps build in parallel
+        with self._build_locks[dep_type]:
+            if dep_type not in self._dependencies:
+                started = time.perf_counter()
+                self._dependencies[dep_type] = self._factories[dep_type]()
+                logger.info(f"Built dependency {dep_type} in {time.perf_counter() - started:.3f}s")
+            return self._dependencies[dep_type]
     
     def has_dependency(self, dep_type: DependencyType) -> bool:
         """Check if a dependency is registered"""
-        return dep_type in self._dependencies
+        return dep_type in self._dependencies or dep_type in self._factories
 
     def list_dependencies(self) -> Dict[str, Any]:
-        """List all registered dependencies"""
+        """List all built dependencies (pending factories are not constructed)"""
         return self._dependencies.copy()
 
+    def pending_dependencies(self) -> List[DependencyType]:
+        """Dependencies registered as factories that haven't been built yet"""
+        return [dep_type for dep_type in self._factories if dep_type not in self._dependencies]
+
+    def shared_dependencies(self) -> List[DependencyType]:
+        """Dependencies registered with `register_shared`"""
+        return list(self._shared)
+
+    def close(self, keep: Iterable[Any] = ()):
+        """Call `close()` on built dependencies that have one, e.g. to flush
+        a persistent vector store. Instances in `keep` are left open."""
+        keep = {id(dep) for dep in keep}
+        for dep_type, dep in self._dependencies.items():
+            close = getattr(dep, "close", None)
+            if id(dep) in keep or not callable(close) or asyncio.iscoroutinefunction(close):
+                continue
+            try:
+                close()
+            except Exception as e:
+                logger.error(f"Failed to close dependency {dep_type}: {e}")
+
+    async def warmup(self):
+        """Build all pending factories concurrently in worker threads.
+
+        Failures are logged and left pending, so the first handler that needs
+        the dependency retries the build and sees the error.
+        """
+        pending = self.pending_dependencies()
+        if not pending:
+            return
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._build, dep_type) for dep_type in pending),
+            return_exceptions=True
+        )
+        for dep_type, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to build dependency {dep_type} during warmup: {result}")
+
 class TaskRegistry:
     """Base class for task registries"""
     def __init__(self, namespace: str, manager: Optional[DependencyManager] = None):
@@ -38,6 +166,8 @@ class TaskRegistry:
         self._manager = manager
         self._tasks: Dict[str, Callable] = {}
         self.task_type = "base"
+        # Set by KitchenAIApp; matching requests are captured when it has rules
+        self.profiler = None
 
     def handler(self, name: str, *dependencies: Union[DependencyType, str]):
         """Decorator for registering task handlers with dependencies"""
@@ -49,7 +179,7 @@ class TaskRegistry:
                     for dep in dependencies:
                         dep_key = dep.value if hasattr(dep, 'value') else dep
                         if self._manager.has_dependency(dep):
-                            kwargs[dep_key] = self._manager.get_dependency(dep)
+                            kwargs[dep_key] = await self._manager.aget_dependency(dep)
                         else:
                             raise KeyError(f"Required dependency {dep} not found")
                 return await func(*args, **kwargs)
@@ -58,8 +188,8 @@ class TaskRegistry:
 
     def register_task(self, name: str, task: Callable) -> Callable:
         """Register a task with the given name"""
-        self._tasks[name] = task
-        return task
+        self._tasks[name] = profiled(self, name, task)
+        return self._tasks[name]
 
     def get_task(self, name: str) -> Optional[Callable]:
         """Get a task by name"""
@@ -75,6 +205,9 @@ class KitchenAITask:
         self._manager = dependency_manager
         self._tasks = {}
         self._hooks = {}
+        self.task_type = "base"
+        # Set by KitchenAIApp; matching requests are captured when it has rules
+        self.profiler = None
 
     def with_dependencies(self, *dep_types: DependencyType | str) -> Callable:
         """Decorator to inject dependencies into task functions."""
@@ -87,15 +220,15 @@ class KitchenAITask:
                         if self._manager.has_dependency(dep_type):
                             # Use value for enum types, or key directly for strings
                             key = dep_type.value if isinstance(dep_type, DependencyType) else dep_type
-                            kwargs[key] = self._manager.get_dependency(dep_type)
+                            kwargs[key] = await self._manager.aget_dependency(dep_type)
                 return await func(*args, **kwargs)
             return wrapper
         return decorator
 
     def register_task(self, name: str, task: Callable):
         """Register a task with a name"""
-        self._tasks[name] = task
-        return task
+        self._tasks[name] = profiled(self, name, task)
+        return self._tasks[name]
 
     def get_task(self, name: str) -> Optional[Callable]:
         """Get a registered task by name"""
@@ -124,6 +257,11 @@ class KitchenAITaskHookMixin:
         """Get hooks for a task"""
         return self.hooks.get(task_name, {}).get(hook_type, [])
 
+    def get_hook(self, task_name: str, hook_type: str) -> Optional[Callable]:
+        """Get the first hook registered for a task, if any"""
+        hooks = self.get_hooks(task_name, hook_type)
+        return hooks[0] if hooks else None
+
     async def execute_hooks(self, task_name: str, hook_type: str, data: Any) -> Any:
         """Execute hooks for a task"""
         hooks = self.get_hooks(task_name, hook_type)
@@ -0,0 +1,232 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+from pydantic import BaseModel, Field, PrivateAttr
+from .schema import ChatInput, Message
+from .tokens import TokenCounter, get_token_counter
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Request metadata key clients use to continue a conversation
+CONVERSATION_ID_KEY = "conversation_id"
+
+
+class Conversation(BaseModel):
+    """Stored history of one conversation plus derived state"""
+    id: str
+    messages: List[Message] = Field(default_factory=list)
+    state: Dict[str, Any] = Field(default_factory=dict, description="JSON-serializable state, persisted with the conversation")
+    created_at: int = Field(default_factory=lambda: int(time.time()))
+    updated_at: int = Field(default_factory=lambda: int(time.time()))
+
+    # In-memory only: anything handlers derive from prior turns (e.g. embeddings)
+    _cache: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    # model -> (messages counted, tokens)
+    _token_counts: Dict[str, Tuple[int, int]] = PrivateAttr(default_factory=dict)
+    # Leading messages already written to SQLite
+    _persisted: int = PrivateAttr(default=0)
+
+    @property
+    def cache(self) -> Dict[str, Any]:
+        return self._cache
+
+    def token_count(self, model: str = "default", counter: Optional[TokenCounter] = None) -> int:
+        """Tokens of the stored messages, counting only turns added since the last call"""
+        counter = counter or get_token_counter()
+        counted, tokens = self._token_counts.get(model, (0, 0))
+        for message in self.messages[counted:]:
+            tokens += counter.count_message(message, model)
+        self._token_counts[model] = (len(self.messages), tokens)
+        return tokens
+
+
+def _common_prefix(stored: Sequence[Message], incoming: Sequence[Message]) -> int:
+    """Number of leading messages the two histories share"""
+    shared = 0
+    for left, right in zip(stored, incoming):
+        if (left.role, left.content) != (right.role, right.content):
+            break
+        shared += 1
+    return shared
+
+
+class ConversationStore:
+    """Server-side chat history keyed by a conversation id.
+
+    Clients pass `metadata={"conversation_id": ...}` and send only the new
+    turn; `resolve()` rebuilds the full history. Requests that resend the
+    history are matched against the stored one: only messages past the
+    shared prefix are new, and a history that was edited or cut short (to
+    regenerate a reply) continues on a fork with a new id, leaving the
+    original intact. Conversations live in an LRU of `max_conversations`;
+    with a `path` they are also written to SQLite, messages append-only, so
+    they survive restarts and evictions.
+
+    Chat handlers hold `turn_lock(conversation_id)` from `resolve()` until
+    the reply is appended, so concurrent turns of one conversation run one
+    after the other instead of interleaving.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_conversations: int = 1024):
+        self.path = path
+        self.max_conversations = max_conversations
+        self._cache: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+        # conversation id -> asyncio.Lock, dropped once no turn holds or awaits it
+        self._turn_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # The connection is shared across threads (check_same_thread=False), so serialize its use
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    conversation_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    name TEXT,
+                    PRIMARY KEY (conversation_id, position)
+                );
+                """
+            )
+
+    def _remember(self, conversation: Conversation):
+        with self._lock:
+            self._cache[conversation.id] = conversation
+            self._cache.move_to_end(conversation.id)
+            while len(self._cache) > self.max_conversations:
+                self._cache.popitem(last=False)
+
+    def _load(self, conversation_id: str) -> Optional[Conversation]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT state, created_at, updated_at FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = [
+                Message(role=role, content=content, name=name)
+                for role, content, name in self._db.execute(
+                    "SELECT role, content, name FROM messages WHERE conversation_id = ? ORDER BY position",
+                    (conversation_id,)
+                )
+            ]
+        conversation = Conversation(id=conversation_id, messages=messages, state=json.loads(row[0]), created_at=row[1], updated_at=row[2])
+        conversation._persisted = len(messages)
+        return conversation
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        with self._lock:
+            conversation = self._cache.get(conversation_id)
+            if conversation is not None:
+                self._cache.move_to_end(conversation_id)
+                return conversation
+        if self._db is None:
+            return None
+        conversation = self._load(conversation_id)
+        if conversation is not None:
+            self._remember(conversation)
+        return conversation
+
+    def append(self, conversation: Conversation, messages: Sequence[Message]):
+        """Add turns to a conversation and persist them"""
+        conversation.messages.extend(messages)
+        conversation.updated_at = int(time.time())
+        self._remember(conversation)
+        if self._db is not None:
+            # Forks also write the history they were branched with
+            start = conversation._persisted
+            with self._db_lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?)",
+                    (conversation.id, json.dumps(conversation.state), conversation.created_at, conversation.updated_at)
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (conversation.id, position, message.role, message.content, message.name)
+                        for position, message in enumerate(conversation.messages[start:], start=start)
+                    ]
+                )
+            conversation._persisted = len(conversation.messages)
+
+    def fork(self, conversation: Conversation, keep: int) -> Conversation:
+        """Branch a conversation under a new id with its first `keep` messages.
+
+        Like a new conversation, the fork is stored on its first `append()`.
+        """
+        return Conversation(
+            id=uuid.uuid4().hex,
+            messages=conversation.messages[:keep],
+            state=json.loads(json.dumps(conversation.state))
+        )
+
+    def delete(self, conversation_id: str):
+        with self._lock:
+            self._cache.pop(conversation_id, None)
+        if self._db is not None:
+            with self._db_lock, self._db:
+                self._db.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+                self._db.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+
+    def turn_lock(self, conversation_id: str) -> asyncio.Lock:
+        """Lock that serializes turns of one conversation"""
+        with self._lock:
+            lock = self._turn_locks.get(conversation_id)
+            if lock is None:
+                lock = self._turn_locks[conversation_id] = asyncio.Lock()
+            return lock
+
+    def resolve(self, chat_input: ChatInput) -> Tuple[Conversation, List[Message]]:
+        """Find (or start) the request's conversation and rebuild its full history.
+
+        Returns the conversation and the request's new messages; `chat_input`
+        is updated in place with the full history and the conversation id.
+        A request of more than one message that starts like the stored
+        history is taken as a resend: messages past the shared prefix are
+        new, and if it diverges from or stops short of the stored history
+        the conversation is forked (the returned id changes). A single
+        message is always a new turn. Nothing is stored until `append()`
+        (normally after the handler succeeds, together with the reply).
+        """
+        metadata = dict(chat_input.metadata or {})
+        conversation_id = metadata.get(CONVERSATION_ID_KEY)
+        conversation = self.get(conversation_id) if conversation_id else None
+        if conversation is None:
+            conversation = Conversation(id=conversation_id or uuid.uuid4().hex)
+
+        incoming = list(chat_input.messages)
+        shared = _common_prefix(conversation.messages, incoming)
+        if shared and len(incoming) > 1:
+            # The client resent the history
+            if shared < len(conversation.messages):
+                # Edited, or cut short to regenerate a reply: branch off
+                logger.info(f"Forking conversation {conversation.id} after {shared} messages")
+                conversation = self.fork(conversation, shared)
+            new = incoming[shared:]
+        else:
+            new = incoming
+        chat_input.messages = [*conversation.messages, *new]
+        metadata[CONVERSATION_ID_KEY] = conversation.id
+        chat_input.metadata = metadata
+        return conversation, new
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
@@ -0,0 +1,180 @@
+from typing import Any, Iterable, List, Optional, Union
+from pydantic import BaseModel, Field
+from .schema import (
+    StorageRequest,
+    StorageResponse,
+    WhiskStorageSchema,
+    WhiskStorageResponseSchema,
+    WhiskStorageStatus,
+)
+import hashlib
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Response types the index knows how to restore
+_RESPONSE_TYPES = {
+    cls.__name__: cls for cls in (StorageResponse, WhiskStorageResponseSchema)
+}
+
+_HASH_BLOCK = 1 << 20
+
+
+def content_hash(data: Union[bytes, Iterable[bytes]]) -> str:
+    """BLAKE2b digest of a payload, fed in blocks so large inputs hash incrementally"""
+    digest = hashlib.blake2b(digest_size=32)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        view = memoryview(data)
+        for offset in range(0, len(view), _HASH_BLOCK):
+            digest.update(view[offset:offset + _HASH_BLOCK])
+    else:
+        for block in data:
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    """Stable id for a chunk of text"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ChunkDiff(BaseModel):
+    """Result of comparing a document's chunks with the indexed version"""
+    hashes: List[str] = Field(default_factory=list, description="Hash of every chunk, in order")
+    changed: List[int] = Field(default_factory=list, description="Indexes of chunks that need embedding")
+    removed: List[str] = Field(default_factory=list, description="Hashes of chunks no longer in the document")
+
+
+def storage_content(data: Any) -> Optional[bytes]:
+    """Get the payload to hash from a storage request, if it carries one"""
+    if isinstance(data, WhiskStorageSchema):
+        return data.data or None
+    if isinstance(data, StorageRequest) and data.action == "upload":
+        return data.content
+    return None
+
+
+def deleted_result_id(data: Any) -> Optional[str]:
+    """Get the file/object id a delete request refers to"""
+    if isinstance(data, StorageRequest):
+        return data.file_id
+    if isinstance(data, WhiskStorageSchema):
+        return str(data.id)
+    return None
+
+
+def is_error_response(response: Any) -> bool:
+    """Whether a storage response reports a failure (and so must not be cached)"""
+    return getattr(response, "status", None) == WhiskStorageStatus.ERROR
+
+
+def relink_response(cached: BaseModel, data: Any, digest: str) -> BaseModel:
+    """Point a cached response at the new request's identity and metadata"""
+    metadata = {**(cached.metadata or {}), **(data.metadata or {})}
+    metadata.update(content_hash=digest, deduplicated=True)
+    update = {"metadata": metadata}
+    if isinstance(cached, WhiskStorageResponseSchema) and isinstance(data, WhiskStorageSchema):
+        update.update(id=data.id, name=data.name)
+    elif isinstance(cached, StorageResponse) and isinstance(data, StorageRequest) and data.filename:
+        update.update(filename=data.filename)
+    return cached.model_copy(update=update)
+
+
+class DedupIndex:
+    """Content-hash index of storage results, backed by SQLite.
+
+    Uses an in-memory database unless a path is given, in which case the
+    index survives restarts. Documents are keyed by handler label and content
+    hash; chunk hashes are kept per document so changed documents only
+    re-embed the chunks that changed.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                key TEXT PRIMARY KEY,
+                result_id TEXT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS documents_result_id ON documents (result_id);
+            CREATE TABLE IF NOT EXISTS chunks (
+                doc_key TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (doc_key, chunk_hash)
+            );
+            """
+        )
+
+    @staticmethod
+    def key(label: str, digest: str) -> str:
+        return f"{label}:{digest}"
+
+    def get(self, key: str) -> Optional[BaseModel]:
+        """Get the stored response for a document key"""
+        row = self._db.execute(
+            "SELECT kind, payload FROM documents WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        kind, payload = row
+        response_type = _RESPONSE_TYPES.get(kind)
+        if response_type is None:
+            return None
+        return response_type.model_validate_json(payload)
+
+    def put(self, key: str, response: BaseModel):
+        """Store the response produced for a document key"""
+        kind = type(response).__name__
+        if kind not in _RESPONSE_TYPES:
+            logger.debug(f"Not indexing unsupported storage response type {kind}")
+            return
+        result_id = getattr(response, "file_id", None) or getattr(response, "id", None)
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+                (key, str(result_id), kind, response.model_dump_json(), int(time.time())),
+            )
+
+    def discard_result(self, result_id: Any):
+        """Forget documents that produced the given file/object id"""
+        with self._db:
+            self._db.execute("DELETE FROM documents WHERE result_id = ?", (str(result_id),))
+
+    def diff_chunks(self, doc_key: str, chunks: List[str]) -> ChunkDiff:
+        """Compare chunk texts with what was indexed for a document.
+
+        Call `commit_chunks` with `diff.hashes` once the changed chunks are
+        embedded and the removed ones deleted.
+        """
+        hashes = [chunk_hash(chunk) for chunk in chunks]
+        known = {
+            row[0] for row in self._db.execute(
+                "SELECT chunk_hash FROM chunks WHERE doc_key = ?", (doc_key,)
+            )
+        }
+        current = set(hashes)
+        return ChunkDiff(
+            hashes=hashes,
+            changed=[index for index, digest in enumerate(hashes) if digest not in known],
+            removed=sorted(known - current),
+        )
+
+    def commit_chunks(self, doc_key: str, hashes: List[str]):
+        """Record the chunk hashes now indexed for a document"""
+        with self._db:
+            self._db.execute("DELETE FROM chunks WHERE doc_key = ?", (doc_key,))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO chunks VALUES (?, ?, ?)",
+                [(doc_key, digest, position) for position, digest in enumerate(hashes)],
+            )
+
+    def close(self):
+        self._db.close()
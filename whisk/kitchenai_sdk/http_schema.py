@@ -86,6 +86,8 @@ class ChatCompletionChunk(BaseModel):
     created: int
     model: str
     choices: List[ChatCompletionChunkChoice]
+    usage: Optional[Dict[str, int]] = None  # Set on the final chunk
+    metadata: Optional[Dict[str, Any]] = None
 
 class FileResponse(BaseModel):
     """OpenAI-compatible file response"""
@@ -0,0 +1,319 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from pydantic import BaseModel, Field
+from .dedup import chunk_hash
+from .jobs import report_progress
+from .pipeline import IngestPipeline, PipelineStats, Stage
+from .schema import StorageRequest, WhiskStorageSchema
+import asyncio
+import inspect
+import io
+import time
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional (kitchenai-whisk[vector]); embeddings are converted in pure Python without it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class IngestSource(BaseModel):
+    """A document to ingest, given as raw bytes or a local path"""
+    filename: str
+    content: Optional[bytes] = None
+    path: Optional[str] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+    def read(self) -> bytes:
+        if self.content is not None:
+            return self.content
+        if self.path is not None:
+            return Path(self.path).read_bytes()
+        raise ValueError(f"Source {self.filename} has no content or path")
+
+
+class Document(BaseModel):
+    """A parsed unit of a source (usually one page)"""
+    text: str
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class Chunk(BaseModel):
+    """A piece of a document ready to embed and upsert"""
+    id: str
+    text: str
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    embedding: Optional[List[float]] = None
+
+
+class IngestionResult(BaseModel):
+    """Counters and chunk ids from an ingestion run"""
+    sources: int = 0
+    pages: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    upserted: int = 0
+    chunk_ids: List[str] = Field(default_factory=list)
+    errors: List[str] = Field(default_factory=list)
+    seconds: float = 0.0
+
+
+class IngestionError(Exception):
+    """A document could not be ingested; `result` has the stage errors"""
+
+    def __init__(self, message: str, result: IngestionResult):
+        super().__init__(message)
+        self.result = result
+
+
+# -- parsers ----------------------------------------------------------------
+# Parsers run in worker processes, so they must be module-level functions.
+
+def parse_text(source: IngestSource) -> List[Document]:
+    """Plain text/markdown; form feeds separate pages"""
+    text = source.read().decode("utf-8", errors="replace")
+    return [
+        Document(text=page, metadata={**source.metadata, "source": source.filename, "page": number})
+        for number, page in enumerate(text.split("\f"), start=1)
+        if page.strip()
+    ]
+
+
+def parse_pdf(source: IngestSource) -> List[Document]:
+    """One document per PDF page"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("Please install pypdf to parse PDF files: pip install pypdf")
+    reader = PdfReader(source.path or io.BytesIO(source.read()))
+    return [
+        Document(text=page.extract_text() or "", metadata={**source.metadata, "source": source.filename, "page": number})
+        for number, page in enumerate(reader.pages, start=1)
+    ]
+
+
+def parse_docx(source: IngestSource) -> List[Document]:
+    """A .docx file as a single document"""
+    try:
+        import docx
+    except ImportError:
+        raise ImportError("Please install python-docx to parse Word files: pip install python-docx")
+    document = docx.Document(source.path or io.BytesIO(source.read()))
+    text = "\n".join(paragraph.text for paragraph in document.paragraphs)
+    return [Document(text=text, metadata={**source.metadata, "source": source.filename, "page": 1})]
+
+
+PARSERS: Dict[str, Callable[[IngestSource], List[Document]]] = {
+    ".txt": parse_text,
+    ".md": parse_text,
+    ".pdf": parse_pdf,
+    ".docx": parse_docx,
+}
+
+
+def get_parser(filename: str, default: Callable[[IngestSource], List[Document]] = parse_text) -> Callable[[IngestSource], List[Document]]:
+    """Pick a parser by file extension"""
+    return PARSERS.get(Path(filename).suffix.lower(), default)
+
+
+# -- chunking ---------------------------------------------------------------
+
+def split_text(text: str, chunk_size: int = 1024, chunk_overlap: int = 128) -> Iterator[str]:
+    """Split text into chunks of at most `chunk_size` characters.
+
+    Breaks at the last whitespace inside the window when there is one and
+    starts each chunk `chunk_overlap` characters before the previous end.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size")
+    start, length = 0, len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            space = text.rfind(" ", start + chunk_overlap + 1, end)
+            if space > start:
+                end = space
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= length:
+            break
+        start = max(end - chunk_overlap, start + 1)
+
+
+def chunk_document(document: Document, chunk_size: int = 1024, chunk_overlap: int = 128) -> Iterator[Chunk]:
+    """Split a document into chunks with stable, content-derived ids"""
+    source = document.metadata.get("source", "")
+    for index, text in enumerate(split_text(document.text, chunk_size, chunk_overlap)):
+        yield Chunk(
+            id=chunk_hash(f"{source}\0{text}"),
+            text=text,
+            metadata={**document.metadata, "chunk": index}
+        )
+
+
+def vector_store_upsert(store: Any) -> Callable[[List[Chunk]], List[str]]:
+    """Upsert callable for stores with `add(ids, vectors, texts, metadatas)` (NumpyVectorStore, ANN indexes)"""
+    def upsert(chunks: List[Chunk]) -> List[str]:
+        return store.add(
+            [chunk.id for chunk in chunks],
+            [chunk.embedding for chunk in chunks],
+            texts=[chunk.text for chunk in chunks],
+            metadatas=[chunk.metadata for chunk in chunks]
+        )
+    return upsert
+
+
+class IngestionPipeline:
+    """Declarative parse -> chunk -> embed -> upsert pipeline for storage handlers.
+
+    Parsing runs in a process pool (`parse_workers`, 0 for threads) since PDF
+    extraction is CPU-bound; chunks are embedded and upserted in batches;
+    stages are connected by bounded queues so a slow embedder applies
+    backpressure to parsing. Progress is reported per stage with
+    `report_progress`, so it shows up on background storage jobs.
+
+    `embed(texts) -> vectors` and `upsert(chunks)` may be sync or async.
+
+        pipeline = IngestionPipeline(
+            embed=embed_model.get_text_embedding_batch,
+            upsert=vector_store_upsert(vector_store),
+            parse_workers=4
+        )
+
+        @kitchen.storage.handler("storage", pipeline=pipeline)
+        async def handle_storage(data: StorageRequest, ingested: IngestionResult) -> StorageResponse:
+            ...
+    """
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[List[str]], Any]] = None,
+        upsert: Optional[Callable[[List[Chunk]], Any]] = None,
+        parse: Optional[Callable[[IngestSource], List[Document]]] = None,
+        chunk_size: int = 1024,
+        chunk_overlap: int = 128,
+        parse_workers: int = 2,
+        embed_batch_size: int = 64,
+        embed_concurrency: int = 2,
+        upsert_batch_size: int = 256,
+        queue_size: int = 256,
+        executor: Optional[Executor] = None
+    ):
+        self.embed = embed
+        self.upsert = upsert
+        self.parse = parse
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.parse_workers = parse_workers
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.upsert_batch_size = upsert_batch_size
+        self.queue_size = queue_size
+        self._executor = executor
+
+    def _parse_executor(self) -> Optional[Executor]:
+        if self._executor is None and self.parse_workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return self._executor
+
+    def close(self):
+        """Shut down the parse process pool"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def _call(self, func: Callable, *args) -> Any:
+        if inspect.iscoroutinefunction(func):
+            return await func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def _parse(self, source: IngestSource) -> List[Document]:
+        parser = self.parse or get_parser(source.filename)
+        if source.content is None and source.path is None:
+            raise ValueError(f"Source {source.filename} has no content or path")
+        return await asyncio.get_running_loop().run_in_executor(self._parse_executor(), parser, source)
+
+    def _chunk(self, document: Document) -> Iterator[Chunk]:
+        return chunk_document(document, self.chunk_size, self.chunk_overlap)
+
+    async def _embed(self, chunks: List[Chunk]) -> List[Chunk]:
+        vectors = await self._call(self.embed, [chunk.text for chunk in chunks])
+        if len(vectors) != len(chunks):
+            raise ValueError(f"embed returned {len(vectors)} vectors for {len(chunks)} chunks")
+        if np is not None:
+            # One conversion for the batch instead of a Python float() per value
+            vectors = np.asarray(vectors, dtype=np.float32).tolist()
+        else:
+            vectors = [[float(value) for value in vector] for vector in vectors]
+        for chunk, vector in zip(chunks, vectors):
+            chunk.embedding = vector
+        return chunks
+
+    async def _upsert(self, chunks: List[Chunk]) -> List[str]:
+        # Emits ids, not chunks, so embeddings can be freed once stored
+        await self._call(self.upsert, chunks)
+        return [chunk.id for chunk in chunks]
+
+    def _stages(self) -> List[Stage]:
+        stages = [
+            Stage(name="parse", func=self._parse, concurrency=max(self.parse_workers, 1), fan_out=True),
+            Stage(name="chunk", func=self._chunk, fan_out=True),
+        ]
+        if self.embed is not None:
+            stages.append(Stage(name="embed", func=self._embed, concurrency=self.embed_concurrency, batch_size=self.embed_batch_size))
+        if self.upsert is not None:
+            stages.append(Stage(name="upsert", func=self._upsert, batch_size=self.upsert_batch_size))
+        return stages
+
+    async def run(self, sources: Iterable[IngestSource]) -> IngestionResult:
+        """Ingest sources and return counters plus the ids of every chunk produced"""
+        started = time.perf_counter()
+        chunk_ids: List[str] = []
+
+        async def collect(item: Union[Chunk, str]):
+            chunk_ids.append(item.id if isinstance(item, Chunk) else item)
+
+        stages = self._stages()
+        stages.append(Stage(name="collect", func=collect))
+
+        def on_progress(stats: PipelineStats):
+            for name, stage in stats.stages.items():
+                report_progress(name, **stage.model_dump())
+
+        stats = await IngestPipeline(stages, queue_size=self.queue_size, on_progress=on_progress).run(sources)
+        return IngestionResult(
+            sources=stats.stages["parse"].received,
+            pages=stats.stages["parse"].emitted,
+            chunks=stats.stages["chunk"].emitted,
+            embedded=stats.stages["embed"].emitted if "embed" in stats.stages else 0,
+            upserted=stats.stages["upsert"].emitted if "upsert" in stats.stages else 0,
+            chunk_ids=chunk_ids,
+            errors=stats.errors,
+            seconds=round(time.perf_counter() - started, 3)
+        )
+
+    async def ingest(self, data: Union[StorageRequest, WhiskStorageSchema, IngestSource]) -> IngestionResult:
+        """Ingest the document carried by a storage request
+
+        Raises IngestionError if a stage failed and no chunk made it through
+        the pipeline; partial failures are left in `result.errors`.
+        """
+        if isinstance(data, IngestSource):
+            source = data
+        elif isinstance(data, WhiskStorageSchema):
+            source = IngestSource(filename=data.name, content=data.data, metadata=dict(data.metadata or {}))
+        else:
+            source = IngestSource(
+                filename=data.filename or data.file_id or "upload",
+                content=data.content,
+                metadata=dict(data.metadata or {})
+            )
+        result = await self.run([source])
+        if result.errors and not result.chunk_ids:
+            raise IngestionError(f"Failed to ingest {source.filename}: {'; '.join(result.errors)}", result)
+        return result
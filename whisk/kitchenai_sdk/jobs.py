@@ -0,0 +1,193 @@
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from contextvars import ContextVar
+from enum import StrEnum
+from pydantic import BaseModel, Field
+import asyncio
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETE = "complete"
+    ERROR = "error"
+
+
+class Job(BaseModel):
+    """A long-running task tracked by the JobManager"""
+    id: str = Field(default_factory=lambda: f"job-{uuid.uuid4().hex}")
+    object: str = "job"
+    kind: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: int = Field(default_factory=lambda: int(time.time()))
+    completed_at: Optional[int] = None
+    # Per-stage counters, e.g. {"store": {"received": 10, "emitted": 9, "failed": 1}}
+    progress: Dict[str, Dict[str, int]] = Field(default_factory=dict)
+    errors: List[str] = Field(default_factory=list)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.COMPLETE, JobStatus.ERROR)
+
+
+class JobEvent(BaseModel):
+    """A job status or progress change, as sent to subscribers"""
+    job_id: str
+    status: JobStatus
+    stage: Optional[str] = None
+    progress: Dict[str, Dict[str, int]] = Field(default_factory=dict)
+    timestamp: float = Field(default_factory=time.time)
+
+
+# The job (and its manager) running in the current task, for report_progress()
+_current_job: ContextVar[Optional[Tuple["JobManager", Job]]] = ContextVar("whisk_current_job", default=None)
+
+
+def current_job() -> Optional[Job]:
+    """Get the job running in the current context, if any"""
+    current = _current_job.get()
+    return current[1] if current else None
+
+
+def report_progress(stage: str, **counters: int):
+    """Report progress counters for the job running in the current context.
+
+    Handlers can call this freely; it is a no-op when not running as a job.
+
+        report_progress("parse", chunks_parsed=len(nodes))
+    """
+    current = _current_job.get()
+    if current:
+        manager, job = current
+        manager.update(job, stage, **counters)
+
+
+class JobManager:
+    """Runs jobs in the background and keeps their state for polling.
+
+    Subscribers get a JobEvent on every status and progress change. Only the
+    most recent `max_jobs` jobs are retained; finished jobs are evicted first.
+    """
+
+    def __init__(self, max_jobs: int = 1000, max_pending_events: int = 100):
+        self.max_jobs = max_jobs
+        self.max_pending_events = max_pending_events
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._listeners: Dict[str, List[asyncio.Queue]] = {}
+
+    def create(self, kind: str, **metadata: Any) -> Job:
+        """Create and register a new queued job"""
+        job = Job(kind=kind, metadata=metadata)
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id"""
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[Job]:
+        """List retained jobs, oldest first"""
+        return list(self._jobs.values())
+
+    def update(self, job: Job, stage: str, **counters: int):
+        """Merge progress counters for a stage and notify subscribers"""
+        job.progress.setdefault(stage, {}).update(counters)
+        self._publish(job, stage)
+
+    def set_status(self, job: Job, status: JobStatus):
+        """Change the job status and notify subscribers"""
+        job.status = status
+        if job.done:
+            job.completed_at = int(time.time())
+        self._publish(job)
+
+    def start(self, job: Job, work: Awaitable[Any]) -> asyncio.Task:
+        """Run `work` in the background, updating the job status as it goes"""
+        async def runner():
+            _current_job.set((self, job))
+            self.set_status(job, JobStatus.RUNNING)
+            try:
+                await work
+            except asyncio.CancelledError:
+                job.errors.append("cancelled")
+                self.set_status(job, JobStatus.ERROR)
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                job.errors.append(str(e))
+                self.set_status(job, JobStatus.ERROR)
+            else:
+                self.set_status(job, JobStatus.COMPLETE)
+            finally:
+                self._tasks.pop(job.id, None)
+
+        task = asyncio.create_task(runner())
+        # Keep a strong reference so the task isn't garbage collected mid-run
+        self._tasks[job.id] = task
+        return task
+
+    async def wait(self, job_id: str) -> Optional[Job]:
+        """Wait for a running job to finish"""
+        task = self._tasks.get(job_id)
+        if task:
+            await asyncio.shield(task)
+        return self.get(job_id)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[JobEvent]:
+        """Yield events for a job, starting with its current state, until it finishes.
+
+        Slow subscribers lose intermediate progress events but always get the
+        latest one, since each event carries the full progress snapshot.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_events)
+        self._listeners.setdefault(job_id, []).append(queue)
+        try:
+            event = self._event(job)
+            while True:
+                yield event
+                if event.status in (JobStatus.COMPLETE, JobStatus.ERROR):
+                    return
+                event = await queue.get()
+        finally:
+            listeners = self._listeners.get(job_id, [])
+            if queue in listeners:
+                listeners.remove(queue)
+            if not listeners:
+                self._listeners.pop(job_id, None)
+
+    def _event(self, job: Job, stage: Optional[str] = None) -> JobEvent:
+        return JobEvent(
+            job_id=job.id,
+            status=job.status,
+            stage=stage,
+            progress={name: dict(counters) for name, counters in job.progress.items()}
+        )
+
+    def _publish(self, job: Job, stage: Optional[str] = None):
+        listeners = self._listeners.get(job.id)
+        if not listeners:
+            return
+        event = self._event(job, stage)
+        for queue in listeners:
+            if queue.full():
+                # Drop the oldest pending event; the new one supersedes it
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _evict(self):
+        while len(self._jobs) > self.max_jobs:
+            finished = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if finished is None:
+                break
+            del self._jobs[finished]
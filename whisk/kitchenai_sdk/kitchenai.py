@@ -3,6 +3,11 @@ from .taxonomy.storage import StorageTask
 from .taxonomy.embeddings import EmbedTask
 from .taxonomy.agent import AgentTask
 from .base import DependencyManager
+from .jobs import JobManager
+from .scheduler import PriorityScheduler
+from .profiling import HandlerProfiler
+from typing import Any, Iterable
+import functools
 
 
 class KitchenAIApp:
@@ -16,14 +21,41 @@ class KitchenAIApp:
         self.storage = StorageTask(namespace, self.manager)
         self.embeddings = EmbedTask(namespace, self.manager)
         self.agent = AgentTask(namespace, self.manager)
+        self.jobs = JobManager()
+        # Replace with PriorityScheduler(concurrency, weights) to tune how work is shared
+        self.scheduler = PriorityScheduler()
+        # Off until a handler is sampled or a capture rule is added (see HandlerProfiler)
+        self.profiler = HandlerProfiler({
+            "chat": self.chat, "storage": self.storage, "embeddings": self.embeddings, "agent": self.agent
+        })
+        for registry in self.profiler.registries.values():
+            registry.profiler = self.profiler
         self._mounted_apps = {}
 
+    def close(self, keep: Iterable[Any] = ()):
+        """Release resources held by handlers and dependencies, such as
+        ingestion process pools and unflushed vector stores.
+
+        Dependencies in `keep` stay open (used by reloads whose new app
+        shares them).
+        """
+        keep = list(keep)
+        for pipeline in self.storage.pipelines:
+            pipeline.close()
+        for app in self._mounted_apps.values():
+            app.close(keep)
+        self.manager.close(keep)
+
     def mount_app(self, prefix: str, app: 'KitchenAIApp'):
         """Mount a sub-app and merge its handlers with prefixed labels"""
         # Merge dependencies
         for dep_type, dep in app.manager._dependencies.items():
             if dep_type not in self.manager._dependencies:
                 self.manager.register_dependency(dep_type, dep)
+        for dep_type in app.manager.pending_dependencies():
+            if not self.manager.has_dependency(dep_type):
+                # Delegate so the sub-app and the parent share one instance
+                self.manager.register_factory(dep_type, functools.partial(app.manager.get_dependency, dep_type))
         
         # Store mounted app
         self._mounted_apps[prefix] = app
@@ -57,6 +89,20 @@ class KitchenAIApp:
             if dep_type not in app.manager._dependencies:
                 app.manager.register_dependency(dep_type, dep)
 
+    def register_factory(self, dep_type, factory):
+        """Register a lazily built dependency and propagate to mounted apps"""
+        self.manager.register_factory(dep_type, factory)
+        for app in self._mounted_apps.values():
+            if not app.manager.has_dependency(dep_type):
+                app.manager.register_factory(dep_type, functools.partial(self.manager.get_dependency, dep_type))
+
+    def register_shared(self, dep_type, factory, wrap=None):
+        """Register a dependency backed by read-only arrays shared across worker processes"""
+        self.manager.register_shared(dep_type, factory, wrap)
+        for app in self._mounted_apps.values():
+            if not app.manager.has_dependency(dep_type):
+                app.manager.register_factory(dep_type, functools.partial(self.manager.get_dependency, dep_type))
+
     def set_manager(self, manager):
         """Update the manager for the app and all tasks."""
         self.manager = manager
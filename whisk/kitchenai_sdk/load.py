@@ -0,0 +1,174 @@
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from .nats_schema import LoadReport
+import asyncio
+import os
+import random
+import sys
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class LoadMonitor:
+    """Tracks a worker's live load for heartbeat replies.
+
+    Handlers are counted per taxonomy while they run; outcomes, queue waits
+    and event-loop lag are kept for the last `window` seconds. Lag is
+    measured by a sampler task (`start()`) that sleeps `lag_interval` and
+    records how late it wakes up.
+    """
+
+    def __init__(self, window: float = 60.0, lag_interval: float = 0.1):
+        self.window = window
+        self.lag_interval = lag_interval
+        self.inflight: Dict[str, int] = {}
+        self._outcomes: Deque[Tuple[float, bool]] = deque(maxlen=10000)
+        self._lags: Deque[Tuple[float, float]] = deque(maxlen=2048)
+        self._sampler: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def track(self, taxonomy: str):
+        """Count a handler as in flight; exceptions count as errors"""
+        self.begin(taxonomy)
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.finish(taxonomy, failed)
+
+    def begin(self, taxonomy: str):
+        self.inflight[taxonomy] = self.inflight.get(taxonomy, 0) + 1
+
+    def finish(self, taxonomy: str, failed: bool = False):
+        self.inflight[taxonomy] = max(self.inflight.get(taxonomy, 0) - 1, 0)
+        self._outcomes.append((time.monotonic(), failed))
+
+    def start(self) -> asyncio.Task:
+        """Start sampling event-loop lag on the running loop"""
+        if self._sampler is None or self._sampler.done():
+            self._sampler = asyncio.create_task(self._sample_lag())
+        return self._sampler
+
+    async def stop(self):
+        if self._sampler is not None:
+            self._sampler.cancel()
+            try:
+                await self._sampler
+            except asyncio.CancelledError:
+                pass
+            self._sampler = None
+
+    async def _sample_lag(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.lag_interval)
+            now = time.monotonic()
+            self._lags.append((now, max(now - started - self.lag_interval, 0.0)))
+
+    def _recent(self, samples: Iterable[Tuple[float, float]]) -> List[float]:
+        cutoff = time.monotonic() - self.window
+        return [value for at, value in samples if at >= cutoff]
+
+    def report(self, queue_waits: Iterable[Tuple[float, float]] = (), draining: bool = False) -> LoadReport:
+        """Current load; `queue_waits` are (timestamp, seconds) samples, e.g. a scheduler pool's `recent_waits`"""
+        outcomes = self._recent(self._outcomes)
+        lags = self._recent(self._lags)
+        return LoadReport(
+            inflight={taxonomy: count for taxonomy, count in self.inflight.items() if count},
+            queue_wait_p95_ms=round(_percentile(self._recent(queue_waits), 0.95) * 1000, 2),
+            loop_lag_ms=round(_percentile(lags, 0.95) * 1000, 2),
+            rss_mb=round(rss_bytes() / 1e6, 1),
+            error_rate=round(sum(outcomes) / len(outcomes), 4) if outcomes else 0.0,
+            requests=len(outcomes),
+            draining=draining,
+        )
+
+
+class LoadAwareDispatcher:
+    """Picks the least-loaded worker from recent heartbeat reports.
+
+    Scores combine in-flight work, queue wait, event-loop lag and error rate,
+    plus requests this dispatcher has routed but not yet seen finish, so
+    bursts between heartbeats don't all land on one worker. Workers without
+    a fresh report get a neutral score; draining workers are skipped. With
+    `choices=2` it compares two random candidates (power of two choices),
+    which avoids herding when many callers act on the same reports.
+    """
+
+    def __init__(self, ttl: float = 15.0, choices: Optional[int] = 2, unknown_score: float = 4.0):
+        self.ttl = ttl
+        self.choices = choices
+        self.unknown_score = unknown_score
+        self.reports: Dict[str, Tuple[float, LoadReport]] = {}
+        self.outstanding: Dict[str, int] = {}
+
+    def update(self, client_id: str, report: LoadReport):
+        self.reports[client_id] = (time.monotonic(), report)
+
+    def score(self, client_id: str) -> float:
+        outstanding = self.outstanding.get(client_id, 0)
+        entry = self.reports.get(client_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return self.unknown_score + outstanding
+        report = entry[1]
+        if report.draining:
+            return float("inf")
+        return (
+            sum(report.inflight.values())
+            + outstanding
+            + report.queue_wait_p95_ms / 100
+            + report.loop_lag_ms / 50
+            + report.error_rate * 10
+        )
+
+    def pick(self, client_ids: Iterable[str]) -> str:
+        candidates = list(client_ids)
+        if not candidates:
+            raise ValueError("No client ids to pick from")
+        # Drop draining workers before sampling, unless there is nothing else
+        scores = {client_id: self.score(client_id) for client_id in candidates}
+        available = [client_id for client_id in candidates if scores[client_id] != float("inf")]
+        candidates = available or candidates
+        if self.choices and len(candidates) > self.choices:
+            candidates = random.sample(candidates, self.choices)
+        scores = {client_id: scores[client_id] for client_id in candidates}
+        best = min(scores.values())
+        return random.choice([client_id for client_id, score in scores.items() if score == best])
+
+    @contextmanager
+    def route(self, client_ids: Iterable[str]):
+        """Pick a worker and count the request against it until the block exits"""
+        client_id = self.pick(client_ids)
+        self.outstanding[client_id] = self.outstanding.get(client_id, 0) + 1
+        try:
+            yield client_id
+        finally:
+            self.outstanding[client_id] -= 1
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from .schema import (
     WhiskQuerySchema,
     WhiskStorageSchema,
@@ -16,6 +16,7 @@ from .schema import (
     ChatCompletionRequest,
     ChatCompletionResponse
 )
+from .profiling import ProfileCapture, ProfileRule, ProfilingStatus
 
 # Base message schema
 class NatsMessageBase(BaseModel):
@@ -43,6 +44,50 @@ class NatsRegisterMessage(BaseModel):
     client_type: str = "bento_box"
     client_description: str = "Bento box"
 
+class HeartbeatRequestMessage(BaseModel):
+    """Heartbeat probe; KitchenAI may send a full NatsRegisterMessage"""
+    client_id: str
+    version: Optional[str] = None
+    name: Optional[str] = None
+
+class LoadReport(BaseModel):
+    """Live load of a worker, sent with every heartbeat"""
+    inflight: Dict[str, int] = Field(default_factory=dict, description="Handlers running per taxonomy")
+    queue_wait_p95_ms: float = 0.0
+    loop_lag_ms: float = 0.0
+    rss_mb: float = 0.0
+    error_rate: float = Field(0.0, description="Failed share of handlers finished in the window")
+    requests: int = Field(0, description="Handlers finished in the window")
+    draining: bool = False
+
+class HeartbeatResponseMessage(BaseModel):
+    """Heartbeat reply with the worker's current load"""
+    client_id: str
+    version: Optional[str] = None
+    name: Optional[str] = None
+    ack: bool = True
+    message: str = "heartbeat"
+    timestamp: float
+    load: LoadReport
+
+class ProfilingRequestMessage(BaseModel):
+    """Control a worker's handler profiler over its mgmt.profiling subject"""
+    client_id: str
+    action: Literal["status", "start_sampling", "stop_sampling", "collapsed", "add_rule", "remove_rule", "capture"]
+    taxonomy: Optional[str] = None
+    label: Optional[str] = None
+    rule: Optional[Dict[str, Any]] = Field(None, description="ProfileRule fields for add_rule")
+    rule_id: Optional[str] = None
+    capture_id: Optional[str] = None
+
+class ProfilingResponseMessage(BaseModel):
+    client_id: str
+    error: Optional[str] = None
+    status: Optional[ProfilingStatus] = None
+    collapsed: Optional[str] = None
+    rule: Optional[ProfileRule] = None
+    capture: Optional[ProfileCapture] = None
+
 # Request Messages
 class QueryRequestMessage(NatsMessageBase, WhiskQuerySchema):
     """Schema for query requests"""
@@ -0,0 +1,199 @@
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from pydantic import BaseModel, Field
+import asyncio
+import functools
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input queue
+_DONE = object()
+
+
+class Stage(BaseModel):
+    """A pipeline stage.
+
+    `func` receives one item and returns a result, None to drop the item, or a
+    (async) generator / list to fan out into several items for the next
+    stage. Sync functions run in the default executor so they don't block the
+    event loop.
+
+    With `batch_size > 1`, `func` receives a list of up to `batch_size` items
+    (waiting at most `batch_wait` seconds to fill it) and its returned list
+    is fanned out, e.g. for batched embedding calls.
+    """
+    name: str
+    func: Callable[[Any], Any]
+    concurrency: int = 1
+    fan_out: bool = False
+    batch_size: int = 1
+    batch_wait: float = 0.05
+
+    @property
+    def fans_out(self) -> bool:
+        return self.fan_out or self.batch_size > 1
+
+
+class StageStats(BaseModel):
+    """Counters for a single stage"""
+    received: int = 0
+    emitted: int = 0
+    failed: int = 0
+
+
+class PipelineStats(BaseModel):
+    """Counters for a pipeline run"""
+    stages: Dict[str, StageStats] = Field(default_factory=dict)
+    errors: List[str] = Field(default_factory=list)
+
+
+class IngestPipeline:
+    """Bounded async pipeline.
+
+    Each stage gets its own bounded queue and `concurrency` workers, so a slow
+    stage applies backpressure to the ones before it instead of buffering the
+    whole corpus in memory. A failing item is counted and dropped; it does not
+    stop the run.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 64,
+        on_progress: Optional[Callable[[PipelineStats], None]] = None,
+        max_errors: int = 100
+    ):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_progress = on_progress
+        self.max_errors = max_errors
+        self.stats = PipelineStats(stages={stage.name: StageStats() for stage in stages})
+
+    def _notify(self):
+        if self.on_progress:
+            self.on_progress(self.stats)
+
+    def _record_error(self, stage: Stage, error: Exception, count: int = 1):
+        self.stats.stages[stage.name].failed += count
+        if len(self.stats.errors) < self.max_errors:
+            self.stats.errors.append(f"{stage.name}: {error}")
+        logger.error(f"Pipeline stage '{stage.name}' failed: {error}")
+
+    async def _call(self, stage: Stage, item: Any) -> Any:
+        if inspect.iscoroutinefunction(stage.func):
+            return await stage.func(item)
+        loop = asyncio.get_running_loop()
+        if stage.fans_out:
+            # Materialize sync generators off the event loop
+            return await loop.run_in_executor(None, lambda: list(stage.func(item) or []))
+        return await loop.run_in_executor(None, functools.partial(stage.func, item))
+
+    async def _emit(self, stage: Stage, result: Any, output: Optional[asyncio.Queue]):
+        stats = self.stats.stages[stage.name]
+        if stage.fans_out:
+            if hasattr(result, "__aiter__"):
+                async for value in result:
+                    stats.emitted += 1
+                    if output is not None:
+                        await output.put(value)
+                return
+            results = result or []
+        else:
+            results = [] if result is None else [result]
+        for value in results:
+            stats.emitted += 1
+            if output is not None:
+                await output.put(value)
+
+    async def _next_batch(self, stage: Stage, source: asyncio.Queue) -> Tuple[List[Any], bool]:
+        """Collect up to `batch_size` items; returns the batch and whether input ended"""
+        item = await source.get()
+        if item is _DONE:
+            return [], True
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + stage.batch_wait
+        while len(batch) < stage.batch_size:
+            remaining = deadline - loop.time()
+            try:
+                item = source.get_nowait() if remaining <= 0 else await asyncio.wait_for(source.get(), remaining)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _batch_worker(self, stage: Stage, source: asyncio.Queue, output: Optional[asyncio.Queue]):
+        while True:
+            batch, done = await self._next_batch(stage, source)
+            if batch:
+                self.stats.stages[stage.name].received += len(batch)
+                try:
+                    await self._emit(stage, await self._call(stage, batch), output)
+                except Exception as e:
+                    self._record_error(stage, e, count=len(batch))
+                self._notify()
+            if done:
+                return
+
+    async def _worker(self, stage: Stage, source: asyncio.Queue, output: Optional[asyncio.Queue]):
+        if stage.batch_size > 1:
+            return await self._batch_worker(stage, source, output)
+        while True:
+            item = await source.get()
+            if item is _DONE:
+                return
+            self.stats.stages[stage.name].received += 1
+            try:
+                await self._emit(stage, await self._call(stage, item), output)
+            except Exception as e:
+                self._record_error(stage, e)
+            self._notify()
+
+    async def _run_stage(self, stage: Stage, source: asyncio.Queue, output: Optional[asyncio.Queue], downstream_workers: int):
+        workers = [
+            asyncio.create_task(self._worker(stage, source, output))
+            for _ in range(max(stage.concurrency, 1))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        if output is not None:
+            for _ in range(downstream_workers):
+                await output.put(_DONE)
+
+    async def _feed(self, items: Union[Iterable, AsyncIterable], queue: asyncio.Queue, workers: int):
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                await queue.put(item)
+        else:
+            for item in items:
+                await queue.put(item)
+        for _ in range(workers):
+            await queue.put(_DONE)
+
+    async def run(self, items: Union[Iterable, AsyncIterable]) -> PipelineStats:
+        """Push items through all stages and wait until the pipeline drains"""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        runners = [asyncio.create_task(self._feed(items, queues[0], max(self.stages[0].concurrency, 1)))]
+        for index, stage in enumerate(self.stages):
+            is_last = index == len(self.stages) - 1
+            runners.append(asyncio.create_task(self._run_stage(
+                stage,
+                queues[index],
+                None if is_last else queues[index + 1],
+                0 if is_last else max(self.stages[index + 1].concurrency, 1)
+            )))
+        try:
+            await asyncio.gather(*runners)
+        finally:
+            for runner in runners:
+                runner.cancel()
+        self._notify()
+        return self.stats
@@ -0,0 +1,383 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple
+from collections import Counter, deque
+from functools import wraps
+from pydantic import BaseModel, Field, PrivateAttr
+from types import CodeType, FrameType
+import inspect
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+CaptureMode = Literal["cprofile", "tracemalloc"]
+
+
+def handler_key(taxonomy: str, label: str) -> str:
+    return f"{taxonomy}:{label}"
+
+
+def _frame_name(code: CodeType) -> str:
+    # Collapsed stacks use ";" between frames and " " before the count
+    name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name.replace(";", ":").replace(" ", "_")
+
+
+class StackSampler:
+    """Samples the event-loop thread's stack while chosen handlers are running.
+
+    A daemon thread reads the loop thread's current frame every `interval`
+    seconds. Samples are kept when the stack runs through one of the target
+    handlers' code, and are recorded from that handler frame down as
+    collapsed stacks (`frame;frame;frame count`), the input format of
+    flamegraph.pl and speedscope. Only time on the loop is seen; a handler
+    suspended in an `await` is not sampled.
+    """
+
+    def __init__(self, interval: float = 0.005, max_stacks: int = 10000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.targets: Dict[CodeType, str] = {}
+        self.counts: Dict[str, Counter] = {}
+        self.samples = 0
+        self._thread_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enable(self, key: str, code: CodeType, thread_id: Optional[int] = None):
+        """Start recording samples for `key` whenever `code` is on the stack"""
+        with self._lock:
+            self.targets[code] = key
+            self.counts.setdefault(key, Counter())
+        self._thread_id = thread_id or threading.get_ident()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="whisk-stack-sampler", daemon=True)
+            self._thread.start()
+
+    def disable(self, key: str):
+        with self._lock:
+            self.targets = {code: target for code, target in self.targets.items() if target != key}
+            idle = not self.targets
+        if idle:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.sample(frame)
+
+    def sample(self, frame: FrameType):
+        """Record one stack, leaf frame first, if it passes through a target"""
+        stack: List[CodeType] = []
+        key = None
+        targets = self.targets
+        while frame is not None:
+            stack.append(frame.f_code)
+            if frame.f_code in targets:
+                # Keep walking: the outermost target frame wins
+                key = targets[frame.f_code]
+                depth = len(stack)
+            frame = frame.f_back
+        if key is None:
+            return
+        collapsed = ";".join(_frame_name(code) for code in reversed(stack[:depth]))
+        with self._lock:
+            counts = self.counts.setdefault(key, Counter())
+            if collapsed in counts or len(counts) < self.max_stacks:
+                counts[collapsed] += 1
+            self.samples += 1
+
+    def collapsed(self, key: Optional[str] = None) -> str:
+        """Samples as collapsed stacks, prefixed with the handler key"""
+        with self._lock:
+            counts = {name: dict(counter) for name, counter in self.counts.items() if key is None or name == key}
+        return "".join(
+            f"{name};{stack} {count}\n"
+            for name, counter in sorted(counts.items())
+            for stack, count in sorted(counter.items())
+        )
+
+    def reset(self, key: Optional[str] = None):
+        with self._lock:
+            for name in list(self.counts):
+                if key is None or name == key:
+                    self.counts[name] = Counter()
+
+
+class ProfileRule(BaseModel):
+    """Capture the next `count` requests to matching handlers"""
+    id: str = Field(default_factory=lambda: f"rule-{uuid.uuid4().hex[:12]}")
+    mode: CaptureMode = "cprofile"
+    taxonomy: Optional[str] = None
+    label: Optional[str] = None
+    metadata: Dict[str, str] = Field(default_factory=dict, description="Request metadata that must match")
+    count: int = Field(1, description="Captures left; the rule is removed when it reaches 0")
+    sample_rate: float = Field(1.0, description="Share of matching requests to capture")
+
+    def matches(self, taxonomy: str, label: str, request: Any) -> bool:
+        if self.taxonomy and self.taxonomy != taxonomy:
+            return False
+        if self.label and self.label != label:
+            return False
+        if self.metadata:
+            metadata = getattr(request, "metadata", None) or {}
+            if any(str(metadata.get(key)) != value for key, value in self.metadata.items()):
+                return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+
+class ProfileCapture(BaseModel):
+    """The result of one captured request"""
+    id: str = Field(default_factory=lambda: f"capture-{uuid.uuid4().hex[:12]}")
+    rule_id: str
+    mode: CaptureMode
+    taxonomy: str
+    label: str
+    started_at: float = Field(default_factory=time.time)
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+    # cprofile: functions by cumulative time; tracemalloc: allocation growth by line
+    top: List[Dict[str, Any]] = Field(default_factory=list)
+    _data: Optional[bytes] = PrivateAttr(default=None)
+
+    @property
+    def data(self) -> Optional[bytes]:
+        """cProfile stats in pstats' file format (`pstats.Stats(path)`, snakeviz)"""
+        return self._data
+
+
+class ProfilingStatus(BaseModel):
+    sampling: List[str] = Field(default_factory=list)
+    samples: int = 0
+    rules: List[ProfileRule] = Field(default_factory=list)
+    captures: List[ProfileCapture] = Field(default_factory=list)
+
+
+class _Capture:
+    """A running cProfile or tracemalloc capture.
+
+    Both are process-wide: other requests running on the loop at the same
+    time show up too, so captures are most useful at low concurrency.
+    """
+
+    def __init__(self, capture: ProfileCapture, top: int):
+        self.capture = capture
+        self.top = top
+        self._profile = None
+        self._snapshot = None
+        self._started_tracing = False
+        self.done = False
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.capture.mode == "cprofile":
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                self._started_tracing = True
+            self._snapshot = tracemalloc.take_snapshot()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        capture = self.capture
+        capture.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if error is not None:
+            capture.error = f"{type(error).__name__}: {error}"
+        if self._profile is not None:
+            import pstats
+            self._profile.disable()
+            stats = pstats.Stats(self._profile)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+            capture.top = [
+                {
+                    "function": f"{func} ({os.path.basename(filename)}:{line})",
+                    "calls": calls,
+                    "tottime_ms": round(tottime * 1000, 3),
+                    "cumtime_ms": round(cumtime * 1000, 3),
+                }
+                for (filename, line, func), (_, calls, tottime, cumtime, _) in rows
+            ]
+            capture._data = marshal.dumps(stats.stats)
+        elif self._snapshot is not None:
+            after = tracemalloc.take_snapshot()
+            if self._started_tracing:
+                tracemalloc.stop()
+            capture.top = [
+                {
+                    "location": str(diff.traceback[0]),
+                    "size_kb": round(diff.size_diff / 1024, 2),
+                    "count": diff.count_diff,
+                }
+                for diff in after.compare_to(self._snapshot, "lineno")[:self.top]
+                if diff.size_diff
+            ]
+
+
+class HandlerProfiler:
+    """Opt-in profiling for a KitchenAIApp's handlers, switchable at runtime.
+
+    - Sampling: `start_sampling("chat", "rag")` records the handler's stacks
+      until `stop_sampling`; `collapsed()` exports them for flamegraphs.
+    - Captures: `add_rule(mode="cprofile", label="rag", count=5)` profiles
+      the next matching requests with cProfile (or tracemalloc) and keeps
+      the last `max_captures` results.
+
+    Every registered task checks `rules` before running, so nothing is
+    profiled (and nothing costs more than that check) until switched on.
+    Exposed over HTTP with `profiling.enabled` and over NATS on the
+    worker's `mgmt.profiling` subject.
+    """
+
+    def __init__(
+        self,
+        registries: Dict[str, Any],
+        interval: float = 0.005,
+        max_captures: int = 50,
+        top: int = 30,
+        capture_timeout: float = 300.0,
+    ):
+        self.registries = registries
+        self.sampler = StackSampler(interval)
+        self.rules: List[ProfileRule] = []
+        self.captures: deque = deque(maxlen=max_captures)
+        self.top = top
+        self.capture_timeout = capture_timeout
+        self._running: Optional[_Capture] = None
+
+    def configure(self, interval: Optional[float] = None, max_captures: Optional[int] = None):
+        if interval is not None:
+            self.sampler.interval = interval
+        if max_captures is not None:
+            self.captures = deque(self.captures, maxlen=max_captures)
+
+    def _code(self, taxonomy: str, label: str) -> CodeType:
+        registry = self.registries.get(taxonomy)
+        task = registry.get_task(label) if registry is not None else None
+        if task is None:
+            raise KeyError(f"No {taxonomy} handler named {label}")
+        return inspect.unwrap(task).__code__
+
+    def start_sampling(self, taxonomy: str, label: str):
+        """Sample the handler's stacks; call from the event-loop thread"""
+        self.sampler.enable(handler_key(taxonomy, label), self._code(taxonomy, label))
+
+    def stop_sampling(self, taxonomy: str, label: str):
+        self.sampler.disable(handler_key(taxonomy, label))
+
+    def collapsed(self, taxonomy: Optional[str] = None, label: Optional[str] = None) -> str:
+        return self.sampler.collapsed(handler_key(taxonomy, label) if taxonomy and label else None)
+
+    def add_rule(self, **options: Any) -> ProfileRule:
+        rule = ProfileRule(**options)
+        self.rules.append(rule)
+        return rule
+
+    def remove_rule(self, rule_id: str) -> bool:
+        before = len(self.rules)
+        self.rules = [rule for rule in self.rules if rule.id != rule_id]
+        return len(self.rules) != before
+
+    def get_capture(self, capture_id: str) -> Optional[ProfileCapture]:
+        return next((capture for capture in self.captures if capture.id == capture_id), None)
+
+    def status(self) -> ProfilingStatus:
+        with self.sampler._lock:
+            sampling = sorted(set(self.sampler.targets.values()))
+        return ProfilingStatus(
+            sampling=sampling,
+            samples=self.sampler.samples,
+            rules=list(self.rules),
+            captures=list(self.captures),
+        )
+
+    def _claim(self, taxonomy: str, label: str, request: Any) -> Optional[ProfileRule]:
+        # cProfile allows one active profiler per thread, so captures don't overlap
+        running = self._running
+        if running is not None:
+            if time.perf_counter() - running._started < self.capture_timeout:
+                return None
+            # A stream that was never consumed to the end; don't profile forever
+            self._finish(running, TimeoutError("capture abandoned"))
+        for rule in self.rules:
+            if rule.matches(taxonomy, label, request):
+                rule.count -= 1
+                if rule.count <= 0:
+                    self.rules.remove(rule)
+                return rule
+        return None
+
+    async def run(self, taxonomy: str, label: str, task: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run a task, capturing it if a rule matches"""
+        rule = self._claim(taxonomy, label, args[0] if args else None)
+        if rule is None:
+            return await _call(task, args, kwargs)
+        running = _Capture(ProfileCapture(rule_id=rule.id, mode=rule.mode, taxonomy=taxonomy, label=label), self.top)
+        self._running = running
+        running.start()
+        try:
+            result = await _call(task, args, kwargs)
+        except BaseException as e:
+            self._finish(running, e)
+            raise
+        if hasattr(result, "__aiter__"):
+            # Streaming responses are captured until the stream ends
+            return self._stream(result, running)
+        self._finish(running)
+        return result
+
+    async def _stream(self, stream: AsyncIterator, running: _Capture) -> AsyncIterator:
+        error = None
+        try:
+            async for item in stream:
+                yield item
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(running, error)
+
+    def _finish(self, running: _Capture, error: Optional[BaseException] = None):
+        if running.done:
+            return
+        try:
+            running.finish(error)
+        finally:
+            if self._running is running:
+                self._running = None
+        self.captures.append(running.capture)
+
+
+async def _call(task: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Any:
+    result = task(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def profiled(registry: Any, label: str, task: Callable) -> Callable:
+    """Wrap a registered task so matching requests can be captured by the registry's profiler"""
+    @wraps(task)
+    async def wrapper(*args, **kwargs):
+        profiler = registry.profiler
+        if profiler is None or not profiler.rules:
+            return await _call(task, args, kwargs)
+        return await profiler.run(registry.task_type, label, task, args, kwargs)
+    return wrapper
@@ -0,0 +1,228 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+from pydantic import BaseModel, Field
+from .schema import Message, SourceNode
+from .tokens import REPLY_OVERHEAD, TokenCounter, get_token_counter
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Context windows by model name prefix (longest prefix wins)
+CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "o1": 200000,
+    "o3": 200000,
+    "claude": 200000,
+    "llama3": 8192,
+    "mistral": 32768,
+}
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+def context_window(model: str, default: int = DEFAULT_CONTEXT_WINDOW) -> int:
+    """Context window of a model, matched by the longest known name prefix"""
+    name = model.split("/")[-1]
+    matches = [prefix for prefix in CONTEXT_WINDOWS if name.startswith(prefix)]
+    return CONTEXT_WINDOWS[max(matches, key=len)] if matches else default
+
+
+class BuiltPrompt(BaseModel):
+    """Messages that fit the budget, plus what was left out"""
+    messages: List[Message]
+    context: str = ""
+    sources: List[SourceNode] = Field(default_factory=list, description="Sources included in the context, best first")
+    prompt_tokens: int = 0
+    budget: int = 0
+    dropped_messages: int = 0
+    dropped_sources: int = 0
+    summarized: bool = False
+
+
+class PromptBuilder:
+    """Assemble chat prompts that fit a model's context window.
+
+    The system prompt and the latest message are always kept. Retrieved
+    sources are ranked by score and added until `context_share` of the budget
+    is used (the last one is trimmed to fit), then history is added newest
+    first until the budget runs out. Older turns are dropped, or condensed
+    with `summarize(messages) -> str` into up to `summary_tokens` when given
+    (use `abuild` for async summarizers). Token counts come from the shared TokenCounter cache, so
+    history resent every turn is only tokenized once.
+
+        builder = PromptBuilder(model="gpt-4o-mini", reserve_completion_tokens=1024)
+        prompt = builder.build(chat.messages, sources=nodes, system_prompt="Answer from the context.")
+        response = await llm.achat(prompt.messages)
+    """
+
+    def __init__(
+        self,
+        model: str = "default",
+        max_context_tokens: Optional[int] = None,
+        reserve_completion_tokens: int = 512,
+        context_share: float = 0.5,
+        summarize: Optional[Callable[[List[Message]], Union[str, Awaitable[str]]]] = None,
+        summary_tokens: int = 256,
+        context_header: str = "Context:",
+        counter: Optional[TokenCounter] = None
+    ):
+        self.model = model
+        self.max_context_tokens = max_context_tokens or context_window(model)
+        self.reserve_completion_tokens = reserve_completion_tokens
+        self.context_share = context_share
+        self.summarize = summarize
+        self.summary_tokens = summary_tokens
+        self.context_header = context_header
+        self.counter = counter or get_token_counter()
+
+    @property
+    def budget(self) -> int:
+        return self.max_context_tokens - self.reserve_completion_tokens
+
+    def count(self, message: Union[Message, Dict[str, Any]]) -> int:
+        return self.counter.count_message(message, self.model)
+
+    def trim_text(self, text: str, max_tokens: int, keep: str = "start") -> str:
+        """Cut text to at most `max_tokens`, at a word boundary when possible.
+
+        `keep="end"` drops the beginning instead (for the latest message,
+        where the question is usually last).
+        """
+        if max_tokens <= 0:
+            return ""
+        tokens = self.counter.count(text, self.model)
+        while tokens > max_tokens and text:
+            # Shrink proportionally, then re-check (usually one or two rounds)
+            size = int(len(text) * max_tokens / tokens * 0.95)
+            if keep == "end":
+                start = len(text) - size
+                space = text.find(" ", start)
+                text = text[space + 1 if 0 <= space < start + size // 2 else start:]
+            else:
+                space = text.rfind(" ", 0, size)
+                text = text[:space if space > size // 2 else size]
+            tokens = self.counter.count(text, self.model)
+        return text
+
+    def _context(self, sources: Sequence[SourceNode], budget: int) -> tuple:
+        ranked = sorted(sources, key=lambda node: node.score if node.score is not None else float("-inf"), reverse=True)
+        used, parts, tokens = [], [], self.counter.count(self.context_header, self.model)
+        for node in ranked:
+            remaining = budget - tokens
+            text = node.text
+            cost = self.counter.count(text, self.model) + 1
+            if cost > remaining:
+                text = self.trim_text(text, remaining - 1)
+                if not text:
+                    break
+                used.append(node.model_copy(update={"text": text}))
+                parts.append(text)
+                break
+            used.append(node)
+            parts.append(text)
+            tokens += cost
+        context = "\n".join([self.context_header, *parts]) if parts else ""
+        return context, used
+
+    def _plan(self, messages: Sequence[Any], sources: Sequence[SourceNode], system_prompt: Optional[str]):
+        messages = [message if isinstance(message, Message) else Message.model_validate(message, from_attributes=True) for message in messages]
+        system = [message for message in messages if message.role == "system"]
+        turns = [message for message in messages if message.role != "system"]
+        last, history = (turns[-1], turns[:-1]) if turns else (None, [])
+
+        system_text = "\n\n".join(filter(None, [system_prompt, *(message.content for message in system)]))
+        fixed = REPLY_OVERHEAD + (self.count(Message(role="system", content=system_text)) if system_text else 0)
+        if last is not None:
+            last_tokens = self.count(last)
+            if fixed + last_tokens > self.budget:
+                # Even the latest message doesn't fit: keep as much of its end as possible
+                content_budget = self.budget - fixed - (last_tokens - self.counter.count(last.content, self.model))
+                last = last.model_copy(update={"content": self.trim_text(last.content, content_budget, keep="end")})
+                last_tokens = self.count(last)
+            fixed += last_tokens
+
+        context, used = self._context(sources, int(max(self.budget - fixed, 0) * self.context_share)) if sources else ("", [])
+        remaining = self.budget - fixed - (self.counter.count(context, self.model) + 2 if context else 0)
+
+        kept, left = self._fit_history(history, remaining)
+        if len(kept) < len(history) and self.summarize is not None:
+            # Leave room for the summary of what gets dropped
+            reserve = min(self.summary_tokens, remaining // 2)
+            kept, left = self._fit_history(history, remaining - reserve)
+            left += reserve
+        dropped = history[:len(history) - len(kept)]
+        return system_text, context, used, kept, dropped, last, left
+
+    def _fit_history(self, history: List[Message], remaining: int) -> tuple:
+        """Newest messages that fit in `remaining` tokens, in order"""
+        kept: List[Message] = []
+        for message in reversed(history):
+            cost = self.count(message)
+            if cost > remaining:
+                break
+            kept.append(message)
+            remaining -= cost
+        kept.reverse()
+        return kept, remaining
+
+    def _assemble(self, system_text, context, used, kept, dropped, last, summary, sources) -> BuiltPrompt:
+        system_content = "\n\n".join(filter(None, [system_text, context]))
+        result = ([Message(role="system", content=system_content)] if system_content else [])
+        if summary:
+            result.append(Message(role="system", content=f"Summary of the earlier conversation:\n{summary}"))
+        result.extend(kept)
+        if last is not None:
+            result.append(last)
+        if dropped:
+            logger.debug(f"Prompt for {self.model}: dropped {len(dropped)} old messages{' (summarized)' if summary else ''}")
+        return BuiltPrompt(
+            messages=result,
+            context=context,
+            sources=used,
+            prompt_tokens=self.counter.count_messages(result, self.model),
+            budget=self.budget,
+            dropped_messages=len(dropped),
+            dropped_sources=len(sources) - len(used),
+            summarized=bool(summary)
+        )
+
+    def _fit_summary(self, summary: Optional[str], remaining: int) -> Optional[str]:
+        if not summary:
+            return None
+        return self.trim_text(summary, remaining - 12) or None
+
+    def build(
+        self,
+        messages: Sequence[Any],
+        sources: Sequence[SourceNode] = (),
+        system_prompt: Optional[str] = None
+    ) -> BuiltPrompt:
+        """Fit messages and sources into the budget"""
+        system_text, context, used, kept, dropped, last, remaining = self._plan(messages, sources, system_prompt)
+        summary = None
+        if dropped and self.summarize is not None:
+            if inspect.iscoroutinefunction(self.summarize):
+                raise TypeError("summarize is async; use `await builder.abuild(...)`")
+            summary = self._fit_summary(self.summarize(dropped), remaining)
+        return self._assemble(system_text, context, used, kept, dropped, last, summary, sources)
+
+    async def abuild(
+        self,
+        messages: Sequence[Any],
+        sources: Sequence[SourceNode] = (),
+        system_prompt: Optional[str] = None
+    ) -> BuiltPrompt:
+        """Like `build`, awaiting an async `summarize`"""
+        system_text, context, used, kept, dropped, last, remaining = self._plan(messages, sources, system_prompt)
+        summary = None
+        if dropped and self.summarize is not None:
+            summary = self.summarize(dropped)
+            if inspect.isawaitable(summary):
+                summary = await summary
+            summary = self._fit_summary(summary, remaining)
+        return self._assemble(system_text, context, used, kept, dropped, last, summary, sources)
@@ -0,0 +1,243 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from pathlib import Path
+from pydantic import BaseModel, Field
+from .dedup import content_hash, _HASH_BLOCK
+from .ingestion import IngestionResult, IngestSource
+from .jobs import report_progress
+from .schema import StorageRequest
+import asyncio
+import os
+import tempfile
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestEntry(BaseModel):
+    """What was indexed for one file"""
+    path: str
+    mtime_ns: int
+    size: int
+    hash: str
+    file_id: Optional[str] = None
+    chunk_ids: List[str] = Field(default_factory=list)
+    indexed_at: int = Field(default_factory=lambda: int(time.time()))
+
+
+class IndexManifest(BaseModel):
+    """Per-file state of an index, persisted as JSON"""
+    version: int = 1
+    files: Dict[str, ManifestEntry] = Field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "IndexManifest":
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        return cls.model_validate_json(path.read_text())
+
+    def save(self, path: Union[str, Path]):
+        """Write atomically: a crash leaves either the old or the new manifest"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w") as out:
+                out.write(self.model_dump_json())
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+class ReindexPlan(BaseModel):
+    """Files to (re)ingest or delete"""
+    added: List[str] = Field(default_factory=list)
+    changed: List[str] = Field(default_factory=list)
+    removed: List[str] = Field(default_factory=list)
+    unchanged: int = 0
+
+
+class ReindexReport(BaseModel):
+    """Outcome of a sync"""
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    errors: List[str] = Field(default_factory=list)
+    seconds: float = 0.0
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """Content hash of a file, read in blocks"""
+    with open(path, "rb") as source:
+        return content_hash(iter(lambda: source.read(_HASH_BLOCK), b""))
+
+
+class Reindexer:
+    """Keep an index in sync with a directory, re-ingesting only what changed.
+
+    A manifest records each file's mtime, size and content hash plus the ids
+    its ingestion produced. `sync()` skips files whose mtime and size are
+    unchanged (without reading them), hashes the rest, deletes the previous
+    vectors of changed and removed files, and ingests added and changed ones.
+    The manifest is saved atomically every `checkpoint_every` files, so an
+    interrupted sync resumes where it stopped.
+
+    `ingest(source)` should return an IngestionResult or a storage response;
+    `delete(entry)` gets the ManifestEntry being replaced or removed. Use
+    `Reindexer.for_storage()` to route both through a storage handler and its
+    `on_delete` hook.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        manifest_path: Union[str, Path],
+        ingest: Callable[[IngestSource], Awaitable[Any]],
+        delete: Optional[Callable[[ManifestEntry], Awaitable[Any]]] = None,
+        patterns: Iterable[str] = ("**/*",),
+        concurrency: int = 4,
+        checkpoint_every: int = 50
+    ):
+        self.root = Path(root)
+        self.manifest_path = Path(manifest_path)
+        self.ingest = ingest
+        self.delete = delete
+        self.patterns = list(patterns)
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.manifest = IndexManifest.load(self.manifest_path)
+
+    @classmethod
+    def for_storage(cls, storage: Any, label: str, root: Union[str, Path], manifest_path: Union[str, Path], **kwargs) -> "Reindexer":
+        """Ingest through a storage handler and delete through its `on_delete` hook.
+
+        The delete hook gets a StorageRequest with `action="delete"`, the
+        stored `file_id`, and the file's `path` and `chunk_ids` in metadata.
+        """
+        async def ingest(source: IngestSource):
+            handler = storage.get_task(label)
+            if handler is None:
+                raise ValueError(f"No storage handler found for {label}")
+            return await handler(StorageRequest(
+                action="upload",
+                content=source.read(),
+                filename=source.filename,
+                model=label,
+                metadata=source.metadata
+            ))
+
+        async def delete(entry: ManifestEntry):
+            await storage.execute_delete(label, StorageRequest(
+                action="delete",
+                file_id=entry.file_id,
+                model=label,
+                metadata={"path": entry.path, "chunk_ids": entry.chunk_ids}
+            ))
+
+        return cls(root, manifest_path, ingest, delete, **kwargs)
+
+    def _files(self) -> Dict[str, Path]:
+        files = {}
+        for pattern in self.patterns:
+            for path in self.root.glob(pattern):
+                if path.is_file() and path.resolve() != self.manifest_path.resolve():
+                    files[path.relative_to(self.root).as_posix()] = path
+        return files
+
+    def plan(self) -> ReindexPlan:
+        """Compare the directory with the manifest (hashing only files whose stat changed)"""
+        plan = ReindexPlan()
+        files = self._files()
+        for name, path in sorted(files.items()):
+            stat = path.stat()
+            entry = self.manifest.files.get(name)
+            if entry is None:
+                plan.added.append(name)
+            elif entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                plan.unchanged += 1
+            elif file_hash(path) == entry.hash:
+                # Touched but identical; remember the new stat so it isn't hashed again
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                plan.unchanged += 1
+            else:
+                plan.changed.append(name)
+        plan.removed = sorted(set(self.manifest.files) - set(files))
+        return plan
+
+    async def _index_file(self, name: str) -> ManifestEntry:
+        path = self.root / name
+        stat = path.stat()
+        digest = await asyncio.to_thread(file_hash, path)
+        result = await self.ingest(IngestSource(
+            filename=path.name,
+            path=str(path),
+            metadata={"path": name, "content_hash": digest}
+        ))
+        entry = ManifestEntry(path=name, mtime_ns=stat.st_mtime_ns, size=stat.st_size, hash=digest)
+        if isinstance(result, IngestionResult):
+            entry.chunk_ids = result.chunk_ids
+        elif result is not None:
+            file_id = getattr(result, "file_id", None) or getattr(result, "id", None)
+            entry.file_id = str(file_id) if file_id is not None else None
+            entry.chunk_ids = list((getattr(result, "metadata", None) or {}).get("chunk_ids", []))
+        return entry
+
+    async def sync(self) -> ReindexReport:
+        """Apply the plan: delete stale vectors, ingest new/changed files, save the manifest"""
+        started = time.perf_counter()
+        # Stat-ing and hashing the tree is blocking I/O
+        plan = await asyncio.to_thread(self.plan)
+        report = ReindexReport(unchanged=plan.unchanged)
+        done = 0
+
+        def checkpoint():
+            nonlocal done
+            done += 1
+            report_progress("reindex", files_done=done, files_total=len(plan.added) + len(plan.changed) + len(plan.removed))
+            if done % self.checkpoint_every == 0:
+                self.manifest.save(self.manifest_path)
+
+        for name in plan.removed:
+            try:
+                if self.delete:
+                    await self.delete(self.manifest.files[name])
+                del self.manifest.files[name]
+                report.removed += 1
+            except Exception as e:
+                report.errors.append(f"{name}: {e}")
+                logger.error(f"Failed to remove {name} from the index: {e}")
+            checkpoint()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def reindex(name: str, changed: bool):
+            async with semaphore:
+                try:
+                    if changed and self.delete:
+                        await self.delete(self.manifest.files[name])
+                    self.manifest.files[name] = await self._index_file(name)
+                    if changed:
+                        report.changed += 1
+                    else:
+                        report.added += 1
+                except Exception as e:
+                    report.errors.append(f"{name}: {e}")
+                    logger.error(f"Failed to index {name}: {e}")
+                checkpoint()
+
+        await asyncio.gather(
+            *(reindex(name, False) for name in plan.added),
+            *(reindex(name, True) for name in plan.changed)
+        )
+        self.manifest.save(self.manifest_path)
+        report.seconds = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"Reindexed {self.root}: {report.added} added, {report.changed} changed, "
+            f"{report.removed} removed, {report.unchanged} unchanged in {report.seconds}s"
+        )
+        return report
@@ -0,0 +1,212 @@
+from typing import Any, Dict, List, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .schema import SourceNode
+from .dedup import chunk_hash
+import asyncio
+import inspect
+import time
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_default_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    """Shared, bounded thread pool for sync retrieval.
+
+    Separate from the event loop's default executor so slow vector searches
+    can't starve `run_in_threadpool` calls elsewhere in the app. Size it with
+    `WHISK_RETRIEVAL_WORKERS`.
+    """
+    global _default_executor
+    with _executor_lock:
+        if _default_executor is None:
+            workers = int(os.getenv("WHISK_RETRIEVAL_WORKERS", min(8, (os.cpu_count() or 1) + 4)))
+            _default_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisk-retrieval")
+        return _default_executor
+
+
+class AsyncRetriever:
+    """Awaitable wrapper around a retriever that never blocks the event loop.
+
+    Uses the retriever's own `aretrieve` coroutine when it has one (and
+    `prefer_native` is set), otherwise runs `retrieve` in a bounded thread
+    pool. Other attributes (`add_texts`, `similarity_top_k`, ...) are passed
+    through, so the wrapper can be registered in place of the retriever:
+
+        kitchen.register_dependency(
+            DependencyType.RETRIEVER,
+            AsyncRetriever.from_dependency(index, similarity_top_k=2)
+        )
+
+        @kitchen.chat.handler("chat.rag", DependencyType.RETRIEVER)
+        async def rag_handler(chat: ChatInput, retriever):
+            nodes = await retriever.aretrieve(chat.messages[-1].content)
+    """
+
+    def __init__(self, retriever: Any, executor: Optional[ThreadPoolExecutor] = None, prefer_native: bool = True):
+        self.retriever = retriever
+        self.executor = executor
+        self.prefer_native = prefer_native
+
+    @classmethod
+    def from_dependency(cls, dependency: Any, similarity_top_k: int = 2, **kwargs) -> "AsyncRetriever":
+        """Wrap a retriever, or a vector store/index that has `as_retriever()`"""
+        if isinstance(dependency, cls):
+            return dependency
+        if not hasattr(dependency, "retrieve") and hasattr(dependency, "as_retriever"):
+            dependency = dependency.as_retriever(similarity_top_k=similarity_top_k)
+        return cls(dependency, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.retriever, name)
+
+    def retrieve(self, query: Any, **kwargs) -> List[Any]:
+        """Blocking retrieval, for sync callers"""
+        return self.retriever.retrieve(query, **kwargs)
+
+    async def aretrieve(self, query: Any, **kwargs) -> List[Any]:
+        """Retrieve without blocking the event loop"""
+        native = getattr(self.retriever, "aretrieve", None)
+        if self.prefer_native and native is not None and inspect.iscoroutinefunction(native):
+            return await native(query, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor or get_retrieval_executor(),
+            partial(self.retriever.retrieve, query, **kwargs)
+        )
+
+
+async def aretrieve(retriever: Any, query: Any, **kwargs) -> List[Any]:
+    """Retrieve from any retriever (or vector store) without blocking the event loop"""
+    return await AsyncRetriever.from_dependency(retriever).aretrieve(query, **kwargs)
+
+
+def to_source_node(hit: Any) -> SourceNode:
+    """Convert a retrieval hit (NodeWithScore, VectorHit, SourceNode) to a SourceNode"""
+    if isinstance(hit, SourceNode):
+        # Own the metadata dict: fusion annotates it with "sources"
+        return hit.model_copy(update={"metadata": dict(hit.metadata or {})})
+    node = getattr(hit, "node", hit)
+    text = getattr(node, "text", None)
+    if text is None and hasattr(node, "get_content"):
+        text = node.get_content()
+    return SourceNode(
+        text=text or "",
+        metadata=dict(getattr(node, "metadata", None) or {}),
+        score=getattr(hit, "score", None)
+    )
+
+
+def _node_key(hit: Any, source: SourceNode) -> str:
+    """Identity used to merge the same chunk returned by several sources"""
+    node = getattr(hit, "node", hit)
+    node_id = getattr(node, "node_id", None) or getattr(node, "id", None)
+    return str(node_id) if node_id else chunk_hash(source.text)
+
+
+class FanOutRetriever:
+    """Query several retrievers concurrently and fuse their results.
+
+    Each source gets its own timeout; sources that time out or fail are
+    logged and left out, so one slow index can't stall the response and the
+    total latency is roughly the slowest source rather than the sum.
+
+    Fusion is either reciprocal-rank fusion (`"rrf"`, score = sum of
+    `weight / (rrf_k + rank)`) or `"score"`, which min-max normalizes each
+    source's scores and sums them. Fused nodes carry the contributing source
+    names in `metadata["sources"]`.
+
+        retriever = FanOutRetriever(
+            {"lyft": lyft_index, "uber": uber_index},
+            similarity_top_k=4,
+            timeout=2.0
+        )
+        nodes = await retriever.aretrieve(question)
+    """
+
+    def __init__(
+        self,
+        retrievers: Dict[str, Any],
+        similarity_top_k: int = 4,
+        timeout: Optional[float] = 5.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        fusion: Literal["rrf", "score"] = "rrf",
+        rrf_k: int = 60,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        if fusion not in ("rrf", "score"):
+            raise ValueError("fusion must be 'rrf' or 'score'")
+        self.retrievers = {
+            name: AsyncRetriever.from_dependency(retriever, similarity_top_k=similarity_top_k)
+            for name, retriever in retrievers.items()
+        }
+        self.similarity_top_k = similarity_top_k
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.weights = weights or {}
+
+    async def _query_source(self, name: str, retriever: AsyncRetriever, query: Any) -> List[Any]:
+        started = time.perf_counter()
+        try:
+            hits = await asyncio.wait_for(retriever.aretrieve(query), self.timeouts.get(name, self.timeout))
+        except asyncio.TimeoutError:
+            logger.warning(f"Retriever {name} timed out after {time.perf_counter() - started:.3f}s")
+            return []
+        except Exception as e:
+            logger.error(f"Retriever {name} failed: {e}")
+            return []
+        logger.debug(f"Retriever {name} returned {len(hits)} nodes in {time.perf_counter() - started:.3f}s")
+        return hits
+
+    async def aretrieve_by_source(self, query: Any) -> Dict[str, List[Any]]:
+        """Raw hits from every source, queried concurrently"""
+        names = list(self.retrievers)
+        results = await asyncio.gather(*(
+            self._query_source(name, self.retrievers[name], query) for name in names
+        ))
+        return dict(zip(names, results))
+
+    async def aretrieve(self, query: Any) -> List[SourceNode]:
+        """Fan out, fuse and return the top `similarity_top_k` nodes"""
+        return self.fuse(await self.aretrieve_by_source(query))
+
+    def retrieve(self, query: Any) -> List[SourceNode]:
+        """Blocking variant for sync callers (must not be called from a running loop)"""
+        return asyncio.run(self.aretrieve(query))
+
+    def fuse(self, results: Dict[str, List[Any]]) -> List[SourceNode]:
+        """Merge per-source hits into one ranked SourceNode list"""
+        fused: Dict[str, SourceNode] = {}
+        scores: Dict[str, float] = {}
+        for name, hits in results.items():
+            weight = self.weights.get(name, 1.0)
+            nodes = [to_source_node(hit) for hit in hits]
+            if self.fusion == "score":
+                raw = [node.score or 0.0 for node in nodes]
+                low, high = (min(raw), max(raw)) if raw else (0.0, 0.0)
+                contributions = [
+                    weight * ((value - low) / (high - low) if high > low else 1.0)
+                    for value in raw
+                ]
+            else:
+                contributions = [weight / (self.rrf_k + rank) for rank in range(1, len(nodes) + 1)]
+
+            for hit, node, contribution in zip(hits, nodes, contributions):
+                key = _node_key(hit, node)
+                if key not in fused:
+                    node.metadata["sources"] = []
+                    fused[key] = node
+                    scores[key] = 0.0
+                fused[key].metadata["sources"].append(name)
+                scores[key] += contribution
+
+        ranked = sorted(fused, key=lambda key: scores[key], reverse=True)[:self.similarity_top_k]
+        return [fused[key].model_copy(update={"score": scores[key]}) for key in ranked]
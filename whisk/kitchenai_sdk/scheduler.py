@@ -0,0 +1,333 @@
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple, Union
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import StrEnum
+from pydantic import BaseModel
+import asyncio
+import inspect
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TaskClass(StrEnum):
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    BACKGROUND = "background"
+
+
+# Share of contended slots each class gets
+DEFAULT_WEIGHTS: Dict[TaskClass, float] = {
+    TaskClass.INTERACTIVE: 8,
+    TaskClass.BATCH: 2,
+    TaskClass.BACKGROUND: 1,
+}
+
+# Class by taxonomy, unless assigned otherwise
+DEFAULT_CLASSES: Dict[str, TaskClass] = {
+    "chat": TaskClass.INTERACTIVE,
+    "query": TaskClass.INTERACTIVE,
+    "agent": TaskClass.INTERACTIVE,
+    "embeddings": TaskClass.BATCH,
+    "storage": TaskClass.BATCH,
+}
+
+# The class of the work running in the current task, for pool() calls inside handlers
+_current_class: ContextVar[Optional[TaskClass]] = ContextVar("whisk_task_class", default=None)
+
+
+class ClassStats(BaseModel):
+    """Counters for one class in one pool"""
+    admitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    running: int = 0
+    queued: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    busy_seconds: float = 0.0
+
+
+class WeightedPool:
+    """A fixed number of slots shared between task classes by weight.
+
+    While slots are free everyone runs. Once they are contended, waiters are
+    granted slots by stride scheduling: each class advances by 1/weight per
+    grant and the class furthest behind goes next, so an interactive request
+    waits behind at most a few bulk ones however long the bulk queue is.
+    Weights only order waiters, so `reserved` slots are kept for interactive
+    work: batch and background tasks together never hold more than
+    `size - reserved`, and long bulk jobs can't occupy the whole pool.
+    `caps` optionally bound how many slots a class may hold at once.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        weights: Optional[Dict[TaskClass, float]] = None,
+        caps: Optional[Dict[TaskClass, int]] = None,
+        reserved: int = 0
+    ):
+        self.size = size
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.caps = dict(caps or {})
+        self.reserved = min(reserved, size - 1) if size > 1 else 0
+        self.active = 0
+        self.stats: Dict[TaskClass, ClassStats] = {task_class: ClassStats() for task_class in TaskClass}
+        self._queues: Dict[TaskClass, Deque[asyncio.Future]] = {task_class: deque() for task_class in TaskClass}
+        self._pass: Dict[TaskClass, float] = {task_class: 0.0 for task_class in TaskClass}
+        self._virtual_time = 0.0
+        # (finished waiting at, seconds waited) for recent grants, for load reports
+        self.recent_waits: Deque[Tuple[float, float]] = deque(maxlen=1024)
+
+    def _eligible(self, task_class: TaskClass) -> bool:
+        if not self._queues[task_class]:
+            return False
+        cap = self.caps.get(task_class)
+        if cap is not None and self.stats[task_class].running >= cap:
+            return False
+        if task_class != TaskClass.INTERACTIVE:
+            bulk = self.active - self.stats[TaskClass.INTERACTIVE].running
+            return bulk < self.size - self.reserved
+        return True
+
+    def _dispatch(self):
+        while self.active < self.size:
+            candidates = [task_class for task_class in TaskClass if self._eligible(task_class)]
+            if not candidates:
+                return
+            task_class = min(candidates, key=lambda candidate: self._pass[candidate])
+            waiter = self._queues[task_class].popleft()
+            self.stats[task_class].queued -= 1
+            if waiter.done():
+                continue
+            self._virtual_time = self._pass[task_class]
+            self._pass[task_class] += 1 / self.weights[task_class]
+            self.active += 1
+            self.stats[task_class].running += 1
+            waiter.set_result(None)
+
+    async def acquire(self, task_class: TaskClass) -> float:
+        """Wait for a slot; returns the seconds spent waiting"""
+        started = time.monotonic()
+        queue = self._queues[task_class]
+        if not queue:
+            # A class that was idle rejoins at the current virtual time instead of catching up
+            self._pass[task_class] = max(self._pass[task_class], self._virtual_time)
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        self.stats[task_class].queued += 1
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(task_class)
+            elif waiter in queue:
+                queue.remove(waiter)
+                self.stats[task_class].queued -= 1
+            raise
+        waited = time.monotonic() - started
+        self.recent_waits.append((time.monotonic(), waited))
+        stats = self.stats[task_class]
+        stats.admitted += 1
+        stats.wait_seconds += waited
+        stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+        return waited
+
+    def release(self, task_class: TaskClass, busy: float = 0.0, failed: bool = False):
+        self.active -= 1
+        stats = self.stats[task_class]
+        stats.running -= 1
+        stats.busy_seconds += busy
+        if failed:
+            stats.failed += 1
+        else:
+            stats.completed += 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, task_class: TaskClass) -> AsyncIterator[None]:
+        await self.acquire(task_class)
+        started = time.monotonic()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.release(task_class, time.monotonic() - started, failed)
+
+
+class PriorityScheduler:
+    """Prioritizes interactive traffic over bulk work in one worker.
+
+    Handlers are classed as interactive, batch or background (by taxonomy,
+    or per handler with `assign()`) and every dispatched task holds a slot of
+    a shared pool of `concurrency`, granted to contending classes by weight.
+    Half the slots (`reserved`) are kept for interactive work by default, so
+    a pool full of long ingest jobs still serves chat and query requests.
+    Dependency clients that only handle so many concurrent calls (an LLM, an
+    embedding model) can get their own weighted pools with `add_pool()`;
+    handlers borrow a slot with `async with kitchen.scheduler.pool(name)`,
+    at the priority of the request they are serving.
+
+        kitchen.scheduler.assign("storage", "background", label="reindex")
+        kitchen.scheduler.add_pool(DependencyType.LLM, 4)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 64,
+        weights: Optional[Dict[Union[TaskClass, str], float]] = None,
+        caps: Optional[Dict[Union[TaskClass, str], int]] = None,
+        reserved: Optional[int] = None
+    ):
+        self.weights = {TaskClass(key): value for key, value in (weights or {}).items()}
+        self.tasks = WeightedPool(
+            concurrency,
+            self.weights,
+            {TaskClass(key): value for key, value in (caps or {}).items()},
+            reserved=concurrency // 2 if reserved is None else reserved
+        )
+        self.pools: Dict[str, WeightedPool] = {}
+        self._classes: Dict[Tuple[str, Optional[str]], TaskClass] = {}
+
+    def assign(self, taxonomy: str, task_class: Union[TaskClass, str], label: Optional[str] = None):
+        """Set the class for a taxonomy, or for one of its handlers"""
+        self._classes[(taxonomy, label)] = TaskClass(task_class)
+
+    def classify(self, taxonomy: str, label: Optional[str] = None) -> TaskClass:
+        return (
+            self._classes.get((taxonomy, label))
+            or self._classes.get((taxonomy, None))
+            or DEFAULT_CLASSES.get(taxonomy, TaskClass.BATCH)
+        )
+
+    def add_pool(
+        self,
+        name: Any,
+        size: int,
+        weights: Optional[Dict[Union[TaskClass, str], float]] = None,
+        reserved: Optional[int] = None
+    ) -> WeightedPool:
+        """Create a weighted pool of `size` slots, e.g. for a dependency client
+
+        Like the task pool, half its slots are reserved for interactive work
+        unless `reserved` says otherwise.
+        """
+        weights = {TaskClass(key): value for key, value in (weights or {}).items()}
+        pool = self.pools[_pool_key(name)] = WeightedPool(
+            size, {**self.weights, **weights}, reserved=size // 2 if reserved is None else reserved
+        )
+        return pool
+
+    @asynccontextmanager
+    async def pool(self, name: Any, task_class: Optional[Union[TaskClass, str]] = None) -> AsyncIterator[None]:
+        """Hold a slot of a named pool (a no-op if no such pool was added)"""
+        pool = self.pools.get(_pool_key(name))
+        if pool is None:
+            yield
+            return
+        task_class = TaskClass(task_class) if task_class else (_current_class.get() or TaskClass.INTERACTIVE)
+        async with pool.slot(task_class):
+            yield
+
+    @asynccontextmanager
+    async def slot(self, taxonomy: str, label: Optional[str] = None) -> AsyncIterator[TaskClass]:
+        """Run a block as a task of the given taxonomy and handler"""
+        task_class = self.classify(taxonomy, label)
+        token = _current_class.set(task_class)
+        try:
+            async with self.tasks.slot(task_class):
+                yield task_class
+        finally:
+            _current_class.reset(token)
+
+    def wrap(self, taxonomy: str, label: str, task: Callable) -> Callable:
+        """A version of `task` that waits for its slot before running.
+
+        When the task returns an async generator (a streaming chat response),
+        the slot is held until the stream is exhausted or closed.
+        """
+        async def scheduled(*args, **kwargs):
+            task_class = self.classify(taxonomy, label)
+            token = _current_class.set(task_class)
+            await self.tasks.acquire(task_class)
+            started = time.monotonic()
+            try:
+                result = task(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+            except BaseException:
+                self.tasks.release(task_class, time.monotonic() - started, failed=True)
+                raise
+            finally:
+                _current_class.reset(token)
+            if hasattr(result, "__aiter__"):
+                return _HeldStream(result, self.tasks, task_class, started)
+            self.tasks.release(task_class, time.monotonic() - started)
+            return result
+        scheduled.__wrapped__ = task
+        return scheduled
+
+    def metrics(self) -> Dict[str, Dict[str, ClassStats]]:
+        """Per-class counters for the task pool ("tasks") and each named pool"""
+        pools = {"tasks": self.tasks, **self.pools}
+        return {
+            name: {task_class.value: stats.model_copy() for task_class, stats in pool.stats.items()}
+            for name, pool in pools.items()
+        }
+
+
+class _HeldStream:
+    """Async iterator that keeps a pool slot until the wrapped stream ends.
+
+    The slot is also freed if the stream is closed or dropped before being
+    iterated (e.g. the client disconnected before the first chunk).
+    """
+
+    def __init__(self, stream: Any, pool: WeightedPool, task_class: TaskClass, started: float):
+        self._stream = stream.__aiter__()
+        self._pool = pool
+        self._task_class = task_class
+        self._started = started
+        self._released = False
+
+    def _release(self, failed: bool = False):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._task_class, time.monotonic() - self._started, failed)
+
+    def __aiter__(self) -> "_HeldStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        token = _current_class.set(self._task_class)
+        try:
+            return await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._release()
+            raise
+        except BaseException:
+            self._release(failed=True)
+            raise
+        finally:
+            _current_class.reset(token)
+
+    async def aclose(self):
+        try:
+            if hasattr(self._stream, "aclose"):
+                await self._stream.aclose()
+        finally:
+            self._release()
+
+    def __del__(self):
+        self._release()
+
+
+def _pool_key(name: Any) -> str:
+    return name.value if hasattr(name, "value") else str(name)
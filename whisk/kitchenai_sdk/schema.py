@@ -167,6 +167,7 @@ class WhiskStorageStatus(StrEnum):
     ERROR = "error"
     COMPLETE = "complete"
     ACK = "ack"
+    PROGRESS = "progress"
 
 class WhiskStorageSchema(BaseModel):
     id: int
@@ -194,6 +195,7 @@ class WhiskStorageResponseSchema(BaseModel):
     deleted: Optional[bool] = None
     created_at: Optional[int] = None
     status: Optional[str] = None
+    token_counts: Optional[TokenCountSchema] = None
 
     @classmethod
     def with_token_counts(cls, token_counts: TokenCountSchema):
@@ -304,8 +306,9 @@ class ChatInput(BaseModel):
             elif isinstance(msg, Message):
                 messages.append(msg)
             elif hasattr(msg, 'role') and hasattr(msg, 'content'):
-                # Handle http_schema.Message and other message-like objects
-                messages.append(Message(
+                # Handle http_schema.Message and other message-like objects;
+                # the request model already validated them, so skip re-validation
+                messages.append(Message.model_construct(
                     role=msg.role,
                     content=msg.content,
                     name=getattr(msg, 'name', None)
@@ -335,6 +338,7 @@ class ChatResponse(BaseModel):
     role: str = "assistant"
     name: Optional[str] = None
     sources: Optional[List[SourceNode]] = None  # Added for RAG responses
+    usage: Optional[Dict[str, int]] = None  # LLM-reported usage; counted locally when None
 
     def to_openai_response(self, model: str = "default") -> Dict[str, Any]:
         """Convert to OpenAI format"""
@@ -407,12 +411,18 @@ class StorageRequest(BaseModel):
     purpose: Optional[str] = None
     model: Optional[str] = None  # Add model field for handler routing
     metadata: Optional[Dict[str, Any]] = None
+    # Pagination for action="list": return at most `limit` files created
+    # after the `after` cursor, ordered by created_at ("asc" or "desc")
+    limit: Optional[int] = None
+    after: Optional[str] = None
+    order: Optional[str] = None
 
 class StorageResponse(BaseModel):
     """Storage task response"""
     file_id: str
     filename: str
     content: Optional[bytes] = None
+    path: Optional[str] = None  # Local file path, served without loading into memory
     created_at: int = Field(default_factory=lambda: int(time.time()))
     metadata: Optional[Dict[str, Any]] = None
     deleted: Optional[bool] = None
\ No newline at end of file
@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Literal, Optional, Union
+from pathlib import Path
+from pydantic import BaseModel, Field
+import json
+import os
+import shutil
+import tempfile
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("Please install numpy to share dependencies between workers: pip install kitchenai-whisk[vector]")
+
+logger = logging.getLogger(__name__)
+
+# Set by the parent process; worker processes inherit it and attach instead of building
+SHARED_DEPENDENCIES_ENV = "WHISK_SHARED_DEPENDENCIES"
+
+
+class SharedArraySpec(BaseModel):
+    """Where a published array lives and how to view it"""
+    backend: Literal["mmap", "shm"]
+    location: str = Field(description="File path for mmap, segment name for shm")
+    shape: List[int]
+    dtype: str
+
+
+class SharedDependencySpec(BaseModel):
+    """The arrays published for one dependency"""
+    arrays: Dict[str, SharedArraySpec]
+    single: bool = Field(False, description="The factory returned one array rather than a dict")
+
+
+def _default_directory() -> str:
+    # tmpfs keeps mmap'd files in RAM; fall back to the regular temp dir elsewhere
+    return "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+
+
+def _attach_shm(name: str):
+    from multiprocessing import shared_memory
+    try:
+        # Python 3.13+: don't let this process's resource tracker unlink the parent's segment
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Older versions: workers share the parent's resource tracker, so attaching
+        # only re-registers a name the parent already owns
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedArrays:
+    """Arrays published by a parent process for zero-copy use by its workers.
+
+    `mmap` writes each array as a `.npy` file (under /dev/shm when available)
+    that workers memory-map read-only; `shm` copies it into a
+    `multiprocessing.shared_memory` segment. Either way every worker maps the
+    same physical pages. Call `close()` after the workers exit to remove them.
+    """
+
+    def __init__(self, backend: str = "mmap", directory: Optional[str] = None):
+        if backend not in ("mmap", "shm"):
+            raise ValueError("backend must be 'mmap' or 'shm'")
+        self.backend = backend
+        self.directory = Path(tempfile.mkdtemp(prefix="whisk-shared-", dir=directory or _default_directory())) if backend == "mmap" else None
+        self.specs: Dict[str, SharedDependencySpec] = {}
+        self._segments: List[Any] = []
+
+    def publish(self, key: str, arrays: Union["np.ndarray", Dict[str, "np.ndarray"]]) -> SharedDependencySpec:
+        """Copy arrays into shared storage under a dependency key"""
+        single = isinstance(arrays, np.ndarray)
+        named = {"array": arrays} if single else arrays
+        specs = {}
+        for name, array in named.items():
+            array = np.ascontiguousarray(array)
+            if self.backend == "mmap":
+                path = self.directory / f"{key}.{name}.npy"
+                np.save(path, array)
+                location = str(path)
+            else:
+                from multiprocessing import shared_memory
+                segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+                self._segments.append(segment)
+                location = segment.name
+            specs[name] = SharedArraySpec(backend=self.backend, location=location, shape=list(array.shape), dtype=array.dtype.str)
+        self.specs[key] = SharedDependencySpec(arrays=specs, single=single)
+        logger.info(f"Published shared dependency {key} ({sum(a.nbytes for a in named.values()) / 1e6:.1f} MB, {self.backend})")
+        return self.specs[key]
+
+    def export(self):
+        """Make the published specs visible to child processes started after this call"""
+        os.environ[SHARED_DEPENDENCIES_ENV] = json.dumps({key: spec.model_dump() for key, spec in self.specs.items()})
+
+    def close(self):
+        """Remove the shared copies (workers must have exited)"""
+        os.environ.pop(SHARED_DEPENDENCIES_ENV, None)
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = []
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Attached shm segments must outlive the arrays viewing them
+_attached_segments: List[Any] = []
+
+
+def attach_array(spec: SharedArraySpec) -> "np.ndarray":
+    """Read-only, zero-copy view of a published array"""
+    if spec.backend == "mmap":
+        return np.load(spec.location, mmap_mode="r")
+    segment = _attach_shm(spec.location)
+    _attached_segments.append(segment)
+    array = np.ndarray(tuple(spec.shape), dtype=np.dtype(spec.dtype), buffer=segment.buf)
+    array.flags.writeable = False
+    return array
+
+
+def published_dependency(key: str) -> Optional[SharedDependencySpec]:
+    """The spec a parent process exported for `key`, if any"""
+    raw = os.environ.get(SHARED_DEPENDENCIES_ENV)
+    if not raw:
+        return None
+    spec = json.loads(raw).get(key)
+    return SharedDependencySpec(**spec) if spec else None
+
+
+def attach_dependency(spec: SharedDependencySpec) -> Union["np.ndarray", Dict[str, "np.ndarray"]]:
+    arrays = {name: attach_array(array_spec) for name, array_spec in spec.arrays.items()}
+    return arrays["array"] if spec.single else arrays
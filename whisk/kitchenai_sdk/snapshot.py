@@ -0,0 +1,149 @@
+from typing import Callable, Iterable, Iterator, Optional, Union
+from contextlib import contextmanager
+from pathlib import Path
+from pydantic import BaseModel, Field
+from .dedup import content_hash
+from .reindex import file_hash
+from .vector_store import NumpyVectorStore
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent first builds are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotInfo(BaseModel):
+    """What a snapshot was built from, stored next to its vectors"""
+    corpus_hash: str
+    embed_model: str
+    dim: Optional[int] = None
+    metric: str = "cosine"
+    count: int = 0
+    created_at: int = Field(default_factory=lambda: int(time.time()))
+
+
+def corpus_hash(
+    texts: Iterable[Union[str, bytes]] = (),
+    paths: Iterable[Union[str, os.PathLike]] = ()
+) -> str:
+    """Order-independent hash of a corpus given as texts/bytes and/or file paths.
+
+    Strings in `texts` are always hashed as text; pass files via `paths`,
+    which hashes their name and contents.
+    """
+    digests = []
+    for text in texts:
+        if isinstance(text, os.PathLike):
+            raise TypeError(f"corpus_hash got a path in texts ({text}); pass files as paths=")
+        digests.append(content_hash(text.encode("utf-8") if isinstance(text, str) else text))
+    for path in paths:
+        digests.append(f"{Path(path).name}:{file_hash(path)}")
+    return content_hash("\n".join(sorted(digests)).encode("utf-8"))
+
+
+class SnapshotStore:
+    """Built vector indexes saved on disk, keyed by corpus hash and embedding model.
+
+    A snapshot is a NumpyVectorStore directory holding one `.npy` segment plus
+    its node metadata and a `snapshot.json`. Loading memory-maps the vectors
+    read-only, so it takes milliseconds and every worker process shares the
+    same pages instead of re-embedding the corpus:
+
+        snapshots = SnapshotStore(".whisk/snapshots")
+        index = snapshots.load_or_build(corpus_hash(paths=paths), "text-embedding-3-small", build, embed_fn=embed)
+
+    Snapshots are written to a temporary directory and renamed into place,
+    and `load_or_build` holds a file lock while building, so workers started
+    together build the index once and the rest load it.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    @staticmethod
+    def key(corpus_hash: str, embed_model: str) -> str:
+        return hashlib.blake2b(f"{embed_model}\0{corpus_hash}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def path(self, corpus_hash: str, embed_model: str) -> Path:
+        return self.root / self.key(corpus_hash, embed_model)
+
+    def info(self, corpus_hash: str, embed_model: str) -> Optional[SnapshotInfo]:
+        """Metadata of a snapshot, or None if it doesn't exist"""
+        info_path = self.path(corpus_hash, embed_model) / "snapshot.json"
+        if not info_path.exists():
+            return None
+        return SnapshotInfo.model_validate_json(info_path.read_text())
+
+    def load(self, corpus_hash: str, embed_model: str, **kwargs) -> Optional[NumpyVectorStore]:
+        """Open a snapshot read-only; kwargs (e.g. `embed_fn`) go to NumpyVectorStore"""
+        if self.info(corpus_hash, embed_model) is None:
+            return None
+        started = time.perf_counter()
+        store = NumpyVectorStore(path=str(self.path(corpus_hash, embed_model)), read_only=True, **kwargs)
+        logger.info(f"Loaded snapshot {self.key(corpus_hash, embed_model)} ({len(store)} vectors) in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return store
+
+    def save(self, store: NumpyVectorStore, corpus_hash: str, embed_model: str) -> Path:
+        """Save a built store; if another process saved the same snapshot first, keep theirs"""
+        target = self.path(corpus_hash, embed_model)
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=self.root))
+        try:
+            store.save(str(tmp_dir))
+            info = SnapshotInfo(corpus_hash=corpus_hash, embed_model=embed_model, dim=store.dim, metric=store.metric, count=len(store))
+            # Written last: a snapshot without snapshot.json is never loaded
+            (tmp_dir / "snapshot.json").write_text(info.model_dump_json())
+            os.rename(tmp_dir, target)
+        except OSError:
+            if not (target / "snapshot.json").exists():
+                raise
+            logger.info(f"Snapshot {target.name} was saved by another process")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return target
+
+    def remove(self, corpus_hash: str, embed_model: str):
+        shutil.rmtree(self.path(corpus_hash, embed_model), ignore_errors=True)
+
+    @contextmanager
+    def _build_lock(self, key: str) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / f".{key}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load_or_build(
+        self,
+        corpus_hash: str,
+        embed_model: str,
+        build: Callable[[], NumpyVectorStore],
+        **kwargs
+    ) -> NumpyVectorStore:
+        """Load the snapshot, building and saving it with `build()` the first time"""
+        store = self.load(corpus_hash, embed_model, **kwargs)
+        if store is not None:
+            return store
+        key = self.key(corpus_hash, embed_model)
+        with self._build_lock(key):
+            # Another worker may have built it while we waited for the lock
+            store = self.load(corpus_hash, embed_model, **kwargs)
+            if store is not None:
+                return store
+            started = time.perf_counter()
+            self.save(build(), corpus_hash, embed_model)
+            logger.info(f"Built snapshot {key} in {time.perf_counter() - started:.2f}s")
+        return self.load(corpus_hash, embed_model, **kwargs)
@@ -10,6 +10,7 @@ class AgentTask(KitchenAITask):
     def __init__(self, namespace: str, dependency_manager=None):
         super().__init__(namespace, dependency_manager)
         self.namespace = namespace
+        self.task_type = "agent"
 
     def handler(self, label: str, *dependencies: DependencyType):
         """Decorator for registering agent tasks with dependencies."""
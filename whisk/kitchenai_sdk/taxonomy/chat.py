@@ -1,8 +1,10 @@
 from typing import Dict, Any, Callable, Union, AsyncGenerator
 from functools import wraps
 from ..base import TaskRegistry
-from ..schema import ChatInput, ChatResponse, DependencyType
+from ..schema import ChatInput, ChatResponse, DependencyType, Message
 from ..http_schema import ChatCompletionResponse, ChatResponseMessage, ChatCompletionChoice
+from ..tokens import UsageTracker, get_token_counter, usage_dict
+from ..conversation import CONVERSATION_ID_KEY, ConversationStore
 import asyncio
 import time
 
@@ -12,9 +14,23 @@ class ChatTask(TaskRegistry):
     def __init__(self, namespace: str, manager=None):
         super().__init__(namespace, manager)
         self.task_type = "chat"
+        self.usage = UsageTracker()
+        # Replace with ConversationStore(path) to keep conversations across restarts
+        self.conversations = ConversationStore()
 
-    def handler(self, name: str, *dependencies: Union[DependencyType, str]):
-        """Decorator for simplified chat handlers"""
+    def handler(self, name: str, *dependencies: Union[DependencyType, str], conversation: bool = False):
+        """Decorator for simplified chat handlers
+
+        With `conversation=True`, history is kept server-side: clients send
+        `metadata={"conversation_id": ...}` with only the new turn, the
+        handler's ChatInput carries the full history, and the Conversation is
+        passed as the `conversation` keyword argument. The reply is stored
+        once the handler finishes and the id is returned in the response
+        metadata (a new id is assigned when none is given, or when a resent
+        history forks the conversation). Turns of one conversation run one
+        at a time; a streamed turn ends when its generator is exhausted or
+        closed.
+        """
         def decorator(func: Callable[[ChatInput], Union[ChatResponse, AsyncGenerator]]):
             @wraps(func)
             async def wrapper(request: Any):
@@ -24,123 +40,182 @@ class ChatTask(TaskRegistry):
                     for dep in dependencies:
                         dep_key = dep.value if hasattr(dep, 'value') else dep
                         if self._manager.has_dependency(dep):
-                            kwargs[dep_key] = self._manager.get_dependency(dep)
+                            kwargs[dep_key] = await self._manager.aget_dependency(dep)
                         else:
                             raise KeyError(f"Required dependency {dep} not found")
 
                 # Convert request to ChatInput
                 chat_input = ChatInput.from_request(request)
+
+                session = None
+                turn = None
+                conversation_id = (chat_input.metadata or {}).get(CONVERSATION_ID_KEY)
+                if conversation and conversation_id:
+                    # One turn at a time per conversation, from resolve() until the reply is stored
+                    turn = self.conversations.turn_lock(conversation_id)
+                    await turn.acquire()
+
+                def end_turn():
+                    nonlocal turn
+                    if turn is not None:
+                        turn.release()
+                        turn = None
+
+                # Streamed replies release the turn when their generator finishes
+                streaming = False
+                try:
+                    if conversation:
+                        session, new_messages = self.conversations.resolve(chat_input)
+                        kwargs["conversation"] = session
+
+                    def remember(reply: str):
+                        if session is not None:
+                            self.conversations.append(session, [*new_messages, Message(role="assistant", content=reply)])
+
+                    # Call handler - don't await yet
+                    response = func(chat_input, **kwargs)
+
+                    counter = get_token_counter()
+
+                    def prompt_tokens() -> int:
+                        return counter.count_messages(chat_input.messages, request.model)
+
+                    def completion_usage(content: str) -> dict:
+                        return usage_dict(prompt_tokens(), counter.count(content, request.model))
+
+                    def final_chunk(chunk_id: str, usage: dict, reply: str) -> dict:
+                        self.usage.record(name, usage)
+                        remember(reply)
+                        chunk = {
+                            "id": chunk_id,
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": request.model,
+                            "choices": [{
+                                "index": 0,
+                                "delta": {},
+                                "finish_reason": "stop"
+                            }],
+                            "usage": usage
+                        }
+                        if session is not None:
+                            chunk["metadata"] = {CONVERSATION_ID_KEY: session.id}
+                        return chunk
                 
-                # Call handler - don't await yet
-                response = func(chat_input, **kwargs)
-                
-                # Handle streaming responses
-                if request.stream:
-                    # For streaming, we want the async generator
-                    if hasattr(response, '__aiter__'):
-                        # Return async generator for streaming
-                        async def stream_generator():
-                            chunk_id = f"chatcmpl-{int(time.time())}"
-                            async for chunk in response:
-                                if isinstance(chunk, ChatResponse):
+                    # Handle streaming responses
+                    if request.stream:
+                        # For streaming, we want the async generator
+                        if hasattr(response, '__aiter__'):
+                            # Return async generator for streaming
+                            async def stream_generator():
+                                try:
+                                    chunk_id = f"chatcmpl-{int(time.time())}"
+                                    usage = counter.stream(request.model, prompt_tokens())
+                                    reported = None
+                                    reply = []
+                                    async for chunk in response:
+                                        if not isinstance(chunk, ChatResponse):
+                                            chunk = ChatResponse(content=str(chunk))
+                                        usage.add(chunk.content)
+                                        reported = chunk.usage or reported
+                                        if session is not None:
+                                            reply.append(chunk.content)
+                                        yield chunk.to_openai_chunk(chunk_id, model=request.model)
+                                    # Send final chunk, preferring usage reported by the LLM
+                                    yield final_chunk(chunk_id, reported or usage.finish(), "".join(reply))
+                                finally:
+                                    end_turn()
+                            streaming = True
+                            return stream_generator()
+                        else:
+                            # If it's a coroutine, await it and wrap in generator
+                            response = await response
+                            async def single_chunk_generator():
+                                try:
+                                    chunk_id = f"chatcmpl-{int(time.time())}"
+                                    chunk = response if isinstance(response, ChatResponse) else ChatResponse(content=str(response))
                                     yield chunk.to_openai_chunk(chunk_id, model=request.model)
-                                else:
-                                    yield ChatResponse(content=str(chunk)).to_openai_chunk(chunk_id, model=request.model)
-                            # Send final chunk
-                            yield {
-                                "id": chunk_id,
-                                "object": "chat.completion.chunk",
-                                "created": int(time.time()),
-                                "model": request.model,
-                                "choices": [{
-                                    "index": 0,
-                                    "delta": {},
-                                    "finish_reason": "stop"
-                                }]
-                            }
-                        return stream_generator()
-                    else:
-                        # If it's a coroutine, await it and wrap in generator
-                        response = await response
-                        async def single_chunk_generator():
-                            chunk_id = f"chatcmpl-{int(time.time())}"
-                            if isinstance(response, ChatResponse):
-                                yield response.to_openai_chunk(chunk_id, model=request.model)
-                            else:
-                                yield ChatResponse(content=str(response)).to_openai_chunk(chunk_id, model=request.model)
-                            # Send final chunk
-                            yield {
-                                "id": chunk_id,
-                                "object": "chat.completion.chunk",
-                                "created": int(time.time()),
-                                "model": request.model,
-                                "choices": [{
-                                    "index": 0,
-                                    "delta": {},
-                                    "finish_reason": "stop"
-                                }]
-                            }
-                        return single_chunk_generator()
+                                    # Send final chunk
+                                    yield final_chunk(chunk_id, chunk.usage or completion_usage(chunk.content), chunk.content)
+                                finally:
+                                    end_turn()
+                            streaming = True
+                            return single_chunk_generator()
                 
-                # For non-streaming, await if it's a coroutine
-                if asyncio.iscoroutine(response):
-                    response = await response
+                    # For non-streaming, await if it's a coroutine
+                    if asyncio.iscoroutine(response):
+                        response = await response
                 
-                # Handle non-streaming responses
-                if isinstance(response, ChatCompletionResponse):
-                    # Already in correct format
-                    return response
-                elif isinstance(response, ChatResponse):
-                    # Convert ChatResponse to ChatCompletionResponse
-                    return ChatCompletionResponse(
-                        model=request.model,
-                        choices=[
-                            ChatCompletionChoice(
-                                index=0,
-                                message=ChatResponseMessage(
-                                    role=response.role,
-                                    content=response.content,
-                                    name=response.name
-                                ),
-                                finish_reason="stop"
+                    # Handle non-streaming responses
+                    if isinstance(response, ChatCompletionResponse):
+                        # Already in correct format
+                        completion = response
+                    elif isinstance(response, ChatResponse):
+                        # Convert ChatResponse to ChatCompletionResponse
+                        completion = ChatCompletionResponse(
+                            model=request.model,
+                            choices=[
+                                ChatCompletionChoice(
+                                    index=0,
+                                    message=ChatResponseMessage(
+                                        role=response.role,
+                                        content=response.content,
+                                        name=response.name
+                                    ),
+                                    finish_reason="stop"
+                                )
+                            ],
+                            usage=response.usage,
+                            metadata={"sources": [s.model_dump() for s in response.sources]} if response.sources else None
+                        )
+                    elif isinstance(response, dict):
+                        # If it's a simple dict with just content, convert to proper format
+                        if "response" in response:
+                            completion = ChatCompletionResponse(
+                                model=request.model,
+                                choices=[
+                                    ChatCompletionChoice(
+                                        index=0,
+                                        message=ChatResponseMessage(
+                                            role="assistant",
+                                            content=response["response"]
+                                        ),
+                                        finish_reason="stop"
+                                    )
+                                ]
                             )
-                        ],
-                        metadata={"sources": [s.model_dump() for s in response.sources]} if response.sources else None
-                    )
-                elif isinstance(response, dict):
-                    # If it's a simple dict with just content, convert to proper format
-                    if "response" in response:
-                        return ChatCompletionResponse(
+                        else:
+                            # Otherwise try to convert dict to ChatCompletionResponse directly
+                            completion = ChatCompletionResponse(**response)
+                    else:
+                        # Convert any other response to ChatCompletionResponse
+                        completion = ChatCompletionResponse(
                             model=request.model,
                             choices=[
                                 ChatCompletionChoice(
                                     index=0,
                                     message=ChatResponseMessage(
                                         role="assistant",
-                                        content=response["response"]
+                                        content=str(response)
                                     ),
                                     finish_reason="stop"
                                 )
                             ]
                         )
-                    # Otherwise try to convert dict to ChatCompletionResponse directly
-                    return ChatCompletionResponse(**response)
-                else:
-                    # Convert any other response to ChatCompletionResponse
-                    return ChatCompletionResponse(
-                        model=request.model,
-                        choices=[
-                            ChatCompletionChoice(
-                                index=0,
-                                message=ChatResponseMessage(
-                                    role="assistant",
-                                    content=str(response)
-                                ),
-                                finish_reason="stop"
-                            )
-                        ]
-                    )
-                
+
+                    # Count tokens locally when the handler didn't report usage
+                    content = completion.choices[0].message.content if completion.choices else ""
+                    if completion.usage is None:
+                        completion.usage = completion_usage(content)
+                    self.usage.record(name, completion.usage)
+                    if session is not None:
+                        remember(content)
+                        completion.metadata = {**(completion.metadata or {}), CONVERSATION_ID_KEY: session.id}
+                    return completion
+                finally:
+                    if not streaming:
+                        end_turn()
+
             return self.register_task(name, wrapper)
         return decorator
 
@@ -5,6 +5,7 @@ class EmbedTask(KitchenAITask, KitchenAITaskHookMixin):
     def __init__(self, namespace: str, dependency_manager=None):
         super().__init__(namespace, dependency_manager)
         self.namespace = namespace
+        self.task_type = "embeddings"
 
     def handler(self, label: str, *dependencies: DependencyType):
         """Decorator for registering embed tasks with dependencies."""
@@ -7,6 +7,7 @@ from ..schema import DependencyType
 class QueryTask(KitchenAITask):
     def __init__(self, namespace: str, manager: DependencyManager):
         super().__init__(namespace, manager)
+        self.task_type = "query"
 
     def handler(self, label: str, *dependencies: DependencyType):
         """Decorator for registering query tasks with dependencies."""
@@ -26,7 +27,7 @@ class QueryTask(KitchenAITask):
                 # Inject requested dependencies
                 for dep in dependencies:
                     if self._manager and self._manager.has_dependency(dep):
-                        kwargs[dep] = self._manager.get_dependency(dep)
+                        kwargs[dep] = await self._manager.aget_dependency(dep)
                 return await func(*args, **kwargs)
             return wrapper
         return decorator
@@ -1,6 +1,15 @@
 from ..base import KitchenAITask, KitchenAITaskHookMixin
 import functools
-from ..schema import DependencyType, WhiskStorageResponseSchema
+from ..schema import DependencyType, WhiskStorageResponseSchema, StorageRequest
+from ..dedup import (
+    DedupIndex,
+    content_hash,
+    deleted_result_id,
+    is_error_response,
+    relink_response,
+    storage_content,
+)
+from ..ingestion import IngestionPipeline
 from typing import Dict, Any, Optional, Callable, List
 from functools import wraps
 
@@ -11,21 +20,72 @@ class StorageTask(KitchenAITask, KitchenAITaskHookMixin):
     def __init__(self, namespace: str, dependency_manager=None):
         KitchenAITask.__init__(self, namespace, dependency_manager)
         KitchenAITaskHookMixin.__init__(self)
+        self.task_type = "storage"
         self.handlers: Dict[str, Callable] = {}
         self.delete_handlers: Dict[str, Callable] = {}
+        # Pipelines used by handlers, closed with the app (see KitchenAIApp.close)
+        self.pipelines: List[IngestionPipeline] = []
+        # Replace with DedupIndex(path) to keep the index across restarts
+        self.dedup_index = DedupIndex()
+
+    def handler(self, name: str, *dependencies: DependencyType, dedup: bool = False, pipeline: Optional[IngestionPipeline] = None):
+        """Register a storage handler
+
+        With `dedup=True`, requests whose content hash matches a previously
+        stored document return the earlier response (with the new request's
+        metadata) instead of running the handler again.
+
+        With a `pipeline`, uploaded content is parsed, chunked, embedded and
+        upserted before the handler runs; the handler gets the
+        IngestionResult as the `ingested` keyword argument. If nothing could
+        be ingested the request fails with IngestionError instead.
+        """
+        if pipeline is not None and pipeline not in self.pipelines:
+            self.pipelines.append(pipeline)
 
-    def handler(self, name: str, *dependencies: DependencyType):
-        """Register a storage handler"""
         def decorator(func):
             @wraps(func)
             @self.with_dependencies(*dependencies)
             async def wrapper(*args, **kwargs):
+                if pipeline is not None and args and storage_content(args[0]) is not None:
+                    kwargs["ingested"] = await pipeline.ingest(args[0])
                 return await func(*args, **kwargs)
+            if dedup:
+                wrapper = self._with_dedup(name, wrapper)
             self.handlers[name] = wrapper
             self.register_task(name, wrapper)
             return wrapper
         return decorator
 
+    def _with_dedup(self, name: str, handler: Callable) -> Callable:
+        """Wrap a handler with the content-hash dedup layer"""
+        @wraps(handler)
+        async def wrapper(data, *args, **kwargs):
+            content = storage_content(data)
+            if content is None:
+                result = await handler(data, *args, **kwargs)
+                if isinstance(data, StorageRequest) and data.action == "delete":
+                    self._forget(data)
+                return result
+
+            digest = content_hash(content)
+            key = self.dedup_index.key(name, digest)
+            cached = self.dedup_index.get(key)
+            if cached is not None:
+                return relink_response(cached, data, digest)
+
+            result = await handler(data, *args, **kwargs)
+            if result is not None and not is_error_response(result):
+                self.dedup_index.put(key, result)
+            return result
+        return wrapper
+
+    def _forget(self, data: Any):
+        """Drop dedup entries for a deleted document so re-uploads run the handler"""
+        result_id = deleted_result_id(data)
+        if result_id:
+            self.dedup_index.discard_result(result_id)
+
     def get_handler(self, name: str) -> Optional[Callable]:
         """Get a registered handler"""
         return self.handlers.get(name)
@@ -57,7 +117,10 @@ class StorageTask(KitchenAITask, KitchenAITaskHookMixin):
             @functools.wraps(func)
             @self.with_dependencies(*dependencies)
             async def wrapper(*args, **kwargs):
-                return await func(*args, **kwargs)
+                result = await func(*args, **kwargs)
+                if args:
+                    self._forget(args[0])
+                return result
             self.delete_handlers[name] = wrapper
             # Register as a hook
             self.register_hook(name, "on_delete", wrapper)
@@ -69,6 +132,8 @@ class StorageTask(KitchenAITask, KitchenAITaskHookMixin):
         handler = self.delete_handlers.get(name)
         if handler:
             await handler(data)
+        else:
+            self._forget(data)
 
     def on_store(self, label: str, *dependencies: DependencyType):
         """Decorator for registering storage hooks with dependencies."""
@@ -0,0 +1,203 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+from collections import OrderedDict
+from pydantic import BaseModel
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# OpenAI chat format overhead: tokens per message and for priming the reply
+MESSAGE_OVERHEAD = 3
+NAME_OVERHEAD = 1
+REPLY_OVERHEAD = 3
+
+
+class Tokenizer(Protocol):
+    def count(self, text: str) -> int:
+        ...
+
+
+class HeuristicTokenizer:
+    """Dependency-free estimate: about four characters per token, never fewer tokens than words"""
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return max(len(text.split()), (len(text) + 3) // 4)
+
+
+class TiktokenTokenizer:
+    """Exact counts for OpenAI models; unknown model names use `cl100k_base`"""
+
+    def __init__(self, model: str = "gpt-4o", default_encoding: str = "cl100k_base"):
+        try:
+            import tiktoken
+        except ImportError:
+            raise ImportError("Please install tiktoken for exact token counts: pip install kitchenai-whisk[tokens]")
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding(default_encoding)
+        self.name = self.encoding.name
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=())) if text else 0
+
+
+def _default_tokenizer(model: str) -> Tokenizer:
+    try:
+        return TiktokenTokenizer(model)
+    except ImportError:
+        return HeuristicTokenizer()
+    except Exception as e:
+        # e.g. the encoding file can't be downloaded
+        logger.warning(f"Falling back to heuristic token counts for {model}: {e}")
+        return HeuristicTokenizer()
+
+
+def usage_dict(prompt_tokens: int, completion_tokens: int) -> Dict[str, int]:
+    """OpenAI-style `usage` payload"""
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+class TokenCounter:
+    """Token counting with per-model tokenizers and an LRU cache of counts.
+
+    Tokenizers are resolved once per model name: the longest registered
+    prefix wins, otherwise tiktoken when installed, otherwise
+    `HeuristicTokenizer`. Counts are cached by (tokenizer, text), so chat
+    history that is resent every turn is only tokenized once.
+    """
+
+    def __init__(self, cache_size: int = 8192):
+        self.cache_size = cache_size
+        self._factories: List[Tuple[str, Callable[[str], Tokenizer]]] = []
+        self._tokenizers: Dict[str, Tokenizer] = {}
+        self._cache: "OrderedDict[Tuple[int, str], int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, prefix: str, factory: Callable[[str], Tokenizer]):
+        """Use `factory(model)` for model names starting with `prefix` ("" matches all)"""
+        self._factories.append((prefix, factory))
+        self._factories.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self._tokenizers.clear()
+
+    def tokenizer(self, model: str = "default") -> Tokenizer:
+        tokenizer = self._tokenizers.get(model)
+        if tokenizer is None:
+            factory = next((factory for prefix, factory in self._factories if model.startswith(prefix)), _default_tokenizer)
+            tokenizer = self._tokenizers[model] = factory(model)
+        return tokenizer
+
+    def count(self, text: str, model: str = "default") -> int:
+        if not text:
+            return 0
+        tokenizer = self.tokenizer(model)
+        key = (id(tokenizer), text)
+        with self._lock:
+            count = self._cache.get(key)
+            if count is not None:
+                self._cache.move_to_end(key)
+                return count
+        count = tokenizer.count(text)
+        with self._lock:
+            self._cache[key] = count
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return count
+
+    def count_message(self, message: Any, model: str = "default") -> int:
+        """Tokens of one chat message (dict or object with role/content/name), including overhead"""
+        get = message.get if isinstance(message, dict) else lambda key: getattr(message, key, None)
+        tokens = MESSAGE_OVERHEAD + self.count(get("role") or "", model) + self.count(get("content") or "", model)
+        if get("name"):
+            tokens += NAME_OVERHEAD + self.count(get("name"), model)
+        return tokens
+
+    def count_messages(self, messages: Iterable[Any], model: str = "default") -> int:
+        """Prompt tokens of a chat request"""
+        return REPLY_OVERHEAD + sum(self.count_message(message, model) for message in messages)
+
+    def stream(self, model: str = "default", prompt_tokens: int = 0) -> "StreamingUsage":
+        return StreamingUsage(self, model, prompt_tokens)
+
+
+class StreamingUsage:
+    """Counts completion tokens as deltas arrive.
+
+    Deltas are buffered until `flush_chars` characters arrive, then counted
+    up to the last whitespace, so tokens are not split across delta
+    boundaries and nothing is re-tokenized.
+    """
+
+    def __init__(self, counter: TokenCounter, model: str, prompt_tokens: int = 0, flush_chars: int = 256):
+        self.counter = counter
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.flush_chars = flush_chars
+        self.completion_tokens = 0
+        self._pending = ""
+
+    def add(self, delta: Optional[str]):
+        if not delta:
+            return
+        self._pending += delta
+        if len(self._pending) < self.flush_chars:
+            return
+        cut = max(self._pending.rfind(" "), self._pending.rfind("\n"))
+        if cut > 0:
+            self.completion_tokens += self.counter.tokenizer(self.model).count(self._pending[:cut])
+            self._pending = self._pending[cut:]
+
+    def finish(self) -> Dict[str, int]:
+        if self._pending:
+            self.completion_tokens += self.counter.tokenizer(self.model).count(self._pending)
+            self._pending = ""
+        return usage_dict(self.prompt_tokens, self.completion_tokens)
+
+
+class UsageStats(BaseModel):
+    """Accumulated usage for one handler"""
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+class UsageTracker:
+    """Per-handler usage counters"""
+
+    def __init__(self):
+        self._stats: Dict[str, UsageStats] = {}
+
+    def record(self, handler: str, usage: Optional[Dict[str, int]]):
+        stats = self._stats.get(handler)
+        if stats is None:
+            stats = self._stats[handler] = UsageStats()
+        stats.requests += 1
+        if usage:
+            stats.prompt_tokens += usage.get("prompt_tokens", 0)
+            stats.completion_tokens += usage.get("completion_tokens", 0)
+            stats.total_tokens += usage.get("total_tokens", 0)
+
+    def get(self, handler: str) -> UsageStats:
+        return self._stats.get(handler, UsageStats())
+
+    def snapshot(self) -> Dict[str, UsageStats]:
+        return {handler: stats.model_copy() for handler, stats in self._stats.items()}
+
+    def reset(self):
+        self._stats.clear()
+
+
+_token_counter = TokenCounter()
+
+
+def get_token_counter() -> TokenCounter:
+    """The process-wide TokenCounter (register custom tokenizers on it)"""
+    return _token_counter
@@ -0,0 +1,449 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from pathlib import Path
+from pydantic import BaseModel, Field
+from .schema import SourceNode
+import json
+import os
+import threading
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("Please install numpy to use the vector store: pip install kitchenai-whisk[vector]")
+
+logger = logging.getLogger(__name__)
+
+
+class StoredNode(BaseModel):
+    """A stored vector's payload"""
+    id: str
+    text: Optional[str] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class VectorHit(BaseModel):
+    """A search result, shaped like llama-index's NodeWithScore (`hit.node.text`, `hit.score`)"""
+    node: StoredNode
+    score: float
+
+    def to_source_node(self) -> SourceNode:
+        return SourceNode(text=self.node.text or "", metadata=self.node.metadata, score=self.score)
+
+
+def _matches(metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Exact-match metadata filter; a list/tuple/set value means "any of" """
+    for key, expected in filters.items():
+        value = metadata.get(key)
+        if isinstance(expected, (list, tuple, set)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class _LazyNodes(Sequence):
+    """Nodes of a loaded segment, validated on first access so loading only reads ids"""
+
+    def __init__(self, raw: List[Dict[str, Any]]):
+        self._raw = raw
+        self._nodes: Dict[int, StoredNode] = {}
+
+    def ids(self) -> List[str]:
+        return [node["id"] for node in self._raw]
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[index] for index in range(*row.indices(len(self)))]
+        node = self._nodes.get(row)
+        if node is None:
+            node = self._nodes[row] = StoredNode(**self._raw[row])
+        return node
+
+
+class _Segment:
+    """An immutable block of vectors plus a mutable tombstone mask"""
+
+    def __init__(self, name: str, vectors: "np.ndarray", nodes: Sequence[StoredNode], alive: Optional["np.ndarray"] = None):
+        self.name = name
+        self.vectors = vectors
+        self.nodes = nodes
+        ids = nodes.ids() if isinstance(nodes, _LazyNodes) else [node.id for node in nodes]
+        self.row_of = {node_id: row for row, node_id in enumerate(ids)}
+        self.alive = np.ones(len(nodes), dtype=bool) if alive is None else alive
+        self._filter_masks: Dict[str, "np.ndarray"] = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def mask(self, filters: Optional[Dict[str, Any]]) -> "np.ndarray":
+        """Rows that are alive and match the filters (filter masks are cached)"""
+        if not filters:
+            return self.alive
+        key = json.dumps(filters, sort_keys=True, default=str)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (_matches(node.metadata, filters) for node in self.nodes),
+                dtype=bool,
+                count=len(self.nodes)
+            )
+            if len(self._filter_masks) >= 64:
+                self._filter_masks.clear()
+            self._filter_masks[key] = mask
+        return mask & self.alive
+
+
+class NumpyVectorStore:
+    """Vector store over contiguous float32 NumPy matrices.
+
+    New vectors are buffered in memory and sealed into append-only segments
+    of `segment_size` rows. With a `path`, sealed segments are written as
+    `.npy` files and memory-mapped read-only, so a restart only maps the
+    files instead of loading them. Deletes are tombstones; `compact()` (or
+    `start_compaction()` in a background thread) rewrites live rows into a
+    single segment. Buffered vectors reach disk only when a segment fills or
+    on `flush()`; `close()` flushes, and KitchenAIApp.close() calls it for
+    stores registered as dependencies, so a clean shutdown loses nothing.
+
+    Search is brute force: one matrix-vector product per segment followed by
+    `argpartition` for the top-k. With `metric="cosine"` vectors are
+    normalized on insert so scoring is a plain dot product.
+
+    Pass `embed_fn` to use `add_texts()` and `as_retriever()` with text
+    queries, as RAG handlers registered with `DependencyType.VECTOR_STORE` do.
+    With `read_only=True` the store only maps existing segments and rejects
+    writes, so several worker processes can share one copy on disk.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dim: Optional[int] = None,
+        metric: str = "cosine",
+        segment_size: int = 65536,
+        max_segments: int = 8,
+        auto_compact: bool = True,
+        embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+        read_only: bool = False
+    ):
+        if metric not in ("cosine", "dot"):
+            raise ValueError("metric must be 'cosine' or 'dot'")
+        self.path = Path(path) if path else None
+        self.dim = dim
+        self.metric = metric
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.auto_compact = auto_compact
+        self.embed_fn = embed_fn
+        self.read_only = read_only
+        self._lock = threading.RLock()
+        self._segments: List[_Segment] = []
+        self._next_segment = 0
+        self._buffer_vectors: List["np.ndarray"] = []
+        self._buffer_nodes: List[StoredNode] = []
+        # Live buffered ids -> row; rows deleted before sealing are dropped when sealed
+        self._buffer_rows: Dict[str, int] = {}
+        self._buffer_segment: Optional[_Segment] = None
+        self._compaction: Optional[threading.Thread] = None
+
+        if self.path:
+            if read_only and not self._manifest_path().exists():
+                raise FileNotFoundError(f"No vector store found at {self.path}")
+            if not read_only:
+                self.path.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @classmethod
+    def from_config(cls, config, **kwargs) -> "NumpyVectorStore":
+        """Create a store from a VectorStoreConfig"""
+        return cls(
+            path=config.path,
+            metric=config.metric,
+            segment_size=config.segment_size,
+            max_segments=config.max_segments,
+            **kwargs
+        )
+
+    # -- persistence -------------------------------------------------------
+
+    def _manifest_path(self) -> Path:
+        return self.path / "manifest.json"
+
+    def _load(self):
+        manifest_path = self._manifest_path()
+        if not manifest_path.exists():
+            return
+        manifest = json.loads(manifest_path.read_text())
+        self.dim = manifest["dim"]
+        self.metric = manifest["metric"]
+        self._next_segment = manifest["next_segment"]
+        for entry in manifest["segments"]:
+            name = entry["name"]
+            vectors = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            nodes = _LazyNodes(json.loads((self.path / f"{name}.json").read_text()))
+            segment = _Segment(name, vectors, nodes)
+            for node_id in entry.get("deleted", []):
+                segment.alive[segment.row_of[node_id]] = False
+            self._segments.append(segment)
+
+    def _write_manifest(self):
+        if not self.path:
+            return
+        manifest = {
+            "dim": self.dim,
+            "metric": self.metric,
+            "next_segment": self._next_segment,
+            "segments": [
+                {
+                    "name": segment.name,
+                    "deleted": [segment.nodes[row].id for row in np.flatnonzero(~segment.alive)]
+                }
+                for segment in self._segments
+            ]
+        }
+        tmp_path = self._manifest_path().with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest))
+        os.replace(tmp_path, self._manifest_path())
+
+    def _seal(self, vectors: "np.ndarray", nodes: List[StoredNode]) -> _Segment:
+        """Create a segment, writing it to disk and memory-mapping it if persistent"""
+        name = f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        if not self.path:
+            return _Segment(name, vectors, nodes)
+        np.save(self.path / f"{name}.npy", vectors)
+        (self.path / f"{name}.json").write_text(json.dumps([node.model_dump() for node in nodes]))
+        return _Segment(name, np.load(self.path / f"{name}.npy", mmap_mode="r"), nodes)
+
+    def save(self, path: str):
+        """Write the live vectors to `path` as a single compacted segment.
+
+        `path` must not already hold a store. The copy is independent of this
+        store; open it with `NumpyVectorStore(path, read_only=True)`.
+        """
+        segments = self._search_segments()
+        rows = [np.flatnonzero(segment.alive) for segment in segments]
+        target = NumpyVectorStore(path=path, dim=self.dim, metric=self.metric, segment_size=self.segment_size, auto_compact=False)
+        if target._segments:
+            raise ValueError(f"A vector store already exists at {path}")
+        nodes = [segment.nodes[row] for segment, live in zip(segments, rows) for row in live]
+        if nodes:
+            # Already normalized, so the rows are copied as they are
+            vectors = np.concatenate([np.asarray(segment.vectors[live]) for segment, live in zip(segments, rows)])
+            target._segments.append(target._seal(vectors, nodes))
+        target._write_manifest()
+
+    def _remove_files(self, segment: _Segment):
+        if self.path:
+            for suffix in (".npy", ".json"):
+                (self.path / f"{segment.name}{suffix}").unlink(missing_ok=True)
+
+    # -- writes ------------------------------------------------------------
+
+    def _check_writable(self):
+        if self.read_only:
+            raise ValueError("Vector store is read-only")
+
+    def _prepare(self, vectors: Any) -> "np.ndarray":
+        matrix = np.ascontiguousarray(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+        if matrix.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {matrix.shape[1]}")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        texts: Optional[Sequence[Optional[str]]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """Add or replace vectors by id"""
+        self._check_writable()
+        matrix = self._prepare(vectors)
+        if len(ids) != len(matrix):
+            raise ValueError("ids and vectors must have the same length")
+        texts = texts or [None] * len(ids)
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            self.delete(ids)
+            offset = len(self._buffer_nodes)
+            self._buffer_vectors.append(matrix)
+            for row, (node_id, text, metadata) in enumerate(zip(ids, texts, metadatas), start=offset):
+                self._buffer_nodes.append(StoredNode(id=str(node_id), text=text, metadata=metadata or {}))
+                self._buffer_rows[str(node_id)] = row
+            self._buffer_segment = None
+            if len(self._buffer_rows) >= self.segment_size:
+                self.flush()
+        return [str(node_id) for node_id in ids]
+
+    def add_texts(self, texts: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None, ids: Optional[Sequence[str]] = None) -> List[str]:
+        """Embed texts with `embed_fn` and add them"""
+        if self.embed_fn is None:
+            raise ValueError("add_texts requires an embed_fn")
+        from .dedup import chunk_hash
+        ids = ids or [chunk_hash(text) for text in texts]
+        return self.add(ids, [self.embed_fn(text) for text in texts], texts=texts, metadatas=metadatas)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """Tombstone vectors by id, returns how many were removed"""
+        self._check_writable()
+        removed = 0
+        with self._lock:
+            for node_id in map(str, ids):
+                for segment in self._segments:
+                    row = segment.row_of.get(node_id)
+                    if row is not None and segment.alive[row]:
+                        segment.alive[row] = False
+                        removed += 1
+                row = self._buffer_rows.pop(node_id, None)
+                if row is not None:
+                    if self._buffer_segment is not None:
+                        self._buffer_segment.alive[row] = False
+                    removed += 1
+            if removed and self._segments:
+                self._write_manifest()
+        return removed
+
+    def flush(self):
+        """Seal buffered vectors into a segment"""
+        self._check_writable()
+        with self._lock:
+            if not self._buffer_nodes:
+                return
+            vectors = np.vstack(self._buffer_vectors)
+            nodes = self._buffer_nodes
+            if len(self._buffer_rows) < len(nodes):
+                rows = sorted(self._buffer_rows.values())
+                vectors = vectors[rows]
+                nodes = [nodes[row] for row in rows]
+            if nodes:
+                self._segments.append(self._seal(vectors, nodes))
+            self._buffer_vectors = []
+            self._buffer_nodes = []
+            self._buffer_rows = {}
+            self._buffer_segment = None
+            self._write_manifest()
+        if self.auto_compact and len(self._segments) > self.max_segments:
+            self.start_compaction()
+
+    def close(self):
+        """Flush buffered vectors and wait for a running compaction"""
+        if self.path and not self.read_only:
+            self.flush()
+        compaction = self._compaction
+        if compaction and compaction.is_alive():
+            compaction.join()
+
+    def compact(self):
+        """Merge sealed segments into one, dropping tombstoned rows"""
+        self._check_writable()
+        with self._lock:
+            sources = list(self._segments)
+        if len(sources) <= 1 and all(segment.alive.all() for segment in sources):
+            return
+        # Snapshot which rows are live; deletes that land during the merge are reapplied below
+        rows = [np.flatnonzero(segment.alive) for segment in sources]
+        vectors = np.concatenate([np.asarray(segment.vectors[live]) for segment, live in zip(sources, rows)]) if sources else np.empty((0, self.dim or 0), dtype=np.float32)
+        nodes = [segment.nodes[row] for segment, live in zip(sources, rows) for row in live]
+
+        with self._lock:
+            merged = self._seal(vectors, nodes)
+            merged.alive = np.concatenate([segment.alive[live] for segment, live in zip(sources, rows)]) if sources else merged.alive
+            # Segments sealed while compacting are kept after the merged one
+            self._segments = [merged] + [segment for segment in self._segments if segment not in sources]
+            self._write_manifest()
+        for segment in sources:
+            self._remove_files(segment)
+        logger.info(f"Compacted {len(sources)} segments into {merged.name} ({len(nodes)} vectors)")
+
+    def start_compaction(self) -> threading.Thread:
+        """Run `compact()` in a background thread (at most one at a time)"""
+        with self._lock:
+            if self._compaction and self._compaction.is_alive():
+                return self._compaction
+            self._compaction = threading.Thread(target=self.compact, name="whisk-vector-compaction", daemon=True)
+            self._compaction.start()
+            return self._compaction
+
+    # -- reads -------------------------------------------------------------
+
+    def _search_segments(self) -> List[_Segment]:
+        with self._lock:
+            segments = list(self._segments)
+            if self._buffer_nodes:
+                if self._buffer_segment is None:
+                    alive = np.zeros(len(self._buffer_nodes), dtype=bool)
+                    alive[list(self._buffer_rows.values())] = True
+                    self._buffer_segment = _Segment("buffer", np.vstack(self._buffer_vectors), list(self._buffer_nodes), alive)
+                segments.append(self._buffer_segment)
+        return segments
+
+    def __len__(self) -> int:
+        return sum(int(segment.alive.sum()) for segment in self._search_segments())
+
+    def get(self, node_id: str) -> Optional[StoredNode]:
+        """Get a stored node by id"""
+        for segment in self._search_segments():
+            row = segment.row_of.get(node_id)
+            if row is not None and segment.alive[row]:
+                return segment.nodes[row]
+        return None
+
+    def query(self, vector: Any, top_k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[VectorHit]:
+        """Top-k search for a single query vector"""
+        return self.query_batch([vector], top_k=top_k, filters=filters)[0]
+
+    def query_batch(self, vectors: Any, top_k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[List[VectorHit]]:
+        """Top-k search for several query vectors with one matrix product per segment"""
+        queries = self._prepare(vectors)
+        candidates: List[List[tuple]] = [[] for _ in range(len(queries))]
+        for segment in self._search_segments():
+            mask = segment.mask(filters)
+            live = int(mask.sum())
+            if not live:
+                continue
+            scores = segment.vectors @ queries.T  # (rows, queries)
+            if live < len(segment):
+                scores[~mask] = -np.inf
+            k = min(top_k, live)
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+            for column in range(len(queries)):
+                for row in top[:, column]:
+                    candidates[column].append((float(scores[row, column]), segment, int(row)))
+
+        results = []
+        for column_candidates in candidates:
+            column_candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            results.append([
+                VectorHit(node=segment.nodes[row], score=score)
+                for score, segment, row in column_candidates[:top_k]
+            ])
+        return results
+
+    def as_retriever(self, similarity_top_k: int = 2, filters: Optional[Dict[str, Any]] = None) -> "VectorStoreRetriever":
+        """Text retriever over this store (requires `embed_fn`)"""
+        return VectorStoreRetriever(self, similarity_top_k=similarity_top_k, filters=filters)
+
+
+class VectorStoreRetriever:
+    """Minimal retriever with the llama-index `retrieve(query)` shape"""
+
+    def __init__(self, store: NumpyVectorStore, similarity_top_k: int = 2, filters: Optional[Dict[str, Any]] = None):
+        if store.embed_fn is None:
+            raise ValueError("as_retriever requires the vector store to have an embed_fn")
+        self.store = store
+        self.similarity_top_k = similarity_top_k
+        self.filters = filters
+
+    def retrieve(self, query: str) -> List[VectorHit]:
+        return self.store.query(self.store.embed_fn(query), top_k=self.similarity_top_k, filters=self.filters)
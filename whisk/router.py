@@ -4,10 +4,12 @@ import uvicorn
 
 from fastapi import FastAPI, HTTPException, Request, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, Callable
+from typing import Optional, Callable, Awaitable
+from contextlib import asynccontextmanager
 from .config import WhiskConfig
+from .admission import AdmissionMiddleware
 from .kitchenai_sdk.kitchenai import KitchenAIApp
-from .dependencies import set_kitchen_app
+from .dependencies import set_kitchen_app, set_whisk_config
 
 import logging
 logger = logging.getLogger(__name__)
@@ -39,6 +41,14 @@ class WhiskRouter:
         self.kitchen_app = kitchen_app
         self.config = config
         self.app = fastapi_app or FastAPI()
+
+        # Admission control sits inside CORS so rejections still carry CORS headers
+        if config.admission.enabled:
+            self.app.add_middleware(
+                AdmissionMiddleware,
+                config=config.admission,
+                known_handlers=lambda: kitchen_app.chat.list_tasks()
+            )
         
         # Add CORS middleware
         self.app.add_middleware(
@@ -51,6 +61,11 @@ class WhiskRouter:
         
         # Set up the kitchen app in the dependency system
         set_kitchen_app(kitchen_app)
+        set_whisk_config(config)
+
+        # Build lazily registered dependencies while the server starts and
+        # release handler resources (ingestion process pools) when it stops
+        self._wrap_lifespan(kitchen_app.manager.warmup, kitchen_app.close)
         
         # Run before setup hook
         if before_setup:
@@ -60,11 +75,35 @@ class WhiskRouter:
         from .api import get_routers
         for router in get_routers():
             self.app.include_router(router)
+        if config.profiling.enabled:
+            from .api.profiling import router as profiling_router
+            kitchen_app.profiler.configure(config.profiling.interval_ms / 1000, config.profiling.max_captures)
+            self.app.include_router(profiling_router)
         
         # Run after setup hook
         if after_setup:
             after_setup(self.app)
 
+    def _wrap_lifespan(
+        self,
+        on_startup: Callable[[], Awaitable[None]],
+        on_shutdown: Optional[Callable[[], None]] = None
+    ):
+        """Run `on_startup` before and `on_shutdown` after the app's own lifespan (works with custom lifespans too)"""
+        original = self.app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app):
+            await on_startup()
+            try:
+                async with original(app) as state:
+                    yield state
+            finally:
+                if on_shutdown is not None:
+                    await asyncio.to_thread(on_shutdown)
+
+        self.app.router.lifespan_context = lifespan
+
     def run(self, host: Optional[str] = None, port: Optional[int] = None):
         """Run the FastAPI server (blocking version)"""
         host = host or self.config.server.fastapi.host